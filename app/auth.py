@@ -1,16 +1,17 @@
 """
 Authentication module for FastAPI
 
-Provides two types of authentication:
+Provides three types of authentication:
 1. API Key authentication (X-API-Key header) for programmatic access
 2. Session-based authentication (cookies) for web dashboard access
+3. Shared-secret authentication (Authorization header) for vendor webhooks
 """
 
 import os
 import secrets
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import HTTPException, Security, Cookie, status
+from fastapi import HTTPException, Security, Cookie, Header, status
 from fastapi.security import APIKeyHeader
 
 # API Key header scheme
@@ -67,6 +68,39 @@ async def verify_api_key(api_key: str = Security(api_key_header)):
     return api_key
 
 
+async def verify_brightdata_webhook(authorization: Optional[str] = Header(None)) -> str:
+    """
+    Verify a Bright Data webhook callback.
+
+    Bright Data sends the auth_header we passed when creating the snapshot
+    back as the Authorization header; it must match BRIGHTDATA_WEBHOOK_SECRET.
+
+    Args:
+        authorization: Authorization header ("<secret>" or "Bearer <secret>")
+
+    Raises:
+        HTTPException: If webhooks aren't configured or the secret doesn't match
+
+    Returns:
+        The validated secret
+    """
+    expected_secret = os.getenv("BRIGHTDATA_WEBHOOK_SECRET")
+    if not expected_secret:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bright Data webhooks are not enabled"
+        )
+
+    provided = (authorization or "").removeprefix("Bearer ").strip()
+    if not provided or not secrets.compare_digest(provided, expected_secret):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid webhook secret"
+        )
+
+    return provided
+
+
 def verify_dashboard_password(password: str) -> bool:
     """Verify password against environment variable."""
     correct_password = get_dashboard_password()
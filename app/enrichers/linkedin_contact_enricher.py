@@ -23,6 +23,14 @@ from dotenv import load_dotenv
 import aiohttp
 from apify_client import ApifyClient
 
+# Shared per-vendor rate limits and cost tracking (Serper, Apify)
+try:
+    from app.services.rate_governor import rate_governor
+    from app.services.cost_tracking import cost_tracker
+except ImportError:
+    from ..services.rate_governor import rate_governor
+    from ..services.cost_tracking import cost_tracker
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -437,13 +445,16 @@ class LinkedInContactEnricher:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with rate_governor.slot("serper") as slot, aiohttp.ClientSession() as session:
                 async with session.post(
                     "https://google.serper.dev/search",
                     json=payload,
                     headers=headers,
                     timeout=aiohttp.ClientTimeout(total=30)
                 ) as response:
+                    slot.report(response.status, response.headers)
+                    if response.status == 200:
+                        cost_tracker.record_serper_query(query)
 
                     if response.status == 200:
                         data = await response.json()
@@ -593,7 +604,12 @@ class LinkedInContactEnricher:
 
             # Run the LinkedIn scraper
             logger.info("⏳ Starting Apify LinkedIn scraper...")
-            run = self.apify_client.actor("dev_fusion/linkedin-profile-scraper").call(run_input=run_input)
+            async with rate_governor.slot("apify"):
+                run = await asyncio.to_thread(
+                    self.apify_client.actor("dev_fusion/linkedin-profile-scraper").call,
+                    run_input=run_input
+                )
+            cost_tracker.record_apify_run(run, "dev_fusion/linkedin-profile-scraper", items=1)
 
             logger.info(f"💾 Dataset URL: https://console.apify.com/storage/datasets/{run['defaultDatasetId']}")
 
@@ -1,7 +1,7 @@
 """
 Database models for API logging and pending Salesforce updates.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, Enum, UniqueConstraint
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -67,3 +67,97 @@ class PendingUpdate(Base):
 
     def __repr__(self):
         return f"<PendingUpdate(id={self.id}, record_type={self.record_type}, record_id={self.record_id}, status={self.status})>"
+
+
+class CachedResponse(Base):
+    """
+    Model for the persistent tier of the response cache (LLM outputs, search results).
+    Rows are content-addressed: cache_key is a sha256 of everything that determines the output.
+    """
+    __tablename__ = "response_cache"
+    __table_args__ = (
+        UniqueConstraint("namespace", "cache_key", name="uq_response_cache_namespace_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    namespace = Column(String(50), nullable=False, index=True)  # e.g. "llm"
+    cache_key = Column(String(64), nullable=False)  # sha256 hex digest
+    call_site = Column(String(100), nullable=True, index=True)  # e.g. "ai_ranking", "title_filter"
+    value = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CachedResponse(namespace={self.namespace}, call_site={self.call_site}, key={self.cache_key[:12]})>"
+
+
+class CostEvent(Base):
+    """
+    Model for per-request API spend (OpenAI tokens, Apify runs, Serper queries, Bright Data records).
+    One row per billable call; "pipeline"/"qualified_leads" rows record lead counts for cost per lead.
+    """
+    __tablename__ = "cost_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    endpoint = Column(String(200), nullable=True, index=True)  # e.g. "/discover-prospects-step1"
+    company_name = Column(String(255), nullable=True, index=True)  # Hospital being processed
+    stage = Column(String(100), nullable=True)  # e.g. "title_filter", "ai_ranking"
+    vendor = Column(String(50), nullable=False, index=True)  # openai, apify, serper, brightdata, pipeline
+    operation = Column(String(100), nullable=True)  # Model name, actor id, "search", "snapshot_download"
+    quantity = Column(Float, nullable=True)  # Billable units (queries, records, compute units, leads)
+    unit = Column(String(50), nullable=True)
+    input_tokens = Column(Integer, nullable=True)
+    output_tokens = Column(Integer, nullable=True)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+    details = Column(JSON, nullable=True)
+
+    def __repr__(self):
+        return f"<CostEvent(vendor={self.vendor}, operation={self.operation}, cost_usd={self.cost_usd})>"
+
+
+class LinkedInProfileRecord(Base):
+    """
+    Model for the LinkedIn profile store: parsed Apify profiles keyed by canonical URL
+    (https://www.linkedin.com/in/<slug>), reused across hospitals and pipelines until stale.
+    """
+    __tablename__ = "linkedin_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    canonical_url = Column(String(255), nullable=False, unique=True, index=True)
+    profile = Column(JSON, nullable=False)  # LinkedInProfile fields, including raw Apify data
+    actor_id = Column(String(100), nullable=True)  # Apify actor that produced the data
+    scraped_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<LinkedInProfileRecord(url={self.canonical_url}, scraped_at={self.scraped_at})>"
+
+
+class DiscoveryJob(Base):
+    """
+    Model for server-side discovery jobs (POST /jobs/discovery): status, per-step progress
+    and each finished step's output, so a job's results survive restarts and other workers.
+    """
+    __tablename__ = "discovery_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(36), nullable=False, unique=True, index=True)  # uuid4
+    pipeline = Column(String(50), nullable=False)  # "hybrid" or "three_step"
+    batch_id = Column(String(36), nullable=True, index=True)  # Set for jobs submitted via /jobs/discovery/batch
+    input_hash = Column(String(64), nullable=True, index=True)  # sha256 of pipeline + canonical params (checkpoint key)
+    resumed_from = Column(String(36), nullable=True)  # Failed job whose checkpointed steps this job reused
+    status = Column(String(20), nullable=False, index=True)  # queued, running, succeeded, failed
+    company_name = Column(String(255), nullable=True, index=True)
+    params = Column(JSON, nullable=True)  # Request body the job was submitted with
+    current_step = Column(String(50), nullable=True)
+    steps = Column(JSON, nullable=True)  # [{name, status, seconds, cost_usd, summary, error}, ...]
+    step_outputs = Column(JSON, nullable=True)  # {"step1": {...}, "step2": {...}} - full step results
+    error = Column(Text, nullable=True)
+    cost_usd = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<DiscoveryJob(job_id={self.job_id}, pipeline={self.pipeline}, status={self.status})>"
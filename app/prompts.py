@@ -161,12 +161,8 @@ CRITICAL: We sell building infrastructure (HVAC, lighting, energy systems) to ho
 
 Your job is to AGGRESSIVELY REJECT any title related to clinical work, patient care, medical services, or healthcare delivery."""
 
-AI_TITLE_FILTER_USER_PROMPT_TEMPLATE = """Score this job title for relevance to selling energy infrastructure projects (HVAC, lighting, building systems) to {company_name}.
-
-Job Title: {title}
-Snippet: {snippet}
-
-ACCEPT ONLY (score 70-100):
+# Scoring rubric shared by the single-title and batched title filter prompts
+AI_TITLE_FILTER_CRITERIA = """ACCEPT ONLY (score 70-100):
 - Facilities/Engineering/Plant Operations Directors, VPs, Managers
 - CFO, COO, VP Finance, VP Operations, Controller
 - Energy Manager, Sustainability Director
@@ -208,7 +204,14 @@ SCORING:
 - 85-100: Good match (Energy Manager, Facilities Manager, VP Operations)
 - 75-85: Possible (Assistant/Associate Facilities roles)
 - 40-54: Weak (Tangential to facilities/operations)
-- 0-39: REJECT (Clinical, patient care, or unrelated)
+- 0-39: REJECT (Clinical, patient care, or unrelated)"""
+
+AI_TITLE_FILTER_USER_PROMPT_TEMPLATE = """Score this job title for relevance to selling energy infrastructure projects (HVAC, lighting, building systems) to {company_name}.
+
+Job Title: {title}
+Snippet: {snippet}
+
+""" + AI_TITLE_FILTER_CRITERIA + """
 
 Return JSON only:
 {{
@@ -216,6 +219,28 @@ Return JSON only:
   "reasoning": "One sentence explanation"
 }}"""
 
+# Batched variant: N titles per request, scores mapped back by index
+# Used with a JSON-schema response format (see app/services/title_filter.py)
+AI_TITLE_FILTER_BATCH_USER_PROMPT_TEMPLATE = """Score EACH job title below for relevance to selling energy infrastructure projects (HVAC, lighting, building systems) to {company_name}.
+
+Score every prospect independently - one prospect must not influence another's score.
+
+Prospects:
+{prospects}
+
+""" + AI_TITLE_FILTER_CRITERIA + """
+
+Return JSON only, with exactly one result per prospect index:
+{{
+  "results": [
+    {{"index": <prospect index>, "score": <0-100>, "reasoning": "One sentence explanation"}}
+  ]
+}}"""
+
+AI_TITLE_FILTER_BATCH_ITEM_TEMPLATE = """[{index}] Job Title: {title}
+    Snippet: {snippet}"""
+
+
 # Legacy prompt - kept for backwards compatibility
 TITLE_RELEVANCE_CHECK_PROMPT = """Is this job title relevant for selling energy infrastructure solutions to a healthcare facility?
 
@@ -286,6 +311,7 @@ PROMPT_VERSIONS = {
     "ai_ranking": "v3.1",  # Added strict rejection rules for clinical/patient care roles
     "ai_qualification_original": "v1.0",  # Deprecated
     "title_filtering": "v2.0",  # AGGRESSIVE clinical role rejection before LinkedIn scraping
+    "title_filtering_batch": "v1.0",  # Same rubric as title_filtering, N titles per request
     "persona_classification": "v1.0"
 }
 
@@ -295,5 +321,6 @@ PROMPT_DESCRIPTIONS = {
     "ai_ranking": "Scores prospects 0-100 based on buyer fit (v3.1: explicit rejection of clinical/care coordination roles)",
     "ai_qualification_original": "Original qualification logic (deprecated)",
     "title_filtering": "v2.0: AGGRESSIVE early rejection of clinical/patient care roles before LinkedIn scraping",
+    "title_filtering_batch": "Batched title filtering with JSON-schema output, scores mapped back by index",
     "persona_classification": "Classifies prospect into buyer persona categories"
 }
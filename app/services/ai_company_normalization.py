@@ -7,7 +7,8 @@ import os
 import logging
 import json
 from typing import List, Dict, Any
-from openai import OpenAI
+
+from app.services.llm_gateway import llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +22,7 @@ class AICompanyNormalizationService:
         self.reasoning_effort = os.getenv('OPENAI_REASONING_EFFORT', 'minimal')
 
         if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = llm_gateway.client
             logger.info(f"AI company normalization service initialized with model: {self.model}")
         else:
             self.client = None
@@ -110,15 +111,8 @@ Return ONLY a JSON object with this format:
                 api_params["reasoning"] = {"effort": self.reasoning_effort}
 
             logger.info(f"Generating company name variations for: {company_name}")
-            response = self.client.responses.create(**api_params)
-
-            # Parse response from Responses API
-            if not response or not hasattr(response, 'output') or not response.output:
-                raise ValueError("Invalid API response")
-
-            # Get the actual output (last item if reasoning is enabled)
-            output_item = response.output[-1]
-            output_text = output_item.content[0].text
+            # Served from the LLM cache when this hospital was normalized before
+            output_text = await llm_gateway.create_response_text("company_normalization", **api_params)
 
             result = json.loads(output_text)
             variations = result.get("variations", [])
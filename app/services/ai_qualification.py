@@ -6,9 +6,11 @@ import os
 import logging
 from typing import List, Dict, Any, Optional
 import openai
-from openai import OpenAI
 import json
 
+from app.services.llm_gateway import llm_gateway
+from app.services.cost_tracking import openai_cost
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,7 +22,7 @@ class OpenAIQualificationService:
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')  # Default to gpt-4o-mini
         
         if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = llm_gateway.client
             logger.info(f"OpenAI client initialized with model: {self.model}")
         else:
             self.client = None
@@ -65,8 +67,9 @@ class OpenAIQualificationService:
             # Create the qualification prompt
             prompt = self._build_qualification_prompt(prospects_for_analysis, company_name)
             
-            # Call OpenAI API (synchronous within async function)
-            response = self.client.chat.completions.create(
+            # Call OpenAI API
+            response = await llm_gateway.create_chat_completion(
+                call_site="ai_qualification",
                 model=self.model,
                 messages=[
                     {
@@ -95,7 +98,7 @@ class OpenAIQualificationService:
                 "total_analyzed": len(prospects_for_analysis),
                 "qualified_prospects": qualified_prospects,
                 "ai_analysis": ai_response,
-                "cost_estimate": 0.001  # Updated for gpt-4o-mini pricing
+                "cost_estimate": openai_cost(self.model, response.usage)
             }
             
         except Exception as e:
@@ -232,8 +235,9 @@ Return JSON format:
 }}
 """
             
-            # Call OpenAI API (synchronous within async function)
-            response = self.client.chat.completions.create(
+            # Call OpenAI API
+            response = await llm_gateway.create_chat_completion(
+                call_site="personalized_message",
                 model=self.model,
                 messages=[
                     {
@@ -255,7 +259,7 @@ Return JSON format:
             return {
                 "success": True,
                 "personalized_message": message_data,
-                "cost_estimate": 0.0005  # Updated for gpt-4o-mini pricing
+                "cost_estimate": openai_cost(self.model, response.usage)
             }
             
         except Exception as e:
@@ -0,0 +1,405 @@
+"""
+Bright Data Client
+Async client for the Bright Data Datasets API (filter snapshots) on a pooled aiohttp session
+
+Snapshot polling backs off exponentially with jitter - starting at
+BRIGHTDATA_POLL_INITIAL_SECONDS and doubling up to BRIGHTDATA_POLL_MAX_SECONDS -
+and never sleeps past the caller's time budget. The download is tried as soon as
+a snapshot reports ready and retried on the same backoff while the download
+endpoint is still building.
+
+Downloads are streamed as JSON lines: each record is parsed as soon as its bytes
+arrive and handed to the caller's handle_record callback, so transforming and
+filtering overlap the transfer and the raw snapshot is never held in memory.
+
+wait_for_snapshots polls any number of snapshots from one coroutine: each pass
+issues only the requests that are due, then sleeps until the next one is.
+
+Completion webhooks (opt-in): with BRIGHTDATA_WEBHOOK_URL and BRIGHTDATA_WEBHOOK_SECRET
+set, new snapshots ask Bright Data to POST to /webhooks/brightdata/snapshot when
+they finish. The endpoint hands the callback to snapshot_notifier, which wakes the
+coroutine waiting on that snapshot_id; status polls drop to one every
+BRIGHTDATA_WEBHOOK_FALLBACK_POLL_SECONDS as a fallback for lost callbacks.
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+
+from .rate_governor import rate_governor
+from .cost_tracking import cost_tracker
+
+logger = logging.getLogger(__name__)
+
+# Called with (snapshot_id, record) for every downloaded record
+RecordHandler = Callable[[str, Dict[str, Any]], None]
+
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+
+@dataclass
+class BrightDataResponse:
+    """Status and body of a Bright Data API response"""
+    status_code: int
+    text: str
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+@dataclass
+class _SnapshotPoll:
+    """Polling state for one snapshot"""
+    snapshot_id: str
+    phase: str = "status"  # status → download
+    attempt: int = 0
+    requests: int = 0
+    next_at: float = 0.0
+    delivered: int = 0  # records handed over so far (skipped if a download is retried)
+
+
+class SnapshotNotifier:
+    """
+    In-process registry of snapshot completion callbacks keyed by snapshot_id
+
+    Callbacks that arrive before anyone waits on the snapshot are kept (up to
+    max_unclaimed) so a fast snapshot isn't missed.
+    """
+
+    def __init__(self, max_unclaimed: int = 500):
+        self.max_unclaimed = max_unclaimed
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._received: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stats = {"callbacks": 0, "woke_waiter": 0, "unclaimed": 0}
+
+    def register(self, snapshot_id: str, wake: asyncio.Event):
+        """Set wake when a callback for snapshot_id arrives (or already has)"""
+        self._waiters[snapshot_id] = wake
+        if snapshot_id in self._received:
+            wake.set()
+
+    def unregister(self, snapshot_id: str):
+        self._waiters.pop(snapshot_id, None)
+        self._received.pop(snapshot_id, None)
+
+    def notify(self, snapshot_id: str, payload: Dict[str, Any]) -> bool:
+        """Record a completion callback; returns True if a job was waiting on it"""
+        self._stats["callbacks"] += 1
+        self._received[snapshot_id] = payload
+        self._received.move_to_end(snapshot_id)
+        while len(self._received) > self.max_unclaimed:
+            self._received.popitem(last=False)
+
+        wake = self._waiters.get(snapshot_id)
+        if wake is None:
+            self._stats["unclaimed"] += 1
+            return False
+        self._stats["woke_waiter"] += 1
+        wake.set()
+        return True
+
+    def take(self, snapshot_id: str) -> Optional[Dict[str, Any]]:
+        """Pop the pending callback for a snapshot, if any"""
+        return self._received.pop(snapshot_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "waiting": len(self._waiters)}
+
+
+class BrightDataClient:
+    """Bright Data Datasets API calls under the shared Bright Data rate limits"""
+
+    def __init__(self, api_token: Optional[str] = None):
+        self.api_token = api_token or os.getenv('BRIGHTDATA_API_TOKEN')
+        self.base_url = os.getenv('BRIGHTDATA_BASE_URL', "https://api.brightdata.com/datasets")
+        self.max_connections = int(os.getenv('BRIGHTDATA_MAX_CONNECTIONS', '10'))
+        self.poll_initial = float(os.getenv('BRIGHTDATA_POLL_INITIAL_SECONDS', '2'))
+        self.poll_max = float(os.getenv('BRIGHTDATA_POLL_MAX_SECONDS', '15'))
+        self.poll_factor = 2.0
+
+        # Opt-in completion webhooks (polling stays on as a slow fallback)
+        self.webhook_url = os.getenv('BRIGHTDATA_WEBHOOK_URL')
+        self.webhook_secret = os.getenv('BRIGHTDATA_WEBHOOK_SECRET')
+        self.webhook_fallback_poll = float(os.getenv('BRIGHTDATA_WEBHOOK_FALLBACK_POLL_SECONDS', '60'))
+        self.notifier = snapshot_notifier
+
+        # Long-lived pooled session (keep-alive connections reused across polls)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+
+    @property
+    def webhook_enabled(self) -> bool:
+        return bool(self.webhook_url and self.webhook_secret)
+
+    async def close(self):
+        """Close the pooled HTTP session (called on app shutdown)"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use in the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+            self._session_loop = loop
+        return self._session
+
+    def _get_headers(self) -> Dict[str, str]:
+        """Get request headers with authorization"""
+        return {
+            "Authorization": f"Bearer {self.api_token}",
+            "Content-Type": "application/json"
+        }
+
+    async def request(self, method: str, path: str, json: Any = None, timeout: float = 30,
+                      params: Optional[Dict[str, str]] = None) -> BrightDataResponse:
+        """Send one API request (path relative to base_url)"""
+        session = await self._get_session()
+        async with rate_governor.slot("brightdata") as slot:
+            async with session.request(
+                method,
+                f"{self.base_url}{path}",
+                json=json,
+                params=params,
+                headers=self._get_headers(),
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                slot.report(response.status, response.headers)
+                return BrightDataResponse(response.status, await response.text())
+
+    async def create_snapshot(self, payload: Dict[str, Any]) -> BrightDataResponse:
+        """Submit a dataset filter; the response carries the snapshot_id"""
+        params = None
+        if self.webhook_enabled:
+            # Bright Data POSTs {"snapshot_id", "status"} to notify, sending auth_header as Authorization
+            params = {"notify": self.webhook_url, "auth_header": self.webhook_secret}
+        return await self.request("POST", "/filter", json=payload, params=params)
+
+    def next_delay(self, attempt: int, remaining: float, fallback: bool = False) -> float:
+        """
+        Exponential backoff with jitter, capped at poll_max and the remaining budget
+
+        fallback=True (webhook mode, waiting for the callback) polls every
+        webhook_fallback_poll seconds instead.
+        """
+        ceiling = self.webhook_fallback_poll if fallback else \
+            min(self.poll_max, self.poll_initial * self.poll_factor ** attempt)
+        delay = random.uniform(ceiling / 2, ceiling)
+        return max(0.0, min(delay, remaining))
+
+    async def wait_for_snapshot(self, snapshot_id: str, max_wait_time: float = 300,
+                                max_records: Optional[int] = None,
+                                handle_record: Optional[RecordHandler] = None) -> Dict[str, Any]:
+        """Wait for one snapshot and download it (see wait_for_snapshots)"""
+        results = await self.wait_for_snapshots([snapshot_id], max_wait_time, max_records, handle_record)
+        return results[snapshot_id]
+
+    async def wait_for_snapshots(self, snapshot_ids: List[str], max_wait_time: float = 300,
+                                 max_records: Optional[int] = None,
+                                 handle_record: Optional[RecordHandler] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Poll snapshots until each is downloaded, fails, or the budget runs out
+
+        Args:
+            snapshot_ids: Snapshots to wait for
+            max_wait_time: Total budget in seconds shared by all snapshots
+            max_records: Reject ready snapshots larger than this without downloading them
+            handle_record: Called with (snapshot_id, record) as each record streams in;
+                without it, records are collected into "profiles"
+
+        Returns:
+            {snapshot_id: {"success": True, "profiles": [...], "record_count": n, "polls": k, "seconds": s}
+             or {"success": False, "error": ..., "status": ..., "polls": k, "seconds": s}}
+            ("profiles" is only included when no handle_record was given)
+        """
+        started = time.monotonic()
+        deadline = started + max_wait_time
+        pending = {snapshot_id: _SnapshotPoll(snapshot_id) for snapshot_id in dict.fromkeys(snapshot_ids)}
+        results: Dict[str, Dict[str, Any]] = {}
+
+        collected: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        if handle_record is None:
+            collected = {snapshot_id: [] for snapshot_id in pending}
+            handle_record = lambda snapshot_id, record: collected[snapshot_id].append(record)
+
+        # Completion callbacks for any of these snapshots cut the current sleep short
+        use_webhook = self.webhook_enabled
+        wake = asyncio.Event()
+        if use_webhook:
+            for snapshot_id in pending:
+                self.notifier.register(snapshot_id, wake)
+
+        def finish(poll: _SnapshotPoll, outcome: Dict[str, Any]):
+            if collected is not None and outcome["success"]:
+                outcome["profiles"] = collected[poll.snapshot_id]
+            results[poll.snapshot_id] = {
+                **outcome,
+                "polls": poll.requests,
+                "seconds": round(time.monotonic() - started, 1)
+            }
+            del pending[poll.snapshot_id]
+            if use_webhook:
+                self.notifier.unregister(poll.snapshot_id)
+
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    for poll in list(pending.values()):
+                        logger.error(f"Snapshot {poll.snapshot_id}: timeout after {max_wait_time}s ({poll.phase})")
+                        finish(poll, {"success": False, "error": f"Timeout after {max_wait_time}s", "status": poll.phase})
+                    break
+
+                due = [poll for poll in pending.values() if poll.next_at <= now]
+                outcomes = await asyncio.gather(*[self._advance(poll, max_records, handle_record) for poll in due])
+
+                for poll, outcome in zip(due, outcomes):
+                    if outcome is not None:
+                        finish(poll, outcome)
+                        continue
+                    fallback = use_webhook and poll.phase == "status"
+                    poll.next_at = time.monotonic() + self.next_delay(poll.attempt, deadline - time.monotonic(), fallback)
+                    poll.attempt += 1
+
+                if pending:
+                    # Snapshots with a completion callback are checked right away
+                    for poll in pending.values():
+                        if use_webhook and self.notifier.take(poll.snapshot_id) is not None:
+                            logger.info(f"Snapshot {poll.snapshot_id}: completion callback received")
+                            poll.next_at = 0.0
+
+                    wake_at = min(min(poll.next_at for poll in pending.values()), deadline)
+                    wake.clear()
+                    try:
+                        await asyncio.wait_for(wake.wait(), timeout=max(0.0, wake_at - time.monotonic()))
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            # Cancelled or failed waits must not leave registrations behind
+            if use_webhook:
+                for snapshot_id in pending:
+                    self.notifier.unregister(snapshot_id)
+
+        return results
+
+    async def _advance(self, poll: _SnapshotPoll, max_records: Optional[int],
+                       handle_record: RecordHandler) -> Optional[Dict[str, Any]]:
+        """One polling step for a snapshot; returns its final outcome, or None to poll again"""
+        try:
+            if poll.phase == "status":
+                poll.requests += 1
+                response = await self.request("GET", f"/snapshots/{poll.snapshot_id}")
+                if not response.ok:
+                    logger.warning(f"Snapshot {poll.snapshot_id}: status check failed ({response.status_code})")
+                    return None
+
+                snapshot_info = response.json()
+                status = snapshot_info.get("status")
+                logger.info(f"Snapshot {poll.snapshot_id} (poll {poll.requests}): Status = {status}")
+
+                if status == "failed":
+                    warning = snapshot_info.get("warning", "Unknown error")
+                    logger.error(f"Snapshot {poll.snapshot_id} failed: {warning}")
+                    return {"success": False, "error": f"Snapshot failed: {warning}", "status": status}
+                if status != "ready":
+                    if status not in ["scheduled", "building"]:
+                        logger.warning(f"Snapshot {poll.snapshot_id}: unknown status {status}")
+                    return None
+
+                # BrightData API returns "dataset_size" as the number of records
+                record_count = snapshot_info.get("dataset_size", 0)
+                if max_records is not None and record_count > max_records:
+                    logger.warning(f"❌ Snapshot {poll.snapshot_id} has {record_count} records (max allowed: {max_records})")
+                    return {
+                        "success": False,
+                        "error": f"Snapshot has {record_count} records (max allowed: {max_records})",
+                        "status": "too_large",
+                        "record_count": record_count
+                    }
+
+                logger.info(f"Snapshot {poll.snapshot_id} ready with {record_count} records, downloading...")
+                poll.phase = "download"
+                poll.attempt = 0
+
+            # Download right away; the endpoint may still be building for a few seconds
+            poll.requests += 1
+            record_count = await self._stream_download(poll, handle_record)
+            if record_count is None:
+                return None
+
+            logger.info(f"✅ Snapshot {poll.snapshot_id}: retrieved {record_count} profiles")
+            cost_tracker.record_brightdata_records(record_count, poll.snapshot_id)
+            return {"success": True, "record_count": record_count}
+
+        except Exception as e:
+            logger.warning(f"Snapshot {poll.snapshot_id}: {poll.phase} request failed: {e}")
+            return None
+
+
+    async def _stream_download(self, poll: _SnapshotPoll, handle_record: RecordHandler) -> Optional[int]:
+        """
+        Download a ready snapshot as JSON lines, handing over records as they are parsed
+
+        Returns the record count, or None if the download isn't available yet.
+        Records already delivered by an interrupted attempt are not delivered again.
+        """
+        session = await self._get_session()
+        async with rate_governor.slot("brightdata") as slot:
+            async with session.get(
+                f"{self.base_url}/snapshots/{poll.snapshot_id}/download",
+                params={"format": "jsonl"},
+                headers=self._get_headers(),
+                timeout=aiohttp.ClientTimeout(total=120)
+            ) as response:
+                slot.report(response.status, response.headers)
+                if response.status != 200:
+                    logger.warning(f"Snapshot {poll.snapshot_id}: download failed (HTTP {response.status})")
+                    return None
+
+                index = 0
+
+                def emit(line: bytes):
+                    nonlocal index
+                    line = line.strip()
+                    if not line:
+                        return
+                    record = json.loads(line)
+                    index += 1
+                    if index > poll.delivered:
+                        handle_record(poll.snapshot_id, record)
+                        poll.delivered = index
+
+                buffer = b""
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_BYTES):
+                    if index == 0 and not buffer and not chunk.lstrip().startswith(b"{") and chunk.strip():
+                        # "Snapshot is building, try again in a few seconds" instead of records
+                        logger.info(f"Snapshot {poll.snapshot_id}: download endpoint still building")
+                        return None
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b"\n")
+                    for line in lines:
+                        emit(line)
+                emit(buffer)
+
+                return index
+
+
+# Global instances
+snapshot_notifier = SnapshotNotifier()
+brightdata_client = BrightDataClient()
@@ -0,0 +1,140 @@
+"""
+Bright Data Pre-flight Sizing
+Estimates how many records a dataset filter will match before a snapshot is created
+
+A filter over the 100-record ceiling used to be discovered only when its snapshot
+finished building, minutes later, and the hospital got nothing. Step 1 now asks
+for an estimate first and tightens the filter while it is too large.
+
+Estimates, cheapest first:
+- observed:    dataset_size reported for this exact (canonical) filter before
+- lower_bound: largest size observed for a narrower filter of the same dataset +
+               state (a broader filter matches at least as many records)
+- count:       optional count-only service (BRIGHTDATA_PREFLIGHT_COUNT_URL) that
+               takes the filter payload and answers {"count": n} - a dataset
+               mirror, or a local stand-in
+
+Every snapshot status that reports a dataset_size (ready or too large) is
+recorded, so sizes learned from rejected snapshots are no longer thrown away.
+"""
+
+import os
+import time
+import logging
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from .response_cache import ResponseCache, ttl_from_env
+from .brightdata_snapshot_cache import canonicalize_filter, filter_hash, filter_covers
+
+logger = logging.getLogger(__name__)
+
+# Observed sizes drift as Bright Data refreshes the dataset
+DEFAULT_SIZE_TTL = 7 * 24 * 3600
+
+# Observed filters remembered per dataset + state for lower-bound estimates
+MAX_INDEX_ENTRIES = 100
+
+
+class BrightDataSizeEstimator:
+    """Observed snapshot sizes + optional count service"""
+
+    def __init__(self):
+        self.enabled = os.getenv('BRIGHTDATA_PREFLIGHT_ENABLED', 'true').lower() == 'true'
+        self.count_url = os.getenv('BRIGHTDATA_PREFLIGHT_COUNT_URL')
+        self.ttl = ttl_from_env('BRIGHTDATA_PREFLIGHT_TTL_HOURS', DEFAULT_SIZE_TTL)
+        self.cache = ResponseCache(
+            namespace="brightdata_size",
+            max_entries=1000,
+            default_ttl_seconds=self.ttl,
+            persistent=os.getenv('BRIGHTDATA_PREFLIGHT_PERSISTENT', 'true').lower() == 'true'
+        )
+        self._stats = {"observed": 0, "lower_bound": 0, "count": 0, "unknown": 0, "recorded": 0}
+
+    async def estimate(self, payload: Dict[str, Any], scope: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Estimate the number of records a filter payload matches
+
+        Returns:
+            {"records": n, "source": "observed" | "lower_bound" | "count"} or None if unknown
+        """
+        if not self.enabled:
+            return None
+
+        key = filter_hash(payload)
+        observed = await self.cache.get(self.cache.make_key("size", key), call_site="observed")
+        if observed is not None:
+            self._stats["observed"] += 1
+            return {"records": observed["records"], "source": "observed"}
+
+        # Any narrower filter's size is a lower bound for this one
+        broad = canonicalize_filter(payload["filter"])
+        index = await self.cache.get(self._index_key(payload, scope), call_site="index") or []
+        now = time.time()
+        bound = max(
+            (entry["records"] for entry in index
+             if now - entry["recorded_at"] <= self.ttl and filter_covers(broad, entry["filter"])),
+            default=None
+        )
+
+        counted = await self._count(payload) if self.count_url else None
+        if counted is not None and (bound is None or counted >= bound):
+            self._stats["count"] += 1
+            return {"records": counted, "source": "count"}
+        if bound is not None:
+            self._stats["lower_bound"] += 1
+            return {"records": bound, "source": "lower_bound"}
+
+        self._stats["unknown"] += 1
+        return None
+
+    async def record(self, payload: Dict[str, Any], records: int, scope: Optional[str] = None):
+        """Remember the dataset_size a snapshot reported for this filter"""
+        if not self.enabled or records is None:
+            return
+
+        key = filter_hash(payload)
+        now = time.time()
+        await self.cache.set(self.cache.make_key("size", key), {"records": records, "recorded_at": now},
+                             call_site="record")
+
+        index_key = self._index_key(payload, scope)
+        index = await self.cache.get(index_key, call_site="index") or []
+        index = [e for e in index if e["filter_hash"] != key and now - e["recorded_at"] <= self.ttl]
+        index.append({
+            "filter_hash": key,
+            "filter": canonicalize_filter(payload["filter"]),
+            "records": records,
+            "recorded_at": now
+        })
+        await self.cache.set(index_key, index[-MAX_INDEX_ENTRIES:], call_site="index")
+        self._stats["recorded"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "count_service": bool(self.count_url),
+            **self._stats,
+            "cache": self.cache.stats()
+        }
+
+    async def _count(self, payload: Dict[str, Any]) -> Optional[int]:
+        """Ask the count service; failures just mean no estimate"""
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+                async with session.post(self.count_url, json=payload) as response:
+                    if response.status != 200:
+                        logger.warning(f"Pre-flight count failed (HTTP {response.status})")
+                        return None
+                    return int((await response.json())["count"])
+        except Exception as e:
+            logger.warning(f"Pre-flight count failed: {e}")
+            return None
+
+    def _index_key(self, payload: Dict[str, Any], scope: Optional[str]) -> str:
+        return self.cache.make_key("index", payload.get("dataset_id"), (scope or "").strip().lower())
+
+
+# Global instance
+brightdata_size_estimator = BrightDataSizeEstimator()
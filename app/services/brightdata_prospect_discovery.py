@@ -12,23 +12,72 @@ Step 3: Rank - AI ranking and final selection
 
 import logging
 import os
-import requests
-import time
 import asyncio
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, List, Optional, Callable, Union
 from dotenv import load_dotenv
 
 from .linkedin import linkedin_service
 from .three_step_prospect_discovery import ThreeStepProspectDiscoveryService
 from .ai_company_normalization import ai_company_normalization_service
+from .brightdata_client import BrightDataClient, brightdata_client
+from .brightdata_snapshot_cache import brightdata_snapshot_cache
+from .brightdata_preflight import brightdata_size_estimator
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class BrightDataRunContext:
+    """
+    Per-hospital state handed from Step 1 to Step 2
+
+    The service is a shared singleton, so nothing hospital-specific lives on it;
+    Step 1 returns this as "run_context" and Step 2 takes it back. to_dict /
+    from_dict keep it JSON-friendly for callers that persist step outputs.
+    """
+    company_name: str
+    company_variations: List[str] = field(default_factory=list)
+    parent_account_name: Optional[str] = None
+    company_city: Optional[str] = None
+    company_state: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BrightDataRunContext":
+        return cls(**{key: data.get(key) for key in cls.__dataclass_fields__ if key in data})
+
+
 class BrightDataProspectDiscoveryService:
     """3-step prospect discovery using Bright Data LinkedIn Filter as the starting point"""
 
+    # Position keywords excluded in the Step 1 filter ("not_includes" substring match)
+    # - intern/student: entry-level
+    # - nurse/nursing/care: prevents "COO" from matching "Care Coordinator"
+    # - clinical/medical/physician/therapist/patient: clinical roles, not building/budget owners
+    EXCLUDED_POSITION_KEYWORDS = [
+        "intern",
+        "student",
+        "nurse",
+        "nursing",
+        "care",
+        "clinical",
+        "medical",
+        "physician",
+        "therapist",
+        "analyst",
+        "patient"
+    ]
+
+    # Cost ceiling per snapshot (records_limit, and larger snapshots are never downloaded)
+    MAX_SNAPSHOT_RECORDS = 100
+
+    # min_connections floors tried (in order) when a filter is estimated over the ceiling
+    TIGHTEN_MIN_CONNECTIONS = [50, 150, 300]
+
     def __init__(self, api_token: Optional[str] = None, raise_on_missing_token: bool = True):
         """
         Initialize the Bright Data prospect discovery service
@@ -41,9 +90,16 @@ class BrightDataProspectDiscoveryService:
         if not self.api_token and raise_on_missing_token:
             raise ValueError("BRIGHTDATA_API_TOKEN must be set in environment or passed to constructor")
 
-        self.base_url = "https://api.brightdata.com/datasets/filter"
+        # Shared pooled client unless a token was passed in explicitly
+        self.client = brightdata_client if api_token is None else BrightDataClient(api_token)
         self.dataset_id = "gd_l1viktl72bvl7bjuj0"  # LinkedIn Profiles dataset
 
+        # Batch mode: hospitals (same state) combined into one filter before adaptive splitting
+        self.batch_max_hospitals = int(os.getenv('BRIGHTDATA_BATCH_MAX_HOSPITALS', '5'))
+
+        # Full snapshots retried with a tighter filter after a missed pre-flight estimate
+        self.tighten_max_retries = int(os.getenv('BRIGHTDATA_TIGHTEN_MAX_RETRIES', '2'))
+
         self.linkedin_service = linkedin_service
         self.three_step_service = ThreeStepProspectDiscoveryService()
 
@@ -76,14 +132,6 @@ class BrightDataProspectDiscoveryService:
             "Financial"
         ]
 
-    def _get_headers(self) -> Dict[str, str]:
-        """Get request headers with authorization"""
-        return {
-            "Authorization": f"Bearer {self.api_token}",
-            "Content-Type": "application/json"
-        }
-
-
     async def step1_brightdata_filter(
         self,
         company_name: str,
@@ -92,11 +140,16 @@ class BrightDataProspectDiscoveryService:
         company_city: str = None,
         company_state: str = None,
         min_connections: int = 10,  # LOWERED: Was 50, now 10 to catch all prospects
-        use_city_filter: bool = False  # NEW: Disabled by default (too restrictive)
+        use_city_filter: bool = False,  # NEW: Disabled by default (too restrictive)
+        apply_step2_filters: bool = False,
+        force_refresh: bool = False
     ) -> Dict[str, Any]:
         """
         STEP 1: Filter LinkedIn profiles using Bright Data
 
+        Filters estimated over MAX_SNAPSHOT_RECORDS are tightened before a snapshot
+        is created (see _tightening_ladder / brightdata_preflight).
+
         Args:
             company_name: Local account name
             parent_account_name: Parent account name (will search both if provided)
@@ -105,6 +158,9 @@ class BrightDataProspectDiscoveryService:
             company_state: State for location filtering (not used in BrightData filter)
             min_connections: Minimum LinkedIn connections (default 20 - disabled)
             use_city_filter: Whether to apply city location filter (default False)
+            apply_step2_filters: Run the Step 2 validation filters on each profile as it
+                streams in (only passing prospects are returned)
+            force_refresh: Create a new snapshot even if a stored one matches the filter
 
         Returns:
             Dict with success status, snapshot_id, and qualified LinkedIn URLs
@@ -132,179 +188,68 @@ class BrightDataProspectDiscoveryService:
             logger.info(f"   → AI generated {len(company_variations)} company name variations")
             logger.debug(f"   → Variations: {company_variations}")
 
-            # Store variations for Step 2 validation
-            self._company_variations = company_variations
-
-            # Build company name filters from AI variations (OR logic)
-            company_filters = [
-                {
-                    "name": "current_company_name",
-                    "value": variation,
-                    "operator": "includes"
-                }
-                for variation in company_variations
-            ]
-
-            # Build title filters (OR logic)
-            title_filters = [
-                {
-                    "name": "position",
-                    "value": title,
-                    "operator": "includes"
-                }
-                for title in target_titles
-            ]
-
-            # Build main filter (AND logic)
-            main_filters = [
-                # Company name filter (OR - match any company variation)
-                {
-                    "operator": "or",
-                    "filters": company_filters
-                },
-                # Title filters (OR - match any title)
-                {
-                    "operator": "or",
-                    "filters": title_filters
-                },
-                # Exclude interns/students
-                {
-                    "name": "position",
-                    "value": "intern",
-                    "operator": "not_includes"
-                },
-                {
-                    "name": "position",
-                    "value": "student",
-                    "operator": "not_includes"
-                },
-                # Exclude nursing roles (prevents "COO" from matching "Care Coordinator")
-                {
-                    "name": "position",
-                    "value": "nurse",
-                    "operator": "not_includes"
-                },
-                {
-                    "name": "position",
-                    "value": "nursing",
-                    "operator": "not_includes"
-                },
-                {
-                    "name": "position",
-                    "value": "care",
-                    "operator": "not_includes"
-                },
-                {
-                    "name": "position",
-                    "value": "clinical",
-                    "operator": "not_includes"
-                },
-                {
-                    "name": "position",
-                    "value": "medical",
-                    "operator": "not_includes"
-                },
-                {
-                    "name": "position",
-                    "value": "physician",
-                    "operator": "not_includes"
-                },
-                {
-                    "name": "position",
-                    "value": "therapist",
-                    "operator": "not_includes"
-                },
-                {
-                    "name": "position",
-                    "value": "analyst",
-                    "operator": "not_includes"
-                },
-                 {
-                    "name": "position",
-                    "value": "patient",
-                    "operator": "not_includes"
-                },
-                # Company state filter
-                {
-                    "name": "city",
-                    "value": company_state,
-                    "operator": "includes"
-                },
-                # Minimum connections filter
-                {
-                    "name": "connections",
-                    "value": min_connections,
-                    "operator": ">="
-                }
-            ]
-
-            # Add location filter (city) - OPTIONAL, disabled by default (too restrictive)
-            if company_city and use_city_filter:
-                logger.info(f"   → Applying city filter: {company_city}")
-                main_filters.append({
-                    "name": "city",
-                    "value": company_city,
-                    "operator": "includes"
-                })
-            else:
-                logger.info("   → City filter DISABLED (casting wider net)")
-
-            # Create filter payload
-            payload = {
-                "dataset_id": self.dataset_id,
-                "records_limit": 100,
-                "filter": {
-                    "operator": "and",
-                    "filters": main_filters
-                }
-            }
-
-            logger.info("Creating Bright Data snapshot...")
-
-            # Create snapshot
-            response = requests.post(
-                self.base_url,
-                headers=self._get_headers(),
-                json=payload,
-                timeout=30
+            # Carried to Step 2 in the result (never stored on the shared service)
+            run_context = BrightDataRunContext(
+                company_name=company_name,
+                company_variations=company_variations,
+                parent_account_name=parent_account_name,
+                company_city=company_city,
+                company_state=company_state
             )
 
-            if not response.ok:
-                error_msg = f"Bright Data filter creation failed (Status {response.status_code})"
-                try:
-                    error_detail = response.json()
-                    error_msg += f": {error_detail}"
-                except:
-                    error_msg += f": {response.text}"
-
-                logger.error(error_msg)
-                return {
-                    "success": False,
-                    "error": error_msg,
-                    "step": "brightdata_filter_creation"
-                }
-
-            response_data = response.json()
-            snapshot_id = response_data.get("snapshot_id")
-
-            if not snapshot_id:
-                return {
-                    "success": False,
-                    "error": "No snapshot_id in response",
-                    "step": "brightdata_filter_creation"
-                }
-
-            logger.info(f"✅ Snapshot created: {snapshot_id}")
-            logger.info("Polling for results (up to 5 minutes)...")
+            # Filter settings from as requested to tightest (see _tightening_ladder)
+            ladder = self._tightening_ladder(company_variations, company_city, min_connections, use_city_filter)
 
-            # Poll for results
-            profiles = await self._poll_snapshot_results(
-                snapshot_id=snapshot_id,
-                max_wait_time=300,  # 5 minutes
-                poll_interval=10    # Check every 10 seconds
-            )
+            # Transform (and optionally filter) each profile as it streams in
+            enriched_prospects = []
+            filtered_out = []
+            variations_normalized = self._normalize_variations(company_variations)
+
+            def handle_profile(snapshot_id: str, profile: Dict[str, Any]):
+                if not profile.get("url"):
+                    return
+                # Transform Bright Data profile to the format expected by Step 3
+                enriched_prospect = self._transform_brightdata_profile(profile)
+                if apply_step2_filters:
+                    rejection = self._filter_prospect(
+                        enriched_prospect, variations_normalized, company_variations,
+                        company_city, company_state, location_filter_enabled=True
+                    )
+                    if rejection:
+                        filtered_out.append(rejection)
+                        return
+                enriched_prospects.append(enriched_prospect)
+
+            step, retries = 0, 0
+            while True:
+                # Pre-flight: tighten while the filter is estimated over the record ceiling
+                step, payload, estimate = await self._preflight_filter(ladder, step, target_titles, company_city, company_state)
+
+                # Reuse a stored snapshot for the same (or a broader) filter instead of paying for a new one
+                cached = None if force_refresh else await brightdata_snapshot_cache.lookup(payload, scope=company_state)
+                if cached:
+                    snapshot_id = cached["snapshot_id"]
+                    for profile in cached["records"]:
+                        handle_profile(snapshot_id, profile)
+                    profile_count = len(cached["records"])
+                    break
+
+                snapshot = await self._run_snapshot(payload, handle_profile, scope=company_state)
+                if not snapshot["success"]:
+                    return snapshot
+                snapshot_id = snapshot["snapshot_id"]
+                profile_count = snapshot["profile_count"]
+
+                # The estimate missed: tighten one more step and try again (each retry is a full snapshot)
+                if snapshot["status"] == "too_large" and retries < self.tighten_max_retries and step + 1 < len(ladder):
+                    retries += 1
+                    step += 1
+                    logger.info(f"   → Snapshot over the limit, retrying with a tighter filter ({ladder[step][0]})")
+                    continue
+                break
 
-            if not profiles:
+            settings = ladder[step][1]
+            if not profile_count:
                 return {
                     "success": False,
                     "error": "No profiles found, snapshot timed out, or result count exceeded limit (max 100)",
@@ -313,31 +258,30 @@ class BrightDataProspectDiscoveryService:
                     "suggestion": "Try adding more specific filters or reducing the number of target titles"
                 }
 
-            logger.info(f"✅ Retrieved {len(profiles)} profiles from Bright Data")
-
-            # Transform Bright Data profiles to enriched format (no scraping needed!)
-            logger.info("Transforming Bright Data profiles to enriched format...")
-            enriched_prospects = []
-            for profile in profiles:
-                url = profile.get("url")
-                if url:
-                    # Transform Bright Data profile to the format expected by Step 3
-                    enriched_prospect = self._transform_brightdata_profile(profile)
-                    enriched_prospects.append(enriched_prospect)
-
-            logger.info(f"✅ Transformed {len(enriched_prospects)} Bright Data profiles to enriched format")
+            logger.info(f"✅ Transformed {len(enriched_prospects)} of {profile_count} Bright Data profiles to enriched format")
 
             summary = {
-                "total_profiles_from_brightdata": len(profiles),
-                "profiles_transformed": len(enriched_prospects),
+                "total_profiles_from_brightdata": profile_count,
+                "profiles_transformed": len(enriched_prospects) + len(filtered_out),
+                "step2_filters_applied": apply_step2_filters,
+                "step2_filtered_out": len(filtered_out),
                 "snapshot_id": snapshot_id,
+                "snapshot_cache": cached["match"] if cached else ("bypassed" if force_refresh else "miss"),
+                "snapshot_age_seconds": cached["age_seconds"] if cached else None,
+                "preflight": {
+                    "estimated_records": estimate["records"] if estimate else None,
+                    "estimate_source": estimate["source"] if estimate else None,
+                    "tightening": [label for label, _ in ladder[1:step + 1]],
+                    "snapshot_retries": retries
+                },
                 "searched_with_parent_account": parent_account_name is not None,
                 "parent_account_name": parent_account_name,
                 "filters_applied": {
-                    "company_variations": len(company_filters),
+                    "company_variations": len(settings["company_variations"]),
                     "target_titles": len(target_titles),
-                    "min_connections": min_connections,
-                    "location_filter": company_city is not None
+                    "min_connections": settings["min_connections"],
+                    "location_filter": company_city is not None,
+                    "city_filter": settings["use_city_filter"]
                 },
                 "scraping_skipped": True,
                 "reason": "Bright Data already provides LinkedIn profile data"
@@ -352,7 +296,9 @@ class BrightDataProspectDiscoveryService:
                 "company_state": company_state,
                 "summary": summary,
                 "enriched_prospects": enriched_prospects,
-                "next_step": "Call step2_filter_prospects to apply validation filters"
+                "filtered_out": filtered_out,
+                "run_context": run_context,
+                "next_step": "Call step2_filter_prospects with run_context to apply validation filters"
             }
 
         except Exception as e:
@@ -363,6 +309,479 @@ class BrightDataProspectDiscoveryService:
                 "step": "step1_exception"
             }
 
+    async def step1_brightdata_filter_batch(
+        self,
+        hospitals: List[Dict[str, Any]],
+        target_titles: List[str] = None,
+        min_connections: int = 10,
+        apply_step2_filters: bool = False,
+        force_refresh: bool = False,
+        max_wait_time: int = 300
+    ) -> Dict[str, Any]:
+        """
+        STEP 1 for several hospitals: one combined Bright Data filter per state
+
+        Hospitals in the same state are grouped (up to BRIGHTDATA_BATCH_MAX_HOSPITALS),
+        their company variations OR'd into a single filter and submitted once. Each
+        downloaded record is routed back to every hospital whose variations it matches
+        (_validate_company_match_with_variations); records matching none are counted
+        as unrouted.
+
+        Cost guard: a combined snapshot that reports MAX_SNAPSHOT_RECORDS or more is
+        rejected before download (it may be truncated) and its group is split in half
+        and resubmitted, down to single hospitals which follow the Step 1 limit.
+
+        Args:
+            hospitals: [{"company_name", "parent_account_name", "company_city", "company_state"}]
+            target_titles: List of job titles (defaults to optimized list)
+            min_connections: Minimum LinkedIn connections
+            apply_step2_filters: Run each hospital's Step 2 filters while routing
+            force_refresh: Create new snapshots even if stored ones match the filters
+            max_wait_time: Seconds to wait for each snapshot
+
+        Returns:
+            Dict with per-hospital Step 1 results (input order) and batch summary
+        """
+        try:
+            if not target_titles:
+                target_titles = self.default_target_titles
+
+            missing_state = [h.get("company_name") for h in hospitals if not h.get("company_state")]
+            if missing_state:
+                return {
+                    "success": False,
+                    "error": f"company_state is required for batch mode (missing for: {missing_state})",
+                    "step": "validation"
+                }
+
+            logger.info(f"STEP 1 (batch): {len(hospitals)} hospitals, generating company name variations...")
+            variations = await asyncio.gather(*[
+                ai_company_normalization_service.normalize_company_name(
+                    company_name=h["company_name"],
+                    parent_account_name=h.get("parent_account_name"),
+                    company_city=h.get("company_city"),
+                    company_state=h["company_state"]
+                )
+                for h in hospitals
+            ])
+            entries = [
+                {"index": i, "hospital": h, "variations": v, "variations_normalized": self._normalize_variations(v)}
+                for i, (h, v) in enumerate(zip(hospitals, variations))
+            ]
+
+            # Group by state, then cap the group size
+            by_state: Dict[str, List[Dict[str, Any]]] = {}
+            for entry in entries:
+                by_state.setdefault(entry["hospital"]["company_state"].strip().lower(), []).append(entry)
+            groups = [
+                group[start:start + self.batch_max_hospitals]
+                for group in by_state.values()
+                for start in range(0, len(group), max(1, self.batch_max_hospitals))
+            ]
+
+            stats = {"snapshots_created": 0, "snapshot_cache_hits": 0, "splits": 0,
+                     "records_downloaded": 0, "unrouted_records": 0}
+            results: Dict[int, Dict[str, Any]] = {}
+
+            async def run_group(group: List[Dict[str, Any]]):
+                state = group[0]["hospital"]["company_state"]
+                combined_variations = list(dict.fromkeys(v for entry in group for v in entry["variations"]))
+                payload = self._build_filter_payload(combined_variations, target_titles, state, min_connections)
+                names = [entry["hospital"]["company_name"] for entry in group]
+
+                # Pre-flight: split groups whose combined filter is already known to be too large
+                estimate = await brightdata_size_estimator.estimate(payload, scope=state) if len(group) > 1 else None
+                if estimate and estimate["records"] >= self.MAX_SNAPSHOT_RECORDS:
+                    stats["splits"] += 1
+                    half = len(group) // 2
+                    logger.info(f"Pre-flight: ~{estimate['records']} records for {len(group)} hospitals in {state} - "
+                                f"splitting into {half} + {len(group) - half}")
+                    await asyncio.gather(run_group(group[:half]), run_group(group[half:]))
+                    return
+
+                records: List[Dict[str, Any]] = []
+                cached = None if force_refresh else await brightdata_snapshot_cache.lookup(payload, scope=state)
+                if cached:
+                    stats["snapshot_cache_hits"] += 1
+                    snapshot_id, records, cache_status = cached["snapshot_id"], cached["records"], cached["match"]
+                else:
+                    logger.info(f"Creating combined Bright Data snapshot for {len(group)} hospitals in {state}: {names}")
+                    response = await self.client.create_snapshot(payload)
+                    snapshot_id = response.json().get("snapshot_id") if response.ok else None
+                    if not snapshot_id:
+                        error = f"Bright Data filter creation failed (Status {response.status_code}): {response.text}"
+                        logger.error(error)
+                        for entry in group:
+                            results[entry["index"]] = {"success": False, "company_name": entry["hospital"]["company_name"],
+                                                       "error": error, "step": "brightdata_filter_creation"}
+                        return
+                    stats["snapshots_created"] += 1
+
+                    # Combined snapshots at the ceiling may be truncated - reject before download and split
+                    max_records = self.MAX_SNAPSHOT_RECORDS - 1 if len(group) > 1 else self.MAX_SNAPSHOT_RECORDS
+                    result = await self.client.wait_for_snapshot(
+                        snapshot_id, max_wait_time=max_wait_time, max_records=max_records,
+                        handle_record=lambda snapshot_id, record: records.append(record)
+                    )
+                    if result.get("record_count") is not None:
+                        await brightdata_size_estimator.record(payload, result["record_count"], scope=state)
+                    if not result["success"]:
+                        if result["status"] == "too_large" and len(group) > 1:
+                            stats["splits"] += 1
+                            half = len(group) // 2
+                            logger.info(f"Snapshot {snapshot_id} has {result.get('record_count')} records - "
+                                        f"splitting {len(group)} hospitals into {half} + {len(group) - half}")
+                            await asyncio.gather(run_group(group[:half]), run_group(group[half:]))
+                            return
+                        for entry in group:
+                            results[entry["index"]] = {
+                                "success": False,
+                                "company_name": entry["hospital"]["company_name"],
+                                "error": result["error"],
+                                "step": "brightdata_polling",
+                                "snapshot_id": snapshot_id
+                            }
+                        return
+                    cache_status = "bypassed" if force_refresh else "miss"
+                    await brightdata_snapshot_cache.store(payload, snapshot_id, records, scope=state)
+
+                stats["records_downloaded"] += len(records)
+                self._route_batch_records(group, records, snapshot_id, cache_status, apply_step2_filters, results, stats)
+
+            await asyncio.gather(*[run_group(group) for group in groups])
+
+            logger.info(f"✅ Batch Step 1: {len(hospitals)} hospitals, {stats['snapshots_created']} snapshots, "
+                        f"{stats['splits']} splits, {stats['unrouted_records']} unrouted records")
+
+            return {
+                "success": True,
+                "step": "brightdata_batch_filter_complete",
+                "results": [results[entry["index"]] for entry in entries],
+                "summary": {
+                    "hospitals": len(hospitals),
+                    "states": len(by_state),
+                    "groups": len(groups),
+                    **stats
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Error in Bright Data batch Step 1: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "step": "step1_batch_exception"
+            }
+
+    def _route_batch_records(
+        self,
+        group: List[Dict[str, Any]],
+        records: List[Dict[str, Any]],
+        snapshot_id: str,
+        cache_status: str,
+        apply_step2_filters: bool,
+        results: Dict[int, Dict[str, Any]],
+        stats: Dict[str, int]
+    ):
+        """Demultiplex a combined snapshot into per-hospital Step 1 results"""
+        routed = {entry["index"]: {"enriched": [], "filtered_out": [], "matched": 0} for entry in group}
+
+        for record in records:
+            if not record.get("url"):
+                continue
+            matched = False
+            for entry in group:
+                company = (record.get("current_company_name") or "").strip()
+                if not self._validate_company_match_with_variations(
+                    company, entry["variations_normalized"], record.get("name", "Unknown")
+                )["is_match"]:
+                    continue
+                matched = True
+                bucket = routed[entry["index"]]
+                bucket["matched"] += 1
+                # Fresh copy per hospital (Step 2 annotates prospects in place)
+                prospect = self._transform_brightdata_profile(record)
+                if apply_step2_filters:
+                    hospital = entry["hospital"]
+                    rejection = self._filter_prospect(
+                        prospect, entry["variations_normalized"], entry["variations"],
+                        hospital.get("company_city"), hospital["company_state"], location_filter_enabled=True
+                    )
+                    if rejection:
+                        bucket["filtered_out"].append(rejection)
+                        continue
+                bucket["enriched"].append(prospect)
+            if not matched:
+                stats["unrouted_records"] += 1
+
+        for entry in group:
+            hospital = entry["hospital"]
+            bucket = routed[entry["index"]]
+            results[entry["index"]] = {
+                "success": True,
+                "step": "brightdata_filter_complete",
+                "company_name": hospital["company_name"],
+                "parent_account_name": hospital.get("parent_account_name"),
+                "company_city": hospital.get("company_city"),
+                "company_state": hospital["company_state"],
+                "run_context": BrightDataRunContext(
+                    company_name=hospital["company_name"],
+                    company_variations=entry["variations"],
+                    parent_account_name=hospital.get("parent_account_name"),
+                    company_city=hospital.get("company_city"),
+                    company_state=hospital["company_state"]
+                ),
+                "summary": {
+                    "total_profiles_from_brightdata": bucket["matched"],
+                    "profiles_transformed": len(bucket["enriched"]) + len(bucket["filtered_out"]),
+                    "step2_filters_applied": apply_step2_filters,
+                    "step2_filtered_out": len(bucket["filtered_out"]),
+                    "snapshot_id": snapshot_id,
+                    "snapshot_cache": cache_status,
+                    "batched_hospitals": len(group),
+                    "snapshot_records": len(records),
+                    "scraping_skipped": True
+                },
+                "enriched_prospects": bucket["enriched"],
+                "filtered_out": bucket["filtered_out"]
+            }
+
+    def _tightening_ladder(
+        self,
+        company_variations: List[str],
+        company_city: str,
+        min_connections: int,
+        use_city_filter: bool
+    ) -> List[tuple]:
+        """
+        Filter settings from the requested ones to the tightest, one change per step
+
+        Order: raise min_connections (TIGHTEN_MIN_CONNECTIONS), enable the city
+        filter, then drop the broadest (shortest) company variations - keeping at
+        least half of them.
+
+        Returns:
+            [(label, {"company_variations", "min_connections", "use_city_filter"})]
+        """
+        settings = {
+            "company_variations": list(company_variations),
+            "min_connections": min_connections,
+            "use_city_filter": use_city_filter
+        }
+        ladder = [("requested", settings)]
+
+        for floor in self.TIGHTEN_MIN_CONNECTIONS:
+            if settings["min_connections"] < floor:
+                settings = {**settings, "min_connections": floor}
+                ladder.append((f"min_connections>={floor}", settings))
+
+        if company_city and not settings["use_city_filter"]:
+            settings = {**settings, "use_city_filter": True}
+            ladder.append(("city_filter", settings))
+
+        keep = max(1, (len(company_variations) + 1) // 2)
+        variations = list(settings["company_variations"])
+        while len(variations) > keep:
+            broadest = min(variations, key=lambda v: len(v.strip()))
+            variations = list(variations)
+            variations.remove(broadest)
+            settings = {**settings, "company_variations": variations}
+            ladder.append((f"dropped_variation:{broadest}", settings))
+
+        return ladder
+
+    async def _preflight_filter(
+        self,
+        ladder: List[tuple],
+        step: int,
+        target_titles: List[str],
+        company_city: str,
+        company_state: str
+    ) -> tuple:
+        """
+        Walk the tightening ladder from step until the size estimate fits the ceiling
+
+        Unknown estimates are trusted (the snapshot itself still rejects oversized
+        results before download).
+
+        Returns:
+            (step, payload, estimate)
+        """
+        while True:
+            label, settings = ladder[step]
+            payload = self._build_filter_payload(
+                settings["company_variations"], target_titles, company_state, settings["min_connections"],
+                company_city=company_city, use_city_filter=settings["use_city_filter"]
+            )
+            estimate = await brightdata_size_estimator.estimate(payload, scope=company_state)
+            if not estimate or estimate["records"] <= self.MAX_SNAPSHOT_RECORDS or step + 1 >= len(ladder):
+                return step, payload, estimate
+
+            step += 1
+            logger.info(f"   → Pre-flight: ~{estimate['records']} records ({estimate['source']}), "
+                        f"tightening filter ({ladder[step][0]})")
+
+    def _build_filter_payload(
+        self,
+        company_variations: List[str],
+        target_titles: List[str],
+        company_state: str,
+        min_connections: int,
+        company_city: str = None,
+        use_city_filter: bool = False
+    ) -> Dict[str, Any]:
+        """Build the Step 1 dataset filter (company variations OR'd, titles OR'd, exclusions/state/connections AND'd)"""
+        # Build company name filters from AI variations (OR logic)
+        company_filters = [
+            {
+                "name": "current_company_name",
+                "value": variation,
+                "operator": "includes"
+            }
+            for variation in company_variations
+        ]
+
+        # Build title filters (OR logic)
+        title_filters = [
+            {
+                "name": "position",
+                "value": title,
+                "operator": "includes"
+            }
+            for title in target_titles
+        ]
+
+        # Build main filter (AND logic)
+        main_filters = [
+            # Company name filter (OR - match any company variation)
+            {
+                "operator": "or",
+                "filters": company_filters
+            },
+            # Title filters (OR - match any title)
+            {
+                "operator": "or",
+                "filters": title_filters
+            },
+            # Exclude interns/students and clinical roles (see EXCLUDED_POSITION_KEYWORDS)
+            *[
+                {
+                    "name": "position",
+                    "value": keyword,
+                    "operator": "not_includes"
+                }
+                for keyword in self.EXCLUDED_POSITION_KEYWORDS
+            ],
+            # Company state filter
+            {
+                "name": "city",
+                "value": company_state,
+                "operator": "includes"
+            },
+            # Minimum connections filter
+            {
+                "name": "connections",
+                "value": min_connections,
+                "operator": ">="
+            }
+        ]
+
+        # Add location filter (city) - OPTIONAL, disabled by default (too restrictive)
+        if company_city and use_city_filter:
+            logger.info(f"   → Applying city filter: {company_city}")
+            main_filters.append({
+                "name": "city",
+                "value": company_city,
+                "operator": "includes"
+            })
+        else:
+            logger.info("   → City filter DISABLED (casting wider net)")
+
+        # Create filter payload
+        return {
+            "dataset_id": self.dataset_id,
+            "records_limit": self.MAX_SNAPSHOT_RECORDS,
+            "filter": {
+                "operator": "and",
+                "filters": main_filters
+            }
+        }
+
+    async def _run_snapshot(
+        self,
+        payload: Dict[str, Any],
+        handle_profile: Callable[[str, Dict[str, Any]], None],
+        scope: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Create a snapshot for a filter payload, stream its profiles to handle_profile
+        and store them in the snapshot cache
+
+        Returns:
+            Dict with success status, snapshot_id, profile_count (None if the snapshot
+            failed, timed out or was too large) and status (or the Step 1 error)
+        """
+        logger.info("Creating Bright Data snapshot...")
+
+        # Create snapshot
+        response = await self.client.create_snapshot(payload)
+
+        if not response.ok:
+            error_msg = f"Bright Data filter creation failed (Status {response.status_code})"
+            try:
+                error_detail = response.json()
+                error_msg += f": {error_detail}"
+            except:
+                error_msg += f": {response.text}"
+
+            logger.error(error_msg)
+            return {
+                "success": False,
+                "error": error_msg,
+                "step": "brightdata_filter_creation"
+            }
+
+        response_data = response.json()
+        snapshot_id = response_data.get("snapshot_id")
+
+        if not snapshot_id:
+            return {
+                "success": False,
+                "error": "No snapshot_id in response",
+                "step": "brightdata_filter_creation"
+            }
+
+        logger.info(f"✅ Snapshot created: {snapshot_id}")
+        logger.info("Polling for results (up to 5 minutes)...")
+
+        # Keep the raw records for the snapshot cache (at most records_limit of them)
+        records = []
+
+        def keep_and_handle(snapshot_id: str, profile: Dict[str, Any]):
+            records.append(profile)
+            handle_profile(snapshot_id, profile)
+
+        result = await self._stream_snapshot_results(
+            snapshot_id=snapshot_id,
+            handle_profile=keep_and_handle,
+            max_wait_time=300  # 5 minutes
+        )
+
+        # Ready and too-large snapshots both report their size - feed the pre-flight estimator
+        if result.get("record_count") is not None:
+            await brightdata_size_estimator.record(payload, result["record_count"], scope=scope)
+
+        profile_count = result["record_count"] if result["success"] else None
+        if profile_count:
+            await brightdata_snapshot_cache.store(payload, snapshot_id, records, scope=scope)
+
+        return {
+            "success": True,
+            "snapshot_id": snapshot_id,
+            "profile_count": profile_count,
+            "status": result.get("status", "ready")
+        }
+
     def _transform_brightdata_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
         """
         Transform Bright Data profile to the enriched format expected by Step 3
@@ -472,150 +891,40 @@ class BrightDataProspectDiscoveryService:
 
         return experience
 
-    async def _poll_snapshot_results(
+    async def _stream_snapshot_results(
         self,
         snapshot_id: str,
-        max_wait_time: int = 600,
-        poll_interval: int = 10
-    ) -> Optional[List[Dict]]:
+        handle_profile: Callable[[str, Dict[str, Any]], None],
+        max_wait_time: int = 600
+    ) -> Dict[str, Any]:
         """
-        Poll Bright Data snapshot endpoint until results are ready
+        Poll Bright Data snapshot endpoint until results are ready, then stream them
+
+        Polls back off exponentially (see BrightDataClient.wait_for_snapshots) and
+        the download starts as soon as the snapshot reports ready. Each profile is
+        handed to handle_profile as soon as it is parsed from the download stream.
 
         Args:
             snapshot_id: Snapshot ID to poll
+            handle_profile: Called with (snapshot_id, profile) for every profile
             max_wait_time: Maximum time to wait in seconds
-            poll_interval: Seconds between poll attempts
 
         Returns:
-            List of profile dictionaries or None if failed/timeout
+            BrightDataClient.wait_for_snapshot result (record_count, or error + status)
         """
-        snapshot_url = f"https://api.brightdata.com/datasets/snapshots/{snapshot_id}"
-        start_time = time.time()
-        attempt = 0
-
-        while time.time() - start_time < max_wait_time:
-            attempt += 1
-            elapsed = time.time() - start_time
-
-            try:
-                # Check snapshot status
-                response = requests.get(
-                    snapshot_url,
-                    headers=self._get_headers(),
-                    timeout=30
-                )
-
-                if not response.ok:
-                    logger.warning(f"Attempt {attempt}: Status check failed ({response.status_code})")
-                    await asyncio.sleep(poll_interval)
-                    continue
-
-                snapshot_info = response.json()
-                status = snapshot_info.get("status")
-
-                logger.info(f"Attempt {attempt} (elapsed: {elapsed:.0f}s): Status = {status}")
-
-                if status == "ready":
-                    # CHECK RESULT COUNT BEFORE DOWNLOADING (max 100 profiles)
-                    # BrightData API returns "dataset_size" as the number of records
-                    result_count = snapshot_info.get("dataset_size", 0)
-                    logger.info(f"Snapshot ready with {result_count} records (dataset_size)")
-
-                    if result_count > 100:
-                        logger.warning(f"❌ Snapshot has {result_count} records (max allowed: 100)")
-                        logger.warning("   Rejecting snapshot to avoid excessive API costs")
-                        logger.warning("   Suggestion: Add more specific filters or reduce target titles")
-                        logger.warning(f"   Snapshot ID: {snapshot_id}")
-                        return None
-
-                    logger.info(f"✅ Dataset size OK ({result_count} ≤ 100), proceeding with download...")
-
-                    # Add small delay to allow download endpoint to catch up with status endpoint
-                    await asyncio.sleep(5)
-
-                    download_url = f"{snapshot_url}/download?format=json"
-
-                    # Try downloading with retries for async download readiness
-                    max_download_attempts = 15
-                    download_attempt = 0
-
-                    while download_attempt < max_download_attempts:
-                        download_attempt += 1
-
-                        try:
-                            logger.info(f"   Download attempt {download_attempt}/{max_download_attempts}...")
-                            download_response = requests.get(
-                                download_url,
-                                headers=self._get_headers(),
-                                timeout=120
-                            )
-
-                            if download_response.ok:
-                                # Check if response is the "still building" message
-                                response_text = download_response.text
-                                if "building" in response_text.lower() and len(response_text) < 200:
-                                    logger.info(f"   Download endpoint still building, waiting 10s...")
-                                    await asyncio.sleep(10)
-                                    continue
-
-                                # Try to parse as JSON
-                                try:
-                                    profiles = download_response.json()
-                                    logger.info(f"✅ Successfully retrieved {len(profiles)} profiles")
-                                    return profiles
-                                except Exception as e:
-                                    logger.warning(f"   JSON parse failed: {e}")
-                                    if download_attempt < max_download_attempts:
-                                        await asyncio.sleep(10)
-                                        continue
-                                    else:
-                                        logger.error(f"❌ All download attempts exhausted")
-                                        logger.error(f"   Response preview: {repr(response_text[:500])}")
-                                        return None
-                            else:
-                                logger.warning(f"   Download failed: HTTP {download_response.status_code}")
-                                if download_attempt < max_download_attempts:
-                                    await asyncio.sleep(10)
-                                    continue
-                                else:
-                                    logger.error(f"❌ Download failed after {max_download_attempts} attempts")
-                                    return None
-
-                        except Exception as e:
-                            logger.error(f"   Download request failed: {e}")
-                            if download_attempt < max_download_attempts:
-                                await asyncio.sleep(10)
-                                continue
-                            else:
-                                logger.error(f"❌ Download failed with exception after {max_download_attempts} attempts")
-                                return None
-
-                    logger.error("Failed to download profile data after all retries")
-                    return None
-
-                elif status == "failed":
-                    logger.error(f"Snapshot failed: {snapshot_info}")
-                    warning = snapshot_info.get("warning", "Unknown error")
-                    logger.warning(f"Failure reason: {warning}")
-                    return None
-
-                elif status in ["scheduled", "building"]:
-                    # Still processing, wait and retry
-                    await asyncio.sleep(poll_interval)
-                    continue
-
-                else:
-                    logger.warning(f"Unknown status: {status}")
-                    await asyncio.sleep(poll_interval)
-                    continue
+        # Reject snapshots over 100 records before downloading (avoids excessive API costs)
+        result = await self.client.wait_for_snapshot(
+            snapshot_id, max_wait_time=max_wait_time, max_records=self.MAX_SNAPSHOT_RECORDS, handle_record=handle_profile
+        )
 
-            except Exception as e:
-                logger.error(f"Error polling snapshot (attempt {attempt}): {e}")
-                await asyncio.sleep(poll_interval)
-                continue
+        if not result["success"]:
+            logger.error(f"Snapshot {snapshot_id}: {result['error']} ({result['polls']} polls, {result['seconds']}s)")
+            if result["status"] == "too_large":
+                logger.warning("   Suggestion: Add more specific filters or reduce target titles")
+            return result
 
-        logger.error(f"Timeout after {max_wait_time}s")
-        return None
+        logger.info(f"✅ Streamed {result['record_count']} profiles after {result['polls']} polls ({result['seconds']}s)")
+        return result
 
     async def step2_filter_prospects(
         self,
@@ -623,7 +932,8 @@ class BrightDataProspectDiscoveryService:
         company_name: str,
         company_city: str = None,
         company_state: str = None,
-        location_filter_enabled: bool = True
+        location_filter_enabled: bool = True,
+        run_context: Optional[Union[BrightDataRunContext, Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """
         STEP 2: Filter Bright Data prospects (NO SCRAPING - we already have the data!)
@@ -640,6 +950,8 @@ class BrightDataProspectDiscoveryService:
             company_city: City for location filtering
             company_state: State for location filtering
             location_filter_enabled: Whether to apply location filter
+            run_context: Step 1 "run_context" (BrightDataRunContext or its dict form)
+                carrying this hospital's AI company variations
 
         Returns:
             Filtered prospects ready for AI ranking
@@ -648,8 +960,14 @@ class BrightDataProspectDiscoveryService:
             logger.info(f"STEP 2: Filtering {len(enriched_prospects)} Bright Data prospects")
             logger.info("   ✅ Skipping LinkedIn scraping - using Bright Data profiles directly")
 
-            # Use AI-generated company variations from Step 1 for validation
-            company_variations = getattr(self, '_company_variations', [company_name])
+            # Use AI-generated company variations from this hospital's Step 1 for validation
+            if isinstance(run_context, dict):
+                run_context = BrightDataRunContext.from_dict(run_context)
+            if run_context and run_context.company_variations:
+                company_variations = run_context.company_variations
+            else:
+                logger.warning("   → No Step 1 run_context - validating against the company name only")
+                company_variations = [company_name]
             logger.info(f"   → Using {len(company_variations)} AI company variations for validation")
             logger.debug(f"   → Variations: {company_variations}")
 
@@ -716,93 +1034,120 @@ class BrightDataProspectDiscoveryService:
         passed = []
         filtered_out = []
 
-        # Normalize all company variations for matching
+        variations_normalized = self._normalize_variations(company_variations)
+        logger.debug(f"   → Normalized variations for matching: {variations_normalized}")
+
+        for prospect in enriched_prospects:
+            rejection = self._filter_prospect(
+                prospect,
+                variations_normalized,
+                company_variations,
+                company_city,
+                company_state,
+                location_filter_enabled
+            )
+            if rejection:
+                filtered_out.append(rejection)
+            else:
+                passed.append(prospect)
+
+        return {"passed": passed, "filtered_out": filtered_out}
+
+    def _normalize_variations(self, company_variations: List[str]) -> List[str]:
+        """Normalize company variations for matching (same as _validate_company_match)"""
         variations_normalized = []
         for variation in company_variations:
             normalized = variation.lower().strip()
             # Apply same normalization as _validate_company_match
             normalized = normalized.replace('st.', 'saint').replace('st ', 'saint ')
             variations_normalized.append(normalized)
+        return variations_normalized
 
-        logger.debug(f"   → Normalized variations for matching: {variations_normalized}")
+    def _filter_prospect(
+        self,
+        prospect: Dict,
+        variations_normalized: List[str],
+        company_variations: List[str],
+        company_city: str,
+        company_state: str,
+        location_filter_enabled: bool
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Step 2 checks for a single prospect
 
-        for prospect in enriched_prospects:
-            linkedin_data = prospect.get('linkedin_data', {})
-            current_company = (linkedin_data.get('company') or linkedin_data.get('company_name') or '').strip()
-            current_title = (linkedin_data.get('job_title') or linkedin_data.get('headline') or '').lower().strip()
-
-            # Filter interns/students
-            if "intern" in current_title or "student" in current_title:
-                filtered_out.append({
-                    "stage": "intern_student_filter",
-                    "name": linkedin_data.get('name', 'Unknown'),
-                    "linkedin_url": prospect.get('linkedin_url', ''),
-                    "reason": f"Intern/student: {current_title}"
-                })
-                continue
+        Returns the filtered_out entry if the prospect is rejected, or None if it
+        passed (prospect["advanced_filter"] is set).
+        """
+        linkedin_data = prospect.get('linkedin_data', {})
+        current_company = (linkedin_data.get('company') or linkedin_data.get('company_name') or '').strip()
+        current_title = (linkedin_data.get('job_title') or linkedin_data.get('headline') or '').lower().strip()
 
-            # Company validation using AI variations
-            company_match_result = self._validate_company_match_with_variations(
-                current_company, variations_normalized, linkedin_data.get('name', 'Unknown')
-            )
+        # Filter interns/students
+        if "intern" in current_title or "student" in current_title:
+            return {
+                "stage": "intern_student_filter",
+                "name": linkedin_data.get('name', 'Unknown'),
+                "linkedin_url": prospect.get('linkedin_url', ''),
+                "reason": f"Intern/student: {current_title}"
+            }
 
-            if not company_match_result['is_match']:
-                filtered_out.append({
-                    "stage": "company_validation",
-                    "name": linkedin_data.get('name', 'Unknown'),
-                    "linkedin_url": prospect.get('linkedin_url', ''),
-                    "reason": company_match_result['reason']
-                })
-                continue
+        # Company validation using AI variations
+        company_match_result = self._validate_company_match_with_variations(
+            current_company, variations_normalized, linkedin_data.get('name', 'Unknown')
+        )
 
-            # Employment status validation
-            employment_status_result = self._validate_employment_status_with_variations(
-                linkedin_data, company_variations
-            )
+        if not company_match_result['is_match']:
+            return {
+                "stage": "company_validation",
+                "name": linkedin_data.get('name', 'Unknown'),
+                "linkedin_url": prospect.get('linkedin_url', ''),
+                "reason": company_match_result['reason']
+            }
 
-            if not employment_status_result['is_current_employee']:
-                filtered_out.append({
-                    "stage": "employment_status",
-                    "name": linkedin_data.get('name', 'Unknown'),
-                    "linkedin_url": prospect.get('linkedin_url', ''),
-                    "reason": employment_status_result['reason']
-                })
-                continue
+        # Employment status validation
+        employment_status_result = self._validate_employment_status_with_variations(
+            linkedin_data, company_variations
+        )
 
-            # Location validation
-            if location_filter_enabled and company_state:
-                location_match_result = self.three_step_service._validate_location_match(
-                    linkedin_data.get('location', ''),
-                    company_city,
-                    company_state,
-                    linkedin_data.get('name', 'Unknown')
-                )
+        if not employment_status_result['is_current_employee']:
+            return {
+                "stage": "employment_status",
+                "name": linkedin_data.get('name', 'Unknown'),
+                "linkedin_url": prospect.get('linkedin_url', ''),
+                "reason": employment_status_result['reason']
+            }
 
-                if not location_match_result['is_match']:
-                    filtered_out.append({
-                        "stage": "location_validation",
-                        "name": linkedin_data.get('name', 'Unknown'),
-                        "linkedin_url": prospect.get('linkedin_url', ''),
-                        "reason": location_match_result['reason']
-                    })
-                    continue
+        # Location validation
+        if location_filter_enabled and company_state:
+            location_match_result = self.three_step_service._validate_location_match(
+                linkedin_data.get('location', ''),
+                company_city,
+                company_state,
+                linkedin_data.get('name', 'Unknown')
+            )
 
-            # Calculate seniority score
-            from .improved_prospect_discovery import improved_prospect_discovery_service
-            seniority_score = improved_prospect_discovery_service._calculate_seniority_score(linkedin_data)
-
-            prospect["advanced_filter"] = {
-                "passed": True,
-                "company_match": company_match_result['is_match'],
-                "seniority_score": seniority_score,
-                "current_title": current_title,
-                "current_company": current_company,
-                "matched_variation": company_match_result.get('matched_variation')
-            }
+            if not location_match_result['is_match']:
+                return {
+                    "stage": "location_validation",
+                    "name": linkedin_data.get('name', 'Unknown'),
+                    "linkedin_url": prospect.get('linkedin_url', ''),
+                    "reason": location_match_result['reason']
+                }
 
-            passed.append(prospect)
+        # Calculate seniority score
+        from .improved_prospect_discovery import improved_prospect_discovery_service
+        seniority_score = improved_prospect_discovery_service._calculate_seniority_score(linkedin_data)
+
+        prospect["advanced_filter"] = {
+            "passed": True,
+            "company_match": company_match_result['is_match'],
+            "seniority_score": seniority_score,
+            "current_title": current_title,
+            "current_company": current_company,
+            "matched_variation": company_match_result.get('matched_variation')
+        }
 
-        return {"passed": passed, "filtered_out": filtered_out}
+        return None
 
     def _validate_company_match_with_variations(
         self, current_company: str, variations_normalized: List[str], prospect_name: str
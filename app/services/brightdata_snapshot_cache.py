@@ -0,0 +1,248 @@
+"""
+Bright Data Snapshot Cache
+Maps a canonicalized dataset filter to the snapshot it produced and the records downloaded
+
+Every Step 1 run builds a deterministic filter tree (company variations, titles,
+exclusions, state, min connections) and used to pay for a new snapshot each time.
+Within the freshness window (BRIGHTDATA_SNAPSHOT_CACHE_TTL_HOURS, default 7 days):
+
+- exact:    the same canonical filter reuses the stored records as-is
+- superset: a stored snapshot whose filter is broader (more variations / titles,
+            fewer exclusions, lower min connections) is filtered locally with the
+            new filter - only if that snapshot wasn't truncated at records_limit
+
+Entries live in a ResponseCache (namespace "brightdata_snapshot"); an index per
+dataset + scope (the company state) lists the stored filters so broader ones can
+be found.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from .response_cache import ResponseCache, ttl_from_env
+
+logger = logging.getLogger(__name__)
+
+# Hospital staff lists move slowly; Bright Data refreshes the dataset less often than this
+DEFAULT_SNAPSHOT_CACHE_TTL = 7 * 24 * 3600
+
+# Stored filters remembered per dataset + state for superset lookups
+MAX_INDEX_ENTRIES = 50
+
+COMPARISON_OPERATORS = {
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+}
+
+
+def canonicalize_filter(node: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Order-independent form of a Bright Data filter tree
+
+    Group children are canonicalized recursively, de-duplicated and sorted; string
+    values are lowercased and stripped; single-child groups collapse to the child.
+    """
+    if "filters" in node:
+        children = {}
+        for child in node["filters"]:
+            canonical = canonicalize_filter(child)
+            children[json.dumps(canonical, sort_keys=True)] = canonical
+        if len(children) == 1:
+            return next(iter(children.values()))
+        return {"operator": node["operator"].lower(), "filters": [children[key] for key in sorted(children)]}
+
+    value = node.get("value")
+    if isinstance(value, str):
+        value = value.strip().lower()
+    return {"name": node["name"], "operator": node["operator"].lower(), "value": value}
+
+
+def filter_hash(payload: Dict[str, Any]) -> str:
+    """sha256 over the dataset, records limit and canonical filter"""
+    canonical = {
+        "dataset_id": payload.get("dataset_id"),
+        "records_limit": payload.get("records_limit"),
+        "filter": canonicalize_filter(payload["filter"])
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _clauses(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Top-level AND clauses of a canonical filter"""
+    return node["filters"] if node.get("operator") == "and" else [node]
+
+
+def _alternatives(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return node["filters"] if node.get("operator") == "or" else [node]
+
+
+def _leaf_implies(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """Does every record matching leaf a also match leaf b?"""
+    if a == b:
+        return True
+    if "filters" in a or "filters" in b or a["name"] != b["name"]:
+        return False
+    if a["operator"] == b["operator"] == "includes":
+        return isinstance(a["value"], str) and isinstance(b["value"], str) and b["value"] in a["value"]
+    if a["operator"] == b["operator"] and a["operator"] in (">=", ">"):
+        return a["value"] >= b["value"]
+    if a["operator"] == b["operator"] and a["operator"] in ("<=", "<"):
+        return a["value"] <= b["value"]
+    return False
+
+
+def _implies(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """Does clause a imply clause b? (each alternative of a implies some alternative of b)"""
+    return all(any(_leaf_implies(x, y) for y in _alternatives(b)) for x in _alternatives(a))
+
+
+def filter_covers(broad: Dict[str, Any], narrow: Dict[str, Any]) -> bool:
+    """True if every record matching the canonical filter `narrow` also matches `broad`"""
+    narrow_clauses = _clauses(narrow)
+    return all(any(_implies(n, b) for n in narrow_clauses) for b in _clauses(broad))
+
+
+def record_matches(record: Dict[str, Any], node: Dict[str, Any]) -> bool:
+    """Evaluate a (canonical) Bright Data filter against one downloaded record"""
+    if "filters" in node:
+        results = (record_matches(record, child) for child in node["filters"])
+        return all(results) if node["operator"] == "and" else any(results)
+
+    operator, value = node["operator"], node["value"]
+    field = record.get(node["name"])
+    if operator in ("includes", "not_includes"):
+        found = str(value).lower() in str(field or "").lower()
+        return found if operator == "includes" else not found
+    if operator in COMPARISON_OPERATORS:
+        if field is None:
+            return False
+        try:
+            return COMPARISON_OPERATORS[operator](float(field), float(value))
+        except (TypeError, ValueError):
+            return COMPARISON_OPERATORS[operator](str(field).lower(), str(value).lower())
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+class BrightDataSnapshotCache:
+    """Filter hash → snapshot_id + records, with superset reuse"""
+
+    def __init__(self):
+        self.enabled = os.getenv('BRIGHTDATA_SNAPSHOT_CACHE_ENABLED', 'true').lower() == 'true'
+        self.ttl = ttl_from_env('BRIGHTDATA_SNAPSHOT_CACHE_TTL_HOURS', DEFAULT_SNAPSHOT_CACHE_TTL)
+        self.cache = ResponseCache(
+            namespace="brightdata_snapshot",
+            max_entries=int(os.getenv('BRIGHTDATA_SNAPSHOT_CACHE_MAX_ENTRIES', '200')),
+            default_ttl_seconds=self.ttl,
+            persistent=os.getenv('BRIGHTDATA_SNAPSHOT_CACHE_PERSISTENT', 'true').lower() == 'true'
+        )
+        self._stats = {"exact_hits": 0, "superset_hits": 0, "misses": 0, "stores": 0}
+
+    async def lookup(self, payload: Dict[str, Any], scope: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find stored records for a filter payload
+
+        Args:
+            payload: Dataset filter payload (dataset_id, records_limit, filter)
+            scope: Index bucket searched for broader filters (the company state)
+
+        Returns:
+            {"snapshot_id", "records", "match": "exact" | "superset", "age_seconds"} or None
+        """
+        if not self.enabled:
+            return None
+
+        key = filter_hash(payload)
+        entry = await self.cache.get(self.cache.make_key("snapshot", key), call_site="exact")
+        if entry is not None:
+            self._stats["exact_hits"] += 1
+            return self._hit(entry, entry["records"], "exact")
+
+        narrow = canonicalize_filter(payload["filter"])
+        index = await self.cache.get(self._index_key(payload, scope), call_site="index") or []
+        for candidate in sorted(index, key=lambda c: c["stored_at"], reverse=True):
+            if time.time() - candidate["stored_at"] > self.ttl:
+                continue
+            # A truncated snapshot may be missing records the narrower filter would match
+            if candidate["record_count"] >= (candidate.get("records_limit") or float("inf")):
+                continue
+            if not filter_covers(candidate["filter"], narrow):
+                continue
+
+            entry = await self.cache.get(self.cache.make_key("snapshot", candidate["filter_hash"]), call_site="superset")
+            if entry is None:
+                continue
+            try:
+                records = [record for record in entry["records"] if record_matches(record, narrow)]
+            except ValueError as e:
+                logger.warning(f"Snapshot {entry['snapshot_id']} can't be refiltered locally: {e}")
+                continue
+
+            if payload.get("records_limit"):
+                records = records[:payload["records_limit"]]
+            self._stats["superset_hits"] += 1
+            return self._hit(entry, records, "superset")
+
+        self._stats["misses"] += 1
+        return None
+
+    async def store(self, payload: Dict[str, Any], snapshot_id: str, records: List[Dict[str, Any]],
+                    scope: Optional[str] = None):
+        """Remember a fully downloaded snapshot for this filter"""
+        if not self.enabled:
+            return
+
+        key = filter_hash(payload)
+        now = time.time()
+        await self.cache.set(
+            self.cache.make_key("snapshot", key),
+            {"snapshot_id": snapshot_id, "records": records, "stored_at": now},
+            call_site="store"
+        )
+
+        # Read-modify-write of the index: a concurrent store may drop an entry, which
+        # only costs a missed superset match
+        index_key = self._index_key(payload, scope)
+        index = await self.cache.get(index_key, call_site="index") or []
+        index = [c for c in index if c["filter_hash"] != key and now - c["stored_at"] <= self.ttl]
+        index.append({
+            "filter_hash": key,
+            "filter": canonicalize_filter(payload["filter"]),
+            "record_count": len(records),
+            "records_limit": payload.get("records_limit"),
+            "stored_at": now
+        })
+        await self.cache.set(index_key, index[-MAX_INDEX_ENTRIES:], call_site="index")
+        self._stats["stores"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Exact / superset hit counters plus the underlying cache tiers"""
+        lookups = self._stats["exact_hits"] + self._stats["superset_hits"] + self._stats["misses"]
+        hits = self._stats["exact_hits"] + self._stats["superset_hits"]
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            **self._stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "cache": self.cache.stats()
+        }
+
+    def _hit(self, entry: Dict[str, Any], records: List[Dict[str, Any]], match: str) -> Dict[str, Any]:
+        age = time.time() - entry["stored_at"]
+        logger.info(f"♻️ Reusing Bright Data snapshot {entry['snapshot_id']} ({match} match, "
+                    f"{len(records)} records, {age / 3600:.1f}h old)")
+        return {"snapshot_id": entry["snapshot_id"], "records": records, "match": match, "age_seconds": round(age)}
+
+    def _index_key(self, payload: Dict[str, Any], scope: Optional[str]) -> str:
+        return self.cache.make_key("index", payload.get("dataset_id"), (scope or "").strip().lower())
+
+
+# Global instance
+brightdata_snapshot_cache = BrightDataSnapshotCache()
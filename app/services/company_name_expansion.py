@@ -6,7 +6,6 @@ Uses OpenAI to identify all variations of how a company might be listed on Linke
 import os
 import logging
 from typing import List, Dict, Any
-from openai import OpenAI
 import json
 
 # Import centralized prompts
@@ -15,6 +14,8 @@ from app.prompts import (
     COMPANY_NAME_EXPANSION_USER_PROMPT_TEMPLATE
 )
 
+from app.services.llm_gateway import llm_gateway
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,7 +27,7 @@ class CompanyNameExpansionService:
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
 
         if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = llm_gateway.client
             logger.info(f"Company name expansion service initialized with model: {self.model}")
         else:
             self.client = None
@@ -84,7 +85,9 @@ Return ONLY a JSON array of strings (no explanations):
 }}
 """
 
-            response = self.client.chat.completions.create(
+            # Served from the LLM cache when this company was expanded before
+            output_text = await llm_gateway.create_chat_completion_text(
+                "company_name_expansion",
                 model=self.model,
                 messages=[
                     {
@@ -101,7 +104,7 @@ Return ONLY a JSON array of strings (no explanations):
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(output_text)
             variations = result.get("variations", [company_name])
 
             # Always ensure the original name is in the list
@@ -7,9 +7,11 @@ import os
 import logging
 from typing import List, Dict, Any, Optional
 import openai
-from openai import OpenAI
 import json
 
+from app.services.llm_gateway import llm_gateway
+from app.services.cost_tracking import openai_cost
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,7 +23,7 @@ class CompanyValidationService:
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')  # Default to gpt-4o-mini
         
         if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = llm_gateway.client
             logger.info(f"Company validation initialized with model: {self.model}")
         else:
             self.client = None
@@ -66,7 +68,8 @@ class CompanyValidationService:
             prompt = self._build_validation_prompt(validation_data, target_company)
             
             # Call OpenAI API
-            response = self.client.chat.completions.create(
+            response = await llm_gateway.create_chat_completion(
+                call_site="company_validation",
                 model=self.model,
                 messages=[
                     {
@@ -98,7 +101,7 @@ class CompanyValidationService:
                 "currently_employed_count": len(validated_prospects),
                 "validated_prospects": validated_prospects,
                 "validation_details": validation_result,
-                "cost_estimate": 0.0008  # Updated for gpt-4o-mini pricing
+                "cost_estimate": openai_cost(self.model, response.usage)
             }
             
         except Exception as e:
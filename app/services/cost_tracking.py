@@ -0,0 +1,458 @@
+"""
+Cost Tracking
+Records actual API spend per request from vendor usage data and stores it in Postgres.
+
+- OpenAI: usage tokens from each response, priced per model
+- Apify: run usageTotalUsd (or compute units when the run has no USD total)
+- Serper: one billable query per successful search
+- Bright Data: records downloaded from a snapshot
+
+Events are collected in a request-scoped CostScope (contextvar, so asyncio.gather
+fan-outs inherit it) and written to the cost_events table when the scope closes.
+Stages tag events inside a request ("title_filter", "ai_ranking") and meter their cost.
+"""
+
+import os
+import time
+import logging
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from .event_stream import is_event_stream
+
+logger = logging.getLogger(__name__)
+
+# OpenAI list prices, USD per 1M tokens: (input, cached input, output)
+# Matched by longest model-name prefix ("gpt-5-mini-2025-08-07" → "gpt-5-mini")
+OPENAI_PRICES_PER_1M = {
+    "gpt-5": (1.25, 0.125, 10.00),
+    "gpt-5-mini": (0.25, 0.025, 2.00),
+    "gpt-5-nano": (0.05, 0.005, 0.40),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+# Unknown models are priced like gpt-5 so spend is never under-reported
+DEFAULT_OPENAI_PRICE = OPENAI_PRICES_PER_1M["gpt-5"]
+
+SERPER_COST_PER_QUERY = float(os.getenv('SERPER_COST_PER_QUERY', '0.001'))
+BRIGHTDATA_COST_PER_RECORD = float(os.getenv('BRIGHTDATA_COST_PER_RECORD', '0.0025'))
+APIFY_COST_PER_COMPUTE_UNIT = float(os.getenv('APIFY_COST_PER_COMPUTE_UNIT', '0.30'))
+
+
+@dataclass
+class UsageEvent:
+    """One billable call"""
+    vendor: str
+    operation: Optional[str]
+    cost_usd: float
+    quantity: Optional[float] = None
+    unit: Optional[str] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    stage: Optional[str] = None
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class CostScope:
+    """Events recorded while handling one request (or one job / script run)"""
+    endpoint: Optional[str] = None
+    company_name: Optional[str] = None
+    events: List[UsageEvent] = field(default_factory=list)
+    # Set for streamed responses - the stream flushes the scope once its body is sent
+    flush_deferred: bool = False
+
+    def summary(self) -> Dict[str, Any]:
+        return summarize_events(self.events)
+
+
+class CostMeter:
+    """Running total for a stage - events recorded inside `cost_tracker.stage()` land here too"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.events: List[UsageEvent] = []
+
+    @property
+    def cost_usd(self) -> float:
+        return round(sum(event.cost_usd for event in self.events), 6)
+
+    def summary(self) -> Dict[str, Any]:
+        return summarize_events(self.events)
+
+
+_current_scope: ContextVar[Optional[CostScope]] = ContextVar("cost_scope", default=None)
+_current_meters: ContextVar[Tuple[CostMeter, ...]] = ContextVar("cost_meters", default=())
+
+
+def openai_price(model: Optional[str]) -> Tuple[float, float, float]:
+    """Price tuple for a model, by longest matching prefix"""
+    model = (model or "").lower()
+    matches = [prefix for prefix in OPENAI_PRICES_PER_1M if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_OPENAI_PRICE
+    return OPENAI_PRICES_PER_1M[max(matches, key=len)]
+
+
+def openai_token_counts(usage: Any) -> Dict[str, int]:
+    """
+    Normalize token usage from either OpenAI API
+
+    Responses API: input_tokens / output_tokens / input_tokens_details.cached_tokens
+    Chat Completions: prompt_tokens / completion_tokens / prompt_tokens_details.cached_tokens
+    """
+    input_tokens = getattr(usage, "input_tokens", None)
+    output_tokens = getattr(usage, "output_tokens", None)
+    input_details = getattr(usage, "input_tokens_details", None)
+    output_details = getattr(usage, "output_tokens_details", None)
+    if input_tokens is None:
+        input_tokens = getattr(usage, "prompt_tokens", 0)
+        output_tokens = getattr(usage, "completion_tokens", 0)
+        input_details = getattr(usage, "prompt_tokens_details", None)
+        output_details = getattr(usage, "completion_tokens_details", None)
+
+    return {
+        "input_tokens": input_tokens or 0,
+        "output_tokens": output_tokens or 0,
+        "cached_tokens": getattr(input_details, "cached_tokens", 0) or 0,
+        "reasoning_tokens": getattr(output_details, "reasoning_tokens", 0) or 0,
+    }
+
+
+def openai_cost(model: Optional[str], usage: Any) -> float:
+    """USD cost of one OpenAI response from its usage (reasoning tokens are billed as output)"""
+    if usage is None:
+        return 0.0
+    tokens = openai_token_counts(usage)
+    input_price, cached_price, output_price = openai_price(model)
+    return (
+        (tokens["input_tokens"] - tokens["cached_tokens"]) * input_price
+        + tokens["cached_tokens"] * cached_price
+        + tokens["output_tokens"] * output_price
+    ) / 1_000_000
+
+
+def summarize_events(events: List[UsageEvent]) -> Dict[str, Any]:
+    """Totals by vendor and stage for a list of events"""
+    by_vendor: Dict[str, Dict[str, Any]] = {}
+    by_stage: Dict[str, float] = {}
+    qualified_leads = 0
+
+    for event in events:
+        if event.vendor == "pipeline" and event.operation == "qualified_leads":
+            qualified_leads += int(event.quantity or 0)
+            continue
+        vendor = by_vendor.setdefault(event.vendor, {"calls": 0, "cost_usd": 0.0})
+        vendor["calls"] += 1
+        vendor["cost_usd"] += event.cost_usd
+        if event.input_tokens is not None:
+            vendor["input_tokens"] = vendor.get("input_tokens", 0) + event.input_tokens
+            vendor["output_tokens"] = vendor.get("output_tokens", 0) + (event.output_tokens or 0)
+        if event.quantity is not None and event.unit:
+            vendor[event.unit] = vendor.get(event.unit, 0) + event.quantity
+        stage = event.stage or "unstaged"
+        by_stage[stage] = by_stage.get(stage, 0.0) + event.cost_usd
+
+    total = sum(vendor["cost_usd"] for vendor in by_vendor.values())
+    for vendor in by_vendor.values():
+        vendor["cost_usd"] = round(vendor["cost_usd"], 6)
+
+    summary = {
+        "total_cost_usd": round(total, 6),
+        "by_vendor": by_vendor,
+        "by_stage": {stage: round(cost, 6) for stage, cost in by_stage.items()},
+    }
+    if qualified_leads:
+        summary["qualified_leads"] = qualified_leads
+        summary["cost_per_qualified_lead"] = round(total / qualified_leads, 4)
+    return summary
+
+
+class CostTracker:
+    """Records usage events into the current scope and persists them"""
+
+    def __init__(self):
+        self.enabled = os.getenv('COST_TRACKING_ENABLED', 'true').lower() == 'true'
+
+    @asynccontextmanager
+    async def scope(self, endpoint: Optional[str] = None, company_name: Optional[str] = None):
+        """
+        Collect events for one request / job and write them to cost_events on exit
+
+        Usage (scripts, background jobs - HTTP requests get one from CostTrackingMiddleware):
+            async with cost_tracker.scope("batch_script", company_name) as scope:
+                ...
+            print(scope.summary())
+        """
+        scope = CostScope(endpoint=endpoint, company_name=company_name)
+        token = _current_scope.set(scope)
+        try:
+            yield scope
+        finally:
+            _current_scope.reset(token)
+            if not scope.flush_deferred:
+                await self.flush(scope)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Tag events recorded inside with a stage name and meter their cost"""
+        meter = CostMeter(name)
+        token = _current_meters.set(_current_meters.get() + (meter,))
+        try:
+            yield meter
+        finally:
+            _current_meters.reset(token)
+
+    def current_scope(self) -> Optional[CostScope]:
+        return _current_scope.get()
+
+    def request_summary(self) -> Dict[str, Any]:
+        """Cost summary of everything recorded so far in the current request"""
+        scope = _current_scope.get()
+        return scope.summary() if scope is not None else summarize_events([])
+
+    def set_company(self, company_name: Optional[str]):
+        """Attach the hospital being processed to the current request's events"""
+        scope = _current_scope.get()
+        if scope is not None and company_name:
+            scope.company_name = company_name
+
+    def record(
+        self,
+        vendor: str,
+        operation: Optional[str],
+        cost_usd: float,
+        stage: Optional[str] = None,
+        **fields
+    ) -> UsageEvent:
+        """
+        Record one billable call in the current scope and any active stage meters
+
+        The innermost `cost_tracker.stage()` names the event's stage; `stage` is the
+        fallback when the call isn't inside one.
+        """
+        meters = _current_meters.get()
+        event = UsageEvent(
+            vendor=vendor,
+            operation=operation,
+            cost_usd=round(cost_usd, 8),
+            stage=meters[-1].name if meters else stage,
+            **fields
+        )
+        if not self.enabled:
+            return event
+
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.events.append(event)
+        for meter in meters:
+            meter.events.append(event)
+        return event
+
+    def record_openai(self, model: Optional[str], usage: Any, call_site: Optional[str] = None) -> Optional[UsageEvent]:
+        """Record token usage from a Responses or Chat Completions result"""
+        if usage is None:
+            return None
+
+        tokens = openai_token_counts(usage)
+        return self.record(
+            "openai", model, openai_cost(model, usage),
+            stage=call_site,
+            input_tokens=tokens["input_tokens"],
+            output_tokens=tokens["output_tokens"],
+            details={
+                "call_site": call_site,
+                "cached_tokens": tokens["cached_tokens"],
+                "reasoning_tokens": tokens["reasoning_tokens"]
+            }
+        )
+
+    def record_apify_run(self, run: Dict[str, Any], actor_id: str, items: Optional[int] = None) -> UsageEvent:
+        """
+        Record an Apify actor run from its run object
+
+        Platform usage comes from usageTotalUsd (or stats.computeUnits when missing);
+        pay-per-result actors add pricingInfo.pricePerUnitUsd per dataset item.
+        """
+        compute_units = (run.get("stats") or {}).get("computeUnits")
+        usage_usd = run.get("usageTotalUsd")
+        if usage_usd is None:
+            usage_usd = (compute_units or 0) * APIFY_COST_PER_COMPUTE_UNIT
+
+        result_usd = 0.0
+        pricing = run.get("pricingInfo") or {}
+        if pricing.get("pricingModel") == "PRICE_PER_DATASET_ITEM" and items:
+            result_usd = items * float(pricing.get("pricePerUnitUsd") or 0)
+
+        return self.record(
+            "apify", actor_id, float(usage_usd) + result_usd,
+            stage="linkedin_scrape",
+            quantity=compute_units,
+            unit="compute_units",
+            details={
+                "run_id": run.get("id"),
+                "items": items,
+                "platform_usage_usd": usage_usd,
+                "result_charges_usd": result_usd
+            }
+        )
+
+    def record_serper_query(self, query: str, num_results: int = 10) -> UsageEvent:
+        # Serper bills requests for more than 10 results as 2 credits
+        credits = 1 if num_results <= 10 else 2
+        return self.record(
+            "serper", "search", credits * SERPER_COST_PER_QUERY,
+            stage="serper_search",
+            quantity=credits, unit="credits", details={"query": query[:200], "num_results": num_results}
+        )
+
+    def record_brightdata_records(self, record_count: int, snapshot_id: Optional[str] = None) -> UsageEvent:
+        return self.record(
+            "brightdata", "snapshot_download", record_count * BRIGHTDATA_COST_PER_RECORD,
+            stage="brightdata_filter",
+            quantity=record_count, unit="records", details={"snapshot_id": snapshot_id}
+        )
+
+    def record_qualified_leads(self, count: int) -> UsageEvent:
+        """Record how many qualified leads a request produced (for cost per lead)"""
+        return self.record("pipeline", "qualified_leads", 0.0, quantity=count, unit="leads")
+
+    async def flush(self, scope: CostScope):
+        """Write a scope's events to cost_events (failures are logged, never raised)"""
+        if not self.enabled or not scope.events:
+            return
+        try:
+            from app.database import AsyncSessionLocal
+            from app.models import CostEvent
+
+            async with AsyncSessionLocal() as session:
+                session.add_all([
+                    CostEvent(
+                        endpoint=scope.endpoint,
+                        company_name=scope.company_name,
+                        stage=event.stage,
+                        vendor=event.vendor,
+                        operation=event.operation,
+                        quantity=event.quantity,
+                        unit=event.unit,
+                        input_tokens=event.input_tokens,
+                        output_tokens=event.output_tokens,
+                        cost_usd=event.cost_usd,
+                        details=event.details or None
+                    )
+                    for event in scope.events
+                ])
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Failed to store {len(scope.events)} cost events: {type(e).__name__}: {str(e)}")
+
+    async def summarize(self, days: int = 7, company_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Aggregate stored spend by day, endpoint, hospital, vendor and stage
+
+        Cost per qualified lead = total spend / leads recorded by Step 3 over the same rows.
+        """
+        from sqlalchemy import select, func
+        from app.database import AsyncSessionLocal
+        from app.models import CostEvent
+
+        # Aware so the comparison with the timestamptz column is not shifted by the DB session timezone
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        day = func.date(CostEvent.created_at)
+        is_spend = CostEvent.vendor != "pipeline"
+
+        filters = [CostEvent.created_at >= since]
+        if company_name:
+            filters.append(CostEvent.company_name == company_name)
+
+        async def grouped(*columns):
+            query = (
+                select(
+                    *columns,
+                    func.sum(CostEvent.cost_usd).filter(is_spend),
+                    func.count(CostEvent.id).filter(is_spend),
+                    func.sum(CostEvent.quantity).filter(CostEvent.operation == "qualified_leads")
+                )
+                .where(*filters)
+                .group_by(*columns)
+                .order_by(func.sum(CostEvent.cost_usd).filter(is_spend).desc().nullslast())
+            )
+            rows = (await session.execute(query)).all()
+            results = []
+            for row in rows:
+                *keys, cost, calls, leads = row
+                entry = {column.key: _jsonable(value) for column, value in zip(columns, keys)}
+                entry["cost_usd"] = round(cost or 0.0, 4)
+                entry["calls"] = calls or 0
+                if leads:
+                    entry["qualified_leads"] = int(leads)
+                    entry["cost_per_qualified_lead"] = round((cost or 0.0) / leads, 4)
+                results.append(entry)
+            return results
+
+        async with AsyncSessionLocal() as session:
+            totals = await grouped()
+            return {
+                "days": days,
+                "company_name": company_name,
+                "totals": totals[0] if totals else {"cost_usd": 0.0, "calls": 0},
+                "by_day": await grouped(day.label("day")),
+                "by_endpoint": await grouped(CostEvent.endpoint),
+                "by_hospital": await grouped(CostEvent.company_name),
+                "by_vendor": await grouped(CostEvent.vendor),
+                "by_stage": await grouped(CostEvent.stage),
+            }
+
+
+def _jsonable(value: Any) -> Any:
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+class CostTrackingMiddleware(BaseHTTPMiddleware):
+    """
+    Opens a cost scope for every request so service-level usage is attributed to the endpoint.
+    Endpoints attach the hospital with cost_tracker.set_company(company_name).
+    The request's total spend is returned in the X-Request-Cost-USD header.
+
+    SSE / NDJSON responses keep recording while their body streams, so their scope is
+    logged and stored when the stream ends (no header - it's sent before the spend is known).
+    """
+
+    async def dispatch(self, request, call_next):
+        async with cost_tracker.scope(endpoint=request.url.path) as scope:
+            started = time.time()
+            response = await call_next(request)
+            if is_event_stream(response):
+                scope.flush_deferred = True
+                response.body_iterator = self._flush_after_stream(response.body_iterator, request, scope, started)
+                return response
+            if scope.events:
+                response.headers["X-Request-Cost-USD"] = f"{scope.summary()['total_cost_usd']:.6f}"
+                logger.info(
+                    f"{request.url.path} cost ${scope.summary()['total_cost_usd']:.4f} "
+                    f"({len(scope.events)} billable calls, {time.time() - started:.1f}s)"
+                )
+            return response
+
+    async def _flush_after_stream(self, body_iterator, request, scope: CostScope, started: float):
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            if scope.events:
+                logger.info(
+                    f"{request.url.path} (streamed) cost ${scope.summary()['total_cost_usd']:.4f} "
+                    f"({len(scope.events)} billable calls, {time.time() - started:.1f}s)"
+                )
+            await cost_tracker.flush(scope)
+
+
+# Global instance
+cost_tracker = CostTracker()
@@ -0,0 +1,229 @@
+"""
+Discovery Batch Scheduler
+Runs discovery for a list of hospitals (Salesforce account ids or hospital records)
+
+Replaces the batch scripts that walked a CSV calling the step endpoints one
+hospital at a time with time.sleep in between. A batch submits one discovery job
+per hospital to the job engine; the engine's worker pool keeps several hospitals
+in flight and its per-vendor budgets interleave them, so Serper, Bright Data,
+Apify and OpenAI all stay busy without any of them going over its limits.
+
+Batch status reports live throughput (hospitals finished per hour since the
+first job started) and an ETA for the rest, plus which step each hospital is in.
+"Retry failed" re-queues only the failed hospitals, each resuming at the step
+that failed.
+"""
+
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+from .discovery_jobs import discovery_job_engine, FINISHED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Finished batches kept in memory (older ones are rebuilt from Postgres)
+MAX_BATCHES_IN_MEMORY = 20
+
+# Request fields applied to every hospital unless the hospital record overrides them
+SHARED_PARAMS = (
+    "target_titles", "force_refresh", "min_score_threshold", "max_prospects",
+    "location_filter_enabled", "queue_leads", "overlap_stages",
+)
+
+# Hospital record fields accepted from CSV-style input → job params
+HOSPITAL_FIELDS = {
+    "company_name": "company_name",
+    "name": "company_name",
+    "company_city": "company_city",
+    "city": "company_city",
+    "company_state": "company_state",
+    "state": "company_state",
+    "parent_account_name": "parent_account_name",
+    "health_system": "parent_account_name",
+    "account_id": "account_id",
+}
+
+
+def hospital_params(hospital: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Normalize one batch entry into job params
+
+    Accepts a Salesforce account id string or a hospital record using either the
+    API names (company_name, company_city, ...) or the batch CSV names (name, city,
+    state, health_system, account_id). A record with both a name and an account id
+    is used as-is; an account id alone is resolved from Salesforce by the job.
+    """
+    if isinstance(hospital, str):
+        return {"account_id": hospital.strip()}
+
+    params = {}
+    for field, param in HOSPITAL_FIELDS.items():
+        value = hospital.get(field)
+        if value not in (None, "") and param not in params:
+            params[param] = value.strip() if isinstance(value, str) else value
+    if params.get("account_id"):
+        params["company_account_id"] = params["account_id"]
+    return params
+
+
+class DiscoveryBatchScheduler:
+    """Submits a job per hospital and reports batch progress + throughput"""
+
+    def __init__(self):
+        self._batches: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def submit(self, pipeline: str, hospitals: List[Union[str, Dict[str, Any]]],
+                     shared: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Validate every hospital, then queue one discovery job each
+
+        Args:
+            pipeline: "hybrid" or "three_step"
+            hospitals: Salesforce account ids and/or hospital records
+            shared: Params applied to every hospital (target_titles, max_prospects, ...)
+
+        Returns:
+            {"success": True, "batch": status} or {"success": False, "error", "invalid": [...]}
+        """
+        if pipeline not in discovery_job_engine.pipelines:
+            return {"success": False, "error": f"Unknown pipeline '{pipeline}'"}
+        if not hospitals:
+            return {"success": False, "error": "No hospitals provided"}
+
+        shared = {key: value for key, value in (shared or {}).items() if key in SHARED_PARAMS and value is not None}
+        entries, invalid = [], []
+        for index, hospital in enumerate(hospitals):
+            params = {**shared, **hospital_params(hospital)}
+            if not params.get("company_name") and not params.get("account_id"):
+                invalid.append({"index": index, "error": "company_name or account_id is required"})
+            elif pipeline == "hybrid" and params.get("company_name") and not params.get("company_state"):
+                invalid.append({"index": index, "error": "company_state is required for accurate search"})
+            else:
+                entries.append(params)
+
+        if invalid:
+            return {"success": False, "error": f"{len(invalid)} invalid hospital(s)", "invalid": invalid}
+
+        batch_id = str(uuid.uuid4())
+        batch = {
+            "batch_id": batch_id,
+            "pipeline": pipeline,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "jobs": []
+        }
+        self._remember(batch)
+
+        for params in entries:
+            view = await discovery_job_engine.submit(pipeline, params, batch_id=batch_id)
+            batch["jobs"].append(await discovery_job_engine.get(view["job_id"]))
+
+        logger.info(f"Discovery batch {batch_id}: {len(entries)} hospitals queued ({pipeline})")
+        return {"success": True, "batch": self.status_view(batch)}
+
+    async def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Batch from memory, else rebuilt from its persisted jobs"""
+        batch = self._batches.get(batch_id)
+        if batch is not None:
+            return batch
+
+        jobs = await discovery_job_engine.load_batch(batch_id)
+        if not jobs:
+            return None
+        return {"batch_id": batch_id, "pipeline": jobs[0]["pipeline"], "created_at": jobs[0]["created_at"], "jobs": jobs}
+
+    async def retry_failed(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Re-queue the batch's failed jobs from their failed step
+
+        Returns:
+            {"retried": n, "batch": status} or None if the batch is unknown
+        """
+        batch = await self.get(batch_id)
+        if batch is None:
+            return None
+
+        retried = 0
+        for job in batch["jobs"]:
+            if job["status"] == "failed":
+                await discovery_job_engine.retry(job)
+                retried += 1
+
+        # A batch rebuilt from Postgres is tracked in memory again while it reruns
+        self._remember(batch)
+        logger.info(f"Discovery batch {batch_id}: {retried} failed hospitals re-queued")
+        return {"retried": retried, "batch": self.status_view(batch)}
+
+    def status_view(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Counts by status, live hospitals/hour + ETA, and one row per hospital"""
+        jobs = batch["jobs"]
+        counts = {status: 0 for status in ("queued", "running", "succeeded", "failed")}
+        in_step: Dict[str, int] = {}
+        for job in jobs:
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+            if job["status"] == "running" and job["current_step"]:
+                in_step[job["current_step"]] = in_step.get(job["current_step"], 0) + 1
+
+        finished = [job for job in jobs if job["status"] in FINISHED_STATUSES]
+        started = [_timestamp(job["started_at"]) for job in jobs if job["started_at"]]
+        elapsed = None
+        if started:
+            end = time.time()
+            if len(finished) == len(jobs):
+                end = max(_timestamp(job["finished_at"]) for job in finished)
+            elapsed = max(end - min(started), 1e-6)
+
+        hospitals_per_hour = round(len(finished) / elapsed * 3600, 1) if elapsed and finished else 0.0
+        remaining = len(jobs) - len(finished)
+        eta_seconds = round(remaining / hospitals_per_hour * 3600) if hospitals_per_hour and remaining else None
+
+        return {
+            "batch_id": batch["batch_id"],
+            "pipeline": batch["pipeline"],
+            "status": "finished" if not remaining else "running" if started else "queued",
+            "created_at": batch["created_at"],
+            "hospitals": len(jobs),
+            "counts": counts,
+            "in_step": in_step,
+            "throughput": {
+                "elapsed_seconds": round(elapsed) if elapsed else 0,
+                "hospitals_per_hour": hospitals_per_hour,
+                "eta_seconds": eta_seconds
+            },
+            "cost_usd": round(sum(job["cost_usd"] or 0.0 for job in finished), 6),
+            "vendor_budgets": discovery_job_engine.budget_stats(),
+            "jobs": [
+                {
+                    "job_id": job["job_id"],
+                    "company_name": job["company_name"],
+                    "account_id": job["params"].get("account_id"),
+                    "status": job["status"],
+                    "current_step": job["current_step"],
+                    "failed_step": next((step["name"] for step in job["steps"] if step["status"] == "failed"), None),
+                    "resumed_from": job.get("resumed_from"),
+                    "qualified_prospects": len((job["outputs"].get("step3") or {}).get("qualified_prospects", [])),
+                    "cost_usd": job["cost_usd"],
+                    "error": job["error"]
+                }
+                for job in jobs
+            ]
+        }
+
+    def _remember(self, batch: Dict[str, Any]):
+        self._batches[batch["batch_id"]] = batch
+        for batch_id in list(self._batches):
+            if len(self._batches) <= MAX_BATCHES_IN_MEMORY:
+                break
+            if all(job["status"] in FINISHED_STATUSES for job in self._batches[batch_id]["jobs"]):
+                del self._batches[batch_id]
+
+
+def _timestamp(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp()
+
+
+# Global instance
+discovery_batch_scheduler = DiscoveryBatchScheduler()
@@ -0,0 +1,739 @@
+"""
+Discovery Job Engine
+Runs a whole prospect discovery pipeline server-side as a background job
+
+The /discover-prospects-step1..3 and /discover-leads-step1..4 endpoints exist so
+each call stays under Railway's 5-minute request timeout - at the price of the
+client shuttling linkedin_urls / enriched_prospects / qualified_prospects between
+calls. POST /jobs/discovery returns a job id right away instead; a worker pool
+runs every step in-process and each step's output is persisted, so nothing
+crosses the wire until the client asks for results (GET /jobs/{id}/results).
+
+Pipelines:
+- hybrid:     Serper + Bright Data search → dedupe + enrich → AI ranking
+              (→ queue leads to PendingUpdates when queue_leads is set)
+              By default step 1 also scrapes the Serper URLs while Bright Data is
+              still searching (overlap_stages, see hybrid_prospect_discovery) and
+              step 2 is skipped; "overlap_stages": false runs them one after the other.
+- three_step: Serper search → Apify scrape → AI ranking
+
+Jobs submitted with an account_id instead of company details first resolve the
+Salesforce account (name, city, state, parent account).
+
+Each step declares the vendors it keeps busy, and a per-vendor budget caps how
+many jobs may be inside such a step at once (DISCOVERY_BUDGET_<VENDOR>). The
+rate governor still caps individual calls; the budgets make a batch of hospitals
+pipeline through the vendors - one searching, another scraping, a third ranking -
+instead of every hospital queueing on the same vendor and timing out together.
+
+Job state lives in memory on the worker that runs it and is written to Postgres
+(discovery_jobs table) on every step transition; GET /jobs/{id} falls back to
+Postgres for jobs this worker doesn't know about. The worker also bumps updated_at
+of its queued/running jobs every DISCOVERY_JOB_HEARTBEAT_SECONDS, so a job whose
+worker died (no update for DISCOVERY_JOB_STALE_SECONDS) can be retried elsewhere.
+
+Every finished step's output is a checkpoint, keyed by the job's input hash
+(pipeline + canonicalized params). Retrying a failed job resumes at the first
+incomplete step, and a new job whose inputs match a recently failed one
+(DISCOVERY_CHECKPOINT_TTL_HOURS, default 24h) starts from that job's
+checkpoints - search and scraping aren't paid for twice. force_refresh opts out.
+"""
+
+import os
+import json
+import time
+import hashlib
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from .cost_tracking import cost_tracker
+from .response_cache import ttl_from_env
+
+logger = logging.getLogger(__name__)
+
+# Called with (job params, outputs of the steps before it); returns the step's result dict
+StepFunction = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+# How long to stop writing jobs to Postgres after a database error
+PERSIST_BACKOFF_SECONDS = 60
+
+# Queued/running jobs are heartbeated this often; silent this long means their worker is gone
+DEFAULT_HEARTBEAT_SECONDS = 60
+DEFAULT_STALE_SECONDS = 300
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+# Search results go stale; a failed run's checkpoints are only resumed for a day
+DEFAULT_CHECKPOINT_TTL = 24 * 3600
+
+# Params that don't change the output of steps 1-3 (left out of the input hash)
+NON_INPUT_PARAMS = ("force_refresh", "queue_leads", "company_account_id")
+
+# Jobs allowed inside a step that uses the vendor at the same time
+DEFAULT_VENDOR_BUDGETS = {
+    "serper": 4,
+    "brightdata": 2,   # Each hospital holds a snapshot for minutes
+    "apify": 3,
+    "openai": 6,
+    "salesforce": 2,
+}
+
+
+@dataclass
+class PipelineStep:
+    """One pipeline step and the vendors it keeps busy (fixed, or depending on the job params)"""
+    name: str
+    title: str
+    run: StepFunction
+    vendors: Union[Tuple[str, ...], Callable[[Dict[str, Any]], Tuple[str, ...]]] = ()
+    enabled: Callable[[Dict[str, Any]], bool] = lambda params: True
+
+    def vendors_for(self, params: Dict[str, Any]) -> Tuple[str, ...]:
+        return self.vendors(params) if callable(self.vendors) else self.vendors
+
+
+async def _resolve_account(params: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in company details from the Salesforce account (explicit params win)"""
+    from .salesforce import salesforce_service
+    account = await salesforce_service.get_account_details_for_prospect_search(params["account_id"])
+    if not account.get("success"):
+        return account
+
+    params.update({
+        "company_name": account["account_name"],
+        "company_city": params.get("company_city") or account.get("city"),
+        "company_state": params.get("company_state") or account.get("state"),
+        "parent_account_name": params.get("parent_account_name") or account.get("parent_name"),
+        "company_account_id": params.get("company_account_id") or params["account_id"],
+    })
+    cost_tracker.set_company(params["company_name"])
+    return {
+        "success": True,
+        "account": account,
+        "summary": {key: params[key] for key in ("company_name", "company_city", "company_state", "parent_account_name")}
+    }
+
+
+def _needs_account(params: Dict[str, Any]) -> bool:
+    return bool(params.get("account_id")) and not params.get("company_name")
+
+
+def _overlaps_stages(params: Dict[str, Any]) -> bool:
+    """Hybrid step 1 scrapes Serper URLs alongside Bright Data unless overlap_stages is false"""
+    return params.get("overlap_stages", True) is not False
+
+
+def _canonical(value: Any) -> Any:
+    """Case/whitespace/order-insensitive form of a params value"""
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_canonical(item) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True, default=str))
+    return value
+
+
+def input_hash(pipeline: str, params: Dict[str, Any]) -> str:
+    """sha256 over the pipeline and the canonical params that determine the step outputs"""
+    inputs = {key: _canonical(value) for key, value in params.items()
+              if key not in NON_INPUT_PARAMS and value not in (None, "", [])}
+    return hashlib.sha256(json.dumps({"pipeline": pipeline, "params": inputs}, sort_keys=True, default=str)
+                          .encode("utf-8")).hexdigest()
+
+
+async def _hybrid_search(params: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+    from .hybrid_prospect_discovery import hybrid_prospect_discovery_service
+    search = hybrid_prospect_discovery_service.step1_parallel_search
+    if _overlaps_stages(params):
+        search = hybrid_prospect_discovery_service.search_and_enrich_overlapped
+    return await search(
+        company_name=params["company_name"],
+        parent_account_name=params.get("parent_account_name"),
+        target_titles=params.get("target_titles") or None,
+        company_city=params.get("company_city"),
+        company_state=params.get("company_state"),
+        force_refresh=params.get("force_refresh", False)
+    )
+
+
+async def _hybrid_enrich(params: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+    from .hybrid_prospect_discovery import hybrid_prospect_discovery_service
+    step1 = outputs["step1"]
+    return await hybrid_prospect_discovery_service.step2_deduplicate_and_enrich(
+        serper_prospects=step1.get("serper_prospects", []),
+        brightdata_prospects=step1.get("brightdata_prospects", []),
+        company_name=params["company_name"],
+        company_city=params.get("company_city"),
+        company_state=params.get("company_state")
+    )
+
+
+async def _hybrid_rank(params: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+    from .hybrid_prospect_discovery import hybrid_prospect_discovery_service
+    # Overlapped runs enrich in step 1 and skip step 2
+    enriched = outputs.get("step2") or outputs["step1"]
+    result = await hybrid_prospect_discovery_service.step3_rank_and_qualify(
+        enriched_prospects=enriched.get("enriched_prospects", []),
+        company_name=params["company_name"],
+        min_score_threshold=params.get("min_score_threshold", 65),
+        max_prospects=params.get("max_prospects", 10)
+    )
+    if result.get("success"):
+        cost_tracker.record_qualified_leads(len(result.get("qualified_prospects", [])))
+    return result
+
+
+async def _hybrid_queue_leads(params: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+    qualified_prospects = outputs["step3"].get("qualified_prospects", [])
+    if not qualified_prospects:
+        return {"success": True, "summary": {"queued": 0, "failed": 0, "total": 0}}
+
+    from app.database import AsyncSessionLocal
+    from .pending_updates import PendingUpdatesService
+    from .salesforce import salesforce_service
+
+    async with AsyncSessionLocal() as session:
+        pending_service = PendingUpdatesService(session, salesforce_service.sf)
+        result = await pending_service.queue_lead_batch(
+            prospects=qualified_prospects,
+            company_name=params["company_name"],
+            company_account_id=params.get("company_account_id")
+        )
+        await session.commit()
+    return {"success": True, "summary": {"queued": result["success"], "failed": result["failed"], "total": result["total"]}}
+
+
+async def _three_step_search(params: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+    from .three_step_prospect_discovery import three_step_prospect_discovery_service
+    return await three_step_prospect_discovery_service.step1_search_and_filter(
+        company_name=params["company_name"],
+        target_titles=params.get("target_titles") or None,
+        company_city=params.get("company_city"),
+        company_state=params.get("company_state"),
+        parent_account_name=params.get("parent_account_name"),
+        force_refresh=params.get("force_refresh", False)
+    )
+
+
+async def _three_step_scrape(params: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+    from .three_step_prospect_discovery import three_step_prospect_discovery_service
+    linkedin_urls = [p["linkedin_url"] for p in outputs["step1"].get("qualified_prospects", []) if p.get("linkedin_url")]
+    if not linkedin_urls:
+        return {"success": False, "error": "Step 1 found no LinkedIn URLs to scrape"}
+    return await three_step_prospect_discovery_service.step2_scrape_profiles(
+        linkedin_urls=linkedin_urls,
+        company_name=params["company_name"],
+        company_city=params.get("company_city"),
+        company_state=params.get("company_state"),
+        location_filter_enabled=params.get("location_filter_enabled", True)
+    )
+
+
+async def _three_step_rank(params: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+    from .three_step_prospect_discovery import three_step_prospect_discovery_service
+    result = await three_step_prospect_discovery_service.step3_rank_prospects(
+        enriched_prospects=outputs["step2"].get("enriched_prospects", []),
+        company_name=params["company_name"],
+        min_score_threshold=params.get("min_score_threshold", 65),
+        max_prospects=params.get("max_prospects", 10)
+    )
+    if result.get("success"):
+        cost_tracker.record_qualified_leads(len(result.get("qualified_prospects", [])))
+    return result
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _jsonable(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Round-trip through JSON so persisted outputs match what the client would have received"""
+    return json.loads(json.dumps(result, default=lambda value: value.to_dict() if hasattr(value, "to_dict") else str(value)))
+
+
+class DiscoveryJobEngine:
+    """Queue + worker pool running discovery pipelines, with per-step persisted outputs"""
+
+    def __init__(self):
+        self.max_workers = int(os.getenv('DISCOVERY_JOB_WORKERS', '8'))
+        self.memory_limit = int(os.getenv('DISCOVERY_JOB_MEMORY_LIMIT', '200'))
+        self.persistent = os.getenv('DISCOVERY_JOB_PERSISTENT', 'true').lower() == 'true'
+        self.checkpoint_ttl = ttl_from_env('DISCOVERY_CHECKPOINT_TTL_HOURS', DEFAULT_CHECKPOINT_TTL)
+        self.heartbeat_seconds = int(os.getenv('DISCOVERY_JOB_HEARTBEAT_SECONDS', DEFAULT_HEARTBEAT_SECONDS))
+        self.stale_seconds = int(os.getenv('DISCOVERY_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS))
+
+        self.vendor_budgets = {
+            vendor: int(os.getenv(f'DISCOVERY_BUDGET_{vendor.upper()}', budget))
+            for vendor, budget in DEFAULT_VENDOR_BUDGETS.items()
+        }
+
+        account = PipelineStep("account", "Resolve Salesforce account", _resolve_account, ("salesforce",), _needs_account)
+        self.pipelines: Dict[str, List[PipelineStep]] = {
+            "hybrid": [
+                account,
+                PipelineStep("step1", "Serper + Bright Data search", _hybrid_search,
+                             lambda params: ("serper", "brightdata", "apify") if _overlaps_stages(params)
+                             else ("serper", "brightdata")),
+                PipelineStep("step2", "Deduplicate + enrich", _hybrid_enrich, ("apify",),
+                             lambda params: not _overlaps_stages(params)),
+                PipelineStep("step3", "AI ranking", _hybrid_rank, ("openai",)),
+                PipelineStep("step4", "Queue leads for approval", _hybrid_queue_leads,
+                             enabled=lambda params: bool(params.get("queue_leads"))),
+            ],
+            "three_step": [
+                account,
+                PipelineStep("step1", "Search + filter", _three_step_search, ("serper", "openai")),
+                PipelineStep("step2", "Scrape + validate", _three_step_scrape, ("apify",)),
+                PipelineStep("step3", "AI ranking", _three_step_rank, ("openai",)),
+            ],
+        }
+
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._loop = None
+        self._persist_disabled_until = 0.0
+
+        # Per-vendor semaphores, created once per event loop
+        self._budgets: Dict[str, asyncio.Semaphore] = {}
+        self._budget_loop = None
+        self._budget_in_use = {vendor: 0 for vendor in self.vendor_budgets}
+        self._budget_waiting = {vendor: 0 for vendor in self.vendor_budgets}
+
+    async def submit(self, pipeline: str, params: Dict[str, Any], batch_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create a job and queue it for the worker pool
+
+        Args:
+            pipeline: "hybrid" or "three_step"
+            params: company_name, company_city, company_state, parent_account_name
+                (or account_id to resolve them from Salesforce), target_titles,
+                force_refresh, min_score_threshold, max_prospects,
+                location_filter_enabled (three_step), queue_leads + company_account_id +
+                overlap_stages (hybrid)
+            batch_id: Batch the job belongs to, if any
+
+        Returns:
+            The job's status view
+        """
+        if pipeline not in self.pipelines:
+            raise ValueError(f"Unknown pipeline '{pipeline}' (expected one of {sorted(self.pipelines)})")
+
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "pipeline": pipeline,
+            "batch_id": batch_id,
+            "input_hash": input_hash(pipeline, params),
+            "resumed_from": None,
+            "status": "queued",
+            "company_name": params.get("company_name"),
+            "params": params,
+            "current_step": None,
+            "steps": [
+                {"name": step.name, "title": step.title, "status": "pending" if step.enabled(params) else "skipped",
+                 "started_at": None, "finished_at": None, "waited_seconds": None, "seconds": None,
+                 "cost_usd": None, "summary": None, "error": None}
+                for step in self.pipelines[pipeline]
+            ],
+            "outputs": {},
+            "error": None,
+            "cost_usd": None,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        if not params.get("force_refresh"):
+            checkpoint = await self._find_checkpoint(job["input_hash"])
+            if checkpoint is not None:
+                self._resume_from(job, checkpoint)
+
+        await self._enqueue(job)
+        resumed = f" - resuming {job['resumed_from']} at {self._first_pending(job)}" if job["resumed_from"] else ""
+        logger.info(f"Discovery job {job['job_id']} queued ({pipeline}, {job['company_name'] or params.get('account_id')}){resumed}")
+        return self.status_view(job)
+
+    async def retry(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Re-queue a failed job; steps with checkpointed outputs are not run again
+
+        Jobs left queued/running by a dead worker (not in this worker's memory and
+        not updated for stale_seconds) can be retried too.
+
+        Raises:
+            ValueError: the job succeeded or is still being run by this or another worker
+        """
+        orphaned = job["status"] in ("queued", "running") and job["job_id"] not in self._jobs
+        if orphaned and not self._is_stale(job):
+            raise ValueError(f"Job {job['job_id']} is {job['status']} on another worker "
+                             f"(updated {self._seconds_since_update(job):.0f}s ago) - it can be retried "
+                             f"once it has been silent for {self.stale_seconds}s")
+        if job["status"] != "failed" and not orphaned:
+            raise ValueError(f"Job {job['job_id']} is {job['status']} - only failed jobs can be retried")
+
+        for step in job["steps"]:
+            if step["status"] != "skipped" and step["name"] not in job["outputs"]:
+                step.update({"status": "pending", "started_at": None, "finished_at": None,
+                             "waited_seconds": None, "seconds": None, "cost_usd": None, "summary": None, "error": None})
+        job.update({"status": "queued", "current_step": None, "error": None, "finished_at": None})
+
+        await self._enqueue(job)
+        logger.info(f"Discovery job {job['job_id']} re-queued from {self._first_pending(job)}")
+        return self.status_view(job)
+
+    async def _enqueue(self, job: Dict[str, Any]):
+        self._remember(job)
+        await self._persist(job)
+        self._ensure_workers()
+        await self._queue.put(job["job_id"])
+
+    def _seconds_since_update(self, job: Dict[str, Any]) -> float:
+        last = job.get("updated_at") or job.get("started_at") or job.get("created_at")
+        if not last:
+            return float("inf")
+        return (datetime.now(timezone.utc) - datetime.fromisoformat(last)).total_seconds()
+
+    def _is_stale(self, job: Dict[str, Any]) -> bool:
+        """No heartbeat / state change for stale_seconds - the worker running the job is gone"""
+        return self._seconds_since_update(job) > self.stale_seconds
+
+    def _first_pending(self, job: Dict[str, Any]) -> Optional[str]:
+        return next((step["name"] for step in job["steps"] if step["status"] == "pending"), None)
+
+    def _resume_from(self, job: Dict[str, Any], checkpoint: Dict[str, Any]):
+        """Copy a failed run's finished steps (and the params it resolved) into a new job"""
+        for key, value in checkpoint["params"].items():
+            if key not in NON_INPUT_PARAMS:
+                job["params"].setdefault(key, value)
+        finished = {step["name"]: step for step in checkpoint["steps"] if step["name"] in checkpoint["outputs"]}
+
+        for step in job["steps"]:
+            # Only a prefix of the pipeline is reused - a later step's output depends on the earlier ones
+            if step["status"] == "skipped":
+                continue
+            if step["name"] not in finished:
+                break
+            job["outputs"][step["name"]] = checkpoint["outputs"][step["name"]]
+            step.update({key: finished[step["name"]].get(key) for key in ("started_at", "finished_at", "seconds", "summary")})
+            step.update({"status": "succeeded", "cost_usd": 0.0})
+
+        if job["outputs"]:
+            job["resumed_from"] = checkpoint["job_id"]
+            job["company_name"] = job["params"].get("company_name") or job["company_name"]
+
+    async def _find_checkpoint(self, key: str) -> Optional[Dict[str, Any]]:
+        """Most recent failed job with the same inputs and at least one checkpointed step"""
+        cutoff = time.time() - self.checkpoint_ttl
+
+        def usable(job: Dict[str, Any]) -> bool:
+            return (job["status"] == "failed" and bool(job["outputs"])
+                    and datetime.fromisoformat(job["created_at"]).timestamp() >= cutoff)
+
+        for job in reversed(self._jobs.values()):
+            if job.get("input_hash") == key and usable(job):
+                return job
+
+        jobs = await self._query(
+            lambda model: (model.input_hash == key) & (model.status == "failed")
+            & (model.created_at >= datetime.fromtimestamp(cutoff, timezone.utc)),
+            order_by=lambda model: model.created_at.desc(), limit=1
+        )
+        return jobs[0] if jobs and usable(jobs[0]) else None
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Full job (including step outputs) from memory, else Postgres"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        return await self._load(job_id)
+
+    def status_view(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Job status and per-step progress without the step outputs"""
+        # Skipped steps (no account lookup, no lead queueing) don't count towards progress
+        steps = [step for step in job["steps"] if step["status"] != "skipped"]
+        done = sum(1 for step in steps if step["status"] == "succeeded")
+        return {
+            **{key: value for key, value in job.items() if key not in ("outputs", "params")},
+            "progress": {"completed_steps": done, "total_steps": len(steps)},
+            "results_available": [step["name"] for step in steps if step["name"] in job["outputs"]]
+        }
+
+    async def close(self):
+        """Stop the worker pool (jobs still running are cancelled)"""
+        tasks = self._workers + ([self._heartbeat] if self._heartbeat else [])
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._queue = asyncio.Queue()
+            self._workers = []
+            self._heartbeat = None
+            self._loop = loop
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.max_workers:
+            self._workers.append(asyncio.create_task(self._worker()))
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self):
+        """Bump updated_at of this worker's queued/running jobs so other workers don't retry them"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            active = [job for job in self._jobs.values() if job["status"] in ("queued", "running")]
+            if active:
+                await self._touch(active)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    await self.run(job)
+            except Exception as e:
+                logger.error(f"Discovery job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def budget_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-vendor budget, jobs inside a step using the vendor, and jobs waiting for it"""
+        return {
+            vendor: {"budget": budget, "in_use": self._budget_in_use[vendor], "waiting": self._budget_waiting[vendor]}
+            for vendor, budget in self.vendor_budgets.items()
+        }
+
+    def _get_budgets(self) -> Dict[str, asyncio.Semaphore]:
+        """Create the semaphores lazily, once per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._budget_loop is not loop:
+            self._budgets = {vendor: asyncio.Semaphore(max(1, budget)) for vendor, budget in self.vendor_budgets.items()}
+            self._budget_in_use = {vendor: 0 for vendor in self.vendor_budgets}
+            self._budget_waiting = {vendor: 0 for vendor in self.vendor_budgets}
+            self._budget_loop = loop
+        return self._budgets
+
+    @asynccontextmanager
+    async def _vendor_budget(self, vendors: Tuple[str, ...]):
+        """Hold one budget slot per vendor for the duration of a step (acquired in sorted order)"""
+        budgets = self._get_budgets()
+        held = []
+        try:
+            for vendor in sorted(set(vendors) & set(budgets)):
+                self._budget_waiting[vendor] += 1
+                try:
+                    await budgets[vendor].acquire()
+                finally:
+                    self._budget_waiting[vendor] -= 1
+                held.append(vendor)
+                self._budget_in_use[vendor] += 1
+            yield
+        finally:
+            for vendor in held:
+                self._budget_in_use[vendor] -= 1
+                budgets[vendor].release()
+
+    async def run(self, job: Dict[str, Any]):
+        """Run the job's remaining steps in order (steps that already have outputs are skipped)"""
+        steps = {step.name: step for step in self.pipelines[job["pipeline"]]}
+        job["status"] = "running"
+        job["started_at"] = job["started_at"] or _now()
+        job["error"] = None
+
+        async with cost_tracker.scope(endpoint="/jobs/discovery", company_name=job["company_name"]) as scope:
+            for step in job["steps"]:
+                if step["status"] == "skipped" or step["name"] in job["outputs"]:
+                    continue
+
+                pipeline_step = steps[step["name"]]
+                job["current_step"] = step["name"]
+                step.update({"status": "waiting", "started_at": None, "error": None})
+                waiting_since = time.monotonic()
+
+                async with self._vendor_budget(pipeline_step.vendors_for(job["params"])):
+                    step.update({"status": "running", "started_at": _now(),
+                                 "waited_seconds": round(time.monotonic() - waiting_since, 1)})
+                    await self._persist(job)
+                    logger.info(f"Discovery job {job['job_id']}: {step['name']} ({step['title']}) started")
+
+                    started = time.monotonic()
+                    with cost_tracker.stage(f"job_{step['name']}") as meter:
+                        try:
+                            result = await pipeline_step.run(job["params"], job["outputs"])
+                        except Exception as e:
+                            logger.error(f"Discovery job {job['job_id']}: {step['name']} raised {e}")
+                            result = {"success": False, "error": str(e)}
+
+                job["company_name"] = job["params"].get("company_name") or job["company_name"]
+                step.update({
+                    "finished_at": _now(),
+                    "seconds": round(time.monotonic() - started, 1),
+                    "cost_usd": meter.cost_usd,
+                    "summary": _jsonable(result.get("summary") or {})
+                })
+
+                if not result.get("success"):
+                    step.update({"status": "failed", "error": result.get("error", "Unknown error")})
+                    job.update({"status": "failed", "error": f"{step['name']} failed: {step['error']}"})
+                    break
+
+                step["status"] = "succeeded"
+                job["outputs"][step["name"]] = _jsonable(result)
+            else:
+                job["status"] = "succeeded"
+                job["current_step"] = None
+
+            job["finished_at"] = _now()
+            job["cost_usd"] = round(scope.summary()["total_cost_usd"], 6)
+
+        await self._persist(job)
+        logger.info(f"Discovery job {job['job_id']} {job['status']} (${job['cost_usd']:.4f})")
+
+    def _remember(self, job: Dict[str, Any]):
+        """Keep the job in memory, dropping the oldest finished jobs over the limit"""
+        self._jobs[job["job_id"]] = job
+        self._jobs.move_to_end(job["job_id"])
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.memory_limit:
+                break
+            if self._jobs[job_id]["status"] in FINISHED_STATUSES:
+                del self._jobs[job_id]
+
+    def _persist_available(self) -> bool:
+        return self.persistent and time.time() >= self._persist_disabled_until
+
+    async def _persist(self, job: Dict[str, Any]):
+        """Upsert the job row; failures only cost durability (the job keeps running)"""
+        job["updated_at"] = _now()
+        if not self._persist_available():
+            return
+        try:
+            # Imported lazily so the services still load without DATABASE_URL
+            from sqlalchemy import func
+            from sqlalchemy.dialects.postgresql import insert
+            from app.database import AsyncSessionLocal
+            from app.models import DiscoveryJob
+
+            def timestamp(value: Optional[str]):
+                return datetime.fromisoformat(value) if value else None
+
+            values = {
+                "job_id": job["job_id"],
+                "pipeline": job["pipeline"],
+                "batch_id": job.get("batch_id"),
+                "input_hash": job.get("input_hash"),
+                "resumed_from": job.get("resumed_from"),
+                "status": job["status"],
+                "company_name": job["company_name"],
+                "params": _jsonable(job["params"]),
+                "current_step": job["current_step"],
+                "steps": job["steps"],
+                "step_outputs": job["outputs"],
+                "error": job["error"],
+                "cost_usd": job["cost_usd"],
+                "created_at": timestamp(job["created_at"]),
+                "started_at": timestamp(job["started_at"]),
+                "finished_at": timestamp(job["finished_at"]),
+            }
+            stmt = insert(DiscoveryJob).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[DiscoveryJob.job_id],
+                set_={**{key: value for key, value in values.items() if key not in ("job_id", "created_at")},
+                      "updated_at": func.now()}
+            )
+            async with AsyncSessionLocal() as session:
+                await session.execute(stmt)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Discovery jobs not persisted: {e} - memory only for {PERSIST_BACKOFF_SECONDS}s")
+            self._persist_disabled_until = time.time() + PERSIST_BACKOFF_SECONDS
+
+    async def _touch(self, jobs: List[Dict[str, Any]]):
+        """Heartbeat: set updated_at of the job rows without rewriting them"""
+        now = _now()
+        for job in jobs:
+            job["updated_at"] = now
+        if not self._persist_available():
+            return
+        try:
+            from sqlalchemy import func, update
+            from app.database import AsyncSessionLocal
+            from app.models import DiscoveryJob
+
+            stmt = (update(DiscoveryJob)
+                    .where(DiscoveryJob.job_id.in_([job["job_id"] for job in jobs]))
+                    .values(updated_at=func.now()))
+            async with AsyncSessionLocal() as session:
+                await session.execute(stmt)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Discovery job heartbeat failed: {e}")
+
+    async def load_batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Persisted jobs of a batch, oldest first (empty if Postgres is unavailable)"""
+        return await self._query(lambda model: model.batch_id == batch_id, order_by=lambda model: model.created_at)
+
+    async def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        jobs = await self._query(lambda model: model.job_id == job_id)
+        return jobs[0] if jobs else None
+
+    async def _query(self, where: Callable[[Any], Any], order_by: Optional[Callable[[Any], Any]] = None,
+                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Jobs from Postgres; where / order_by build clauses from the DiscoveryJob model"""
+        if not self._persist_available():
+            return []
+        try:
+            from sqlalchemy import select
+            from app.database import AsyncSessionLocal
+            from app.models import DiscoveryJob
+
+            stmt = select(DiscoveryJob).where(where(DiscoveryJob))
+            if order_by is not None:
+                stmt = stmt.order_by(order_by(DiscoveryJob))
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(stmt)).scalars().all()
+        except Exception as e:
+            logger.warning(f"Discovery job lookup failed: {e}")
+            return []
+
+        def iso(value: Optional[datetime]) -> Optional[str]:
+            return value.isoformat() if value else None
+
+        return [{
+            "job_id": row.job_id,
+            "pipeline": row.pipeline,
+            "batch_id": row.batch_id,
+            "input_hash": row.input_hash,
+            "resumed_from": row.resumed_from,
+            "status": row.status,
+            "company_name": row.company_name,
+            "params": row.params or {},
+            "current_step": row.current_step,
+            "steps": row.steps or [],
+            "outputs": row.step_outputs or {},
+            "error": row.error,
+            "cost_usd": row.cost_usd,
+            "created_at": iso(row.created_at),
+            "updated_at": iso(row.updated_at),
+            "started_at": iso(row.started_at),
+            "finished_at": iso(row.finished_at),
+        } for row in rows]
+
+
+# Global instance
+discovery_job_engine = DiscoveryJobEngine()
@@ -0,0 +1,63 @@
+"""
+Event Streams
+Server-sent events / NDJSON responses for endpoints that emit results as they complete
+
+Events are {"event": name, "data": {...}} dicts from an async iterator:
+- SSE (Accept: text/event-stream): "event: <name>\\ndata: <json>\\n\\n"
+- NDJSON (default): one {"event": name, "data": {...}} object per line
+
+APILoggingMiddleware and CostTrackingMiddleware recognize these media types and
+pass the body through chunk by chunk (logging / storing costs when the stream
+ends) instead of buffering it.
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from starlette.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAMING_MEDIA_TYPES = (SSE_MEDIA_TYPE, NDJSON_MEDIA_TYPE)
+
+
+def is_event_stream(response: Any) -> bool:
+    """True for SSE / NDJSON responses (which must not be buffered)"""
+    return response.headers.get("content-type", "").startswith(STREAMING_MEDIA_TYPES)
+
+
+def wants_sse(accept: Optional[str]) -> bool:
+    return SSE_MEDIA_TYPE in (accept or "")
+
+
+def encode_event(event: str, data: Dict[str, Any], sse: bool) -> bytes:
+    payload = json.dumps(data, default=str)
+    if sse:
+        return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+    return (json.dumps({"event": event, "data": data}, default=str) + "\n").encode("utf-8")
+
+
+def event_stream_response(events: AsyncIterator[Dict[str, Any]], sse: bool = False) -> StreamingResponse:
+    """
+    Stream events as SSE or NDJSON
+
+    An exception while producing events ends the stream with an "error" event
+    (the 200 status has already been sent by then).
+    """
+    async def body():
+        try:
+            async for event in events:
+                yield encode_event(event["event"], event["data"], sse)
+        except Exception as e:
+            logger.error(f"Event stream failed: {type(e).__name__}: {str(e)}")
+            yield encode_event("error", {"success": False, "error": str(e)}, sse)
+
+    return StreamingResponse(
+        body(),
+        media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE,
+        # Proxies (nginx, Railway) must not hold events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -15,17 +15,28 @@ Benefits:
 - Best data quality: Prefer Bright Data's rich profiles
 - Fallback enrichment: Scrape Serper-only results
 - Review workflow: All leads queued for manual approval
+
+Overlapped mode (search_and_enrich_overlapped) runs Steps 1-3 as a dataflow:
+Serper returns in seconds while a Bright Data snapshot can take minutes, so the
+Serper URLs go to Apify as soon as they land instead of after both searches.
+Dedupe against Bright Data is reconciled when Bright Data finishes - chunks that
+haven't started drop the URLs that turned out to be duplicates, the scrape is
+cancelled (aborting its Apify runs) when nothing left in it is needed, and
+duplicates already scraped are discarded. Wall time per hospital drops from
+max(Serper, Bright Data) + Apify to roughly max(Bright Data, Serper + Apify).
 """
 
+import time
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 from .search import serper_service
 from .brightdata_prospect_discovery import brightdata_prospect_discovery_service
 from .linkedin import linkedin_service
 from .three_step_prospect_discovery import ThreeStepProspectDiscoveryService
+from .linkedin_urls import LinkedInUrlIndex, url_key
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +56,8 @@ class HybridProspectDiscoveryService:
         parent_account_name: str = None,
         target_titles: List[str] = None,
         company_city: str = None,
-        company_state: str = None
+        company_state: str = None,
+        force_refresh: bool = False
     ) -> Dict[str, Any]:
         """
         STEP 1: Run Serper AND Bright Data searches in parallel
@@ -56,6 +68,7 @@ class HybridProspectDiscoveryService:
             target_titles: List of job titles
             company_city: City for filtering
             company_state: State for filtering (REQUIRED)
+            force_refresh: Bypass cached Serper query results and stored Bright Data snapshots
 
         Returns:
             Combined results from both sources with deduplication stats
@@ -78,12 +91,12 @@ class HybridProspectDiscoveryService:
 
             serper_task = self._run_serper_search(
                 company_name, parent_account_name, target_titles,
-                company_city, company_state
+                company_city, company_state, force_refresh
             )
 
             brightdata_task = self._run_brightdata_search(
                 company_name, parent_account_name, target_titles,
-                company_city, company_state
+                company_city, company_state, force_refresh
             )
 
             # Wait for both to complete
@@ -150,7 +163,8 @@ class HybridProspectDiscoveryService:
         parent_account_name: str,
         target_titles: List[str],
         company_city: str,
-        company_state: str
+        company_state: str,
+        force_refresh: bool = False
     ) -> Dict[str, Any]:
         """Run Serper search and basic filtering"""
         try:
@@ -160,7 +174,8 @@ class HybridProspectDiscoveryService:
                 parent_account_name=parent_account_name,
                 target_titles=target_titles,
                 company_city=company_city,
-                company_state=company_state
+                company_state=company_state,
+                force_refresh=force_refresh
             )
 
             if result.get("success"):
@@ -179,7 +194,8 @@ class HybridProspectDiscoveryService:
         parent_account_name: str,
         target_titles: List[str],
         company_city: str,
-        company_state: str
+        company_state: str,
+        force_refresh: bool = False
     ) -> Dict[str, Any]:
         """Run Bright Data search"""
         try:
@@ -194,7 +210,8 @@ class HybridProspectDiscoveryService:
                 company_city=company_city,
                 company_state=company_state,
                 min_connections=10,
-                use_city_filter=False
+                use_city_filter=False,
+                force_refresh=force_refresh
             )
 
             if result.get("success"):
@@ -219,8 +236,8 @@ class HybridProspectDiscoveryService:
         STEP 2: Deduplicate by name + Enrich Serper-only results
 
         Logic:
-        1. Extract names from both sources
-        2. Find duplicates by name matching (fuzzy)
+        1. Extract canonical LinkedIn URLs and names from both sources
+        2. Find duplicates by canonical URL, then by name matching (fuzzy)
         3. For duplicates: Keep Bright Data version (richer data)
         4. For Serper-only: Scrape via Apify to get full LinkedIn data
         5. Combine all enriched prospects
@@ -240,38 +257,11 @@ class HybridProspectDiscoveryService:
             logger.info(f"   → Serper: {len(serper_prospects)} prospects")
             logger.info(f"   → Bright Data: {len(brightdata_prospects)} prospects")
 
-            # Step 2.1: Extract names from Bright Data (already enriched)
-            brightdata_names = set()
-            for prospect in brightdata_prospects:
-                name = self._extract_name(prospect)
-                if name:
-                    brightdata_names.add(name.lower().strip())
-
-            logger.info(f"   → Bright Data unique names: {len(brightdata_names)}")
-
-            # Step 2.2: Find Serper-only prospects (not in Bright Data)
-            serper_only_prospects = []
-            duplicates_found = []
-
-            for prospect in serper_prospects:
-                # Extract name from Serper prospect
-                serper_name = self._extract_name_from_serper(prospect)
-                if not serper_name:
-                    continue
-
-                serper_name_normalized = serper_name.lower().strip()
-
-                # Check if this name is in Bright Data
-                is_duplicate = serper_name_normalized in brightdata_names
-
-                if is_duplicate:
-                    duplicates_found.append({
-                        "name": serper_name,
-                        "reason": "Found in Bright Data (preferring Bright Data version)"
-                    })
-                    logger.debug(f"   → Duplicate: {serper_name} (skipping Serper version)")
-                else:
-                    serper_only_prospects.append(prospect)
+            # Step 2.1 + 2.2: Index Bright Data URLs / names, find Serper-only prospects
+            url_index = LinkedInUrlIndex()
+            brightdata_prospects, serper_only_prospects, duplicates_found = self._split_serper_only(
+                serper_prospects, brightdata_prospects, url_index
+            )
 
             logger.info(f"   → Duplicates found: {len(duplicates_found)}")
             logger.info(f"   → Serper-only prospects: {len(serper_only_prospects)}")
@@ -316,6 +306,7 @@ class HybridProspectDiscoveryService:
                     "serper_only_count": len(serper_only_prospects),
                     "serper_enriched_count": len(enriched_serper_prospects),
                     "duplicates_skipped": len(duplicates_found),
+                    "duplicate_urls_collapsed": url_index.duplicates_collapsed,
                     "total_enriched": len(all_enriched_prospects)
                 },
                 "enriched_prospects": all_enriched_prospects,
@@ -334,6 +325,226 @@ class HybridProspectDiscoveryService:
                 "step": "step2_exception"
             }
 
+    async def search_and_enrich_overlapped(
+        self,
+        company_name: str,
+        parent_account_name: str = None,
+        target_titles: List[str] = None,
+        company_city: str = None,
+        company_state: str = None,
+        force_refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        STEPS 1 + 2 overlapped: scrape Serper URLs while Bright Data is still searching
+
+        Dataflow:
+        1. Start the Bright Data search
+        2. When Serper lands, start scraping its URLs via Apify right away
+        3. When Bright Data lands, dedupe as in Step 2:
+           - chunks that haven't started skip the URLs that became duplicates
+           - the scrape is cancelled (aborting its Apify runs) if none of its URLs are still needed
+           - duplicates that were already scraped are discarded (Bright Data version wins)
+
+        Args:
+            Same as step1_parallel_search
+
+        Returns:
+            Step 1 fields (serper_prospects, brightdata_prospects) plus Step 2 fields
+            (enriched_prospects, deduplication_details); summary.overlap has the timings
+        """
+        if not company_state:
+            return {
+                "success": False,
+                "error": "company_state is required for hybrid search",
+                "step": "validation"
+            }
+
+        logger.info(f"STEPS 1+2 (overlapped): Starting hybrid search + enrich for: {company_name}")
+        started = time.monotonic()
+        timings: Dict[str, float] = {}
+
+        async def timed(name: str, coro):
+            began = time.monotonic()
+            try:
+                return await coro
+            finally:
+                timings[name] = round(time.monotonic() - began, 2)
+
+        search_args = (company_name, parent_account_name, target_titles, company_city, company_state, force_refresh)
+        brightdata_task = asyncio.ensure_future(timed("brightdata_seconds", self._run_brightdata_search(*search_args)))
+        scrape_task = None
+
+        # Canonical URLs found to be Bright Data duplicates after their scrape was queued
+        late_duplicates = set()
+
+        try:
+            serper_result = await timed("serper_seconds", self._run_serper_search(*search_args))
+            serper_prospects = serper_result.get("prospects", [])
+            logger.info(f"   ✅ Serper: {len(serper_prospects)} prospects - scraping before Bright Data finishes")
+
+            # Same dedupe as Step 2 with nothing from Bright Data yet
+            _, candidates, _ = self._split_serper_only(serper_prospects, [], LinkedInUrlIndex())
+            candidate_urls = [p["linkedin_url"] for p in candidates if p.get("linkedin_url")]
+            if candidate_urls:
+                scrape_task = asyncio.ensure_future(timed("scrape_seconds", self.three_step_service.step2_scrape_profiles(
+                    linkedin_urls=candidate_urls,
+                    company_name=company_name,
+                    company_city=company_city,
+                    company_state=company_state,
+                    location_filter_enabled=True,
+                    skip_url=lambda url: url_key(url) in late_duplicates
+                )))
+
+            brightdata_result = await brightdata_task
+            brightdata_prospects = brightdata_result.get("prospects", [])
+            logger.info(f"   ✅ Bright Data: {len(brightdata_prospects)} prospects")
+
+            # Reconcile: the final dedupe decides which scraped profiles are kept
+            url_index = LinkedInUrlIndex()
+            brightdata_prospects, serper_only_prospects, duplicates_found = self._split_serper_only(
+                serper_prospects, brightdata_prospects, url_index
+            )
+            keep = {url_key(p.get("linkedin_url")) for p in serper_only_prospects if p.get("linkedin_url")}
+            late_duplicates.update(url_key(url) for url in candidate_urls if url_key(url) not in keep)
+
+            scrape_result: Dict[str, Any] = {}
+            scrape_cancelled = False
+            if scrape_task is not None:
+                if not keep and not scrape_task.done():
+                    logger.info("   → Every Serper URL is a Bright Data duplicate - cancelling the scrape")
+                    scrape_task.cancel()
+                    scrape_cancelled = True
+                await asyncio.wait([scrape_task])
+                if not scrape_task.cancelled():
+                    scrape_result = scrape_task.result()
+                    if not scrape_result.get("success"):
+                        logger.warning(f"   ⚠️ Scraping failed: {scrape_result.get('error')}")
+
+            # Discard only profiles scraped for a late duplicate - renamed slugs are kept as in Step 2
+            scraped = scrape_result.get("enriched_prospects", []) if scrape_result.get("success") else []
+            enriched_serper_prospects = [
+                p for p in scraped
+                if url_key(p.get("requested_url") or p.get("linkedin_url")) not in late_duplicates
+            ]
+        except Exception as e:
+            logger.error(f"Error in overlapped Steps 1+2: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "step": "search_and_enrich_exception"
+            }
+        finally:
+            # Cancelled from outside (or failed) - don't leave the searches or Apify runs behind
+            for task in (brightdata_task, scrape_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+        if not serper_prospects and not brightdata_prospects:
+            return {
+                "success": False,
+                "error": "Both Serper and Bright Data searches returned no results",
+                "step": "parallel_search",
+                "serper_error": serper_result.get("error"),
+                "brightdata_error": brightdata_result.get("error")
+            }
+
+        all_enriched_prospects = brightdata_prospects + enriched_serper_prospects
+        wall_seconds = round(time.monotonic() - started, 2)
+        search_seconds = max(timings.get("serper_seconds", 0.0), timings.get("brightdata_seconds", 0.0))
+
+        logger.info(f"   ✅ Total enriched prospects: {len(all_enriched_prospects)} in {wall_seconds}s "
+                    f"({len(late_duplicates)} late duplicates, scrape {'cancelled' if scrape_cancelled else 'kept'})")
+
+        return {
+            "success": True,
+            "step": "search_and_enrich_complete",
+            "company_name": company_name,
+            "parent_account_name": parent_account_name,
+            "company_city": company_city,
+            "company_state": company_state,
+            "serper_prospects": serper_prospects,
+            "brightdata_prospects": brightdata_prospects,
+            "enriched_prospects": all_enriched_prospects,
+            "summary": {
+                "serper_count": len(serper_prospects),
+                "brightdata_count": len(brightdata_prospects),
+                "serper_success": serper_result.get("success", False),
+                "brightdata_success": brightdata_result.get("success", False),
+                "serper_only_count": len(serper_only_prospects),
+                "serper_enriched_count": len(enriched_serper_prospects),
+                "duplicates_skipped": len(duplicates_found),
+                "duplicate_urls_collapsed": url_index.duplicates_collapsed,
+                "total_enriched": len(all_enriched_prospects),
+                "overlap": {
+                    **timings,
+                    "wall_seconds": wall_seconds,
+                    # What waiting for both searches before scraping would have taken
+                    "sequential_estimate_seconds": round(search_seconds + timings.get("scrape_seconds", 0.0), 2),
+                    "late_duplicates": len(late_duplicates),
+                    "scrape_urls_skipped": scrape_result.get("summary", {}).get("profiles_skipped", 0),
+                    "scraped_then_discarded": len(scraped) - len(enriched_serper_prospects),
+                    "scrape_cancelled": scrape_cancelled
+                }
+            },
+            "deduplication_details": {
+                "duplicates": duplicates_found,
+                "serper_only_urls": [p.get("linkedin_url") for p in serper_only_prospects]
+            },
+            "next_step": "Call step3_rank_and_qualify with these enriched prospects"
+        }
+
+    def _split_serper_only(
+        self,
+        serper_prospects: List[Dict],
+        brightdata_prospects: List[Dict],
+        url_index: LinkedInUrlIndex
+    ) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """
+        Dedupe Serper prospects against Bright Data (canonical URL, then name)
+
+        Returns:
+            (unique Bright Data prospects, Serper-only prospects, duplicates found)
+        """
+        # Index Bright Data URLs (canonical) and names (already enriched)
+        brightdata_prospects = url_index.dedupe(brightdata_prospects, lambda p: p.get("linkedin_url"))
+        brightdata_names = set()
+        for prospect in brightdata_prospects:
+            name = self._extract_name(prospect)
+            if name:
+                brightdata_names.add(name.lower().strip())
+
+        logger.info(f"   → Bright Data unique names: {len(brightdata_names)}")
+
+        # Find Serper-only prospects (not in Bright Data)
+        serper_only_prospects = []
+        duplicates_found = []
+
+        for prospect in serper_prospects:
+            # Same profile URL already seen (Bright Data or an earlier Serper variant)
+            if prospect.get("linkedin_url") and not url_index.add(prospect["linkedin_url"]):
+                duplicates_found.append({
+                    "name": self._extract_name_from_serper(prospect),
+                    "reason": "Same LinkedIn profile URL already present"
+                })
+                continue
+
+            # Extract name from Serper prospect
+            serper_name = self._extract_name_from_serper(prospect)
+            if not serper_name:
+                continue
+
+            # Check if this name is in Bright Data
+            if serper_name.lower().strip() in brightdata_names:
+                duplicates_found.append({
+                    "name": serper_name,
+                    "reason": "Found in Bright Data (preferring Bright Data version)"
+                })
+                logger.debug(f"   → Duplicate: {serper_name} (skipping Serper version)")
+            else:
+                serper_only_prospects.append(prospect)
+
+        return brightdata_prospects, serper_only_prospects, duplicates_found
+
     def _extract_name(self, prospect: Dict) -> Optional[str]:
         """Extract name from enriched prospect (Bright Data format)"""
         linkedin_data = prospect.get("linkedin_data", {})
@@ -404,6 +615,29 @@ class HybridProspectDiscoveryService:
                 "step": "step3_exception"
             }
 
+    async def step3_rank_and_qualify_stream(
+        self,
+        enriched_prospects: List[Dict],
+        company_name: str,
+        min_score_threshold: int = 65,
+        max_prospects: int = 10
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        STEP 3 (streamed): ranked prospects as their AI ranking finishes, then a summary
+
+        Delegates to three_step_service.step3_rank_prospects_stream (same events).
+        """
+        async for event in self.three_step_service.step3_rank_prospects_stream(
+            enriched_prospects=enriched_prospects,
+            company_name=company_name,
+            min_score_threshold=min_score_threshold,
+            max_prospects=max_prospects
+        ):
+            if event["event"] == "summary":
+                event["data"]["step"] = "rank_and_qualify_complete"
+                event["data"]["next_step"] = "Call step4_queue_to_pending_updates to add leads for approval"
+            yield event
+
 
 # Global instance
 hybrid_prospect_discovery_service = HybridProspectDiscoveryService()
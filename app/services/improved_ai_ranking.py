@@ -7,11 +7,13 @@ AI does NOT create, modify, or invent data
 import os
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 import openai
-from openai import OpenAI
 import json
 
+from app.services.llm_gateway import llm_gateway
+from app.services.cost_tracking import cost_tracker, openai_cost
+
 # Import centralized prompts
 from app.prompts import (
     AI_RANKING_SYSTEM_PROMPT,
@@ -21,6 +23,14 @@ from app.prompts import (
 logger = logging.getLogger(__name__)
 
 
+def _has_score(output_text: str) -> bool:
+    """Only cache ranking outputs that contain a score"""
+    try:
+        return "score" in json.loads(output_text)
+    except (TypeError, ValueError):
+        return False
+
+
 class ImprovedAIRankingService:
     """AI service that ONLY ranks prospects based on real LinkedIn data"""
     
@@ -32,7 +42,8 @@ class ImprovedAIRankingService:
         self.reasoning_effort = os.getenv('OPENAI_REASONING_EFFORT', 'minimal')
 
         if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            # Shared async client - never blocks the event loop
+            self.client = llm_gateway.client
             logger.info(f"AI ranking service initialized with model: {self.model}, reasoning: {self.reasoning_effort}")
         else:
             self.client = None
@@ -70,7 +81,8 @@ class ImprovedAIRankingService:
 
             # Execute all ranking calls in parallel
             logger.info(f"Starting AI ranking for {len(prospects)} prospects using {self.model}")
-            ranking_results = await asyncio.gather(*ranking_tasks, return_exceptions=True)
+            with cost_tracker.stage("ai_ranking") as cost_meter:
+                ranking_results = await asyncio.gather(*ranking_tasks, return_exceptions=True)
 
             # Track errors for debugging
             errors = []
@@ -103,7 +115,8 @@ class ImprovedAIRankingService:
                 "total_ranked": len(ranked_prospects),
                 "ranked_prospects": ranked_prospects,
                 "errors": errors if errors else None,
-                "cost_estimate": successful_rankings * 0.003  # GPT-5 with minimal reasoning
+                "cost_estimate": cost_meter.cost_usd,  # Actual token cost (cached rankings are free)
+                "token_usage": cost_meter.summary()["by_vendor"].get("openai", {})
             }
 
         except Exception as e:
@@ -116,6 +129,64 @@ class ImprovedAIRankingService:
                 "traceback": traceback.format_exc()
             }
     
+    async def rank_prospects_stream(self, prospects: List[Dict], company_name: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Rank prospects with the same individual AI calls, yielding each one as soon as it's scored
+
+        Yields, in completion order:
+            {"type": "ranked", "index": i, "prospect": prospect + ai_ranking}
+            {"type": "failed", "index": i, "error": "..."}
+        and finally:
+            {"type": "complete", "successfully_ranked", "failed_rankings", "cost_estimate", "token_usage"}
+            (or {"type": "error", "error": "..."} when nothing can be ranked)
+
+        Closing the iterator early cancels the rankings still in flight.
+        """
+        if not self.client:
+            yield {"type": "error", "error": "OpenAI client not configured - missing API key"}
+            return
+
+        if not prospects:
+            yield {"type": "error", "error": "No prospects to rank"}
+            return
+
+        logger.info(f"Starting streamed AI ranking for {len(prospects)} prospects using {self.model}")
+        # Tasks keep the stage's meter from the context they were created in
+        with cost_tracker.stage("ai_ranking") as cost_meter:
+            tasks = {
+                asyncio.ensure_future(self._rank_single_prospect(prospect, company_name, i)): i
+                for i, prospect in enumerate(prospects)
+            }
+
+        successful_rankings = 0
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.get):
+                    index = tasks[task]
+                    result = task.exception() or task.result()
+                    if isinstance(result, dict) and result.get("success"):
+                        successful_rankings += 1
+                        yield {"type": "ranked", "index": index, "prospect": self._with_ranking(prospects[index], result)}
+                    else:
+                        error = result.get("error", "Unknown error") if isinstance(result, dict) \
+                            else f"{type(result).__name__}: {str(result)}"
+                        logger.error(f"Prospect {index}: {error}")
+                        yield {"type": "failed", "index": index, "error": error}
+        finally:
+            for task in pending:
+                task.cancel()
+
+        logger.info(f"Streamed AI ranking complete: {successful_rankings}/{len(prospects)} succeeded")
+        yield {
+            "type": "complete",
+            "successfully_ranked": successful_rankings,
+            "failed_rankings": len(prospects) - successful_rankings,
+            "cost_estimate": cost_meter.cost_usd,
+            "token_usage": cost_meter.summary()["by_vendor"].get("openai", {})
+        }
+
     async def _rank_single_prospect(self, prospect: Dict, company_name: str, index: int) -> Dict[str, Any]:
         """
         Rank a single prospect with retry logic
@@ -174,39 +245,14 @@ class ImprovedAIRankingService:
                 if "gpt-5" in self.model or self.model.startswith("o"):
                     api_params["reasoning"] = {"effort": self.reasoning_effort}
 
-                response = self.client.responses.create(**api_params)
+                # Served from the LLM cache when this exact prompt was ranked before
+                output_text = await llm_gateway.create_response_text(
+                    "ai_ranking",
+                    force_refresh=attempt > 0,
+                    cache_validator=_has_score,
+                    **api_params
+                )
 
-                # Check if response is valid
-                if not response:
-                    error_msg = "API returned None response"
-                    logger.warning(f"Prospect {index}, attempt {attempt + 1}: {error_msg}")
-                    if attempt == 1:
-                        return {"success": False, "index": index, "error": error_msg}
-                    continue
-
-                # Parse response from Responses API
-                # Response format: response.output[0].content[0].text
-                if not hasattr(response, 'output') or not response.output:
-                    error_msg = "Response missing output field"
-                    logger.warning(f"Prospect {index}, attempt {attempt + 1}: {error_msg}")
-                    if attempt == 1:
-                        return {"success": False, "index": index, "error": error_msg}
-                    continue
-                
-                try:
-                    # When reasoning is enabled, response.output has 2 items:
-                    # [0] = ResponseReasoningItem (thinking, content=None)
-                    # [1] = ResponseOutputMessage (actual response)
-                    # So we need to access the last item which contains the actual output
-                    output_item = response.output[-1]  # Get last item (the actual output message)
-                    output_text = output_item.content[0].text
-                except (IndexError, AttributeError, TypeError) as e:
-                    error_msg = f"Error accessing response fields: {type(e).__name__}: {str(e)}"
-                    logger.warning(f"Prospect {index}, attempt {attempt + 1}: {error_msg}")
-                    if attempt == 1:
-                        return {"success": False, "index": index, "error": error_msg}
-                    continue
-                
                 ranking_data = json.loads(output_text)
 
                 # Validate required fields
@@ -231,6 +277,12 @@ class ImprovedAIRankingService:
                 logger.warning(f"Prospect {index}, attempt {attempt + 1}: {error_msg}")
                 if attempt == 1:
                     return {"success": False, "index": index, "error": error_msg}
+            except ValueError as e:
+                # Response had no usable output text
+                error_msg = str(e)
+                logger.warning(f"Prospect {index}, attempt {attempt + 1}: {error_msg}")
+                if attempt == 1:
+                    return {"success": False, "index": index, "error": error_msg}
             except openai.APITimeoutError as e:
                 error_msg = f"API timeout: {str(e)}"
                 logger.warning(f"Prospect {index}, attempt {attempt + 1}: {error_msg}")
@@ -335,17 +387,7 @@ IMPORTANT RULES:
                     break
 
             if ranking_result:  # Only process prospects that got successfully ranked
-                # Add ranking data WITHOUT modifying original prospect data
-                ranked_prospect = {
-                    **prospect,  # Original prospect data (unchanged)
-                    "ai_ranking": {
-                        "ranking_score": ranking_result.get("score", 0),
-                        "ranking_reasoning": ranking_result.get("reasoning", ""),
-                        "ranked_by": "ai_individual",
-                        "ranking_timestamp": None  # Would add in production
-                    }
-                }
-                all_ranked_prospects.append(ranked_prospect)
+                all_ranked_prospects.append(self._with_ranking(prospect, ranking_result))
             else:
                 logger.warning(f"No successful ranking for prospect {i}: {prospect.get('linkedin_data', {}).get('name', 'Unknown')}")
 
@@ -370,6 +412,18 @@ IMPORTANT RULES:
         return all_ranked_prospects
     
     
+    def _with_ranking(self, prospect: Dict, ranking_result: Dict) -> Dict:
+        """Add ranking data WITHOUT modifying original prospect data"""
+        return {
+            **prospect,  # Original prospect data (unchanged)
+            "ai_ranking": {
+                "ranking_score": ranking_result.get("score", 0),
+                "ranking_reasoning": ranking_result.get("reasoning", ""),
+                "ranked_by": "ai_individual",
+                "ranking_timestamp": None  # Would add in production
+            }
+        }
+
     async def generate_outreach_strategy(self, top_prospect: Dict, company_context: Dict = None) -> Dict[str, Any]:
         """Generate outreach strategy based on ranked prospect data"""
         if not self.client:
@@ -417,7 +471,8 @@ Return JSON format:
 }}
 """
             
-            response = self.client.chat.completions.create(
+            response = await llm_gateway.create_chat_completion(
+                call_site="outreach_strategy",
                 model=self.model,
                 messages=[
                     {
@@ -439,7 +494,7 @@ Return JSON format:
             return {
                 "success": True,
                 "outreach_strategy": strategy_data.get("outreach_strategy", {}),
-                "cost_estimate": 0.001
+                "cost_estimate": openai_cost(self.model, response.usage)
             }
             
         except Exception as e:
@@ -10,10 +10,11 @@ Fixes accuracy issues by:
 import logging
 import re
 from typing import Dict, Any, List, Optional
-import asyncio
 from .search import serper_service
 from .linkedin import linkedin_service
+from .title_filter import title_filter_service
 from .company_name_expansion import company_name_expansion_service
+from .cost_tracking import cost_tracker
 
 logger = logging.getLogger(__name__)
 
@@ -56,35 +57,23 @@ class ImprovedProspectDiscoveryService:
             # Step 1: Search for LinkedIn profiles using ALL company name variations (IN PARALLEL)
             logger.info("Step 1: Searching for LinkedIn profiles across all company variations...")
 
-            # Create parallel search tasks for all variations
-            search_tasks = []
-            for variation in company_variations:
-                logger.info(f"  Queuing search for: {variation}")
-                task = self.search_service.search_linkedin_profiles(
-                    company_name=variation,
-                    target_titles=target_titles,
-                    company_city=company_city,
-                    company_state=company_state
-                )
-                search_tasks.append((variation, task))
-
-            # Execute all searches in parallel
-            logger.info(f"Executing {len(search_tasks)} searches in parallel...")
-            search_results_raw = await asyncio.gather(*[task for _, task in search_tasks], return_exceptions=True)
+            # One search covers every variation (the query planner packs variations into
+            # OR-groups in grouped mode; every result is tagged with its search_company_variation)
+            search_response = await self.search_service.search_linkedin_profiles(
+                company_name=company_variations[0],
+                target_titles=target_titles,
+                company_city=company_city,
+                company_state=company_state,
+                company_variations=company_variations[1:]
+            )
 
-            # Process results and tag with variation
             all_search_results = []
-            for (variation, _), search_result in zip(search_tasks, search_results_raw):
-                if isinstance(search_result, Exception):
-                    logger.error(f"Search failed for variation '{variation}': {search_result}")
-                    continue
-
-                if search_result.get("success") and search_result.get("results"):
-                    # Tag each result with which variation it came from
-                    for result in search_result.get("results", []):
-                        result["search_company_variation"] = variation
-                    all_search_results.extend(search_result.get("results", []))
-                    logger.info(f"  Found {len(search_result.get('results', []))} results for: {variation}")
+            if search_response.get("success"):
+                all_search_results = search_response.get("results", [])
+                logger.info(f"  Found {len(all_search_results)} results across {len(company_variations)} variation(s) "
+                            f"in {search_response.get('queries_issued')} queries")
+            else:
+                logger.error(f"Search failed: {search_response.get('error')}")
 
             # Deduplicate by LinkedIn URL
             seen_urls = set()
@@ -158,6 +147,7 @@ class ImprovedProspectDiscoveryService:
             # Step 3.5: AI filter for proper job titles - if job title is not relevant, remove the prospect
             logger.info("Step 3.5: AI filter for proper job titles...")
             prospects_before_title_filter = len(ai_filtered_prospects)
+            title_filter_input = ai_filtered_prospects
             ai_filtered_prospects = await self._ai_title_filter_prospects(ai_filtered_prospects, company_name)
             filtered_by_title = prospects_before_title_filter - len(ai_filtered_prospects)
             logger.info(f"AI filtered to {len(ai_filtered_prospects)} prospects after removing {filtered_by_title} with irrelevant job titles")
@@ -262,6 +252,8 @@ class ImprovedProspectDiscoveryService:
                     "prospects_after_ai_basic_filter": prospects_before_title_filter,
                     "prospects_after_ai_title_filter": len(ai_filtered_prospects) if ai_filtered_prospects else 0,
                     "filtered_by_title": filtered_by_title,
+                    # How many titles the local pre-classifier decided without the LLM
+                    "title_filter_sources": title_filter_service.summarize_sources(title_filter_input),
                     "linkedin_profiles_scraped": len(linkedin_profiles),
                     "prospects_after_advanced_filter": len(final_prospects),
                     "prospects_after_ai_ranking": len(ranked_prospects),
@@ -276,13 +268,8 @@ class ImprovedProspectDiscoveryService:
                     "filtered_out_by_stage": self._group_filtered_by_stage(filtering_funnel['filtered_out']),
                     "detailed_filtered_prospects": filtering_funnel['filtered_out']
                 },
-                "cost_estimates": {
-                    "company_expansion_cost": 0.01,  # Cost of AI name expansion
-                    "search_cost": 0.01 * len(company_variations),  # Search cost per variation
-                    "linkedin_cost": linkedin_result.get("cost_estimate", 0),
-                    "ai_ranking_cost": 0.02,
-                    "total_estimated": 0.01 + (0.01 * len(company_variations)) + linkedin_result.get("cost_estimate", 0) + 0.02
-                }
+                # Actual spend recorded from API usage so far in this request
+                "cost_estimates": cost_tracker.request_summary()
             }
             
         except Exception as e:
@@ -802,24 +789,9 @@ class ImprovedProspectDiscoveryService:
             return []
         
         try:
-            # Import AI ranking service to use same prompt logic
-            from .improved_ai_ranking import ImprovedAIRankingService
-            from app.prompts import AI_RANKING_USER_PROMPT_TEMPLATE
-            
-            ai_service = ImprovedAIRankingService()
-            
-            if not ai_service.client:
-                logger.warning("OpenAI client not available - skipping title filter")
-                return prospects
-            
-            # Score each prospect's title individually
-            filtering_tasks = []
-            for i, prospect in enumerate(prospects):
-                task = self._score_title_relevance(prospect, company_name, ai_service, i)
-                filtering_tasks.append(task)
-            
+            # Score titles (batched by default, see TITLE_FILTER_MODE / TITLE_FILTER_BATCH_SIZE)
             logger.info(f"Scoring {len(prospects)} prospects for title relevance...")
-            scoring_results = await asyncio.gather(*filtering_tasks, return_exceptions=True)
+            scoring_results = await title_filter_service.score_prospects(prospects, company_name)
             
             # Filter prospects based on scores
             filtered_prospects = []
@@ -840,7 +812,8 @@ class ImprovedProspectDiscoveryService:
                     prospect["ai_title_filter"] = {
                         "score": score,
                         "reasoning": reasoning,
-                        "passed": score >= MIN_TITLE_SCORE
+                        "passed": score >= MIN_TITLE_SCORE,
+                        "source": result.get("source")
                     }
                     
                     if score >= MIN_TITLE_SCORE:
@@ -848,6 +821,15 @@ class ImprovedProspectDiscoveryService:
                         logger.debug(f"✓ Passed: {prospect.get('title', 'Unknown')} - Score: {score}")
                     else:
                         logger.info(f"✗ Filtered: {prospect.get('title', 'Unknown')} - Score: {score} - {reasoning}")
+                elif isinstance(result, dict) and result.get("source") == "unscored":
+                    # No OpenAI client - kept without a score (counted in title_filter_sources)
+                    prospect["ai_title_filter"] = {
+                        "score": None,
+                        "reasoning": result.get("error"),
+                        "passed": True,
+                        "source": "unscored"
+                    }
+                    filtered_prospects.append(prospect)
                 else:
                     # Keep on error
                     logger.warning(f"No valid score for prospect {i} - keeping by default")
@@ -861,100 +843,6 @@ class ImprovedProspectDiscoveryService:
             # Return all prospects on error
             return prospects
     
-    async def _score_title_relevance(self, prospect: Dict, company_name: str, ai_service, index: int) -> Dict[str, Any]:
-        """
-        Score a single prospect's title relevance using AI
-        
-        Args:
-            prospect: Prospect with title and snippet
-            company_name: Target company name
-            ai_service: AI ranking service instance
-            index: Prospect index for tracking
-            
-        Returns:
-            Dict with success, score, and reasoning
-        """
-        try:
-            from app.prompts import AI_TITLE_FILTER_SYSTEM_PROMPT, AI_TITLE_FILTER_USER_PROMPT_TEMPLATE
-
-            title = prospect.get("title", "")
-            snippet = prospect.get("snippet", "")
-
-            # Build title filter prompt
-            prompt = AI_TITLE_FILTER_USER_PROMPT_TEMPLATE.format(
-                company_name=company_name,
-                title=title,
-                snippet=snippet[:300]
-            )
-
-            # Combine system prompt with user prompt
-            full_input = f"{AI_TITLE_FILTER_SYSTEM_PROMPT}\n\n{prompt}"
-            
-            # Use Responses API like in ranking service
-            api_params = {
-                "model": ai_service.model,
-                "input": full_input,
-                "text": {"format": {"type": "json_object"}},
-                "max_output_tokens": 300,
-                "timeout": 20
-            }
-
-            # Only add reasoning parameter for gpt-5 or o-series models
-            # Note: temperature is NOT supported in Responses API for GPT-5/o-series
-            if "gpt-5" in ai_service.model or ai_service.model.startswith("o"):
-                api_params["reasoning"] = {"effort": "minimal"}  # Fast for filtering
-            
-            response = ai_service.client.responses.create(**api_params)
-
-            # Parse response with proper error handling
-            import json
-
-            # Check if response is valid
-            if not response or not hasattr(response, 'output') or not response.output:
-                return {
-                    "success": False,
-                    "index": index,
-                    "error": "Invalid response structure from API"
-                }
-
-            try:
-                # When reasoning is enabled, response.output has 2 items:
-                # [0] = ResponseReasoningItem (thinking, content=None)
-                # [1] = ResponseOutputMessage (actual response)
-                # So we need to access the last item which contains the actual output
-                output_item = response.output[-1]  # Get last item (the actual output message)
-                output_text = output_item.content[0].text
-            except (IndexError, AttributeError, TypeError) as e:
-                return {
-                    "success": False,
-                    "index": index,
-                    "error": f"Error accessing response fields: {type(e).__name__}: {str(e)}"
-                }
-
-            result_data = json.loads(output_text)
-            
-            if "score" in result_data:
-                return {
-                    "success": True,
-                    "index": index,
-                    "score": int(result_data["score"]),
-                    "reasoning": result_data.get("reasoning", "")
-                }
-            else:
-                return {
-                    "success": False,
-                    "index": index,
-                    "error": "Missing score in response"
-                }
-                
-        except Exception as e:
-            logger.error(f"Error scoring title for prospect {index}: {str(e)}")
-            return {
-                "success": False,
-                "index": index,
-                "error": str(e)
-            }
-    
     async def _ai_basic_filter_prospects(self, prospects: List[Dict], company_name: str) -> List[Dict]:
         """
         Simple rule-based filtering to validate company match and connection count
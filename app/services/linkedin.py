@@ -22,17 +22,30 @@ print("💾 Check your data here: https://console.apify.com/storage/datasets/" +
 for item in client.dataset(run["defaultDatasetId"]).iterate_items():
     print(item)
 ```
+
+Runs use the async client instead: the actor is started, its status polled without
+blocking the event loop, and dataset items are paged in and parsed while the run
+is still scraping.
 """
 
 import os
+import time
 import logging
-from typing import List, Dict, Any, Optional
-from apify_client import ApifyClient # type: ignore
+from typing import List, Dict, Any, Optional, Callable
+from apify_client import ApifyClientAsync # type: ignore
 import asyncio
 from dataclasses import dataclass
 
+from .rate_governor import rate_governor
+from .cost_tracking import cost_tracker
+from .linkedin_urls import url_key
+from .profile_store import profile_store
+
 logger = logging.getLogger(__name__)
 
+# Apify run statuses after which the dataset is complete
+TERMINAL_RUN_STATUSES = {"SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"}
+
 
 @dataclass
 class LinkedInProfile:
@@ -47,6 +60,8 @@ class LinkedInProfile:
     education: Optional[List[Dict]] = None
     skills: Optional[List[str]] = None
     raw_data: Optional[Dict] = None
+    # URL this profile was scraped for when Apify returned a different one (renamed / redirected slug)
+    requested_url: Optional[str] = None
 
 
 class ApifyLinkedInService:
@@ -55,22 +70,38 @@ class ApifyLinkedInService:
     def __init__(self):
         self.api_token = os.getenv('APIFY_API_TOKEN')
         self.actor_id = "dev_fusion/linkedin-profile-scraper"  # LinkedIn Profile Scraper
+        self.poll_interval = float(os.getenv('APIFY_POLL_INTERVAL_SECONDS', '2'))
+        self.run_timeout = int(os.getenv('APIFY_RUN_TIMEOUT_SECONDS', '240'))
+        self.dataset_page_size = int(os.getenv('APIFY_DATASET_PAGE_SIZE', '50'))
+        # Large URL lists are split into chunks, each scraped by its own actor run
+        self.chunk_size = int(os.getenv('APIFY_CHUNK_SIZE', '10'))
+        self.max_parallel_runs = int(os.getenv('APIFY_MAX_PARALLEL_RUNS', '3'))
         
         if self.api_token:
-            self.client = ApifyClient(self.api_token)
+            self.client = ApifyClientAsync(self.api_token)
         else:
             self.client = None
             logger.warning("APIFY_API_TOKEN not found in environment variables")
     
-    async def scrape_profiles(self, linkedin_urls: List[str]) -> Dict[str, Any]:
+    async def scrape_profiles(self, linkedin_urls: List[str], force_refresh: bool = False,
+                              skip_url: Optional[Callable[[str], bool]] = None) -> Dict[str, Any]:
         """
         Scrape multiple LinkedIn profiles
         
+        Profiles in the profile store that were scraped within PROFILE_STORE_MAX_AGE_DAYS
+        are reused; only the remaining URLs are sent to Apify, split into chunks of
+        APIFY_CHUNK_SIZE with up to APIFY_MAX_PARALLEL_RUNS actor runs at once. Profiles
+        from finished chunks are returned even when another chunk fails or times out.
+        Cancelling the scrape aborts the actor runs still in progress.
+        
         Args:
             linkedin_urls: List of LinkedIn profile URLs to scrape
+            force_refresh: Re-scrape every URL even when a fresh stored profile exists
+            skip_url: Checked when a chunk is about to start its run - URLs it returns
+                True for are no longer needed and are dropped (a chunk left empty is skipped)
         
         Returns:
-            Dictionary with scraped profile data
+            Dictionary with scraped profile data (in the order of linkedin_urls)
         """
         if not self.client:
             return {
@@ -85,35 +116,74 @@ class ApifyLinkedInService:
             }
         
         try:
-            logger.info(f"Starting to scrape {len(linkedin_urls)} LinkedIn profiles")
-            
-            # Prepare the Actor input (matching example code structure)
-            run_input = {
-                "profileUrls": linkedin_urls  # Increased limit to capture more prospects per target title
-            }
-            
-            # Run the Actor and wait for it to finish (matching example code)
-            run = self.client.actor(self.actor_id).call(run_input=run_input)
-            
-            # Log dataset URL for debugging (matching example code pattern)
-            logger.info(f"💾 Check your data here: https://console.apify.com/storage/datasets/{run['defaultDatasetId']}")
-            
-            # Fetch and process Actor results from the run's dataset (matching example code)
+            stored = {} if force_refresh else await profile_store.get_many(linkedin_urls)
+
+            # Only store misses go to Apify (each canonical URL once)
+            to_scrape = []
+            queued = set()
+            for url in linkedin_urls:
+                key = url_key(url)
+                if key not in stored and key not in queued:
+                    queued.add(key)
+                    to_scrape.append(url)
+
+            logger.info(f"Starting to scrape {len(to_scrape)} LinkedIn profiles "
+                        f"({len(stored)} reused from the profile store)")
+
+            # Scrape the misses in parallel chunks (one actor run each)
+            chunks = [to_scrape[i:i + self.chunk_size] for i in range(0, len(to_scrape), self.chunk_size)]
+            semaphore = asyncio.Semaphore(self.max_parallel_runs)
+            chunk_results = await asyncio.gather(*[
+                self._scrape_chunk(index, chunk, semaphore, skip_url) for index, chunk in enumerate(chunks)
+            ])
+
+            scraped = [profile for chunk in chunk_results for profile in chunk.pop("profiles")]
+            failed_chunks = [chunk for chunk in chunk_results if chunk["error"]]
+            logger.info(f"Successfully scraped {len(scraped)} profiles "
+                        f"({len(chunks) - len(failed_chunks)}/{len(chunks)} chunks succeeded)")
+
+            if failed_chunks and not scraped and not stored:
+                return {
+                    "success": False,
+                    "error": "; ".join(f"chunk {chunk['index']}: {chunk['error']}" for chunk in failed_chunks),
+                    "chunks": chunk_results
+                }
+
+            # Merge stored and freshly scraped profiles back in the original order
+            by_url = {}
+            for p in scraped:
+                by_url[url_key(p.url)] = p
+                if p.requested_url:
+                    by_url.setdefault(url_key(p.requested_url), p)
+            for key, data in stored.items():
+                by_url.setdefault(key, LinkedInProfile(**{**data, "requested_url": None}))
+
             profiles = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                profile = self._parse_profile_data(item)
-                if profile:
+            merged = set()
+            for url in linkedin_urls:
+                profile = by_url.get(url_key(url))
+                if profile is not None and id(profile) not in merged:
+                    merged.add(id(profile))
+                    profile.requested_url = url
+                    profiles.append(profile)
+            # Renamed slugs that couldn't be matched to a requested URL go last
+            for profile in by_url.values():
+                if id(profile) not in merged:
+                    merged.add(id(profile))
                     profiles.append(profile)
-            
-            logger.info(f"Successfully scraped {len(profiles)} profiles")
             
             return {
                 "success": True,
                 "profiles_requested": len(linkedin_urls),
                 "profiles_scraped": len(profiles),
+                "profiles_from_store": len(stored),
+                "profiles_sent_to_apify": len(to_scrape) - sum(chunk["urls_skipped"] for chunk in chunk_results),
+                "profiles_skipped": sum(chunk["urls_skipped"] for chunk in chunk_results),
                 "profiles": [self._profile_to_dict(p) for p in profiles],
-                "run_id": run.get("id"),
-                "cost_estimate": len(linkedin_urls) * 0.15  # Rough estimate
+                "run_id": chunk_results[0]["run_id"] if chunk_results else None,
+                "cost_estimate": round(sum(chunk["cost_usd"] for chunk in chunk_results), 4),
+                "chunks": chunk_results,
+                "chunks_failed": len(failed_chunks)
             }
             
         except Exception as e:
@@ -122,6 +192,175 @@ class ApifyLinkedInService:
                 "success": False,
                 "error": str(e)
             }
+
+    async def _scrape_chunk(self, index: int, linkedin_urls: List[str], semaphore: asyncio.Semaphore,
+                            skip_url: Optional[Callable[[str], bool]] = None) -> Dict[str, Any]:
+        """
+        Scrape one chunk of URLs in its own actor run
+
+        Never raises (except when cancelled) - failures are reported in the chunk
+        result so other chunks still count. Profiles parsed before a failure or
+        timeout are kept.
+        """
+        profiles: List[LinkedInProfile] = []
+        run = None
+        error = None
+        requested = len(linkedin_urls)
+
+        async with semaphore:
+            if skip_url:
+                linkedin_urls = [url for url in linkedin_urls if not skip_url(url)]
+            if not linkedin_urls:
+                logger.info(f"Apify chunk {index} skipped - none of its {requested} URLs are needed any more")
+                return {"index": index, "urls": requested, "urls_skipped": requested, "profiles_scraped": 0,
+                        "status": "SKIPPED", "seconds": 0.0, "run_id": None, "cost_usd": 0.0, "error": None,
+                        "profiles": profiles}
+
+            started = time.monotonic()
+            try:
+                run = await self._run_scraper(linkedin_urls, profiles)
+                if run.get("error"):
+                    error = run["error"]
+                elif run.get("status") != "SUCCEEDED" and not profiles:
+                    error = f"Apify run {run.get('id')} finished with status {run.get('status')}"
+            except Exception as e:
+                logger.error(f"Apify chunk {index} failed: {str(e)}")
+                error = str(e) or type(e).__name__
+            seconds = time.monotonic() - started
+
+        self._match_requested_urls(linkedin_urls, profiles)
+
+        # Actual run cost from the run's Apify usage; store what we got either way
+        cost_usd = cost_tracker.record_apify_run(run, self.actor_id, items=len(profiles)).cost_usd if run else 0.0
+        await profile_store.save_many(profiles, self.actor_id)
+
+        return {
+            "index": index,
+            "urls": requested,
+            "urls_skipped": requested - len(linkedin_urls),
+            "profiles_scraped": len(profiles),
+            "status": (run or {}).get("status", "FAILED"),
+            "seconds": round(seconds, 1),
+            "run_id": (run or {}).get("id"),
+            "cost_usd": cost_usd,
+            "error": error,
+            "profiles": profiles
+        }
+
+    def _match_requested_urls(self, linkedin_urls: List[str], profiles: List[LinkedInProfile]):
+        """
+        Set requested_url on each profile of a chunk
+
+        Profiles come back under the URL LinkedIn resolved, which differs from the
+        requested one for renamed / redirected slugs. A single such profile left
+        over is matched to the single requested URL that got no profile; more than
+        one can't be told apart and stays unmatched.
+        """
+        requested = {url_key(url): url for url in linkedin_urls}
+        unmatched = dict(requested)
+        renamed = []
+        for profile in profiles:
+            key = url_key(profile.url)
+            if key in requested:
+                profile.requested_url = requested[key]
+                unmatched.pop(key, None)
+            else:
+                renamed.append(profile)
+
+        if len(renamed) == 1 and len(unmatched) == 1:
+            renamed[0].requested_url = next(iter(unmatched.values()))
+            logger.info(f"Apify returned {renamed[0].url} for {renamed[0].requested_url} (renamed slug)")
+
+    async def _run_scraper(self, linkedin_urls: List[str], profiles: List[LinkedInProfile]) -> Dict[str, Any]:
+        """Run the Apify actor for a list of URLs, appending parsed profiles as they arrive; returns the final run record"""
+        # Prepare the Actor input (matching example code structure)
+        run_input = {
+            "profileUrls": linkedin_urls  # Increased limit to capture more prospects per target title
+        }
+        
+        # Start the Actor (returns immediately with the run record)
+        async with rate_governor.slot("apify"):
+            run = await self.client.actor(self.actor_id).start(run_input=run_input)
+        
+        # Log dataset URL for debugging (matching example code pattern)
+        logger.info(f"💾 Check your data here: https://console.apify.com/storage/datasets/{run['defaultDatasetId']}")
+        
+        # Parse Actor results as they are paged in from the run's dataset
+        def handle_item(item: Dict[str, Any]):
+            profile = self._parse_profile_data(item)
+            if profile:
+                profiles.append(profile)
+
+        run = await self._stream_run_items(run, handle_item)
+
+        if run.get("status") != "SUCCEEDED":
+            logger.warning(f"Apify run {run.get('id')} finished with status {run.get('status')} - "
+                           f"keeping {len(profiles)} profiles already in the dataset")
+        return run
+
+    async def _stream_run_items(self, run: Dict[str, Any], handle_item: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """
+        Poll a started run and hand each new dataset item to handle_item
+
+        Items are fetched page by page while the run is in progress, then the
+        dataset is drained once the run reaches a terminal status. Runs still
+        going after APIFY_RUN_TIMEOUT_SECONDS are aborted and drained, and come
+        back with status TIMED-OUT.
+
+        Returns:
+            The final run record (status, usage)
+        """
+        run_client = self.client.run(run["id"])
+        try:
+            return await self._poll_run(run, run_client, handle_item)
+        except asyncio.CancelledError:
+            # Nobody will read the rest - stop paying for it
+            logger.info(f"Apify run {run['id']} cancelled - aborting")
+            try:
+                await run_client.abort()
+            except Exception as e:
+                logger.warning(f"Could not abort Apify run {run['id']}: {e}")
+            raise
+
+    async def _poll_run(self, run: Dict[str, Any], run_client: Any,
+                        handle_item: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        dataset_client = self.client.dataset(run["defaultDatasetId"])
+        deadline = time.monotonic() + self.run_timeout
+        offset = 0
+
+        while True:
+            finished = run.get("status") in TERMINAL_RUN_STATUSES
+
+            # Page in everything written since the last poll
+            while True:
+                async with rate_governor.slot("apify"):
+                    page = await dataset_client.list_items(offset=offset, limit=self.dataset_page_size)
+                for item in page.items:
+                    handle_item(item)
+                offset += len(page.items)
+                if len(page.items) < self.dataset_page_size:
+                    break
+
+            if finished:
+                return run
+
+            if time.monotonic() > deadline:
+                logger.error(f"Apify run {run['id']} exceeded {self.run_timeout}s - aborting")
+                async with rate_governor.slot("apify"):
+                    aborted = await run_client.abort()
+                # Drain what the run wrote before it was stopped on the next pass
+                run = {**run, **(aborted or {}), "status": "TIMED-OUT"}
+                continue
+
+            await asyncio.sleep(self.poll_interval)
+            async with rate_governor.slot("apify"):
+                refreshed = await run_client.get()
+            if refreshed is None:
+                # The run record is gone (deleted run / bad id) - it will never finish
+                logger.error(f"Apify run {run['id']} not found while polling - treating it as failed")
+                run = {**run, "status": "FAILED", "error": f"Apify run {run['id']} not found while polling"}
+                continue
+            run = refreshed
     
     def _parse_profile_data(self, raw_data: Dict[str, Any]) -> Optional[LinkedInProfile]:
         """Parse raw Apify data into LinkedInProfile object"""
@@ -209,6 +448,7 @@ class ApifyLinkedInService:
         profile_dict = {
             # === BASIC PROFILE INFORMATION ===
             'url': profile.url,
+            'requested_url': profile.requested_url,
             'name': profile.name,
             'first_name': raw_data.get('firstName'),
             'last_name': raw_data.get('lastName'),
@@ -0,0 +1,102 @@
+"""
+LinkedIn URL helpers
+Canonical form used to key stored profiles and dedupe URLs: https://www.linkedin.com/in/<slug>
+
+URLs arrive from Serper, Bright Data and client payloads in many shapes:
+- www. vs country / mobile subdomains (uk.linkedin.com, mobile.linkedin.com)
+- http vs https, missing scheme, trailing slashes, query strings, fragments
+- sub-pages (/in/<slug>/details/experience/)
+- legacy public URLs (/pub/<name>/<a>/<b>/<c> → /in/<name>-<c><b><a>)
+- percent-encoded or mixed-case slugs
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, unquote
+
+
+def canonical_linkedin_url(url: Optional[str]) -> str:
+    """
+    Normalize a LinkedIn profile URL to https://www.linkedin.com/in/<slug>
+
+    Returns "" for anything that isn't a LinkedIn profile URL.
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url.lstrip("/")
+
+    parts = urlsplit(url)
+    host = parts.netloc.lower().split("@")[-1].split(":")[0]
+    if not (host == "linkedin.com" or host.endswith(".linkedin.com")):
+        return ""
+
+    segments = [unquote(segment) for segment in parts.path.split("/") if segment]
+    if len(segments) < 2:
+        return ""
+
+    kind = segments[0].lower()
+    if kind == "in":
+        slug = segments[1]
+    elif kind == "pub":
+        # /pub/jane-doe/1a/2b/3c is the legacy form of /in/jane-doe-3c2b1a
+        ids = segments[2:5]
+        slug = segments[1] + ("-" + "".join(reversed(ids)) if len(ids) == 3 else "")
+    else:
+        return ""
+
+    slug = slug.strip().lower()
+    return f"https://www.linkedin.com/in/{slug}" if slug else ""
+
+
+def url_key(url: Optional[str]) -> str:
+    """Dedupe key: the canonical URL, or the stripped raw value for non-profile URLs"""
+    return canonical_linkedin_url(url) or (url or "").strip()
+
+
+class LinkedInUrlIndex:
+    """
+    Per-job dedupe index keyed by canonical URL
+
+    The first occurrence of each profile wins; later variants of the same
+    profile are counted in duplicates_collapsed so responses can report them.
+    """
+
+    def __init__(self, urls: Iterable[str] = ()):
+        self._first: Dict[str, str] = {}
+        self.duplicates_collapsed = 0
+        for url in urls:
+            self.add(url)
+
+    def add(self, url: Optional[str]) -> bool:
+        """Register a URL; returns False if the same profile was already seen"""
+        key = url_key(url)
+        if not key:
+            return False
+        if key in self._first:
+            self.duplicates_collapsed += 1
+            return False
+        self._first[key] = url
+        return True
+
+    def __contains__(self, url: Optional[str]) -> bool:
+        return url_key(url) in self._first
+
+    def __len__(self) -> int:
+        return len(self._first)
+
+    def dedupe_urls(self, urls: Iterable[str]) -> List[str]:
+        """Keep the first occurrence of each profile, in order"""
+        return [url for url in urls if self.add(url)]
+
+    def dedupe(self, items: Iterable[Any], get_url: Callable[[Any], Optional[str]]) -> List[Any]:
+        """Keep the first item for each profile URL; items without a URL are kept as-is"""
+        unique = []
+        for item in items:
+            url = get_url(item)
+            if not url or self.add(url):
+                unique.append(item)
+        return unique
+
+    def stats(self) -> Dict[str, int]:
+        return {"unique_urls": len(self._first), "duplicates_collapsed": self.duplicates_collapsed}
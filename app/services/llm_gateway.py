@@ -0,0 +1,315 @@
+"""
+LLM Gateway
+Shared AsyncOpenAI client for every LLM call site in the app.
+
+All services go through this gateway so that:
+- Calls never block the event loop (asyncio.gather fan-outs actually overlap)
+- One connection pool is shared across the hypercorn worker
+- Request rate and concurrency are governed per vendor (see rate_governor.py)
+- Timeouts and retries of transient errors are handled in one place
+- Repeated prompts are served from the response cache instead of re-billed
+"""
+
+import os
+import logging
+import asyncio
+import re
+import json
+import random
+from typing import Dict, Any, Optional, Callable
+
+import httpx
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from .response_cache import ResponseCache, ttl_from_env
+from .rate_governor import rate_governor
+from .cost_tracking import cost_tracker
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying - everything else (bad request, auth, etc.) fails fast
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# Default cache TTL per call site (override with LLM_CACHE_TTL_HOURS_<CALL_SITE>)
+LLM_CACHE_TTLS = {
+    "title_filter": 30 * 24 * 3600,            # Title + snippet relevance barely drifts
+    "title_filter_batch": 30 * 24 * 3600,
+    "ai_ranking": 7 * 24 * 3600,               # Profiles change; re-rank weekly
+    "company_normalization": 30 * 24 * 3600,
+    "company_name_expansion": 30 * 24 * 3600,
+}
+DEFAULT_LLM_CACHE_TTL = 24 * 3600
+
+# Request params that shape the output - part of the cache key alongside the prompt
+OUTPUT_FORMAT_PARAMS = ("text", "response_format", "max_output_tokens", "max_tokens", "temperature")
+
+
+def normalize_prompt(prompt: Any) -> str:
+    """
+    Collapse whitespace so formatting-only prompt differences share a cache entry
+
+    Non-string prompts (Responses API message lists, multi-part content) are
+    serialized as sorted-key JSON instead.
+    """
+    if prompt is not None and not isinstance(prompt, str):
+        return json.dumps(prompt, sort_keys=True, default=str, ensure_ascii=False)
+    return re.sub(r"\s+", " ", prompt or "").strip()
+
+
+def output_format_hash(api_params: Dict[str, Any]) -> str:
+    """Hash of the output-format params (JSON schema, token limit, temperature) of a request"""
+    return ResponseCache.make_key({name: api_params[name] for name in OUTPUT_FORMAT_PARAMS if name in api_params})
+
+
+def extract_response_text(response: Any) -> str:
+    """
+    Pull the output text out of a Responses API result
+
+    When reasoning is enabled, response.output has 2 items:
+    [0] = ResponseReasoningItem (thinking, content=None)
+    [1] = ResponseOutputMessage (actual response)
+    so the text always lives in the last item.
+    """
+    if not response or not getattr(response, "output", None):
+        raise ValueError("Invalid response structure from API")
+    try:
+        return response.output[-1].content[0].text
+    except (IndexError, AttributeError, TypeError) as e:
+        raise ValueError(f"Error accessing response fields: {type(e).__name__}: {str(e)}")
+
+
+def is_json_text(text: str) -> bool:
+    """Default cache validator - only well-formed JSON outputs are worth keeping"""
+    try:
+        json.loads(text)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+class LLMGateway:
+    """Single app-wide async OpenAI client with pooling, timeouts and retries"""
+
+    def __init__(self):
+        self.api_key = os.getenv('OPENAI_API_KEY')
+        self.timeout = float(os.getenv('OPENAI_TIMEOUT_SECONDS', '60'))
+        self.max_retries = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+        self.max_connections = int(os.getenv('OPENAI_MAX_CONNECTIONS', '50'))
+
+        self.cache_enabled = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+        self.cache = ResponseCache(
+            namespace="llm",
+            max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000')),
+            default_ttl_seconds=DEFAULT_LLM_CACHE_TTL,
+            persistent=os.getenv('LLM_CACHE_PERSISTENT', 'true').lower() == 'true'
+        )
+
+        if self.api_key:
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                timeout=self.timeout
+            )
+            # SDK retries are disabled - the gateway retries itself so every
+            # attempt goes through the same concurrency limit
+            self.client = AsyncOpenAI(
+                api_key=self.api_key,
+                http_client=http_client,
+                timeout=self.timeout,
+                max_retries=0
+            )
+            logger.info(
+                f"LLM gateway initialized (timeout={self.timeout}s, retries={self.max_retries}, "
+                f"pool={self.max_connections})"
+            )
+        else:
+            self.client = None
+            logger.warning("OPENAI_API_KEY not found - LLM gateway disabled")
+
+    async def create_response(self, call_site: Optional[str] = None, **api_params) -> Any:
+        """
+        Call the Responses API (async)
+
+        Args:
+            call_site: Name of the calling feature (recorded with the token cost)
+            **api_params: Same parameters as client.responses.create
+                          (model, input, text, max_output_tokens, reasoning, timeout)
+
+        Returns:
+            OpenAI Response object
+        """
+        return await self._call_with_retries(self.client.responses.create, api_params, "responses", call_site)
+
+    async def create_chat_completion(self, call_site: Optional[str] = None, **api_params) -> Any:
+        """
+        Call the Chat Completions API (async)
+
+        Args:
+            call_site: Name of the calling feature (recorded with the token cost)
+            **api_params: Same parameters as client.chat.completions.create
+
+        Returns:
+            OpenAI ChatCompletion object
+        """
+        return await self._call_with_retries(self.client.chat.completions.create, api_params, "chat", call_site)
+
+    async def create_response_text(
+        self,
+        call_site: str,
+        force_refresh: bool = False,
+        cache_validator: Callable[[str], bool] = is_json_text,
+        **api_params
+    ) -> str:
+        """
+        Call the Responses API and return the output text, served from cache when possible
+
+        The cache key is model + reasoning effort + output-format params + a hash of the
+        normalized prompt.
+
+        Args:
+            call_site: Name of the calling feature (selects the TTL and stats bucket)
+            force_refresh: Skip the cache lookup (the fresh result is still stored)
+            cache_validator: Only outputs passing this check are cached
+            **api_params: Same parameters as client.responses.create
+
+        Returns:
+            Output text of the response
+
+        Raises:
+            ValueError: If the API response has no usable output text
+        """
+        key = None
+        if self.cache_enabled:
+            key = ResponseCache.make_key(
+                "responses",
+                api_params.get("model"),
+                (api_params.get("reasoning") or {}).get("effort"),
+                output_format_hash(api_params),
+                normalize_prompt(api_params.get("input", ""))
+            )
+            if not force_refresh:
+                cached = await self.cache.get(key, call_site)
+                if cached is not None:
+                    return cached
+
+        response = await self.create_response(call_site=call_site, **api_params)
+        output_text = extract_response_text(response)
+
+        if key and cache_validator(output_text):
+            await self.cache.set(key, output_text, self._cache_ttl(call_site), call_site)
+
+        return output_text
+
+    async def create_chat_completion_text(
+        self,
+        call_site: str,
+        force_refresh: bool = False,
+        cache_validator: Callable[[str], bool] = is_json_text,
+        **api_params
+    ) -> str:
+        """
+        Call the Chat Completions API and return the message content, served from cache when possible
+
+        Same caching rules as create_response_text (messages are the prompt).
+        """
+        key = None
+        if self.cache_enabled:
+            key = ResponseCache.make_key(
+                "chat",
+                api_params.get("model"),
+                api_params.get("reasoning_effort"),
+                output_format_hash(api_params),
+                [
+                    [message.get("role"), normalize_prompt(message.get("content", ""))]
+                    for message in api_params.get("messages", [])
+                ]
+            )
+            if not force_refresh:
+                cached = await self.cache.get(key, call_site)
+                if cached is not None:
+                    return cached
+
+        response = await self.create_chat_completion(call_site=call_site, **api_params)
+        output_text = response.choices[0].message.content
+
+        if key and output_text and cache_validator(output_text):
+            await self.cache.set(key, output_text, self._cache_ttl(call_site), call_site)
+
+        return output_text
+
+    def _cache_ttl(self, call_site: str) -> int:
+        default = LLM_CACHE_TTLS.get(call_site, DEFAULT_LLM_CACHE_TTL)
+        return ttl_from_env(f"LLM_CACHE_TTL_HOURS_{call_site.upper()}", default)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the LLM response cache"""
+        return {
+            "enabled": self.cache_enabled,
+            "ttl_seconds": {site: self._cache_ttl(site) for site in LLM_CACHE_TTLS},
+            **self.cache.stats()
+        }
+
+    async def _call_with_retries(
+        self,
+        method,
+        api_params: Dict[str, Any],
+        operation: str,
+        call_site: Optional[str] = None
+    ) -> Any:
+        """
+        Run an SDK coroutine with retries on transient errors (exponential backoff + jitter)
+
+        Every attempt goes through the "openai" rate governor slot, so 429s and 5xx
+        shrink concurrency for all call sites at once and Retry-After pauses them all.
+        Token usage of the successful attempt is recorded by the cost tracker.
+        """
+        if not self.client:
+            raise RuntimeError("OpenAI client not configured - missing API key")
+
+        api_params.setdefault("timeout", self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with rate_governor.slot("openai"):
+                    response = await method(**api_params)
+                cost_tracker.record_openai(api_params.get("model"), getattr(response, "usage", None), call_site)
+                return response
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning(
+                    f"OpenAI {operation} call failed ({type(e).__name__}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """Honor Retry-After when OpenAI sends one, otherwise back off exponentially"""
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), 30.0)
+                except ValueError:
+                    pass
+        return min(2 ** attempt, 10) + random.uniform(0, 0.5)
+
+    async def close(self):
+        """Close the shared connection pool (called on app shutdown)"""
+        if self.client:
+            await self.client.close()
+
+
+# Global instance
+llm_gateway = LLMGateway()
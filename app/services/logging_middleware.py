@@ -9,6 +9,7 @@ from starlette.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import AsyncSessionLocal
 from app.models import APILog
+from app.services.event_stream import is_event_stream
 
 class APILoggingMiddleware(BaseHTTPMiddleware):
     """
@@ -59,6 +60,10 @@ class APILoggingMiddleware(BaseHTTPMiddleware):
             except Exception as e:
                 request_body = f"Error reading request body: {str(e)}"
 
+        log_details = dict(method=method, endpoint=endpoint, request_body=request_body,
+                           client_ip=client_ip, user_agent=user_agent)
+        stream_logged_later = False
+
         # Process the request
         try:
             response = await call_next(request)
@@ -66,7 +71,13 @@ class APILoggingMiddleware(BaseHTTPMiddleware):
 
             # Capture response body
             response_body = None
-            if isinstance(response, StreamingResponse):
+            if isinstance(response, StreamingResponse) and is_event_stream(response):
+                # SSE / NDJSON: pass each chunk through as it's produced, log when the stream ends
+                response.body_iterator = self._log_after_stream(
+                    response.body_iterator, start_time, status_code=status_code, **log_details
+                )
+                stream_logged_later = True
+            elif isinstance(response, StreamingResponse):
                 # Handle streaming responses
                 response_body_bytes = b""
                 async for chunk in response.body_iterator:
@@ -95,22 +106,38 @@ class APILoggingMiddleware(BaseHTTPMiddleware):
 
             # Log to database asynchronously
             try:
-                await self._log_to_database(
-                    method=method,
-                    endpoint=endpoint,
-                    request_body=request_body,
-                    response_body=response_body,
-                    status_code=status_code,
-                    duration_ms=duration_ms,
-                    client_ip=client_ip,
-                    user_agent=user_agent
-                )
+                if not stream_logged_later:
+                    await self._log_to_database(
+                        response_body=response_body,
+                        status_code=status_code,
+                        duration_ms=duration_ms,
+                        **log_details
+                    )
             except Exception as log_error:
                 # Don't fail the request if logging fails
                 print(f"Failed to log API request: {log_error}")
 
         return response
 
+    async def _log_after_stream(self, body_iterator, start_time: float, **log_details):
+        """
+        Yield a streamed body unchanged, then log it with the full stream duration.
+        """
+        captured = bytearray()
+        try:
+            async for chunk in body_iterator:
+                captured.extend(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8"))
+                yield chunk
+        finally:
+            try:
+                await self._log_to_database(
+                    response_body=captured.decode("utf-8", errors="replace"),
+                    duration_ms=(time.time() - start_time) * 1000,
+                    **log_details
+                )
+            except Exception as log_error:
+                print(f"Failed to log API request: {log_error}")
+
     async def _log_to_database(
         self,
         method: str,
@@ -0,0 +1,134 @@
+"""
+LinkedIn Profile Store
+Persistent store of parsed LinkedIn profiles keyed by canonical URL (linkedin_profiles table)
+
+The same people are scraped repeatedly: parent-system executives appear under every
+child hospital, and the hybrid pipeline re-scrapes Serper-only URLs. Profiles scraped
+within the freshness window (PROFILE_STORE_MAX_AGE_DAYS) are served from here, so only
+store misses are sent to Apify.
+"""
+
+import os
+import time
+import logging
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from .linkedin_urls import canonical_linkedin_url
+
+logger = logging.getLogger(__name__)
+
+# How long to stop using the store after a database error
+STORE_BACKOFF_SECONDS = 60
+
+
+class LinkedInProfileStore:
+    """Canonical URL → parsed profile, with a scraped-at freshness window"""
+
+    def __init__(self):
+        self.enabled = os.getenv('PROFILE_STORE_ENABLED', 'true').lower() == 'true'
+        self.max_age_days = float(os.getenv('PROFILE_STORE_MAX_AGE_DAYS', '30'))
+        self._disabled_until = 0.0
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0}
+
+    def available(self) -> bool:
+        return self.enabled and time.time() >= self._disabled_until
+
+    async def get_many(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up fresh profiles for a list of URLs
+
+        Returns:
+            {canonical_url: profile fields} for every URL with a fresh stored profile
+        """
+        canonical_urls = {canonical_linkedin_url(url) for url in urls} - {""}
+        if not canonical_urls or not self.available():
+            return {}
+
+        self._stats["lookups"] += len(canonical_urls)
+        try:
+            # Imported lazily so the services still load without DATABASE_URL
+            from sqlalchemy import select
+            from app.database import AsyncSessionLocal
+            from app.models import LinkedInProfileRecord
+
+            fresh_after = datetime.now(timezone.utc) - timedelta(days=self.max_age_days)
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(LinkedInProfileRecord.canonical_url, LinkedInProfileRecord.profile).where(
+                        LinkedInProfileRecord.canonical_url.in_(canonical_urls),
+                        LinkedInProfileRecord.scraped_at > fresh_after
+                    )
+                )
+                found = {row.canonical_url: row.profile for row in result}
+        except Exception as e:
+            self._disable(e)
+            return {}
+
+        self._stats["hits"] += len(found)
+        self._stats["misses"] += len(canonical_urls) - len(found)
+        return found
+
+    async def save_many(self, profiles: List[Any], actor_id: Optional[str] = None):
+        """Upsert scraped LinkedInProfile objects (scraped_at = now)"""
+        rows = self._rows(profiles)
+        if not rows or not self.available():
+            return
+
+        try:
+            from sqlalchemy.dialects.postgresql import insert
+            from app.database import AsyncSessionLocal
+            from app.models import LinkedInProfileRecord
+
+            now = datetime.now(timezone.utc)
+            stmt = insert(LinkedInProfileRecord).values([
+                {"canonical_url": url, "profile": data, "actor_id": actor_id, "scraped_at": now}
+                for url, data in rows.items()
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[LinkedInProfileRecord.canonical_url],
+                set_={"profile": stmt.excluded.profile, "actor_id": stmt.excluded.actor_id,
+                      "scraped_at": stmt.excluded.scraped_at}
+            )
+
+            async with AsyncSessionLocal() as session:
+                await session.execute(stmt)
+                await session.commit()
+            self._stats["stores"] += len(rows)
+        except Exception as e:
+            self._disable(e)
+
+    def _rows(self, profiles: List[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Canonical URL → profile fields
+
+        A renamed / redirected slug is stored under the requested URL as well, since
+        that's the URL later lookups ask for.
+        """
+        rows = {}
+        for profile in profiles:
+            for url in (profile.url, getattr(profile, "requested_url", None)):
+                canonical_url = canonical_linkedin_url(url)
+                if canonical_url:
+                    rows.setdefault(canonical_url, asdict(profile))
+        return rows
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters since startup"""
+        lookups = self._stats["lookups"]
+        return {
+            "enabled": self.enabled,
+            "available": self.available(),
+            "max_age_days": self.max_age_days,
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0
+        }
+
+    def _disable(self, error: Exception):
+        logger.warning(f"LinkedIn profile store unavailable: {error} - scraping everything for {STORE_BACKOFF_SECONDS}s")
+        self._disabled_until = time.time() + STORE_BACKOFF_SECONDS
+
+
+# Global instance
+profile_store = LinkedInProfileStore()
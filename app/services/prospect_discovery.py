@@ -14,6 +14,7 @@ from .search import serper_service
 from .ai_qualification import ai_qualification_service
 from .linkedin import linkedin_service
 from .company_validation import company_validation_service
+from .cost_tracking import cost_tracker
 
 logger = logging.getLogger(__name__)
 
@@ -153,13 +154,8 @@ class ProspectDiscoveryService:
                 "qualified_prospects": final_prospects,
                 "ai_analysis": qualification_result.get("ai_analysis", {}),
                 "validation_summary": validation_result.get("validation_details", {}),
-                "cost_estimates": {
-                    "search_cost": 0.01 * len(search_results[:10]),  # Estimate
-                    "validation_cost": validation_result.get("cost_estimate", 0.015) if validation_result.get("success") else 0,
-                    "ai_cost": qualification_result.get("cost_estimate", 0.02),
-                    "linkedin_cost": linkedin_result.get("cost_estimate", 0) if linkedin_result.get("success") else 0,
-                    "total_estimated": 0.01 * len(search_results[:10]) + (validation_result.get("cost_estimate", 0.015) if validation_result.get("success") else 0) + 0.02 + (linkedin_result.get("cost_estimate", 0) if linkedin_result.get("success") else 0)
-                }
+                # Actual spend recorded from API usage so far in this request
+                "cost_estimates": cost_tracker.request_summary()
             }
             
         except Exception as e:
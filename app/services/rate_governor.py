@@ -0,0 +1,263 @@
+"""
+Rate Governor
+Process-wide rate limiting and concurrency control, one limiter per external vendor.
+
+Every outbound call to OpenAI, Serper, Apify, Bright Data and ZoomInfo runs inside
+`rate_governor.slot(vendor)`. Each vendor limiter combines:
+- Token bucket: caps the request rate (requests/second with a burst allowance)
+- AIMD concurrency: the in-flight limit grows by ~1 per window of successful calls
+  and halves on 429/5xx, never dropping below 1
+- Retry-After: a throttled response pauses the whole vendor until the given time
+
+Defaults per vendor can be overridden with RATE_LIMIT_<VENDOR>_RPS,
+RATE_LIMIT_<VENDOR>_BURST and RATE_LIMIT_<VENDOR>_CONCURRENCY.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Mapping
+
+logger = logging.getLogger(__name__)
+
+# (requests per second, burst, max concurrency) per vendor
+VENDOR_DEFAULTS = {
+    "openai": (10.0, 25, int(os.getenv('OPENAI_MAX_CONCURRENCY', '25'))),
+    "serper": (10.0, 20, 10),
+    "apify": (5.0, 10, 4),          # Run starts, status polls and dataset pages
+    "brightdata": (1.0, 3, 4),
+    "zoominfo": (3.0, 5, 5),
+}
+DEFAULT_LIMITS = (2.0, 5, 5)
+
+# Pause applied when a vendor throttles us without a Retry-After header
+DEFAULT_THROTTLE_PAUSE_SECONDS = 2.0
+MAX_THROTTLE_PAUSE_SECONDS = 60.0
+
+# Call outcomes
+SUCCESS = "success"
+THROTTLED = "throttled"
+ERROR = "error"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds from now"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Slot:
+    """Handle for one governed call - report the response so the limiter can adapt"""
+
+    def __init__(self):
+        self.outcome: Optional[str] = None
+        self.retry_after: Optional[float] = None
+
+    def report(self, status_code: Optional[int], headers: Optional[Mapping[str, str]] = None):
+        """
+        Record the HTTP status of the call
+
+        429 and 5xx count as throttling (concurrency backs off, Retry-After pauses the vendor).
+        Other 4xx are client errors and leave the limits unchanged.
+        """
+        if status_code == 429 or (status_code is not None and status_code >= 500):
+            self.outcome = THROTTLED
+            self.retry_after = parse_retry_after((headers or {}).get("retry-after"))
+        elif status_code is not None and status_code < 400:
+            self.outcome = SUCCESS
+        else:
+            self.outcome = ERROR
+
+    def report_exception(self, error: Exception):
+        """Record a failed call, using the status code when the SDK exception carries one"""
+        response = getattr(error, "response", None)
+        status_code = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        if isinstance(status_code, int):
+            self.report(status_code, getattr(response, "headers", None))
+        else:
+            self.outcome = ERROR
+
+
+class VendorLimiter:
+    """Token bucket + AIMD concurrency limit for a single vendor"""
+
+    def __init__(self, vendor: str, rate_per_second: float, burst: int, max_concurrency: int):
+        self.vendor = vendor
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_concurrency = max(1, max_concurrency)
+
+        self.tokens = float(burst)
+        self.concurrency_limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop = None
+
+        self.stats_counters = {
+            "requests": 0,
+            "successes": 0,
+            "throttled": 0,
+            "errors": 0,
+            "waited_seconds": 0.0,
+        }
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Create the condition lazily, once per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self.in_flight = 0
+        return self._condition
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self.tokens = min(float(self.burst), self.tokens + elapsed * self.rate_per_second)
+        self._last_refill = now
+
+    async def acquire(self):
+        """Wait until a concurrency slot and a rate token are both available"""
+        condition = self._get_condition()
+        started = time.monotonic()
+
+        async with condition:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    timeout = self.paused_until - now
+                elif self.in_flight >= int(self.concurrency_limit):
+                    timeout = None  # Woken by release()
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        self.in_flight += 1
+                        break
+                    timeout = (1 - self.tokens) / self.rate_per_second
+
+                try:
+                    await asyncio.wait_for(condition.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+        self.stats_counters["requests"] += 1
+        self.stats_counters["waited_seconds"] += time.monotonic() - started
+
+    async def release(self, outcome: str, retry_after: Optional[float] = None):
+        """Free the slot and adapt the concurrency limit to the outcome"""
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            now = time.monotonic()
+
+            if outcome == SUCCESS:
+                self.stats_counters["successes"] += 1
+                # Additive increase: roughly +1 per concurrency_limit successful calls
+                self.concurrency_limit = min(
+                    float(self.max_concurrency),
+                    self.concurrency_limit + 1.0 / self.concurrency_limit
+                )
+            elif outcome == THROTTLED:
+                self.stats_counters["throttled"] += 1
+                # Multiplicative decrease, at most once per second so a burst of
+                # 429s from the same window doesn't collapse the limit to 1
+                if now - self._last_decrease >= 1.0:
+                    self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+                    self._last_decrease = now
+                pause = retry_after if retry_after is not None else DEFAULT_THROTTLE_PAUSE_SECONDS
+                pause = min(pause, MAX_THROTTLE_PAUSE_SECONDS)
+                self.paused_until = max(self.paused_until, now + pause)
+                logger.warning(
+                    f"{self.vendor} throttled - concurrency limit now {int(self.concurrency_limit)}, "
+                    f"pausing {pause:.1f}s"
+                )
+            else:
+                self.stats_counters["errors"] += 1
+
+            condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Live limiter state"""
+        now = time.monotonic()
+        return {
+            "rate_per_second": self.rate_per_second,
+            "burst": self.burst,
+            "tokens": round(min(float(self.burst), self.tokens + (now - self._last_refill) * self.rate_per_second), 2),
+            "max_concurrency": self.max_concurrency,
+            "concurrency_limit": int(self.concurrency_limit),
+            "in_flight": self.in_flight,
+            "paused_for_seconds": round(max(0.0, self.paused_until - now), 1),
+            **{key: round(value, 2) if isinstance(value, float) else value
+               for key, value in self.stats_counters.items()}
+        }
+
+
+class RateGovernor:
+    """Registry of per-vendor limiters shared by the whole process"""
+
+    def __init__(self):
+        self._limiters: Dict[str, VendorLimiter] = {}
+
+    def limiter(self, vendor: str) -> VendorLimiter:
+        """Get (or create from defaults + env overrides) the limiter for a vendor"""
+        if vendor not in self._limiters:
+            rate, burst, concurrency = VENDOR_DEFAULTS.get(vendor, DEFAULT_LIMITS)
+            prefix = f"RATE_LIMIT_{vendor.upper()}"
+            self._limiters[vendor] = VendorLimiter(
+                vendor,
+                rate_per_second=float(os.getenv(f"{prefix}_RPS", rate)),
+                burst=int(os.getenv(f"{prefix}_BURST", burst)),
+                max_concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", concurrency))
+            )
+        return self._limiters[vendor]
+
+    @asynccontextmanager
+    async def slot(self, vendor: str):
+        """
+        Run one outbound call under the vendor's limits
+
+        Usage:
+            async with rate_governor.slot("serper") as slot:
+                response = await session.post(...)
+                slot.report(response.status, response.headers)
+
+        Calls that raise without reporting count as errors; calls that finish
+        without reporting count as successes.
+        """
+        limiter = self.limiter(vendor)
+        await limiter.acquire()
+        slot = Slot()
+        try:
+            yield slot
+        except BaseException as e:
+            if slot.outcome is None:
+                if isinstance(e, Exception):
+                    slot.report_exception(e)
+                else:
+                    slot.outcome = ERROR  # Cancelled
+            raise
+        finally:
+            await limiter.release(slot.outcome or SUCCESS, slot.retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        """Live state of every limiter that has been used"""
+        return {vendor: limiter.stats() for vendor, limiter in sorted(self._limiters.items())}
+
+
+# Global instance
+rate_governor = RateGovernor()
@@ -0,0 +1,194 @@
+"""
+Two-tier response cache
+Hot in-memory LRU in front of a persistent Postgres tier (response_cache table)
+
+Used to avoid paying twice for identical upstream calls when the same
+hospitals are re-run (LLM outputs, search results).
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# How long to stop using the persistent tier after a database error
+PERSISTENT_TIER_BACKOFF_SECONDS = 60
+
+
+class ResponseCache:
+    """LRU memory tier + Postgres tier, with per-call-site hit/miss counters"""
+
+    def __init__(self, namespace: str, max_entries: int = 5000, default_ttl_seconds: int = 86400,
+                 persistent: bool = True):
+        """
+        Args:
+            namespace: Logical cache name (e.g. "llm"), stored with every persistent row
+            max_entries: Memory tier size before least-recently-used entries are evicted
+            default_ttl_seconds: TTL used when a caller doesn't pass one
+            persistent: Whether to read/write the Postgres tier
+        """
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.default_ttl_seconds = default_ttl_seconds
+        self.persistent = persistent
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._evictions = 0
+        self._persistent_disabled_until = 0.0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Content-addressed key: sha256 over the JSON encoding of all key parts"""
+        raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str, call_site: str = "default") -> Optional[Any]:
+        """Return the cached value or None (memory first, then Postgres)"""
+        stats = self._site_stats(call_site)
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                stats["memory_hits"] += 1
+                return value
+            del self._memory[key]
+
+        if self._persistent_available():
+            row = await self._persistent_get(key)
+            if row is not None:
+                value, expires_at = row
+                self._memory_set(key, value, expires_at)
+                stats["persistent_hits"] += 1
+                return value
+
+        stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None, call_site: str = "default"):
+        """Store a JSON-serializable value in both tiers"""
+        ttl = ttl_seconds if ttl_seconds is not None else self.default_ttl_seconds
+        if ttl <= 0:
+            return
+
+        expires_at = time.time() + ttl
+        self._memory_set(key, value, expires_at)
+        self._site_stats(call_site)["stores"] += 1
+
+        if self._persistent_available():
+            await self._persistent_set(key, value, expires_at, call_site)
+
+    def clear_memory(self):
+        """Drop the memory tier (persistent rows are kept until they expire)"""
+        self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per call site plus tier sizes"""
+        by_call_site = {}
+        for call_site, counters in self._stats.items():
+            hits = counters["memory_hits"] + counters["persistent_hits"]
+            lookups = hits + counters["misses"]
+            by_call_site[call_site] = {
+                **counters,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+            }
+
+        return {
+            "namespace": self.namespace,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "evictions": self._evictions,
+            "persistent_enabled": self.persistent,
+            "persistent_available": self._persistent_available(),
+            "by_call_site": by_call_site
+        }
+
+    def _site_stats(self, call_site: str) -> Dict[str, int]:
+        if call_site not in self._stats:
+            self._stats[call_site] = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "stores": 0}
+        return self._stats[call_site]
+
+    def _memory_set(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._evictions += 1
+
+    def _persistent_available(self) -> bool:
+        return self.persistent and time.time() >= self._persistent_disabled_until
+
+    def _disable_persistent_tier(self, error: Exception):
+        logger.warning(
+            f"Response cache ({self.namespace}) persistent tier unavailable: {error} - "
+            f"using memory only for {PERSISTENT_TIER_BACKOFF_SECONDS}s"
+        )
+        self._persistent_disabled_until = time.time() + PERSISTENT_TIER_BACKOFF_SECONDS
+
+    async def _persistent_get(self, key: str) -> Optional[tuple]:
+        try:
+            # Imported lazily so the services still load without DATABASE_URL
+            from sqlalchemy import select
+            from app.database import AsyncSessionLocal
+            from app.models import CachedResponse
+
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(CachedResponse.value, CachedResponse.expires_at).where(
+                        CachedResponse.namespace == self.namespace,
+                        CachedResponse.cache_key == key,
+                        CachedResponse.expires_at > datetime.now(timezone.utc)
+                    )
+                )
+                row = result.first()
+                if row is None:
+                    return None
+                return row.value, row.expires_at.timestamp()
+        except Exception as e:
+            self._disable_persistent_tier(e)
+            return None
+
+    async def _persistent_set(self, key: str, value: Any, expires_at: float, call_site: str):
+        try:
+            from sqlalchemy.dialects.postgresql import insert
+            from app.database import AsyncSessionLocal
+            from app.models import CachedResponse
+
+            expires_dt = datetime.fromtimestamp(expires_at, tz=timezone.utc)
+            stmt = insert(CachedResponse).values(
+                namespace=self.namespace,
+                cache_key=key,
+                call_site=call_site,
+                value=value,
+                expires_at=expires_dt
+            ).on_conflict_do_update(
+                constraint="uq_response_cache_namespace_key",
+                set_={"value": value, "call_site": call_site, "expires_at": expires_dt,
+                      "created_at": datetime.now(timezone.utc)}
+            )
+
+            async with AsyncSessionLocal() as session:
+                await session.execute(stmt)
+                await session.commit()
+        except Exception as e:
+            self._disable_persistent_tier(e)
+
+
+def ttl_from_env(env_name: str, default_seconds: int) -> int:
+    """Read a TTL override (in hours) from the environment"""
+    value = os.getenv(env_name)
+    if not value:
+        return default_seconds
+    try:
+        return int(float(value) * 3600)
+    except ValueError:
+        logger.warning(f"Invalid {env_name}={value!r} - using default TTL")
+        return default_seconds
@@ -3,14 +3,29 @@ Search service for finding LinkedIn profiles using Serper API
 """
 
 import os
+import re
 import logging
 from typing import List, Dict, Any, Optional
 import aiohttp
 import asyncio
 from dataclasses import dataclass
 
+from .rate_governor import rate_governor
+from .cost_tracking import cost_tracker
+from .response_cache import ResponseCache, ttl_from_env
+from .serper_query_planner import serper_query_planner
+from .linkedin_urls import url_key
+
 logger = logging.getLogger(__name__)
 
+# LinkedIn results for a hospital's team barely move week to week
+DEFAULT_SERPER_CACHE_TTL = 7 * 24 * 3600
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so equivalent queries share a cache entry"""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
 
 @dataclass
 class SearchResult:
@@ -26,12 +41,52 @@ class SerperSearchService:
     
     def __init__(self):
         self.api_key = os.getenv('SERPER_API_KEY')
-        self.base_url = "https://google.serper.dev/search"
+        self.base_url = os.getenv('SERPER_BASE_URL', "https://google.serper.dev/search")
+        # Title queries issued at once per company search (the rate governor caps the process total)
+        self.max_concurrent_queries = int(os.getenv('SERPER_MAX_CONCURRENT_QUERIES', '6'))
+        self.max_connections = int(os.getenv('SERPER_MAX_CONNECTIONS', '20'))
+        # per_title = one query per title; grouped = titles/variations packed into OR-queries
+        self.query_mode = os.getenv('SERPER_QUERY_MODE', 'per_title').lower()
+
+        # Query result cache (re-running a hospital doesn't re-buy identical searches)
+        self.cache_enabled = os.getenv('SERPER_CACHE_ENABLED', 'true').lower() == 'true'
+        self.cache_ttl = ttl_from_env('SERPER_CACHE_TTL_HOURS', DEFAULT_SERPER_CACHE_TTL)
+        self.cache = ResponseCache(
+            namespace="serper",
+            max_entries=int(os.getenv('SERPER_CACHE_MAX_ENTRIES', '5000')),
+            default_ttl_seconds=self.cache_ttl,
+            persistent=os.getenv('SERPER_CACHE_PERSISTENT', 'true').lower() == 'true'
+        )
+
+        # Long-lived pooled session (keep-alive connections reused across queries)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
         
         if not self.api_key:
             logger.warning("SERPER_API_KEY not found in environment variables")
+
+    async def start(self):
+        """Open the pooled HTTP session (called on app startup)"""
+        await self._get_session()
+
+    async def close(self):
+        """Close the pooled HTTP session (called on app shutdown)"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use in the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+            self._session_loop = loop
+        return self._session
     
-    async def search_linkedin_profiles(self, company_name: str, target_titles: List[str] = None, company_city: str = None, company_state: str = None) -> Dict[str, Any]:
+    async def search_linkedin_profiles(self, company_name: str, target_titles: List[str] = None, company_city: str = None, company_state: str = None, force_refresh: bool = False, company_variations: List[str] = None) -> Dict[str, Any]:
         """
         Search for LinkedIn profiles at a specific company
 
@@ -40,6 +95,9 @@ class SerperSearchService:
             target_titles: List of job titles to search for (optional)
             company_city: City where company is located (REQUIRED for search accuracy)
             company_state: State where company is located (REQUIRED for search accuracy)
+            force_refresh: Skip cached query results (fresh results are still stored)
+            company_variations: Extra company names to search (results are tagged with
+                                search_company_variation)
 
         Returns:
             Dictionary with search results and metadata
@@ -92,24 +150,33 @@ class SerperSearchService:
                 location_str = f"{company_state} "
                 logger.info(f"Using location: {company_state} (city not provided)")
 
-            # Search for each target title
-            for title in target_titles:
-                # Format: "Company City State Title site:linkedin.com/in"
-                # Location is ALWAYS included now
-                search_query = f'{company_name} {location_str}{title} site:linkedin.com/in'
+            # Plan queries: one per title, or titles/variations packed into OR-groups
+            companies = [company_name] + [v for v in (company_variations or []) if v and v != company_name]
+            planned_queries = serper_query_planner.plan(
+                companies, location_str, target_titles, grouped=self.query_mode == "grouped"
+            )
+
+            # Run the planned queries concurrently (bounded)
+            semaphore = asyncio.Semaphore(self.max_concurrent_queries)
 
-                logger.info(f"Searching: {search_query}")
-                
-                results = await self._perform_search(search_query)
+            async def run_query(planned) -> Dict[str, Any]:
+                async with semaphore:
+                    logger.info(f"Searching: {planned.query}")
+                    return await self._perform_search(planned.query, force_refresh=force_refresh,
+                                                      num_results=planned.num_results)
+
+            query_results = await asyncio.gather(*[run_query(planned) for planned in planned_queries])
+
+            # Merge in plan order so dedupe keeps the same first hit as a sequential loop
+            cached_queries = 0
+            for planned, results in zip(planned_queries, query_results):
+                if results.get("cached"):
+                    cached_queries += 1
                 if results.get("success"):
-                    # OPTIMIZED: Limit to first 3 per title (reduced from 5)
-                    title_results = results.get("results", [])[:8]
-                    for result in title_results:
-                        result["target_title"] = title
-                    all_results.extend(title_results)
-
-                # No delay needed when running in parallel
-                # await asyncio.sleep(0.1)
+                    # OPTIMIZED: Limit to first 8 per title
+                    all_results.extend(serper_query_planner.assign_results(
+                        results.get("results", []), planned, per_title_limit=8
+                    ))
             
             # Remove duplicates based on LinkedIn URL
             unique_results = self._deduplicate_results(all_results)
@@ -119,7 +186,10 @@ class SerperSearchService:
                 "company_name": company_name,
                 "total_results": len(unique_results),
                 "results": unique_results,  # Limit to top 20 results
-                "target_titles_searched": target_titles
+                "target_titles_searched": target_titles,
+                "query_mode": self.query_mode,
+                "queries_issued": len(planned_queries),
+                "cached_queries": cached_queries
             }
             
         except Exception as e:
@@ -129,8 +199,30 @@ class SerperSearchService:
                 "error": str(e)
             }
     
-    async def _perform_search(self, query: str) -> Dict[str, Any]:
-        """Perform a single search request to Serper API"""
+    async def _perform_search(self, query: str, force_refresh: bool = False, num_results: int = 10) -> Dict[str, Any]:
+        """
+        Perform a single search request to Serper API, served from cache when possible
+
+        The cache key is the normalized query + result count. Only successful
+        responses are cached, so failed searches are retried on the next run.
+        """
+        key = None
+        if self.cache_enabled:
+            key = ResponseCache.make_key(normalize_query(query), num_results)
+            if not force_refresh:
+                cached = await self.cache.get(key, "serper_search")
+                if cached is not None:
+                    # Copies - callers tag results with target_title in place
+                    return {"success": True, "results": [dict(r) for r in cached["results"]],
+                            "query": query, "cached": True}
+
+        result = await self._fetch_search(query, num_results)
+        if key and result.get("success"):
+            await self.cache.set(key, {"results": [dict(r) for r in result["results"]]}, call_site="serper_search")
+        return result
+
+    async def _fetch_search(self, query: str, num_results: int) -> Dict[str, Any]:
+        """Call the Serper API for one query"""
         headers = {
             'X-API-KEY': self.api_key,
             'Content-Type': 'application/json'
@@ -138,19 +230,21 @@ class SerperSearchService:
         
         payload = {
             'q': query,
-            'num': 10  # Number of results per search
+            'num': num_results
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
+            session = await self._get_session()
+            async with rate_governor.slot("serper") as slot:
                 async with session.post(
                     self.base_url,
                     json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=30)
+                    headers=headers
                 ) as response:
-                    
+                    slot.report(response.status, response.headers)
+
                     if response.status == 200:
+                        cost_tracker.record_serper_query(query, num_results)
                         data = await response.json()
                         
                         # Parse organic results
@@ -192,13 +286,21 @@ class SerperSearchService:
                 "error": str(e)
             }
     
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the Serper query cache"""
+        return {
+            "enabled": self.cache_enabled,
+            "ttl_seconds": self.cache_ttl,
+            **self.cache.stats()
+        }
+
     def _deduplicate_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate LinkedIn URLs from results"""
+        """Remove duplicate LinkedIn profiles from results (compared by canonical URL)"""
         seen_urls = set()
         unique_results = []
         
         for result in results:
-            url = result.get('link', '')
+            url = url_key(result.get('link', ''))
             if url and url not in seen_urls:
                 seen_urls.add(url)
                 unique_results.append(result)
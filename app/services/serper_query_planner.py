@@ -0,0 +1,229 @@
+"""
+Serper Query Planner
+Packs target titles (and company name variations) into Google OR-groups so one
+Serper request covers several titles, then attributes each returned result back
+to the title and company variation it matched.
+
+Per-title (one request per title):
+    Mayo Clinic Rochester Minnesota Director of Facilities site:linkedin.com/in
+Grouped:
+    Mayo Clinic Rochester Minnesota ("Director of Facilities" OR "Facilities Manager") site:linkedin.com/in
+
+Titles sharing a function keyword (facilities, engineering, energy, ...) are grouped
+first so each query stays topically tight; leftovers are packed together. Google
+ignores everything past the 32nd query word, so every planned query stays within
+MAX_QUERY_WORDS.
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Google drops query words past this limit (OR and site: count as words)
+MAX_QUERY_WORDS = 32
+
+SITE_FILTER = "site:linkedin.com/in"
+
+# Seniority / filler words that don't identify a title's function
+GENERIC_TITLE_WORDS = {
+    "of", "and", "the", "for", "&", "-", "director", "manager", "vp", "vice", "president",
+    "chief", "officer", "head", "senior", "sr", "assistant", "associate", "executive",
+}
+
+# Abbreviations expanded before matching results back to titles
+TITLE_ABBREVIATIONS = {
+    "cfo": "chief financial officer",
+    "coo": "chief operating officer",
+    "ceo": "chief executive officer",
+    "vp": "vice president",
+    "svp": "senior vice president",
+    "dir": "director",
+    "mgr": "manager",
+}
+
+
+@dataclass
+class PlannedQuery:
+    """One Serper request and the titles / company names it covers"""
+    query: str
+    titles: List[str]
+    companies: List[str]
+    num_results: int = 10
+    word_count: int = 0
+
+
+def count_query_words(query: str) -> int:
+    """Count words the way Google's 32-word limit does (quotes and parentheses don't count)"""
+    return len(re.findall(r"[^\s()\"]+", query))
+
+
+def _normalize(text: str) -> str:
+    text = re.sub(r"[^a-z0-9&]+", " ", (text or "").lower())
+    words = [TITLE_ABBREVIATIONS.get(word, word) for word in text.split()]
+    return " ".join(words)
+
+
+def _significant_words(phrase: str) -> List[str]:
+    return [word for word in _normalize(phrase).split() if word not in GENERIC_TITLE_WORDS]
+
+
+def _or_group(phrases: List[str]) -> str:
+    """Single phrase stays unquoted (same as the per-title query); several become ("a" OR "b")"""
+    if len(phrases) == 1:
+        return phrases[0]
+    return "(" + " OR ".join(f'"{phrase}"' for phrase in phrases) + ")"
+
+
+def _match_score(phrase: str, text: str) -> float:
+    """2+ for a full phrase match (longer phrases win), otherwise the share of the phrase's words found"""
+    normalized = _normalize(phrase)
+    if not normalized:
+        return 0.0
+    words = normalized.split()
+    if re.search(r"\b" + re.escape(normalized) + r"\b", text):
+        return 2.0 + 0.01 * len(words)
+    significant = [word for word in words if word not in GENERIC_TITLE_WORDS] or words
+    found = sum(1 for word in significant if re.search(r"\b" + re.escape(word) + r"\b", text))
+    # Generic words only break ties between titles with the same function words
+    generic_found = sum(1 for word in words if word not in significant and re.search(r"\b" + re.escape(word) + r"\b", text))
+    return found / len(significant) + 0.01 * generic_found
+
+
+class SerperQueryPlanner:
+    """Builds Serper queries for a company search and splits results back per title"""
+
+    def __init__(self):
+        self.max_titles_per_query = int(os.getenv('SERPER_MAX_TITLES_PER_QUERY', '3'))
+        self.max_companies_per_query = int(os.getenv('SERPER_MAX_COMPANIES_PER_QUERY', '3'))
+        # Grouped queries ask for more results since several titles share one page
+        self.grouped_num_results = int(os.getenv('SERPER_GROUPED_NUM_RESULTS', '20'))
+        self.max_words = MAX_QUERY_WORDS
+
+    def plan(self, companies: List[str], location_str: str, titles: List[str], grouped: bool = True) -> List[PlannedQuery]:
+        """
+        Plan the queries for one company search
+
+        Args:
+            companies: Company name followed by any variations to search
+            location_str: "City State " prefix (trailing space included, as in search.py)
+            titles: Target titles in priority order
+            grouped: False reproduces the per-title strategy (one query per company x title)
+
+        Returns:
+            Planned queries ordered by company, then by first title covered
+        """
+        if not grouped:
+            return [
+                self._build([company], location_str, [title], num_results=10)
+                for company in companies
+                for title in titles
+            ]
+
+        planned = []
+        for company_group in self._group_companies(companies, location_str, titles):
+            for title_group in self._group_titles(company_group, location_str, titles):
+                num_results = 10 if len(title_group) * len(company_group) == 1 else self.grouped_num_results
+                planned.append(self._build(company_group, location_str, title_group, num_results))
+        return planned
+
+    def assign_results(self, results: List[Dict[str, Any]], planned: PlannedQuery,
+                       per_title_limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Tag each result with the title and company variation it matched
+
+        Matching uses the result title + snippet. Results that match none of the
+        titles go to the first title in the group, keeping Google's ranking order.
+
+        Args:
+            results: Parsed Serper results for the planned query
+            planned: The query they came from
+            per_title_limit: Keep at most this many results per title/company pair
+        """
+        assigned = []
+        counts: Dict[tuple, int] = {}
+        for result in results:
+            text = _normalize(f"{result.get('title', '')} {result.get('snippet', '')}")
+            title = self._best_match(planned.titles, text)
+            company = self._best_match(planned.companies, text)
+
+            if per_title_limit is not None:
+                bucket = (title, company)
+                if counts.get(bucket, 0) >= per_title_limit:
+                    continue
+                counts[bucket] = counts.get(bucket, 0) + 1
+
+            result["target_title"] = title
+            # Single-company queries (per_title mode) are tagged with their own variation
+            result["search_company_variation"] = company
+            assigned.append(result)
+        return assigned
+
+    def _best_match(self, phrases: List[str], text: str) -> str:
+        best, best_score = phrases[0], 0.0
+        for phrase in phrases:
+            score = _match_score(phrase, text)
+            if score > best_score:
+                best, best_score = phrase, score
+        return best
+
+    def _build(self, companies: List[str], location_str: str, titles: List[str], num_results: int) -> PlannedQuery:
+        query = f"{_or_group(companies)} {location_str}{_or_group(titles)} {SITE_FILTER}"
+        return PlannedQuery(query=query, titles=titles, companies=companies,
+                            num_results=num_results, word_count=count_query_words(query))
+
+    def _fits(self, companies: List[str], location_str: str, titles: List[str]) -> bool:
+        return count_query_words(f"{_or_group(companies)} {location_str}{_or_group(titles)} {SITE_FILTER}") <= self.max_words
+
+    def _group_companies(self, companies: List[str], location_str: str, titles: List[str]) -> List[List[str]]:
+        """Pack company variations, leaving room for the longest single title"""
+        longest_title = [max(titles, key=count_query_words)] if titles else [""]
+        groups: List[List[str]] = []
+        for company in companies:
+            if groups and len(groups[-1]) < self.max_companies_per_query and \
+                    self._fits(groups[-1] + [company], location_str, longest_title):
+                groups[-1].append(company)
+            else:
+                groups.append([company])
+        return groups
+
+    def _group_titles(self, companies: List[str], location_str: str, titles: List[str]) -> List[List[str]]:
+        """Group titles sharing a function word first, then pack the leftovers"""
+        groups: List[List[str]] = []
+        for title in titles:
+            words = set(_significant_words(title))
+            for group in groups:
+                shares_function = any(words & set(_significant_words(other)) for other in group)
+                if shares_function and self._can_add(group, title, companies, location_str):
+                    group.append(title)
+                    break
+            else:
+                groups.append([title])
+
+        # Pack single-title groups together so unrelated titles still share requests
+        packed = [group for group in groups if len(group) > 1]
+        leftovers: List[List[str]] = []
+        for group in groups:
+            if len(group) > 1:
+                continue
+            if leftovers and self._can_add(leftovers[-1], group[0], companies, location_str):
+                leftovers[-1].append(group[0])
+            else:
+                leftovers.append(list(group))
+        packed.extend(leftovers)
+
+        # Keep the caller's title priority order across groups
+        order = {title: i for i, title in enumerate(titles)}
+        for group in packed:
+            group.sort(key=order.get)
+        return sorted(packed, key=lambda group: order[group[0]])
+
+    def _can_add(self, group: List[str], title: str, companies: List[str], location_str: str) -> bool:
+        return len(group) < self.max_titles_per_query and self._fits(companies, location_str, group + [title])
+
+
+# Global instance
+serper_query_planner = SerperQueryPlanner()
@@ -9,10 +9,12 @@ Step 3: Rank - AI ranking and final selection
 
 import logging
 import re
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional
 import asyncio
 from .search import serper_service
 from .linkedin import linkedin_service
+from .title_filter import title_filter_service
+from .linkedin_urls import LinkedInUrlIndex
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +32,8 @@ class ThreeStepProspectDiscoveryService:
         target_titles: List[str] = None,
         company_city: str = None,
         company_state: str = None,
-        parent_account_name: str = None
+        parent_account_name: str = None,
+        force_refresh: bool = False
     ) -> Dict[str, Any]:
         """
         STEP 1: Search LinkedIn and filter to qualified prospects
@@ -42,6 +45,7 @@ class ThreeStepProspectDiscoveryService:
             company_state: State for location filtering
             parent_account_name: Parent account name (e.g., "Providence Health & Services")
                                  If provided, will search with BOTH local and parent names
+            force_refresh: Bypass cached Serper query results
 
         Returns:
             List of LinkedIn URLs and metadata for prospects that passed filters
@@ -57,8 +61,10 @@ class ThreeStepProspectDiscoveryService:
                 company_name=company_name,
                 target_titles=target_titles,
                 company_city=company_city,
-                company_state=company_state
+                company_state=company_state,
+                force_refresh=force_refresh
             )
+            cached_queries = search_result_local.get("cached_queries", 0)
 
             search_results = []
 
@@ -76,8 +82,10 @@ class ThreeStepProspectDiscoveryService:
                     company_name=parent_account_name,
                     target_titles=target_titles,
                     company_city=company_city,
-                    company_state=company_state
+                    company_state=company_state,
+                    force_refresh=force_refresh
                 )
+                cached_queries += search_result_parent.get("cached_queries", 0)
 
                 if search_result_parent.get("success"):
                     parent_results = search_result_parent.get("results", [])
@@ -144,7 +152,8 @@ class ThreeStepProspectDiscoveryService:
                     "search_snippet": p.get("snippet"),
                     "target_title": p.get("target_title"),
                     "ai_title_score": p.get("ai_title_filter", {}).get("score"),
-                    "ai_title_reasoning": p.get("ai_title_filter", {}).get("reasoning")
+                    "ai_title_reasoning": p.get("ai_title_filter", {}).get("reasoning"),
+                    "ai_title_source": p.get("ai_title_filter", {}).get("source")
                 }
                 for p in title_filtered_prospects
                 if p.get("link")
@@ -155,7 +164,11 @@ class ThreeStepProspectDiscoveryService:
                 "after_basic_filter": len(filtered_prospects),
                 "after_ai_basic_filter": len(ai_filtered_prospects),
                 "after_title_filter": len(title_filtered_prospects),
-                "qualified_for_scraping": len(qualified_urls)
+                "qualified_for_scraping": len(qualified_urls),
+                # How many titles the local pre-classifier decided without the LLM
+                "title_filter_sources": title_filter_service.summarize_sources(ai_filtered_prospects),
+                # Serper queries answered from the query cache instead of the API
+                "serper_cached_queries": cached_queries
             }
 
             # Add parent account search info if applicable
@@ -191,7 +204,8 @@ class ThreeStepProspectDiscoveryService:
         company_name: str,
         company_city: str = None,
         company_state: str = None,
-        location_filter_enabled: bool = True
+        location_filter_enabled: bool = True,
+        skip_url: Optional[Callable[[str], bool]] = None
     ) -> Dict[str, Any]:
         """
         STEP 2: Scrape full LinkedIn data and apply advanced filters
@@ -202,16 +216,24 @@ class ThreeStepProspectDiscoveryService:
             company_city: City for location filtering
             company_state: State for location filtering
             location_filter_enabled: Whether to apply location filter
+            skip_url: Drops URLs that stopped being needed before their Apify chunk starts
+                (hybrid overlapped mode)
 
         Returns:
             Enriched prospects with full LinkedIn data ready for ranking
         """
         try:
+            # Collapse URL variants of the same profile before paying for any scrape
+            url_index = LinkedInUrlIndex()
+            linkedin_urls = url_index.dedupe_urls(linkedin_urls)
+            if url_index.duplicates_collapsed:
+                logger.info(f"Collapsed {url_index.duplicates_collapsed} duplicate LinkedIn URLs")
+
             logger.info(f"STEP 2: Starting LinkedIn scraping for {len(linkedin_urls)} profiles")
 
             # Step 2.1: Scrape LinkedIn profiles
             logger.info("Step 2.1: Scraping LinkedIn profiles...")
-            linkedin_result = await self.linkedin_service.scrape_profiles(linkedin_urls)
+            linkedin_result = await self.linkedin_service.scrape_profiles(linkedin_urls, skip_url=skip_url)
 
             if not linkedin_result.get("success"):
                 return {
@@ -238,6 +260,8 @@ class ThreeStepProspectDiscoveryService:
                 consolidated_data = self._consolidate_linkedin_data(profile)
                 enriched_prospects.append({
                     "linkedin_url": profile.get("url"),
+                    # Differs from linkedin_url for renamed / redirected slugs
+                    "requested_url": profile.get("requested_url"),
                     "linkedin_data": consolidated_data,
                     "has_complete_data": True,
                     "data_source": "linkedin_scrape"
@@ -266,6 +290,10 @@ class ThreeStepProspectDiscoveryService:
                 "company_name": company_name,
                 "summary": {
                     "profiles_scraped": len(linkedin_profiles),
+                    "duplicate_urls_collapsed": url_index.duplicates_collapsed,
+                    # Reused from the LinkedIn profile store instead of re-scraped
+                    "profiles_from_store": linkedin_result.get("profiles_from_store", 0),
+                    "profiles_skipped": linkedin_result.get("profiles_skipped", 0),
                     "after_advanced_filter": len(final_prospects),
                     "ready_for_ranking": len(final_prospects)
                 },
@@ -362,6 +390,94 @@ class ThreeStepProspectDiscoveryService:
                 "step": "step3_exception"
             }
 
+    async def step3_rank_prospects_stream(
+        self,
+        enriched_prospects: List[Dict],
+        company_name: str,
+        min_score_threshold: int = 65,
+        max_prospects: int = 10
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        STEP 3 (streamed): yield each prospect the moment its AI ranking finishes
+
+        Same ranking, threshold and limit as step3_rank_prospects, but the slowest
+        OpenAI call no longer holds back the rest of the list.
+
+        Yields {"event": ..., "data": {...}}:
+            ranked         - one per ranked prospect, in completion order, with
+                             qualified = score ≥ min_score_threshold
+            ranking_failed - a prospect whose ranking failed after retries
+            summary        - last event: the step3_rank_prospects result (top
+                             qualified_prospects in score order, without all_ranked_prospects)
+            error          - nothing could be ranked (last event)
+        """
+        from .improved_ai_ranking import ImprovedAIRankingService
+        ai_service = ImprovedAIRankingService()
+
+        logger.info(f"STEP 3 (streamed): Starting AI ranking for {len(enriched_prospects)} prospects")
+        total = len(enriched_prospects)
+        ranked_prospects = []
+        completed = 0
+
+        async for update in ai_service.rank_prospects_stream(enriched_prospects, company_name):
+            if update["type"] == "ranked":
+                completed += 1
+                prospect = update["prospect"]
+                ranked_prospects.append(prospect)
+                yield {"event": "ranked", "data": {
+                    "index": update["index"],
+                    "completed": completed,
+                    "total": total,
+                    "qualified": prospect["ai_ranking"]["ranking_score"] >= min_score_threshold,
+                    "prospect": prospect
+                }}
+            elif update["type"] == "failed":
+                completed += 1
+                yield {"event": "ranking_failed", "data": {
+                    "index": update["index"],
+                    "completed": completed,
+                    "total": total,
+                    "name": enriched_prospects[update["index"]].get("linkedin_data", {}).get("name"),
+                    "error": update["error"]
+                }}
+            elif update["type"] == "error":
+                yield {"event": "error", "data": {"success": False, "error": update["error"], "step": "ranking"}}
+                return
+
+        if not ranked_prospects:
+            yield {"event": "error", "data": {
+                "success": False,
+                "error": "AI ranking failed to rank any prospects",
+                "step": "ranking"
+            }}
+            return
+
+        ranked_prospects.sort(key=lambda p: p["ai_ranking"]["ranking_score"], reverse=True)
+        for position, prospect in enumerate(ranked_prospects, start=1):
+            prospect["ai_ranking"]["rank_position"] = position
+
+        qualified_prospects = [
+            p for p in ranked_prospects
+            if p["ai_ranking"]["ranking_score"] >= min_score_threshold
+        ]
+        top_prospects = qualified_prospects[:max_prospects]
+        logger.info(f"Final qualified prospects (streamed): {len(top_prospects)}")
+
+        yield {"event": "summary", "data": {
+            "success": True,
+            "step": "ranking_complete",
+            "company_name": company_name,
+            "summary": {
+                "prospects_ranked": len(ranked_prospects),
+                "above_threshold": len(qualified_prospects),
+                "final_top_prospects": len(top_prospects),
+                "min_score_threshold": min_score_threshold,
+                "max_prospects": max_prospects
+            },
+            "qualified_prospects": top_prospects,
+            "pipeline_complete": True
+        }}
+
     # ========== HELPER METHODS (copied from improved_prospect_discovery.py) ==========
 
     def _basic_filter_prospects(self, prospects: List[Dict], company_name: str, company_state: str = None) -> List[Dict]:
@@ -463,23 +579,9 @@ class ThreeStepProspectDiscoveryService:
             return []
 
         try:
-            from .improved_ai_ranking import ImprovedAIRankingService
-            from app.prompts import AI_TITLE_FILTER_SYSTEM_PROMPT, AI_TITLE_FILTER_USER_PROMPT_TEMPLATE
-
-            ai_service = ImprovedAIRankingService()
-
-            if not ai_service.client:
-                logger.warning("OpenAI client not available - skipping title filter")
-                return prospects
-
-            # Score each prospect's title
-            filtering_tasks = []
-            for i, prospect in enumerate(prospects):
-                task = self._score_title_relevance(prospect, company_name, ai_service, i)
-                filtering_tasks.append(task)
-
+            # Score titles (batched by default, see TITLE_FILTER_MODE / TITLE_FILTER_BATCH_SIZE)
             logger.info(f"Scoring {len(prospects)} prospects for title relevance...")
-            scoring_results = await asyncio.gather(*filtering_tasks, return_exceptions=True)
+            scoring_results = await title_filter_service.score_prospects(prospects, company_name)
 
             # Filter based on scores
             filtered_prospects = []
@@ -498,12 +600,17 @@ class ThreeStepProspectDiscoveryService:
                     prospect["ai_title_filter"] = {
                         "score": score,
                         "reasoning": reasoning,
-                        "passed": score >= MIN_TITLE_SCORE
+                        "passed": score >= MIN_TITLE_SCORE,
+                        "source": result.get("source")
                     }
 
                     if score >= MIN_TITLE_SCORE:
                         filtered_prospects.append(prospect)
                 else:
+                    if isinstance(result, dict) and result.get("source") == "unscored":
+                        # No OpenAI client - kept without a score (counted in title_filter_sources)
+                        prospect["ai_title_filter"] = {"score": None, "reasoning": result.get("error"),
+                                                       "passed": True, "source": "unscored"}
                     filtered_prospects.append(prospect)
 
             return filtered_prospects
@@ -512,61 +619,6 @@ class ThreeStepProspectDiscoveryService:
             logger.error(f"Error in title filtering: {str(e)}")
             return prospects
 
-    async def _score_title_relevance(self, prospect: Dict, company_name: str, ai_service, index: int) -> Dict[str, Any]:
-        """Score single prospect title - same as original"""
-        try:
-            from app.prompts import AI_TITLE_FILTER_SYSTEM_PROMPT, AI_TITLE_FILTER_USER_PROMPT_TEMPLATE
-            import json
-
-            title = prospect.get("title", "")
-            snippet = prospect.get("snippet", "")
-
-            prompt = AI_TITLE_FILTER_USER_PROMPT_TEMPLATE.format(
-                company_name=company_name,
-                title=title,
-                snippet=snippet[:300]
-            )
-
-            full_input = f"{AI_TITLE_FILTER_SYSTEM_PROMPT}\n\n{prompt}"
-
-            api_params = {
-                "model": ai_service.model,
-                "input": full_input,
-                "text": {"format": {"type": "json_object"}},
-                "max_output_tokens": 300,
-                "timeout": 20
-            }
-
-            if "gpt-5" in ai_service.model or ai_service.model.startswith("o"):
-                api_params["reasoning"] = {"effort": "minimal"}
-
-            response = ai_service.client.responses.create(**api_params)
-
-            if not response or not hasattr(response, 'output') or not response.output:
-                return {"success": False, "index": index, "error": "Invalid response"}
-
-            try:
-                output_item = response.output[-1]
-                output_text = output_item.content[0].text
-            except (IndexError, AttributeError, TypeError) as e:
-                return {"success": False, "index": index, "error": str(e)}
-
-            result_data = json.loads(output_text)
-
-            if "score" in result_data:
-                return {
-                    "success": True,
-                    "index": index,
-                    "score": int(result_data["score"]),
-                    "reasoning": result_data.get("reasoning", "")
-                }
-            else:
-                return {"success": False, "index": index, "error": "Missing score"}
-
-        except Exception as e:
-            logger.error(f"Error scoring title for prospect {index}: {str(e)}")
-            return {"success": False, "index": index, "error": str(e)}
-
     def _advanced_filter_with_linkedin_data(
         self,
         prospects: List[Dict],
@@ -0,0 +1,182 @@
+"""
+Deterministic Title Pre-Classifier
+Resolves trivially decidable job titles locally before the LLM title filter
+
+Rules are compiled from the existing buyer persona sources:
+- app/hospital_buyer_persona.md (facilities/engineering/maintenance leaders first,
+  then sustainability/energy, then finance and operations executives)
+- WebSearchContactEnricher.PERSONAS title lists
+- BrightDataProspectDiscoveryService.EXCLUDED_POSITION_KEYWORDS plus the clinical
+  rejection keywords from AI_TITLE_FILTER prompts
+
+Decisions:
+- accept:    buyer persona match and no rejection keyword → score 85
+- reject:    rejection keyword and no buyer persona match → score 15
+- uncertain: neither or both → sent to the LLM title filter
+"""
+
+import re
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+ACCEPT = "accept"
+REJECT = "reject"
+UNCERTAIN = "uncertain"
+
+# Scores assigned to local decisions (MIN_TITLE_SCORE is 55)
+LOCAL_ACCEPT_SCORE = 85
+LOCAL_REJECT_SCORE = 15
+
+# Buyer roles from the hospital buyer persona call (app/hospital_buyer_persona.md)
+PERSONA_DOC_TITLES = [
+    "director of facilities", "vp of facilities", "facilities manager",
+    "director of engineering", "engineering director", "director of maintenance",
+    "director of plant operations", "plant manager", "physical plant",
+    "energy manager", "energy engineer", "sustainability manager", "director of sustainability",
+    "chief financial officer", "chief operating officer", "vp of operations", "vp of finance",
+    "director of procurement", "procurement director",
+]
+
+# Clinical / non-buyer keywords from the AI_TITLE_FILTER rejection list
+CLINICAL_REJECT_KEYWORDS = [
+    "rn", "md", "surgeon", "surgery", "surgical", "doctor", "pharmacist", "pharmacy",
+    "radiology", "imaging", "oncology", "cardiology", "cardiac", "pediatric", "pediatrics",
+    "neurology", "obstetrics", "laboratory", "pathology", "respiratory", "dietary",
+    "nutrition", "social worker", "case manager", "case management", "infection prevention",
+    "care coordinator", "technologist", "phlebotomist", "chaplain", "resident", "volunteer",
+]
+
+# Entry-level keywords that reject even when a persona phrase matches ("Facilities Intern")
+HARD_REJECT_KEYWORDS = ["intern", "internship", "student", "volunteer"]
+
+# Words allowed between persona phrase tokens ("director facilities" matches "Director of Facilities")
+_FILLER = r"(?:\W+(?:of|for|and|&|the)\b)*\W+"
+
+
+@dataclass
+class TitleDecision:
+    """Local classification result"""
+    decision: str
+    score: Optional[int]
+    reason: str
+    role: str
+
+
+def _phrase_pattern(phrases: List[str]) -> Pattern:
+    """Compile phrases into one word-bounded, case-insensitive alternation"""
+    alternatives = []
+    for phrase in sorted(set(p.lower().replace(",", " ") for p in phrases), key=len, reverse=True):
+        tokens = [re.escape(token) for token in phrase.split()]
+        alternatives.append(_FILLER.join(tokens))
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+
+def extract_role(serper_title: str, company_name: Optional[str] = None) -> str:
+    """
+    Pull the role out of a Serper LinkedIn result title
+
+    "Jane Doe - Director of Facilities - Providence | LinkedIn" → "Director of Facilities"
+    Two-part titles ("Jane Doe - Providence") are ambiguous and return "".
+    Company names are removed so "Medical Center" can't trigger a clinical rejection.
+    """
+    text = (serper_title or "").split("|")[0]
+    parts = [part.strip() for part in re.split(r"\s+[-–—]\s+", text) if part.strip()]
+    role = parts[1] if len(parts) >= 3 else ""
+
+    if company_name and role:
+        role = re.sub(re.escape(company_name), " ", role, flags=re.IGNORECASE)
+    # Drop trailing "at <Company>" / "@ <Company>"
+    role = re.split(r"\s+(?:at|@)\s+", role, maxsplit=1)[0]
+    return role.strip(" ,-")
+
+
+class TitleClassifier:
+    """Compiled accept/reject rules for job titles"""
+
+    def __init__(self):
+        self._accept: Optional[Pattern] = None
+        self._reject: Optional[Pattern] = None
+        self._hard_reject: Optional[Pattern] = None
+
+    def _compile(self):
+        """Build the patterns on first use (imports are lazy to avoid import cycles)"""
+        from app.enrichers.web_search_contact_enricher import WebSearchContactEnricher
+        from .brightdata_prospect_discovery import BrightDataProspectDiscoveryService
+
+        persona_titles = list(PERSONA_DOC_TITLES)
+        for persona in WebSearchContactEnricher.PERSONAS.values():
+            persona_titles.extend(persona["titles"])
+
+        reject_keywords = list(BrightDataProspectDiscoveryService.EXCLUDED_POSITION_KEYWORDS)
+        reject_keywords.extend(CLINICAL_REJECT_KEYWORDS)
+
+        self._accept = _phrase_pattern(persona_titles)
+        self._reject = _phrase_pattern(reject_keywords)
+        self._hard_reject = _phrase_pattern(HARD_REJECT_KEYWORDS)
+        logger.info(
+            f"Title classifier compiled: {len(set(persona_titles))} persona phrases, "
+            f"{len(set(reject_keywords))} rejection keywords"
+        )
+
+    def classify(self, serper_title: str, company_name: Optional[str] = None) -> TitleDecision:
+        """
+        Classify a Serper result title as accept, reject or uncertain
+
+        Args:
+            serper_title: Search result title ("Name - Role - Company | LinkedIn")
+            company_name: Target company (stripped from the role before matching)
+        """
+        if self._accept is None:
+            self._compile()
+
+        role = extract_role(serper_title, company_name)
+        if not role:
+            return TitleDecision(UNCERTAIN, None, "No role found in search title", role)
+
+        hard_reject = self._hard_reject.search(role)
+        if hard_reject:
+            return TitleDecision(REJECT, LOCAL_REJECT_SCORE, f"Entry-level keyword '{hard_reject.group(0)}'", role)
+
+        accept = self._accept.search(role)
+        reject = self._reject.search(role)
+
+        if accept and not reject:
+            return TitleDecision(ACCEPT, LOCAL_ACCEPT_SCORE, f"Buyer persona match '{accept.group(0)}'", role)
+        if reject and not accept:
+            return TitleDecision(REJECT, LOCAL_REJECT_SCORE, f"Non-buyer keyword '{reject.group(0)}'", role)
+        if accept and reject:
+            return TitleDecision(
+                UNCERTAIN, None,
+                f"Conflicting matches '{accept.group(0)}' / '{reject.group(0)}'", role
+            )
+        return TitleDecision(UNCERTAIN, None, "No persona or rejection match", role)
+
+    def partition(self, prospects: List[dict], company_name: Optional[str] = None) -> Tuple[dict, List[int]]:
+        """
+        Split prospects into locally decided results and indices that need the LLM
+
+        Returns:
+            (results keyed by index, uncertain indices)
+        """
+        decided = {}
+        uncertain = []
+        for i, prospect in enumerate(prospects):
+            decision = self.classify(prospect.get("title", ""), company_name)
+            if decision.decision == UNCERTAIN:
+                uncertain.append(i)
+                continue
+            decided[i] = {
+                "success": True,
+                "index": i,
+                "score": decision.score,
+                "reasoning": f"Local {decision.decision}: {decision.reason}",
+                "source": "local"
+            }
+        return decided, uncertain
+
+
+# Global instance
+title_classifier = TitleClassifier()
@@ -0,0 +1,295 @@
+"""
+Title Relevance Scoring Service
+Scores Serper search hits (title + snippet) for buyer relevance before LinkedIn scraping
+
+Titles the local pre-classifier can decide (obvious buyers / obvious clinical roles)
+never reach the LLM - see app/services/title_classifier.py. Without an OpenAI client
+the remaining titles pass through unscored (source "unscored").
+
+Two LLM modes for the remaining titles:
+- batch (default): N titles per request with a JSON-schema response, scores mapped
+  back by index. Items missing or invalid in the batch output fall back to per-item calls.
+- individual: one request per prospect (original behavior)
+"""
+
+import os
+import json
+import logging
+import asyncio
+from typing import List, Dict, Any, Optional
+
+from app.prompts import (
+    AI_TITLE_FILTER_SYSTEM_PROMPT,
+    AI_TITLE_FILTER_USER_PROMPT_TEMPLATE,
+    AI_TITLE_FILTER_BATCH_USER_PROMPT_TEMPLATE,
+    AI_TITLE_FILTER_BATCH_ITEM_TEMPLATE
+)
+from .llm_gateway import llm_gateway
+from .title_classifier import title_classifier
+
+logger = logging.getLogger(__name__)
+
+# Structured output schema for batched scoring
+TITLE_SCORES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "index": {"type": "integer"},
+                    "score": {"type": "integer"},
+                    "reasoning": {"type": "string"}
+                },
+                "required": ["index", "score", "reasoning"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["results"],
+    "additionalProperties": False
+}
+
+
+class TitleFilterService:
+    """Scores prospect titles 0-100 for relevance, batched or one call per prospect"""
+
+    def __init__(self):
+        self.model = os.getenv('OPENAI_MODEL', 'gpt-5-mini-2025-08-07')
+        self.mode = os.getenv('TITLE_FILTER_MODE', 'batch')  # batch | individual
+        self.batch_size = int(os.getenv('TITLE_FILTER_BATCH_SIZE', '20'))
+        self.preclassify = os.getenv('TITLE_PRECLASSIFIER_ENABLED', 'true').lower() == 'true'
+        self.client = llm_gateway.client
+
+    async def score_prospects(
+        self,
+        prospects: List[Dict],
+        company_name: str,
+        mode: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        preclassify: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Score every prospect's title relevance
+
+        Args:
+            prospects: Serper results with "title" and "snippet"
+            company_name: Target company name
+            mode: "batch" or "individual" (defaults to TITLE_FILTER_MODE)
+            batch_size: Titles per batched request (defaults to TITLE_FILTER_BATCH_SIZE)
+            preclassify: Resolve obvious titles locally first (defaults to TITLE_PRECLASSIFIER_ENABLED)
+
+        Returns:
+            One result per prospect, in input order:
+            {"success", "index", "score", "reasoning", "source"} or {"success": False, "index", "error"}
+            source is "local", "llm_batch" or "llm_single" ("unscored" for failures without a client)
+        """
+        if not prospects:
+            return []
+
+        preclassify = self.preclassify if preclassify is None else preclassify
+        if not preclassify:
+            return await self._score_with_llm(prospects, company_name, mode, batch_size)
+
+        results, uncertain = title_classifier.partition(prospects, company_name)
+        logger.info(f"Title pre-classifier resolved {len(results)}/{len(prospects)} titles locally")
+
+        if uncertain:
+            llm_results = await self._score_with_llm(
+                [prospects[i] for i in uncertain], company_name, mode, batch_size
+            )
+            for original_index, result in zip(uncertain, llm_results):
+                results[original_index] = {**result, "index": original_index}
+
+        return [results[i] for i in range(len(prospects))]
+
+    async def _score_with_llm(
+        self,
+        prospects: List[Dict],
+        company_name: str,
+        mode: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Score prospects with the LLM (batched or one call each), results in input order"""
+        if not self.client:
+            logger.warning(f"OpenAI client not available - {len(prospects)} title(s) pass through unscored")
+            return [
+                {"success": False, "index": i, "error": "OpenAI client not available", "source": "unscored"}
+                for i in range(len(prospects))
+            ]
+
+        mode = mode or self.mode
+        batch_size = max(1, batch_size or self.batch_size)
+
+        if mode != "batch":
+            return list(await asyncio.gather(
+                *[self.score_single(prospect, company_name, i) for i, prospect in enumerate(prospects)]
+            ))
+
+        indexed = list(enumerate(prospects))
+        batches = [indexed[i:i + batch_size] for i in range(0, len(indexed), batch_size)]
+        logger.info(f"Scoring {len(prospects)} titles in {len(batches)} batched request(s) of up to {batch_size}")
+
+        batch_results = await asyncio.gather(*[self._score_batch(batch, company_name) for batch in batches])
+
+        results: Dict[int, Dict[str, Any]] = {}
+        for scored in batch_results:
+            results.update(scored)
+
+        # Per-item fallback only for items the batch didn't return valid scores for
+        missing = [i for i in range(len(prospects)) if i not in results]
+        if missing:
+            logger.info(f"Batch output invalid for {len(missing)} title(s) - falling back to per-item scoring")
+            fallback = await asyncio.gather(
+                *[self.score_single(prospects[i], company_name, i) for i in missing]
+            )
+            for result in fallback:
+                results[result["index"]] = result
+
+        return [results[i] for i in range(len(prospects))]
+
+    async def _score_batch(self, batch: List[tuple], company_name: str) -> Dict[int, Dict[str, Any]]:
+        """
+        Score one batch in a single structured-output request
+
+        Returns:
+            Valid results keyed by original prospect index (invalid items are left out)
+        """
+        # Prompt indices are local to the batch so identical batches share cache entries
+        items = []
+        for local_index, (_, prospect) in enumerate(batch):
+            items.append(AI_TITLE_FILTER_BATCH_ITEM_TEMPLATE.format(
+                index=local_index,
+                title=prospect.get("title", ""),
+                snippet=(prospect.get("snippet") or "")[:300]
+            ))
+
+        prompt = AI_TITLE_FILTER_BATCH_USER_PROMPT_TEMPLATE.format(
+            company_name=company_name,
+            prospects="\n".join(items)
+        )
+
+        api_params = {
+            "model": self.model,
+            "input": f"{AI_TITLE_FILTER_SYSTEM_PROMPT}\n\n{prompt}",
+            "text": {
+                "format": {
+                    "type": "json_schema",
+                    "name": "title_scores",
+                    "schema": TITLE_SCORES_SCHEMA,
+                    "strict": True
+                }
+            },
+            "max_output_tokens": 200 + 80 * len(batch),
+            "timeout": 20 + 2 * len(batch)
+        }
+
+        if "gpt-5" in self.model or self.model.startswith("o"):
+            api_params["reasoning"] = {"effort": "minimal"}  # Fast for filtering
+
+        try:
+            output_text = await llm_gateway.create_response_text("title_filter_batch", **api_params)
+            entries = json.loads(output_text).get("results", [])
+        except Exception as e:
+            logger.warning(f"Batched title scoring failed for {len(batch)} titles: {type(e).__name__}: {str(e)}")
+            return {}
+
+        scored = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            local_index = entry.get("index")
+            score = entry.get("score")
+            if not isinstance(local_index, int) or not 0 <= local_index < len(batch):
+                continue
+            if not isinstance(score, (int, float)) or isinstance(score, bool) or not 0 <= score <= 100:
+                continue
+
+            original_index = batch[local_index][0]
+            if original_index in scored:
+                # Duplicate index in model output - can't tell which is right
+                scored[original_index] = None
+                continue
+            scored[original_index] = {
+                "success": True,
+                "index": original_index,
+                "score": int(score),
+                "reasoning": entry.get("reasoning", ""),
+                "source": "llm_batch"
+            }
+
+        return {index: result for index, result in scored.items() if result is not None}
+
+    async def score_single(self, prospect: Dict, company_name: str, index: int) -> Dict[str, Any]:
+        """
+        Score a single prospect's title relevance (one request)
+
+        Args:
+            prospect: Prospect with title and snippet
+            company_name: Target company name
+            index: Prospect index for tracking
+
+        Returns:
+            Dict with success, score, and reasoning
+        """
+        try:
+            prompt = AI_TITLE_FILTER_USER_PROMPT_TEMPLATE.format(
+                company_name=company_name,
+                title=prospect.get("title", ""),
+                snippet=(prospect.get("snippet") or "")[:300]
+            )
+
+            api_params = {
+                "model": self.model,
+                "input": f"{AI_TITLE_FILTER_SYSTEM_PROMPT}\n\n{prompt}",
+                "text": {"format": {"type": "json_object"}},
+                "max_output_tokens": 300,
+                "timeout": 20
+            }
+
+            # Note: temperature is NOT supported in Responses API for GPT-5/o-series
+            if "gpt-5" in self.model or self.model.startswith("o"):
+                api_params["reasoning"] = {"effort": "minimal"}  # Fast for filtering
+
+            # Served from the LLM cache when this title/snippet was scored before
+            output_text = await llm_gateway.create_response_text("title_filter", **api_params)
+            result_data = json.loads(output_text)
+
+            if "score" in result_data:
+                return {
+                    "success": True,
+                    "index": index,
+                    "score": int(result_data["score"]),
+                    "reasoning": result_data.get("reasoning", ""),
+                    "source": "llm_single"
+                }
+            return {"success": False, "index": index, "error": "Missing score in response"}
+
+        except Exception as e:
+            logger.error(f"Error scoring title for prospect {index}: {str(e)}")
+            return {"success": False, "index": index, "error": str(e)}
+
+    @staticmethod
+    def summarize_sources(prospects: List[Dict]) -> Dict[str, Any]:
+        """
+        Share of titles resolved locally vs by the LLM, from prospect["ai_title_filter"]["source"]
+
+        Args:
+            prospects: Prospects that went through the title filter (passed and filtered)
+        """
+        total = len(prospects)
+        sources = [(p.get("ai_title_filter") or {}).get("source") for p in prospects]
+        local = sources.count("local")
+        unscored = sources.count("unscored")
+        return {
+            "titles_scored": total,
+            "resolved_locally": local,
+            "sent_to_llm": total - local - unscored,
+            "unscored": unscored,
+            "local_share": round(local / total, 3) if total else 0.0
+        }
+
+
+# Global instance
+title_filter_service = TitleFilterService()
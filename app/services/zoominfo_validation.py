@@ -14,10 +14,13 @@ To enable, pass enable_zoominfo=true in the API request.
 import os
 import logging
 import base64
+import asyncio
 from typing import Dict, Any, List, Optional
 import requests
 from dotenv import load_dotenv
 
+from .rate_governor import rate_governor
+
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -57,6 +60,19 @@ class ZoomInfoValidationService:
                 "Content-Type": "application/vnd.api+json"
             }
 
+    async def _post(self, url: str, payload: Dict[str, Any]) -> requests.Response:
+        """POST to ZoomInfo in a worker thread under the shared ZoomInfo limits"""
+        async with rate_governor.slot("zoominfo") as slot:
+            response = await asyncio.to_thread(
+                requests.post,
+                url,
+                headers=self._get_headers(),
+                json=payload,
+                timeout=30
+            )
+            slot.report(response.status_code, response.headers)
+            return response
+
     async def search_contact(
         self,
         first_name: str,
@@ -97,12 +113,7 @@ class ZoomInfoValidationService:
                 }
             }
 
-            response = requests.post(
-                url,
-                headers=self._get_headers(),
-                json=payload,
-                timeout=30
-            )
+            response = await self._post(url, payload)
 
             if response.status_code == 200:
                 data = response.json()
@@ -158,12 +169,7 @@ class ZoomInfoValidationService:
                 }
             }
 
-            response = requests.post(
-                url,
-                headers=self._get_headers(),
-                json=payload,
-                timeout=30
-            )
+            response = await self._post(url, payload)
 
             if response.status_code == 200:
                 data = response.json()
@@ -430,8 +436,7 @@ class ZoomInfoValidationService:
                 'phone_enriched': 0
             }
 
-            # Process each prospect
-            import asyncio
+            # Process each prospect (concurrency is capped by the ZoomInfo rate governor)
             tasks = [self.validate_and_enrich_prospect(prospect) for prospect in prospects]
             validated_prospects = await asyncio.gather(*tasks, return_exceptions=True)
 
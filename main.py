@@ -19,9 +19,20 @@ from app.services.improved_prospect_discovery import improved_prospect_discovery
 from app.services.three_step_prospect_discovery import three_step_prospect_discovery_service
 from app.services.zoominfo_validation import zoominfo_validation_service
 from app.services.hybrid_prospect_discovery import hybrid_prospect_discovery_service
+from app.services.discovery_jobs import discovery_job_engine
+from app.services.discovery_batches import discovery_batch_scheduler
 from app.services.search import serper_service
+from app.services.brightdata_client import brightdata_client, snapshot_notifier
+from app.services.brightdata_snapshot_cache import brightdata_snapshot_cache
+from app.services.brightdata_preflight import brightdata_size_estimator
+from app.services.profile_store import profile_store
+from app.services.linkedin_urls import LinkedInUrlIndex
 from app.services.linkedin import linkedin_service
 from app.services.ai_qualification import ai_qualification_service
+from app.services.llm_gateway import llm_gateway
+from app.services.rate_governor import rate_governor
+from app.services.cost_tracking import cost_tracker, CostTrackingMiddleware
+from app.services.event_stream import event_stream_response, wants_sse
 from app.services.credit_enrichment import credit_enrichment_service, CompanyRecord
 from app.services.enrichment import enrichment_service, AccountEnrichmentRequest, ContactEnrichmentRequest
 from app.auth import (
@@ -29,6 +40,7 @@ from app.auth import (
     verify_dashboard_session,
     check_dashboard_session,
     verify_dashboard_password,
+    verify_brightdata_webhook,
     create_session_token,
     active_sessions
 )
@@ -58,6 +70,9 @@ app = FastAPI(
 # Add logging middleware
 app.add_middleware(APILoggingMiddleware)
 
+# Attribute API spend (OpenAI tokens, Apify runs, Serper queries, Bright Data records) to each request
+app.add_middleware(CostTrackingMiddleware)
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
@@ -68,6 +83,17 @@ async def startup_event():
     except Exception as e:
         print(f"⚠️ Failed to initialize database: {e}")
 
+    # Pooled Serper session (keep-alive connections shared by all searches)
+    await serper_service.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close shared outbound connection pools on application shutdown"""
+    await llm_gateway.close()
+    await serper_service.close()
+    await brightdata_client.close()
+    await discovery_job_engine.close()
+
 @app.get("/")
 async def root():
     return {
@@ -343,6 +369,7 @@ async def discover_prospects(request: dict):
     """
     try:
         company_name = request.get("company_name")
+        cost_tracker.set_company(company_name)
         target_titles = request.get("target_titles", [])
         
         if not company_name:
@@ -392,6 +419,7 @@ async def discover_prospects_improved(request: dict):
     """
     try:
         company_name = request.get("company_name")
+        cost_tracker.set_company(company_name)
         target_titles = request.get("target_titles", [])
         company_city = request.get("company_city")
         company_state = request.get("company_state")
@@ -410,6 +438,7 @@ async def discover_prospects_improved(request: dict):
         )
         
         if result.get("success"):
+            cost_tracker.record_qualified_leads(len(result.get("qualified_prospects", [])))
             return {
                 "status": "success",
                 "message": "Improved prospect discovery completed",
@@ -469,7 +498,8 @@ async def discover_prospects_step1(request: dict):
         "company_name": "Mayo Clinic",
         "company_city": "Rochester",
         "company_state": "Minnesota",
-        "target_titles": []  // Optional - uses defaults if not provided
+        "target_titles": [],  // Optional - uses defaults if not provided
+        "force_refresh": false  // Optional - bypass cached Serper results
     }
     ```
 
@@ -477,9 +507,11 @@ async def discover_prospects_step1(request: dict):
     """
     try:
         company_name = request.get("company_name")
+        cost_tracker.set_company(company_name)
         target_titles = request.get("target_titles", [])
         company_city = request.get("company_city")
         company_state = request.get("company_state")
+        force_refresh = request.get("force_refresh", False)
 
         if not company_name:
             raise HTTPException(
@@ -491,7 +523,8 @@ async def discover_prospects_step1(request: dict):
             company_name=company_name,
             target_titles=target_titles if target_titles else None,
             company_city=company_city,
-            company_state=company_state
+            company_state=company_state,
+            force_refresh=force_refresh
         )
 
         if result.get("success"):
@@ -543,6 +576,7 @@ async def discover_prospects_step2(request: dict):
     ```
 
     **Key Filters:**
+    - Duplicates: URL variants of the same profile are collapsed before scraping
     - Company matching: Handles "St." vs "Saint", state abbreviations
     - Employment: Current employees only (not former)
     - Location: Same state as hospital (if enabled)
@@ -553,6 +587,7 @@ async def discover_prospects_step2(request: dict):
     try:
         linkedin_urls = request.get("linkedin_urls", [])
         company_name = request.get("company_name")
+        cost_tracker.set_company(company_name)
         company_city = request.get("company_city")
         company_state = request.get("company_state")
         location_filter_enabled = request.get("location_filter_enabled", True)
@@ -636,6 +671,7 @@ async def discover_prospects_step3(request: dict):
     try:
         enriched_prospects = request.get("enriched_prospects", [])
         company_name = request.get("company_name")
+        cost_tracker.set_company(company_name)
         min_score_threshold = request.get("min_score_threshold", 65)
         max_prospects = request.get("max_prospects", 10)
 
@@ -659,6 +695,7 @@ async def discover_prospects_step3(request: dict):
         )
 
         if result.get("success"):
+            cost_tracker.record_qualified_leads(len(result.get("qualified_prospects", [])))
             return {
                 "status": "success",
                 "message": "Step 3: AI ranking completed - Pipeline finished!",
@@ -678,6 +715,58 @@ async def discover_prospects_step3(request: dict):
             detail=f"Error in step 3: {str(e)}"
         )
 
+
+@app.post("/discover-prospects-step3/stream")
+async def discover_prospects_step3_stream(request: dict, accept: Optional[str] = Header(None)):
+    """
+    ✅ Step 3 of 3-Step Pipeline, streamed: ranked prospects as they complete
+
+    **What it does:**
+    - Same ranking, threshold and limit as /discover-prospects-step3
+    - Emits each prospect the moment its AI ranking finishes (completion order),
+      so the slowest OpenAI call doesn't hold back the whole list
+    - Ends with a `summary` event carrying the usual Step 3 result
+
+    **Response:** NDJSON (one `{"event": ..., "data": ...}` per line), or server-sent
+    events with `Accept: text/event-stream`
+
+    **Events:**
+    - `ranked` - `{index, completed, total, qualified, prospect}` (qualified = score ≥ threshold)
+    - `ranking_failed` - `{index, completed, total, name, error}`
+    - `summary` - last event: `qualified_prospects` (top N by score) + summary counts
+    - `error` - last event when nothing could be ranked
+
+    **Request format:** same as /discover-prospects-step3
+    """
+    enriched_prospects = request.get("enriched_prospects", [])
+    company_name = request.get("company_name")
+    cost_tracker.set_company(company_name)
+
+    if not enriched_prospects:
+        raise HTTPException(
+            status_code=400,
+            detail="enriched_prospects is required"
+        )
+
+    if not company_name:
+        raise HTTPException(
+            status_code=400,
+            detail="company_name is required"
+        )
+
+    async def events():
+        async for event in three_step_prospect_discovery_service.step3_rank_prospects_stream(
+            enriched_prospects=enriched_prospects,
+            company_name=company_name,
+            min_score_threshold=request.get("min_score_threshold", 65),
+            max_prospects=request.get("max_prospects", 10)
+        ):
+            if event["event"] == "summary":
+                cost_tracker.record_qualified_leads(len(event["data"]["qualified_prospects"]))
+            yield event
+
+    return event_stream_response(events(), sse=wants_sse(accept))
+
 ########################################
 # ZOOMINFO VALIDATION (OPTIONAL)
 ########################################
@@ -721,6 +810,7 @@ async def discover_prospects_zoominfo(request: dict):
     try:
         qualified_prospects = request.get("qualified_prospects", [])
         company_name = request.get("company_name")
+        cost_tracker.set_company(company_name)
 
         if not qualified_prospects:
             raise HTTPException(
@@ -786,6 +876,8 @@ async def discover_leads_step1(request: dict):
     **What it does:**
     - Runs Serper (web search) AND Bright Data (dataset) in parallel
     - Returns results from both sources for deduplication in Step 2
+    - With `overlap_stages`, also scrapes the Serper URLs via Apify while Bright Data
+      is still searching and returns the deduplicated `enriched_prospects` (skip Step 2)
 
     **Expected Time:** 30-60 seconds
 
@@ -796,18 +888,24 @@ async def discover_leads_step1(request: dict):
         "parent_account_name": "Mayo Clinic Health System",  // Optional
         "company_city": "Rochester",
         "company_state": "Minnesota",  // REQUIRED
-        "target_titles": []  // Optional - uses defaults if not provided
+        "target_titles": [],  // Optional - uses defaults if not provided
+        "force_refresh": false,  // Optional - bypass cached Serper results and Bright Data snapshots
+        "overlap_stages": false  // Optional - do Step 2's scraping while Bright Data runs
     }
     ```
 
     **Next Step:** Call /discover-leads-step2 with the prospects from this response
+    (or /discover-leads-step3 with enriched_prospects when overlap_stages is true)
     """
     try:
         company_name = request.get("company_name")
+        cost_tracker.set_company(company_name)
         parent_account_name = request.get("parent_account_name")
         target_titles = request.get("target_titles", [])
         company_city = request.get("company_city")
         company_state = request.get("company_state")
+        force_refresh = request.get("force_refresh", False)
+        overlap_stages = request.get("overlap_stages", False)
 
         if not company_name:
             raise HTTPException(
@@ -821,14 +919,27 @@ async def discover_leads_step1(request: dict):
                 detail="company_state is required for accurate search"
             )
 
-        result = await hybrid_prospect_discovery_service.step1_parallel_search(
+        search = hybrid_prospect_discovery_service.step1_parallel_search
+        if overlap_stages:
+            search = hybrid_prospect_discovery_service.search_and_enrich_overlapped
+
+        result = await search(
             company_name=company_name,
             parent_account_name=parent_account_name,
             target_titles=target_titles if target_titles else None,
             company_city=company_city,
-            company_state=company_state
+            company_state=company_state,
+            force_refresh=force_refresh
         )
 
+        if result.get("success") and overlap_stages:
+            return {
+                "status": "success",
+                "message": "Steps 1+2: Search + enrich completed (Apify overlapped with Bright Data)",
+                "data": result,
+                "next_step": "Call /discover-leads-step3 with enriched_prospects",
+                "timestamp": datetime.utcnow().isoformat()
+            }
         if result.get("success"):
             return {
                 "status": "success",
@@ -880,6 +991,7 @@ async def discover_leads_step2(request: dict):
         serper_prospects = request.get("serper_prospects", [])
         brightdata_prospects = request.get("brightdata_prospects", [])
         company_name = request.get("company_name")
+        cost_tracker.set_company(company_name)
         company_city = request.get("company_city")
         company_state = request.get("company_state")
 
@@ -946,6 +1058,7 @@ async def discover_leads_step3(request: dict):
     try:
         enriched_prospects = request.get("enriched_prospects", [])
         company_name = request.get("company_name")
+        cost_tracker.set_company(company_name)
         min_score_threshold = request.get("min_score_threshold", 65)
         max_prospects = request.get("max_prospects", 10)
 
@@ -969,6 +1082,7 @@ async def discover_leads_step3(request: dict):
         )
 
         if result.get("success"):
+            cost_tracker.record_qualified_leads(len(result.get("qualified_prospects", [])))
             return {
                 "status": "success",
                 "message": "Step 3: AI ranking completed",
@@ -990,6 +1104,58 @@ async def discover_leads_step3(request: dict):
         )
 
 
+@app.post("/discover-leads-step3/stream")
+async def discover_leads_step3_stream(request: dict, accept: Optional[str] = Header(None)):
+    """
+    🆕 HYBRID PIPELINE - Step 3, streamed: ranked leads as they complete
+
+    **What it does:**
+    - Same ranking, threshold and limit as /discover-leads-step3
+    - Emits each prospect the moment its AI ranking finishes (completion order),
+      so the slowest OpenAI call doesn't hold back the whole list
+    - Ends with a `summary` event carrying the usual Step 3 result
+
+    **Response:** NDJSON (one `{"event": ..., "data": ...}` per line), or server-sent
+    events with `Accept: text/event-stream`
+
+    **Events:**
+    - `ranked` - `{index, completed, total, qualified, prospect}` (qualified = score ≥ threshold)
+    - `ranking_failed` - `{index, completed, total, name, error}`
+    - `summary` - last event: `qualified_prospects` (top N by score) + summary counts
+    - `error` - last event when nothing could be ranked
+
+    **Request format:** same as /discover-leads-step3
+    """
+    enriched_prospects = request.get("enriched_prospects", [])
+    company_name = request.get("company_name")
+    cost_tracker.set_company(company_name)
+
+    if not enriched_prospects:
+        raise HTTPException(
+            status_code=400,
+            detail="enriched_prospects is required"
+        )
+
+    if not company_name:
+        raise HTTPException(
+            status_code=400,
+            detail="company_name is required"
+        )
+
+    async def events():
+        async for event in hybrid_prospect_discovery_service.step3_rank_and_qualify_stream(
+            enriched_prospects=enriched_prospects,
+            company_name=company_name,
+            min_score_threshold=request.get("min_score_threshold", 65),
+            max_prospects=request.get("max_prospects", 10)
+        ):
+            if event["event"] == "summary":
+                cost_tracker.record_qualified_leads(len(event["data"]["qualified_prospects"]))
+            yield event
+
+    return event_stream_response(events(), sse=wants_sse(accept))
+
+
 @app.post("/discover-leads-step4")
 async def discover_leads_step4(
     request: dict,
@@ -1019,6 +1185,7 @@ async def discover_leads_step4(
     try:
         qualified_prospects = request.get("qualified_prospects", [])
         company_name = request.get("company_name")
+        cost_tracker.set_company(company_name)
         company_account_id = request.get("company_account_id")
 
         if not qualified_prospects:
@@ -1068,6 +1235,320 @@ async def discover_leads_step4(
         )
 
 
+########################################
+# DISCOVERY JOBS
+########################################
+# Run a whole pipeline server-side instead of chaining step calls from the client.
+# POST returns a job id immediately; a background worker runs every step and
+# persists each step's output (discovery_jobs table). Poll GET /jobs/{job_id}
+# for progress and fetch outputs with GET /jobs/{job_id}/results when done.
+# POST /jobs/discovery/batch queues a job per hospital for whole account lists.
+# Finished steps are checkpoints: retries resume at the first incomplete step.
+
+@app.post("/jobs/discovery")
+async def submit_discovery_job(request: dict):
+    """
+    🧵 Submit a discovery job (runs all steps in the background)
+
+    **Pipelines:**
+    - `hybrid` (default): Serper + Bright Data → dedupe + enrich → AI ranking
+      (→ queue to PendingUpdates when `queue_leads` is true)
+    - `three_step`: search + filter → Apify scrape → AI ranking
+
+    **Request format:**
+    ```json
+    {
+        "pipeline": "hybrid",
+        "company_name": "Mayo Clinic",
+        "parent_account_name": "Mayo Clinic Health System",  // Optional
+        "company_city": "Rochester",
+        "company_state": "Minnesota",  // REQUIRED for hybrid
+        "target_titles": [],  // Optional - uses defaults if not provided
+        "force_refresh": false,  // Optional
+        "min_score_threshold": 65,  // Optional
+        "max_prospects": 10,  // Optional
+        "location_filter_enabled": true,  // Optional (three_step)
+        "queue_leads": false,  // Optional (hybrid) - run Step 4
+        "company_account_id": "001XXXXXXXXXXXXXXX",  // Optional (hybrid, with queue_leads)
+        "overlap_stages": true  // Optional (hybrid) - false waits for Bright Data before scraping
+    }
+    ```
+    Or pass `"account_id"` instead of the company fields to look them up in Salesforce.
+
+    **Next Step:** Poll /jobs/{job_id} until status is succeeded or failed
+    """
+    pipeline = request.get("pipeline", "hybrid")
+    company_name = request.get("company_name")
+
+    if pipeline not in discovery_job_engine.pipelines:
+        raise HTTPException(
+            status_code=400,
+            detail=f"pipeline must be one of: {', '.join(discovery_job_engine.pipelines)}"
+        )
+
+    if not company_name and not request.get("account_id"):
+        raise HTTPException(
+            status_code=400,
+            detail="company_name or account_id is required"
+        )
+
+    if pipeline == "hybrid" and company_name and not request.get("company_state"):
+        raise HTTPException(
+            status_code=400,
+            detail="company_state is required for accurate search"
+        )
+
+    cost_tracker.set_company(company_name)
+    params = {key: value for key, value in request.items() if key != "pipeline"}
+
+    try:
+        job = await discovery_job_engine.submit(pipeline, params)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error submitting discovery job: {str(e)}"
+        )
+
+    return {
+        "status": "success",
+        "message": f"Discovery job queued for {company_name or request.get('account_id')}",
+        "data": {
+            "job_id": job["job_id"],
+            "pipeline": pipeline,
+            "job_status": job["status"],
+            "status_url": f"/jobs/{job['job_id']}",
+            "results_url": f"/jobs/{job['job_id']}/results"
+        },
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.post("/jobs/discovery/batch")
+async def submit_discovery_batch(request: dict):
+    """
+    🧵 Submit a discovery batch (one background job per hospital)
+
+    Hospitals are interleaved across the job worker pool so Serper, Bright Data,
+    Apify and OpenAI are all busy at once, each within its budget
+    (DISCOVERY_BUDGET_<VENDOR>) and the rate governor's limits.
+
+    **Request format:**
+    ```json
+    {
+        "pipeline": "hybrid",  // or "three_step"
+        "account_ids": ["001VR00000UhY3oYAF"],  // Resolved from Salesforce
+        "hospitals": [  // And/or explicit records
+            {"name": "St. Patrick Hospital", "city": "Missoula", "state": "MT", "account_id": "001VR00000UhY4hYAF"}
+        ],
+        "target_titles": [],  // Optional - applied to every hospital
+        "min_score_threshold": 65,  // Optional
+        "max_prospects": 10,  // Optional
+        "queue_leads": false  // Optional (hybrid)
+    }
+    ```
+
+    **Next Step:** Poll /jobs/batches/{batch_id} for progress and hospitals per hour
+    """
+    hospitals = list(request.get("account_ids") or []) + list(request.get("hospitals") or [])
+    if not hospitals:
+        raise HTTPException(
+            status_code=400,
+            detail="account_ids or hospitals is required"
+        )
+
+    try:
+        result = await discovery_batch_scheduler.submit(
+            pipeline=request.get("pipeline", "hybrid"),
+            hospitals=hospitals,
+            shared=request
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error submitting discovery batch: {str(e)}"
+        )
+
+    if not result["success"]:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": result["error"], "invalid": result.get("invalid", [])}
+        )
+
+    batch = result["batch"]
+    return {
+        "status": "success",
+        "message": f"Discovery batch queued: {batch['hospitals']} hospitals",
+        "data": {
+            "batch_id": batch["batch_id"],
+            "pipeline": batch["pipeline"],
+            "hospitals": batch["hospitals"],
+            "status_url": f"/jobs/batches/{batch['batch_id']}",
+            "jobs": [{"job_id": job["job_id"], "company_name": job["company_name"], "account_id": job["account_id"]}
+                     for job in batch["jobs"]]
+        },
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/jobs/batches/{batch_id}")
+async def get_discovery_batch(batch_id: str):
+    """
+    🧵 Discovery batch progress: counts by status, hospitals per step, live
+    hospitals/hour + ETA, vendor budget usage and one row per hospital job
+    (per-hospital results via /jobs/{job_id}/results)
+    """
+    batch = await discovery_batch_scheduler.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+
+    return {
+        "status": "success",
+        "data": discovery_batch_scheduler.status_view(batch),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_discovery_job(job_id: str):
+    """
+    🧵 Discovery job status: overall status, current step, per-step timing / cost /
+    summary, and which step outputs are available (outputs themselves via /results)
+    """
+    job = await discovery_job_engine.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    return {
+        "status": "success",
+        "data": discovery_job_engine.status_view(job),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.post("/jobs/{job_id}/retry")
+async def retry_discovery_job(job_id: str):
+    """
+    🧵 Retry a failed discovery job
+
+    Resumes at the step that failed - checkpointed step outputs (e.g. search and
+    scraping before an OpenAI timeout in step 3) are reused, not paid for again.
+    """
+    job = await discovery_job_engine.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    try:
+        view = await discovery_job_engine.retry(job)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return {
+        "status": "success",
+        "message": f"Job {job_id} re-queued (checkpointed steps: {', '.join(view['results_available']) or 'none'})",
+        "data": view,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/jobs/{job_id}/results")
+async def get_discovery_job_results(job_id: str, step: Optional[str] = None):
+    """
+    🧵 Discovery job outputs
+
+    **Query params:**
+    - `step`: step1 / step2 / step3 / step4 - defaults to the last finished step
+      (step3 holds the qualified prospects)
+    """
+    job = await discovery_job_engine.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    outputs = job["outputs"]
+    if step is None:
+        finished = [s["name"] for s in job["steps"] if s["name"] in outputs]
+        if not finished:
+            raise HTTPException(status_code=409, detail=f"Job {job_id} has no finished steps yet (status: {job['status']})")
+        step = finished[-1]
+    elif step not in outputs:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} has no output for {step}")
+
+    return {
+        "status": "success",
+        "message": f"{step} output for job {job_id} ({job['status']})",
+        "data": {
+            "job_id": job_id,
+            "job_status": job["status"],
+            "step": step,
+            "result": outputs[step]
+        },
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.post("/jobs/batches/{batch_id}/retry-failed")
+async def retry_failed_discovery_batch(batch_id: str):
+    """
+    🧵 Re-queue a batch's failed hospitals, each resuming at the step that failed
+    (succeeded hospitals and checkpointed steps are not rerun)
+    """
+    result = await discovery_batch_scheduler.retry_failed(batch_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+
+    return {
+        "status": "success",
+        "message": f"Re-queued {result['retried']} failed hospitals",
+        "data": result["batch"],
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+########################################
+# VENDOR WEBHOOKS
+########################################
+# Completion callbacks from vendors, authenticated with a shared secret (Authorization header).
+
+@app.post("/webhooks/brightdata/snapshot")
+async def brightdata_snapshot_webhook(request: dict, secret: str = Depends(verify_brightdata_webhook)):
+    """
+    🔔 Bright Data snapshot-ready callback
+
+    **Opt-in:** set BRIGHTDATA_WEBHOOK_URL (this endpoint's public URL) and
+    BRIGHTDATA_WEBHOOK_SECRET. New snapshots then ask Bright Data to call this
+    endpoint when they finish, and the job waiting on that snapshot wakes up
+    immediately instead of on its next poll. Polling continues as a fallback.
+
+    **Headers:**
+    ```
+    Authorization: <BRIGHTDATA_WEBHOOK_SECRET>
+    ```
+
+    **Request format (sent by Bright Data):**
+    ```json
+    {
+        "snapshot_id": "s_m1abc2def3",
+        "status": "ready"
+    }
+    ```
+    """
+    snapshot_id = request.get("snapshot_id") or request.get("id")
+    if not snapshot_id:
+        raise HTTPException(status_code=400, detail="snapshot_id is required")
+
+    waiter_found = snapshot_notifier.notify(snapshot_id, request)
+
+    return {
+        "status": "success",
+        "message": f"Snapshot {snapshot_id} callback received",
+        "data": {
+            "snapshot_id": snapshot_id,
+            "snapshot_status": request.get("status"),
+            "waiter_found": waiter_found
+        },
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 ########################################
 # TESTING & DEBUG ENDPOINTS
 ########################################
@@ -1101,6 +1582,139 @@ async def test_prospect_services():
             detail=f"Error testing services: {str(e)}"
         )
 
+@app.get("/diagnostics/llm-cache")
+async def llm_cache_diagnostics():
+    """
+    📊 LLM response cache statistics
+
+    Hit/miss counters per call site (title_filter, ai_ranking, company_normalization,
+    company_name_expansion), memory tier size, evictions and configured TTLs.
+
+    Cache key = model + reasoning effort + hash of the normalized prompt.
+    Memory tier is per worker; the persistent tier lives in the response_cache table.
+    """
+    return {
+        "status": "success",
+        "message": "LLM cache statistics",
+        "data": llm_gateway.cache_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/diagnostics/serper-cache")
+async def serper_cache_diagnostics():
+    """
+    📊 Serper query cache statistics
+
+    Hit/miss counters, memory tier size and the configured TTL (SERPER_CACHE_TTL_HOURS).
+
+    Cache key = normalized query string + result count. Pass "force_refresh": true
+    to /discover-prospects-step1 or /discover-leads-step1 to bypass it.
+    """
+    return {
+        "status": "success",
+        "message": "Serper cache statistics",
+        "data": serper_service.cache_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/diagnostics/brightdata-snapshot-cache")
+async def brightdata_snapshot_cache_diagnostics():
+    """
+    📊 Bright Data snapshot cache statistics
+
+    Exact and superset hits, misses and stores plus the configured TTL
+    (BRIGHTDATA_SNAPSHOT_CACHE_TTL_HOURS). Key = canonicalized dataset filter;
+    a stored snapshot with a broader, untruncated filter is refiltered locally.
+    Pass "force_refresh": true to /discover-leads-step1 to create a new snapshot.
+    """
+    return {
+        "status": "success",
+        "message": "Bright Data snapshot cache statistics",
+        "data": brightdata_snapshot_cache.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/diagnostics/brightdata-preflight")
+async def brightdata_preflight_diagnostics():
+    """
+    📊 Bright Data pre-flight sizing statistics
+
+    How Step 1 size estimates were answered (observed size for the same filter,
+    lower bound from a narrower filter, count service, unknown) and how many
+    snapshot sizes have been recorded. Filters estimated over 100 records are
+    tightened before a snapshot is created.
+    """
+    return {
+        "status": "success",
+        "message": "Bright Data pre-flight statistics",
+        "data": brightdata_size_estimator.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/diagnostics/profile-store")
+async def profile_store_diagnostics():
+    """
+    📊 LinkedIn profile store statistics
+
+    Lookups, hits and misses since startup plus the freshness window
+    (PROFILE_STORE_MAX_AGE_DAYS). Profiles are keyed by canonical LinkedIn URL
+    in the linkedin_profiles table; hits are not re-scraped through Apify.
+    """
+    return {
+        "status": "success",
+        "message": "Profile store statistics",
+        "data": profile_store.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/diagnostics/rate-limits")
+async def rate_limit_diagnostics():
+    """
+    🚦 Live per-vendor rate limiter state
+
+    For each vendor used so far (openai, serper, apify, brightdata, zoominfo):
+    token bucket level, current AIMD concurrency limit vs max, in-flight calls,
+    remaining Retry-After pause, and request/throttle/error counters.
+
+    State is per worker process.
+    """
+    return {
+        "status": "success",
+        "message": "Rate limiter state",
+        "data": rate_governor.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/costs/summary")
+async def costs_summary(days: int = 7, company_name: Optional[str] = None):
+    """
+    💰 Actual API spend from recorded usage
+
+    Aggregates the cost_events table by day, endpoint, hospital, vendor and stage
+    for the last `days` days (optionally one hospital via `company_name`).
+
+    - OpenAI: usage tokens × model price (cached input tokens at the cached rate)
+    - Apify: run usageTotalUsd (+ per-result actor charges)
+    - Serper: successful queries × SERPER_COST_PER_QUERY
+    - Bright Data: downloaded records × BRIGHTDATA_COST_PER_RECORD
+
+    Cost per qualified lead uses the lead counts recorded by the Step 3 endpoints.
+    Each response also carries its own spend in the X-Request-Cost-USD header.
+    """
+    try:
+        summary = await cost_tracker.summarize(days=days, company_name=company_name)
+        return {
+            "status": "success",
+            "message": f"API spend for the last {days} days",
+            "data": summary,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error summarizing costs: {str(e)}"
+        )
+
 ########################################
 # LINKEDIN SCRAPING ENDPOINTS
 ########################################
@@ -1121,7 +1735,8 @@ async def scrape_linkedin_profiles(request: dict):
     - LinkedIn connections and follower count
     - Contact information (email, phone if available)
 
-    **Rate Limits:** Maximum 10 LinkedIn URLs per request (cost control)
+    **Rate Limits:** Maximum 10 LinkedIn URLs per request (cost control), counted after
+    duplicate URLs of the same profile are collapsed
 
     **Request format:**
     ```json
@@ -1130,7 +1745,8 @@ async def scrape_linkedin_profiles(request: dict):
             "https://www.linkedin.com/in/lucaserb/",
             "https://www.linkedin.com/in/emollick/"
         ],
-        "include_detailed_data": true
+        "include_detailed_data": true,
+        "force_refresh": false  // Optional - re-scrape even if the profile store has a fresh copy
     }
     ```
 
@@ -1143,6 +1759,10 @@ async def scrape_linkedin_profiles(request: dict):
                 status_code=400,
                 detail="linkedin_urls is required"
             )
+
+        # Collapse URL variants of the same profile (www/country subdomain, /pub/, query strings)
+        url_index = LinkedInUrlIndex()
+        linkedin_urls = url_index.dedupe_urls(linkedin_urls)
         
         if len(linkedin_urls) > 10:  # Limit for cost control
             raise HTTPException(
@@ -1150,7 +1770,11 @@ async def scrape_linkedin_profiles(request: dict):
                 detail="Maximum 10 LinkedIn URLs per request"
             )
         
-        result = await linkedin_service.scrape_profiles(linkedin_urls)
+        result = await linkedin_service.scrape_profiles(
+            linkedin_urls,
+            force_refresh=request.get("force_refresh", False)
+        )
+        result["duplicate_urls_collapsed"] = url_index.duplicates_collapsed
         
         if result.get("success"):
             return {
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Batch prospect discovery through the job API
+Submits every hospital as one batch (POST /jobs/discovery/batch), prints live
+progress and hospitals per hour while the server interleaves them across
+Serper, Bright Data, Apify and OpenAI, then saves each hospital's qualified
+prospects.
+
+Replaces looping over the step endpoints one hospital at a time
+(batch_all_hospitals_full_export.py, test_account_id_batch.py).
+
+Input, either:
+- a CSV with the HospitalAccountsAndIDs.csv columns (Hospital, City, State, Account ID)
+- Salesforce account ids (--account-ids), resolved to name/city/state by the server
+- --retry-failed BATCH_ID: rerun only the hospitals that failed, from their failed
+  step (replaces test_failed_hospitals_retry.py)
+
+Usage:
+    python tests/batch_discovery.py --csv HospitalAccountsAndIDs.csv
+    python tests/batch_discovery.py --account-ids 001VR00000UhY3oYAF 001VR00000UhY4hYAF --pipeline three_step
+    python tests/batch_discovery.py --csv hospitals.csv --base-url https://fast-leads-api.up.railway.app
+    python tests/batch_discovery.py --retry-failed 6f1c2d3e-...
+"""
+
+import sys
+import csv
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+
+def load_hospitals(csv_file: str) -> list:
+    """Hospital records from a HospitalAccountsAndIDs-style CSV"""
+    hospitals = []
+    with open(csv_file, 'r', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            hospitals.append({
+                'name': row.get('Hospital', '').strip(),
+                'city': row.get('City', '').strip(),
+                'state': row.get('State', '').strip(),
+                'account_id': row.get('Account ID', '').strip()
+            })
+    return hospitals
+
+
+def print_progress(batch: dict):
+    counts = batch['counts']
+    throughput = batch['throughput']
+    eta = throughput['eta_seconds']
+    in_step = ', '.join(f"{step}: {n}" for step, n in sorted(batch['in_step'].items())) or '-'
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] "
+          f"✅ {counts['succeeded']}  ❌ {counts['failed']}  🔄 {counts['running']}  ⏳ {counts['queued']}  "
+          f"| {throughput['hospitals_per_hour']:.1f} hospitals/hour"
+          f"{f' | ETA {eta // 60}m{eta % 60:02d}s' if eta else ''}"
+          f" | in step: {in_step} | ${batch['cost_usd']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="Hospital CSV (Hospital, City, State, Account ID)")
+    parser.add_argument("--account-ids", nargs="+", default=[], help="Salesforce account ids")
+    parser.add_argument("--retry-failed", metavar="BATCH_ID", help="Re-drive the failed hospitals of a batch")
+    parser.add_argument("--pipeline", choices=["hybrid", "three_step"], default="hybrid")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--max-prospects", type=int, default=10)
+    parser.add_argument("--min-score", type=int, default=65)
+    parser.add_argument("--queue-leads", action="store_true", help="Queue qualified leads for approval (hybrid)")
+    parser.add_argument("--poll", type=float, default=15.0, help="Seconds between progress updates")
+    parser.add_argument("--output-dir", default=f"batch_discovery_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    args = parser.parse_args()
+
+    if args.retry_failed:
+        batch_id = args.retry_failed
+        response = requests.post(f"{args.base_url}/jobs/batches/{batch_id}/retry-failed", timeout=60)
+        if response.status_code != 200:
+            print(f"❌ Retry rejected (HTTP {response.status_code}): {response.text}")
+            sys.exit(1)
+        print(f"🔁 Batch {batch_id}: {response.json()['message']}")
+    else:
+        hospitals = load_hospitals(args.csv) if args.csv else []
+        if not hospitals and not args.account_ids:
+            parser.error("--csv, --account-ids or --retry-failed is required")
+
+        response = requests.post(f"{args.base_url}/jobs/discovery/batch", json={
+            "pipeline": args.pipeline,
+            "hospitals": hospitals,
+            "account_ids": args.account_ids,
+            "max_prospects": args.max_prospects,
+            "min_score_threshold": args.min_score,
+            "queue_leads": args.queue_leads
+        }, timeout=60)
+        if response.status_code != 200:
+            print(f"❌ Batch rejected (HTTP {response.status_code}): {response.text}")
+            sys.exit(1)
+
+        batch_id = response.json()['data']['batch_id']
+        print(f"🧵 Batch {batch_id}: {response.json()['data']['hospitals']} hospitals ({args.pipeline})")
+
+    while True:
+        time.sleep(args.poll)
+        status = requests.get(f"{args.base_url}/jobs/batches/{batch_id}", timeout=60)
+        status.raise_for_status()
+        batch = status.json()['data']
+        print_progress(batch)
+        if batch['status'] == 'finished':
+            break
+
+    # Per-hospital results
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(exist_ok=True)
+    results = []
+    for job in batch['jobs']:
+        row = dict(job)
+        if job['status'] == 'succeeded':
+            ranked = requests.get(f"{args.base_url}/jobs/{job['job_id']}/results", params={"step": "step3"}, timeout=60)
+            if ranked.status_code == 200:
+                row['qualified_prospects'] = ranked.json()['data']['result'].get('qualified_prospects', [])
+        results.append(row)
+
+    with open(output_dir / "batch_results.json", 'w') as f:
+        json.dump({"batch": {k: v for k, v in batch.items() if k != 'jobs'}, "hospitals": results}, f, indent=2)
+
+    print("\n" + "=" * 80)
+    print(f"Batch {batch_id} finished in {batch['throughput']['elapsed_seconds'] / 60:.1f} minutes "
+          f"({batch['throughput']['hospitals_per_hour']:.1f} hospitals/hour, ${batch['cost_usd']:.2f})")
+    print(f"✅ {batch['counts']['succeeded']} succeeded, ❌ {batch['counts']['failed']} failed")
+    for job in batch['jobs']:
+        if job['status'] == 'failed':
+            print(f"   ❌ {job['company_name'] or job['account_id']}: {job['error']}")
+    if batch['counts']['failed']:
+        print(f"🔁 Rerun failed hospitals from their failed step: python tests/batch_discovery.py --retry-failed {batch_id}")
+    print(f"📁 Results: {output_dir / 'batch_results.json'}")
+
+
+if __name__ == "__main__":
+    main()
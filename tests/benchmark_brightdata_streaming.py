@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark: buffered vs streamed Bright Data snapshot download
+Compares downloading a snapshot as one JSON array (parse everything, then
+transform, then filter) against the streamed JSON-lines pipeline (each record is
+transformed and run through the Step 2 filter as soon as it arrives).
+
+Metrics per snapshot size:
+- seconds:      download + transform + filter wall time
+- peak memory:  tracemalloc peak while processing the snapshot
+- passed:       prospects passing the Step 2 filter (must match between modes)
+
+Snapshots are synthetic LinkedIn-profile records served by a local stand-in
+that sends the body in 64 KB chunks at a fixed rate to mimic network transfer.
+
+Usage:
+    python tests/benchmark_brightdata_streaming.py
+    python tests/benchmark_brightdata_streaming.py --sizes 100 5000 --mbps 40
+"""
+
+import sys
+import json
+import random
+import asyncio
+import logging
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.brightdata_client import BrightDataClient
+from app.services.brightdata_prospect_discovery import BrightDataProspectDiscoveryService
+from app.services.rate_governor import rate_governor, VendorLimiter
+
+CHUNK_BYTES = 64 * 1024
+
+COMPANY_VARIATIONS = ["Mayo Clinic", "Mayo Clinic Health System"]
+TITLES = ["Director of Facilities", "Chief Financial Officer", "Plant Operations Manager",
+          "Energy Manager", "Registered Nurse", "Retired", "Sustainability Director"]
+COMPANIES = ["Mayo Clinic", "Mayo Clinic Health System", "Olmsted Medical Center", "Allina Health"]
+
+
+def synthetic_profile(i: int, rng: random.Random) -> dict:
+    """A record shaped like the Bright Data LinkedIn Profiles dataset"""
+    company = rng.choice(COMPANIES)
+    title = rng.choice(TITLES)
+    return {
+        "url": f"https://www.linkedin.com/in/person-{i}",
+        "name": f"Person {i}",
+        "first_name": "Person",
+        "last_name": str(i),
+        "position": title,
+        "headline": f"{title} at {company}",
+        "current_company_name": company,
+        "city": rng.choice(["Rochester, Minnesota", "Minneapolis, Minnesota", "Phoenix, Arizona"]),
+        "country": "US",
+        "connections": rng.randint(10, 500),
+        "followers": rng.randint(10, 2000),
+        "about": " ".join(rng.choice(["energy", "capital", "facilities", "budget", "hospital", "operations"])
+                          for _ in range(300)),
+        "experience_company": company,
+        "experience_title": title,
+        "experience_start_date": "2019",
+        "experience_end_date": "",
+        "experience_location": "Rochester, Minnesota",
+    }
+
+
+async def start_stand_in(snapshots: dict, bytes_per_second: float):
+    """Serve snapshots as a JSON array or JSON lines, paced to bytes_per_second"""
+
+    async def status(request: web.Request) -> web.Response:
+        snapshot_id = request.match_info["snapshot_id"]
+        return web.json_response({"status": "ready", "dataset_size": len(snapshots[snapshot_id])})
+
+    async def download(request: web.Request) -> web.StreamResponse:
+        records = snapshots[request.match_info["snapshot_id"]]
+        if request.query.get("format") == "jsonl":
+            body = "\n".join(json.dumps(record) for record in records).encode()
+        else:
+            body = json.dumps(records).encode()
+
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for start in range(0, len(body), CHUNK_BYTES):
+            await response.write(body[start:start + CHUNK_BYTES])
+            await asyncio.sleep(CHUNK_BYTES / bytes_per_second)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/snapshots/{snapshot_id}", status)
+    app.router.add_get("/snapshots/{snapshot_id}/download", download)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def run_buffered(service: BrightDataProspectDiscoveryService, base_url: str, snapshot_id: str) -> int:
+    """Previous behaviour: whole JSON array → transform all → filter all"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{base_url}/snapshots/{snapshot_id}/download", params={"format": "json"}) as response:
+            profiles = json.loads(await response.text())
+
+    enriched = [service._transform_brightdata_profile(profile) for profile in profiles if profile.get("url")]
+    result = service._advanced_filter_with_ai_variations(enriched, COMPANY_VARIATIONS, "Rochester", "Minnesota", True)
+    return len(result["passed"])
+
+
+async def run_streamed(service: BrightDataProspectDiscoveryService, client: BrightDataClient, snapshot_id: str) -> int:
+    """Streamed pipeline: JSON lines → transform + filter per record as it arrives"""
+    variations_normalized = service._normalize_variations(COMPANY_VARIATIONS)
+    passed = []
+
+    def handle_profile(snapshot_id: str, profile: dict):
+        prospect = service._transform_brightdata_profile(profile)
+        if not service._filter_prospect(prospect, variations_normalized, COMPANY_VARIATIONS,
+                                        "Rochester", "Minnesota", True):
+            passed.append(prospect)
+
+    result = await client.wait_for_snapshot(snapshot_id, max_wait_time=600, handle_record=handle_profile)
+    assert result["success"], result
+    return len(passed)
+
+
+async def measure(coro_factory) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    passed = await coro_factory()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_mb": peak / 1e6, "passed": passed}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 5000], help="Records per snapshot")
+    parser.add_argument("--mbps", type=float, default=40.0, help="Simulated transfer rate (megabits/s)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # Keep per-poll log lines out of the report
+    rate_governor._limiters["brightdata"] = VendorLimiter("brightdata", rate_per_second=1000, burst=1000, max_concurrency=10)
+
+    rng = random.Random(7)
+    snapshots = {f"synthetic_{size}": [synthetic_profile(i, rng) for i in range(size)] for size in args.sizes}
+    runner, base_url = await start_stand_in(snapshots, bytes_per_second=args.mbps * 1e6 / 8)
+
+    service = BrightDataProspectDiscoveryService(api_token="benchmark")
+    client = BrightDataClient(api_token="benchmark")
+    client.base_url = base_url
+
+    rows = []
+    for size in args.sizes:
+        snapshot_id = f"synthetic_{size}"
+        buffered = await measure(lambda: run_buffered(service, base_url, snapshot_id))
+        streamed = await measure(lambda: run_streamed(service, client, snapshot_id))
+        assert buffered["passed"] == streamed["passed"], (buffered, streamed)
+        rows.append((size, buffered, streamed))
+
+    print("\n" + "=" * 90)
+    print(f"BRIGHT DATA SNAPSHOT DOWNLOAD - buffered vs streamed ({args.mbps:g} Mbit/s simulated)")
+    print("=" * 90)
+    print(f"{'Records':>8} {'Seconds':>22} {'Peak memory (MB)':>26} {'Passed':>8}")
+    for size, buffered, streamed in rows:
+        print(f"{size:>8} "
+              f"{buffered['seconds']:>9.2f} → {streamed['seconds']:<9.2f} "
+              f"{buffered['peak_mb']:>12.1f} → {streamed['peak_mb']:<11.1f} "
+              f"{streamed['passed']:>8}")
+
+    await client.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential vs concurrent Serper title queries
+Runs a local Serper stand-in and compares Step 1 search latency for:
+- sequential: one title at a time, new aiohttp session per query (previous behavior)
+- concurrent: SerperSearchService (bounded gather over the pooled session)
+
+Also checks both produce the same deduplicated results and target_title tags.
+
+Usage:
+    python tests/benchmark_serper_concurrency.py
+    python tests/benchmark_serper_concurrency.py --latency-ms 600 --handshake-ms 150
+
+The stand-in adds --latency-ms to every request and --handshake-ms to the first
+request on each new connection (TCP + TLS setup to google.serper.dev).
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.search import serper_service
+
+COMPANY_NAME = "Providence Medford Medical Center"
+TITLES = [
+    "Director of Facilities", "Director of Engineering", "Director of Maintenance",
+    "VP Facilities", "VP Operations", "Chief Financial Officer", "Chief Operating Officer",
+    "Facilities Manager", "Energy Manager", "Plant Manager", "Maintenance Manager"
+]
+
+
+def build_stand_in(latency: float, handshake: float) -> web.Application:
+    """Serper-shaped responses; people overlap across titles so dedupe is exercised"""
+    seen_transports = set()
+    stats = {"requests": 0, "connections": 0}
+
+    async def search(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        transport_id = id(request.transport)
+        delay = latency
+        if transport_id not in seen_transports:
+            seen_transports.add(transport_id)
+            stats["connections"] += 1
+            delay += handshake
+        await asyncio.sleep(delay)
+
+        query = (await request.json())["q"]
+        seed = sum(map(ord, query)) % 7
+        organic = [
+            {
+                "title": f"Person {seed + i} - Role - {COMPANY_NAME} | LinkedIn",
+                "link": f"https://www.linkedin.com/in/person-{seed + i}",
+                "snippet": f"Snippet for {query}"
+            }
+            for i in range(10)
+        ]
+        return web.json_response({"organic": organic})
+
+    app = web.Application()
+    app.router.add_post("/search", search)
+    app["stats"] = stats
+    return app
+
+
+async def sequential_search(base_url: str) -> list:
+    """Previous behavior: titles in order, fresh session (new connection) per query"""
+    all_results = []
+    for title in TITLES:
+        query = f'{COMPANY_NAME} Medford Oregon {title} site:linkedin.com/in'
+        async with aiohttp.ClientSession() as session:
+            async with session.post(base_url, json={"q": query, "num": 10},
+                                    headers={"X-API-KEY": "bench"}) as response:
+                data = await response.json()
+        results = [
+            {"title": r["title"], "link": r["link"], "snippet": r["snippet"], "position": i + 1}
+            for i, r in enumerate(data["organic"]) if "linkedin.com/in/" in r["link"]
+        ][:8]
+        for result in results:
+            result["target_title"] = title
+        all_results.extend(results)
+    return serper_service._deduplicate_results(all_results)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=int, default=400, help="Per-request server latency")
+    parser.add_argument("--handshake-ms", type=int, default=150, help="Extra latency on a new connection")
+    parser.add_argument("--runs", type=int, default=3, help="Company searches per mode")
+    args = parser.parse_args()
+
+    app = build_stand_in(args.latency_ms / 1000, args.handshake_ms / 1000)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}/search"
+
+    serper_service.api_key = serper_service.api_key or "bench"
+    serper_service.base_url = base_url
+    serper_service.cache_enabled = False  # Measure API round trips, not cache hits
+
+    print("\n" + "=" * 80)
+    print(f"SERPER BENCHMARK - {len(TITLES)} titles, {args.latency_ms}ms latency, "
+          f"{args.handshake_ms}ms connection setup")
+    print("=" * 80)
+
+    rows = {}
+    for mode in ("sequential", "concurrent"):
+        timings = []
+        app["stats"].update(requests=0, connections=0)
+        for _ in range(args.runs):
+            start = time.time()
+            if mode == "sequential":
+                results = await sequential_search(base_url)
+            else:
+                response = await serper_service.search_linkedin_profiles(
+                    COMPANY_NAME, TITLES, company_city="Medford", company_state="Oregon"
+                )
+                results = response["results"]
+            timings.append(time.time() - start)
+        rows[mode] = {
+            "results": results,
+            "seconds": round(sum(timings) / len(timings), 2),
+            "connections": app["stats"]["connections"],
+            "requests": app["stats"]["requests"]
+        }
+        print(f"\n{mode.upper()}")
+        print(f"  avg seconds    {rows[mode]['seconds']}")
+        print(f"  requests       {rows[mode]['requests']}")
+        print(f"  connections    {rows[mode]['connections']}")
+        print(f"  unique results {len(results)}")
+
+    same = [(r["link"], r["target_title"]) for r in rows["sequential"]["results"]] == \
+           [(r["link"], r["target_title"]) for r in rows["concurrent"]["results"]]
+    print("\n" + "-" * 80)
+    print(f"Latency: {rows['sequential']['seconds']}s → {rows['concurrent']['seconds']}s")
+    print(f"Same deduplicated results and target_title tags: {'✅' if same else '❌'}")
+
+    await serper_service.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
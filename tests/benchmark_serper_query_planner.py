@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-title Serper queries vs planner OR-groups
+Compares request count and recall of the grouped query plan against the current
+one-query-per-title strategy, replaying recorded Serper responses.
+
+Metrics per hospital:
+- requests:          Serper requests issued by each strategy
+- recall:            share of per-title LinkedIn URLs also found by the grouped plan
+- persona recall:    same, restricted to results the title pre-classifier accepts
+                     (the buyer roles Step 1 actually keeps)
+- title agreement:   shared URLs attributed to the same target_title by both strategies
+
+Usage:
+    # Record live responses for both strategies (needs SERPER_API_KEY, ~15 credits per hospital)
+    python tests/benchmark_serper_query_planner.py --record
+
+    # Replay the recorded fixture offline
+    python tests/benchmark_serper_query_planner.py
+"""
+
+import sys
+import json
+import logging
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.search import serper_service
+from app.services.title_classifier import title_classifier, ACCEPT
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "serper_query_planner.json"
+
+HOSPITALS = [
+    {"company_name": "Mayo Clinic", "company_city": "Rochester", "company_state": "Minnesota"},
+    {"company_name": "Providence Medford Medical Center", "company_city": "Medford", "company_state": "Oregon"},
+    {"company_name": "St. Patrick Hospital", "company_city": "Missoula", "company_state": "Montana"},
+    {"company_name": "Bozeman Health Deaconess Hospital", "company_city": "Bozeman", "company_state": "Montana"},
+    {"company_name": "MedStar Union Memorial Hospital", "company_city": "Baltimore", "company_state": "Maryland"},
+]
+
+
+def fixture_key(query: str, num_results: int) -> str:
+    return f"{num_results}|{query}"
+
+
+async def run_strategy(mode: str, hospital: dict, responses: dict, record: bool) -> dict:
+    """Run one company search with the given query mode, recording or replaying responses"""
+    live_fetch = serper_service._fetch_search
+
+    async def fetch(query: str, num_results: int) -> dict:
+        key = fixture_key(query, num_results)
+        if record:
+            result = await live_fetch(query, num_results)
+            if result.get("success"):
+                responses[key] = result["results"]
+            return result
+        if key not in responses:
+            return {"success": False, "error": f"Not in fixture: {key}"}
+        return {"success": True, "results": [dict(r) for r in responses[key]], "query": query}
+
+    serper_service._fetch_search = fetch
+    serper_service.query_mode = mode
+    try:
+        return await serper_service.search_linkedin_profiles(**hospital)
+    finally:
+        serper_service._fetch_search = live_fetch
+
+
+def compare(hospital: dict, per_title: dict, grouped: dict) -> dict:
+    baseline = {r["link"]: r for r in per_title.get("results", [])}
+    planned = {r["link"]: r for r in grouped.get("results", [])}
+    shared = baseline.keys() & planned.keys()
+
+    persona = {
+        link for link, r in baseline.items()
+        if title_classifier.classify(r.get("title", ""), hospital["company_name"]).decision == ACCEPT
+    }
+    agreement = sum(1 for link in shared if baseline[link]["target_title"] == planned[link]["target_title"])
+
+    return {
+        "hospital": hospital["company_name"],
+        "requests_per_title": per_title.get("queries_issued", 0),
+        "requests_grouped": grouped.get("queries_issued", 0),
+        "urls_per_title": len(baseline),
+        "urls_grouped": len(planned),
+        "recall": round(len(shared) / len(baseline), 3) if baseline else None,
+        "persona_recall": round(len(persona & planned.keys()) / len(persona), 3) if persona else None,
+        "title_agreement": round(agreement / len(shared), 3) if shared else None,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", action="store_true", help="Call Serper and (re)write the fixture")
+    parser.add_argument("--fixture", type=Path, default=FIXTURE_PATH)
+    args = parser.parse_args()
+
+    if args.record:
+        if not serper_service.api_key:
+            sys.exit("SERPER_API_KEY is required to record the fixture")
+        responses = {}
+    else:
+        if not args.fixture.exists():
+            sys.exit(f"Fixture not found: {args.fixture}\nRecord it first with --record")
+        responses = json.loads(args.fixture.read_text())["responses"]
+
+    logging.disable(logging.INFO)  # Keep per-query log lines out of the report
+    serper_service.cache_enabled = False  # Compare strategies, not cache hits
+
+    rows = []
+    for hospital in HOSPITALS:
+        per_title = await run_strategy("per_title", hospital, responses, args.record)
+        grouped = await run_strategy("grouped", hospital, responses, args.record)
+        rows.append(compare(hospital, per_title, grouped))
+
+    if args.record:
+        args.fixture.parent.mkdir(parents=True, exist_ok=True)
+        args.fixture.write_text(json.dumps({"hospitals": HOSPITALS, "responses": responses}, indent=2))
+        print(f"Recorded {len(responses)} responses → {args.fixture}")
+
+    print("\n" + "=" * 100)
+    print("SERPER QUERY PLANNER - per-title vs grouped")
+    print("=" * 100)
+    print(f"{'Hospital':<38} {'Requests':>12} {'URLs':>10} {'Recall':>8} {'Persona':>8} {'Title agr.':>10}")
+    for row in rows:
+        print(f"{row['hospital'][:38]:<38} "
+              f"{row['requests_per_title']:>5} → {row['requests_grouped']:<4} "
+              f"{row['urls_per_title']:>4} → {row['urls_grouped']:<3} "
+              f"{row['recall'] if row['recall'] is not None else '-':>8} "
+              f"{row['persona_recall'] if row['persona_recall'] is not None else '-':>8} "
+              f"{row['title_agreement'] if row['title_agreement'] is not None else '-':>10}")
+
+    total_before = sum(r["requests_per_title"] for r in rows)
+    total_after = sum(r["requests_grouped"] for r in rows)
+    print("-" * 100)
+    print(f"Total requests: {total_before} → {total_after}")
+
+    await serper_service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
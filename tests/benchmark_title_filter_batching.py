@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batched vs per-prospect title filtering
+Compares latency, request count and token cost per hospital for
+TitleFilterService in "individual" mode and "batch" mode.
+
+Usage:
+    python tests/benchmark_title_filter_batching.py              # live OpenAI (needs OPENAI_API_KEY)
+    python tests/benchmark_title_filter_batching.py --simulate   # local stand-in, no API calls
+    python tests/benchmark_title_filter_batching.py --batch-size 40 --titles 80
+
+The simulated model charges a fixed round-trip latency plus time per output token,
+which is what makes per-prospect mode slow in production (80 hits = 80 round-trips).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load .env from project root FIRST before any imports
+load_dotenv(Path(__file__).parent.parent / '.env')
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.llm_gateway import llm_gateway
+from app.services.rate_governor import rate_governor
+from app.services.title_filter import title_filter_service
+
+# gpt-5-mini list prices (USD per 1M tokens) - override for other models
+PRICE_INPUT_PER_1M = float(os.getenv("BENCH_PRICE_INPUT_PER_1M", "0.25"))
+PRICE_OUTPUT_PER_1M = float(os.getenv("BENCH_PRICE_OUTPUT_PER_1M", "2.00"))
+
+COMPANY_NAME = "Providence Medford Medical Center"
+
+# Typical Serper hits for one hospital: a few buyers, many clinical/unrelated titles
+SAMPLE_TITLES = [
+    "Director of Facilities", "Facilities Manager", "VP of Operations", "Chief Financial Officer",
+    "Plant Operations Manager", "Energy Manager", "Director of Engineering", "Maintenance Supervisor",
+    "Registered Nurse", "Nurse Manager - ICU", "Physician - Internal Medicine", "Medical Director, Emergency",
+    "Pharmacist", "Lab Technician", "Radiology Technologist", "Physical Therapist",
+    "Case Manager", "Social Worker", "Director of Nutrition Services", "IT Project Manager",
+    "HR Business Partner", "Marketing Coordinator", "Controller", "Director of Sustainability",
+    "Chief Operating Officer", "Security Officer", "Environmental Services Manager", "Patient Access Representative",
+    "Surgical Technologist", "Respiratory Therapist", "Chief Nursing Officer", "Director of Support Services",
+    "Construction Project Manager", "Biomedical Engineer", "Clinical Informatics Specialist", "Accountant",
+    "Supply Chain Director", "Capital Projects Manager", "Medical Assistant", "Infection Prevention Specialist",
+]
+
+
+def build_fixture(count: int) -> list:
+    """Build `count` Serper-style hits by cycling the sample titles"""
+    prospects = []
+    for i in range(count):
+        title = SAMPLE_TITLES[i % len(SAMPLE_TITLES)]
+        prospects.append({
+            "title": f"Person {i} - {title} - {COMPANY_NAME} | LinkedIn",
+            "snippet": f"{title} at {COMPANY_NAME}. Medford, Oregon. 500+ connections on LinkedIn.",
+            "link": f"https://www.linkedin.com/in/person-{i}"
+        })
+    return prospects
+
+
+class UsageRecorder:
+    """Wraps the gateway's Responses call to count requests and tokens"""
+
+    def __init__(self, simulate: bool):
+        self.simulate = simulate
+        self.requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._original = llm_gateway.create_response
+
+    def reset(self):
+        self.requests = self.input_tokens = self.output_tokens = 0
+
+    async def create_response(self, **api_params):
+        self.requests += 1
+        if self.simulate:
+            # Same governor limits the real gateway applies
+            async with rate_governor.slot("openai"):
+                response = await _simulated_response(api_params)
+        else:
+            response = await self._original(**api_params)
+        usage = getattr(response, "usage", None)
+        self.input_tokens += getattr(usage, "input_tokens", 0) or 0
+        self.output_tokens += getattr(usage, "output_tokens", 0) or 0
+        return response
+
+    @property
+    def cost(self) -> float:
+        return (self.input_tokens * PRICE_INPUT_PER_1M + self.output_tokens * PRICE_OUTPUT_PER_1M) / 1_000_000
+
+
+def _heuristic_score(text: str) -> int:
+    text = text.lower()
+    if any(word in text for word in ("facilit", "plant", "energy", "engineering", "financial", "operating", "operations", "controller", "sustainab", "capital", "maintenance")):
+        return random.randint(75, 95)
+    return random.randint(5, 35)
+
+
+async def _simulated_response(api_params: dict):
+    """Local stand-in for the Responses API: ~600ms round-trip + 5ms per output token"""
+    from types import SimpleNamespace
+
+    prompt = api_params["input"]
+    if api_params["text"]["format"]["type"] == "json_schema":
+        lines = [line for line in prompt.splitlines() if line.startswith("[")]
+        results = []
+        for line in lines:
+            index = int(line[1:line.index("]")])
+            results.append({"index": index, "score": _heuristic_score(line), "reasoning": "Simulated"})
+        output = json.dumps({"results": results})
+    else:
+        title_line = next(line for line in prompt.splitlines() if line.startswith("Job Title:"))
+        output = json.dumps({"score": _heuristic_score(title_line), "reasoning": "Simulated"})
+
+    output_tokens = len(output) // 4
+    await asyncio.sleep(0.6 + output_tokens * 0.005)
+
+    content = SimpleNamespace(text=output)
+    return SimpleNamespace(
+        output=[SimpleNamespace(content=[content])],
+        usage=SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=output_tokens)
+    )
+
+
+async def run_mode(recorder: UsageRecorder, prospects: list, mode: str, batch_size: int) -> dict:
+    recorder.reset()
+    start = time.time()
+    results = await title_filter_service.score_prospects(prospects, COMPANY_NAME, mode=mode, batch_size=batch_size)
+    elapsed = time.time() - start
+
+    scored = [r for r in results if r.get("success")]
+    return {
+        "mode": mode,
+        "seconds": round(elapsed, 2),
+        "requests": recorder.requests,
+        "input_tokens": recorder.input_tokens,
+        "output_tokens": recorder.output_tokens,
+        "cost_usd": round(recorder.cost, 5),
+        "scored": len(scored),
+        "fallbacks": len([r for r in scored if r.get("source") == "llm_single"]) if mode == "batch" else 0,
+        "passed": len([r for r in scored if r["score"] >= 55])
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--simulate", action="store_true", help="Use the local stand-in instead of OpenAI")
+    parser.add_argument("--titles", type=int, default=80, help="Serper hits per hospital")
+    parser.add_argument("--batch-size", type=int, default=title_filter_service.batch_size)
+    args = parser.parse_args()
+
+    simulate = args.simulate or not llm_gateway.client
+    if not llm_gateway.client and not args.simulate:
+        print("⚠️ OPENAI_API_KEY not set - running with the local stand-in (--simulate)")
+
+    # Measure real model calls, not cache hits
+    llm_gateway.cache_enabled = False
+
+    recorder = UsageRecorder(simulate)
+    llm_gateway.create_response = recorder.create_response
+
+    prospects = build_fixture(args.titles)
+
+    print("\n" + "=" * 80)
+    print(f"TITLE FILTER BENCHMARK - {args.titles} titles/hospital, batch size {args.batch_size}"
+          f" ({'simulated' if simulate else 'live ' + title_filter_service.model})")
+    print("=" * 80)
+
+    rows = []
+    for mode in ("individual", "batch"):
+        row = await run_mode(recorder, prospects, mode, args.batch_size)
+        rows.append(row)
+        print(f"\n{mode.upper()}")
+        for key, value in row.items():
+            if key != "mode":
+                print(f"  {key:<14} {value}")
+
+    individual, batch = rows
+    print("\n" + "-" * 80)
+    print(f"Requests: {individual['requests']} → {batch['requests']}")
+    if individual["seconds"]:
+        print(f"Latency:  {individual['seconds']}s → {batch['seconds']}s "
+              f"({batch['seconds'] / individual['seconds']:.0%} of per-prospect)")
+    if individual["cost_usd"]:
+        print(f"Cost:     ${individual['cost_usd']} → ${batch['cost_usd']} per hospital "
+              f"({batch['cost_usd'] / individual['cost_usd']:.0%} of per-prospect)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
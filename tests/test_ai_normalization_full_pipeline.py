@@ -68,6 +68,7 @@ async def test_full_pipeline():
     step2_start = time.time()
     step2_result = await service.step2_filter_prospects(
         enriched_prospects=enriched,
+        run_context=step1_result.get('run_context'),
         company_name=company_name,
         company_city=company_city,
         company_state=company_state
@@ -61,6 +61,7 @@ async def test_show_all_profiles():
     print(f"\n[STEP 2] Company validation filtering...")
     step2_result = await service.step2_filter_prospects(
         enriched_prospects=enriched,
+        run_context=step1_result.get('run_context'),
         company_name=company_name,
         company_city=company_city,
         company_state=company_state
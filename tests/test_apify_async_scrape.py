@@ -0,0 +1,299 @@
+"""
+Test Async Apify Scrape
+Verifies ApifyLinkedInService.scrape_profiles starts the actor, polls it without
+blocking the event loop, parses dataset items while the run is still going, and
+aborts runs that exceed the timeout. Large URL lists are split into parallel
+chunked runs that keep partial results. Also checks that profiles found in the profile
+store skip Apify and are merged back in request order (a renamed slug is returned and
+stored under the requested URL too), that URLs which stop being
+needed mid-scrape are dropped from chunks that haven't started, that cancelling
+a scrape aborts its runs, and that a run whose record disappears while polling
+fails its chunk with an explicit error.
+
+Runs offline - the Apify client and the profile store's database are replaced
+with in-memory fakes.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.linkedin import ApifyLinkedInService
+from app.services.linkedin_urls import canonical_linkedin_url
+from app.services.profile_store import profile_store
+from app.services.rate_governor import rate_governor, VendorLimiter
+
+
+class FakeApify:
+    """
+    Each run writes one profile per poll and succeeds once all its URLs are scraped
+
+    URLs in fail_urls make their run end FAILED before writing anything;
+    runs with a URL in vanish_urls disappear (get() returns None) after writing
+    one profile; finish=False leaves runs RUNNING forever (for timeouts); renamed
+    maps a requested URL to the URL LinkedIn redirects it to.
+    """
+
+    def __init__(self, finish=True, fail_urls=(), renamed=None, vanish_urls=()):
+        self.finish = finish
+        self.fail_urls = set(fail_urls)
+        self.vanish_urls = set(vanish_urls)
+        self.renamed = dict(renamed or {})
+        self.runs = {}
+        self.polls = 0
+        self.aborted = []
+        self.items_seen_while_running = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    # ApifyClientAsync surface used by the service
+    def actor(self, actor_id):
+        return SimpleNamespace(start=self._start)
+
+    def run(self, run_id):
+        return SimpleNamespace(get=lambda: self._get(run_id), abort=lambda: self._abort(run_id))
+
+    def dataset(self, dataset_id):
+        return SimpleNamespace(list_items=lambda offset, limit: self._list_items(dataset_id, offset, limit))
+
+    async def _start(self, run_input):
+        run_id = f"run{len(self.runs)}"
+        self.runs[run_id] = {
+            "state": {"id": run_id, "defaultDatasetId": run_id, "status": "RUNNING", "usageTotalUsd": 0.02},
+            "urls": run_input["profileUrls"],
+            "written": []
+        }
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return dict(self.runs[run_id]["state"])
+
+    async def _get(self, run_id):
+        self.polls += 1
+        run = self.runs[run_id]
+        state = run["state"]
+        if state["status"] != "RUNNING":
+            return dict(state)
+        if self.vanish_urls & set(run["urls"]) and run["written"]:
+            return None
+        if self.fail_urls & set(run["urls"]):
+            state["status"] = "FAILED"
+        elif len(run["written"]) < len(run["urls"]):
+            url = run["urls"][len(run["written"])]
+            url = self.renamed.get(url, url)
+            run["written"].append({"linkedinUrl": url, "fullName": url.rsplit("/", 1)[-1], "headline": "Director of Facilities"})
+        elif self.finish:
+            state["status"] = "SUCCEEDED"
+        if state["status"] != "RUNNING":
+            self.in_flight -= 1
+        return dict(state)
+
+    async def _abort(self, run_id):
+        self.aborted.append(run_id)
+        self.runs[run_id]["state"]["status"] = "ABORTED"
+        self.in_flight -= 1
+        return dict(self.runs[run_id]["state"])
+
+    async def _list_items(self, run_id, offset, limit):
+        run = self.runs[run_id]
+        items = run["written"][offset:offset + limit]
+        if run["state"]["status"] == "RUNNING":
+            self.items_seen_while_running += len(items)
+        return SimpleNamespace(items=items)
+
+
+def make_service(fake) -> ApifyLinkedInService:
+    rate_governor._limiters["apify"] = VendorLimiter("apify", rate_per_second=1000, burst=1000, max_concurrency=10)
+    service = ApifyLinkedInService()
+    service.client = fake
+    service.poll_interval = 0.05
+    service.dataset_page_size = 2
+    return service
+
+
+async def test_streamed_scrape():
+    """Profiles are parsed as they land and the event loop keeps serving other work"""
+    urls = [f"https://www.linkedin.com/in/person-{i}" for i in range(5)]
+    fake = FakeApify()
+    service = make_service(fake)
+
+    ticks = 0
+
+    async def other_request():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(other_request())
+    result = await service.scrape_profiles(urls)
+    ticker.cancel()
+
+    assert result["success"], result
+    assert result["profiles_scraped"] == 5
+    assert [p["url"] for p in result["profiles"]] == urls
+    assert fake.items_seen_while_running >= 4, "items should be consumed while the run is in progress"
+    assert ticks >= 10, f"event loop blocked during scrape ({ticks} ticks)"
+    print(f"✅ Streamed scrape test passed ({fake.polls} polls, {ticks} ticks of other work)")
+
+
+async def test_run_timeout():
+    """A run that never finishes is aborted after run_timeout, keeping what it already scraped"""
+    urls = [f"https://www.linkedin.com/in/slow-{i}" for i in range(30)]
+    fake = FakeApify(finish=False)
+    service = make_service(fake)
+    service.run_timeout = 0.2
+    service.chunk_size = 30
+
+    result = await service.scrape_profiles(urls)
+    assert result["success"] and 0 < result["profiles_scraped"] < 30
+    assert fake.aborted == ["run0"]
+    assert result["chunks"][0]["status"] == "TIMED-OUT" and result["chunks"][0]["error"] is None
+    print(f"✅ Run timeout test passed ({result['profiles_scraped']} profiles kept)")
+
+
+async def test_profile_store_hits():
+    """Stored profiles skip Apify; hits and fresh scrapes come back in the original order"""
+    stored = {
+        "https://www.linkedin.com/in/person-0": {"url": "https://www.linkedin.com/in/person-0", "name": "Stored Zero"},
+        "https://www.linkedin.com/in/person-2": {"url": "https://www.linkedin.com/in/person-2", "name": "Stored Two"},
+    }
+    saved = []
+
+    async def fake_get_many(urls):
+        return {key: value for key, value in stored.items() if key in {canonical_linkedin_url(u) for u in urls}}
+
+    async def fake_save_many(profiles, actor_id=None):
+        saved.extend(profiles)
+
+    original = profile_store.get_many, profile_store.save_many
+    profile_store.get_many, profile_store.save_many = fake_get_many, fake_save_many
+
+    urls = [
+        "https://uk.linkedin.com/in/Person-0/?trk=public",
+        "https://www.linkedin.com/in/person-1",
+        "https://www.linkedin.com/in/person-2/",
+        "https://www.linkedin.com/in/person-3",
+    ]
+    fake = FakeApify()
+    result = await make_service(fake).scrape_profiles(urls)
+
+    assert result["profiles_from_store"] == 2 and result["profiles_sent_to_apify"] == 2
+    assert [p["name"] for p in result["profiles"]] == ["Stored Zero", "person-1", "Stored Two", "person-3"]
+    assert [p.url for p in saved] == [urls[1], urls[3]]
+
+    # force_refresh re-scrapes everything
+    fake = FakeApify()
+    result = await make_service(fake).scrape_profiles(urls, force_refresh=True)
+    assert result["profiles_from_store"] == 0 and result["profiles_sent_to_apify"] == 4
+    profile_store.get_many, profile_store.save_many = original
+    print("✅ Profile store merge test passed")
+
+
+async def test_renamed_slug():
+    """A redirected slug keeps its place in the results and is stored under the requested URL too"""
+    urls = ["https://www.linkedin.com/in/person-0", "https://www.linkedin.com/in/old-slug"]
+    saved = []
+
+    async def fake_get_many(urls):
+        return {}
+
+    async def fake_save_many(profiles, actor_id=None):
+        saved.extend(profiles)
+
+    original = profile_store.get_many, profile_store.save_many
+    profile_store.get_many, profile_store.save_many = fake_get_many, fake_save_many
+    try:
+        fake = FakeApify(renamed={urls[1]: "https://www.linkedin.com/in/new-slug"})
+        result = await make_service(fake).scrape_profiles(urls)
+    finally:
+        profile_store.get_many, profile_store.save_many = original
+
+    assert [p["url"] for p in result["profiles"]] == [urls[0], "https://www.linkedin.com/in/new-slug"]
+    assert [p["requested_url"] for p in result["profiles"]] == urls
+    assert set(profile_store._rows(saved)) == {urls[0], urls[1], "https://www.linkedin.com/in/new-slug"}
+    print("✅ Renamed slug test passed")
+
+
+async def test_chunked_runs():
+    """URL lists are split across bounded parallel runs; a failed chunk doesn't lose the others"""
+    urls = [f"https://www.linkedin.com/in/person-{i}" for i in range(25)]
+    fake = FakeApify(fail_urls={urls[12]})
+    service = make_service(fake)
+    service.chunk_size = 5
+    service.max_parallel_runs = 2
+
+    result = await service.scrape_profiles(urls)
+
+    assert result["success"]
+    assert len(result["chunks"]) == 5 and result["chunks_failed"] == 1
+    assert result["chunks"][2]["status"] == "FAILED" and result["chunks"][2]["error"]
+    assert [p["url"] for p in result["profiles"]] == urls[:10] + urls[15:]
+    assert fake.peak_in_flight == 2
+    assert all(chunk["seconds"] > 0 for chunk in result["chunks"])
+    assert abs(result["cost_estimate"] - 0.1) < 1e-9
+    print(f"✅ Chunked runs test passed: {[(c['index'], c['status'], c['seconds']) for c in result['chunks']]}")
+
+
+async def test_vanished_run():
+    """A run whose record disappears while polling fails its chunk explicitly and keeps its items"""
+    urls = [f"https://www.linkedin.com/in/person-{i}" for i in range(4)]
+    fake = FakeApify(vanish_urls={urls[2]})
+    service = make_service(fake)
+    service.chunk_size = 2
+
+    result = await service.scrape_profiles(urls)
+
+    assert result["success"] and result["chunks_failed"] == 1
+    assert result["chunks"][1]["status"] == "FAILED"
+    assert result["chunks"][1]["error"] == "Apify run run1 not found while polling"
+    assert [p["url"] for p in result["profiles"]] == urls[:3]
+    print("✅ Vanished run test passed")
+
+
+async def test_skip_and_cancel():
+    """skip_url drops URLs from chunks that haven't started; cancelling aborts the run in flight"""
+    urls = [f"https://www.linkedin.com/in/person-{i}" for i in range(6)]
+    fake = FakeApify()
+    service = make_service(fake)
+    service.chunk_size = 2
+    service.max_parallel_runs = 1
+    skip = set()
+
+    task = asyncio.create_task(service.scrape_profiles(urls, skip_url=lambda url: url in skip))
+    await asyncio.sleep(0.01)
+    skip.update(urls[1:5])  # Chunk 0 already started; chunk 1 empties, chunk 2 keeps one URL
+    result = await task
+
+    assert [chunk["status"] for chunk in result["chunks"]] == ["SUCCEEDED", "SKIPPED", "SUCCEEDED"]
+    assert result["profiles_skipped"] == 3 and result["profiles_sent_to_apify"] == 3
+    assert [p["url"] for p in result["profiles"]] == [urls[0], urls[1], urls[5]]
+    assert len(fake.runs) == 2
+
+    fake = FakeApify(finish=False)
+    task = asyncio.create_task(make_service(fake).scrape_profiles(urls))
+    await asyncio.sleep(0.15)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    assert fake.aborted == ["run0"]
+    print("✅ Skip / cancel test passed")
+
+
+async def main():
+    await test_streamed_scrape()
+    await test_run_timeout()
+    await test_profile_store_hits()
+    await test_renamed_slug()
+    await test_chunked_runs()
+    await test_vanished_run()
+    await test_skip_and_cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -185,6 +185,7 @@ async def process_hospital(service, hospital, index, total):
 
             step2_result = await service.step2_filter_prospects(
                 enriched_prospects=enriched_prospects,
+                run_context=step1_result.get('run_context'),
                 company_name=hospital['name'],
                 company_city=hospital['city'],
                 company_state=hospital['state'],
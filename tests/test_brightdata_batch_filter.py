@@ -0,0 +1,144 @@
+"""
+Test Bright Data Multi-Hospital Batch Filter
+Verifies that hospitals in the same state share one combined snapshot, records
+are routed back to the right hospital, a combined snapshot at the 100-record
+ceiling is split (and never downloaded), and per-hospital results match what
+separate Step 1 runs would return.
+
+Runs offline - the Bright Data stand-in evaluates each filter against a
+synthetic dataset, company variations are fixed and the snapshot cache is off.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import brightdata_prospect_discovery as discovery_module
+from app.services.brightdata_prospect_discovery import BrightDataProspectDiscoveryService
+from app.services.brightdata_snapshot_cache import BrightDataSnapshotCache, canonicalize_filter, record_matches
+from app.services.ai_company_normalization import ai_company_normalization_service
+from app.services.rate_governor import rate_governor, VendorLimiter
+
+HOSPITALS = [
+    {"company_name": "Billings Clinic", "company_city": "Billings", "company_state": "Montana"},
+    {"company_name": "Benefis Health", "company_city": "Great Falls", "company_state": "Montana"},
+    {"company_name": "Bozeman Health", "company_city": "Bozeman", "company_state": "Montana"},
+    {"company_name": "Portneuf Health", "company_city": "Pocatello", "company_state": "Idaho"},
+]
+
+# Records per hospital in the synthetic dataset (the three Montana hospitals total 120)
+SIZES = {"Billings Clinic": 40, "Benefis Health": 40, "Bozeman Health": 40, "Portneuf Health": 5}
+
+
+def synthetic_dataset():
+    records = []
+    for hospital in HOSPITALS:
+        for i in range(SIZES[hospital["company_name"]]):
+            records.append({
+                "url": f"https://www.linkedin.com/in/{hospital['company_name'].split()[0].lower()}-{i}",
+                "name": f"Person {i}",
+                "position": "Director of Facilities",
+                "current_company_name": hospital["company_name"],
+                "city": f"{hospital['company_city']}, {hospital['company_state']}",
+                "connections": 200
+            })
+    return records
+
+
+async def start_stand_in(dataset):
+    """Bright Data stand-in that runs each submitted filter against the dataset"""
+    snapshots = {}
+    downloads = []
+
+    async def create(request: web.Request) -> web.Response:
+        payload = await request.json()
+        node = canonicalize_filter(payload["filter"])
+        snapshot_id = f"s_{len(snapshots)}"
+        snapshots[snapshot_id] = [record for record in dataset if record_matches(record, node)]
+        return web.json_response({"snapshot_id": snapshot_id})
+
+    async def status(request: web.Request) -> web.Response:
+        return web.json_response({"status": "ready", "dataset_size": len(snapshots[request.match_info["snapshot_id"]])})
+
+    async def download(request: web.Request) -> web.Response:
+        snapshot_id = request.match_info["snapshot_id"]
+        downloads.append(snapshot_id)
+        return web.Response(text="\n".join(json.dumps(record) for record in snapshots[snapshot_id]))
+
+    app = web.Application()
+    app.router.add_post("/filter", create)
+    app.router.add_get("/snapshots/{snapshot_id}", status)
+    app.router.add_get("/snapshots/{snapshot_id}/download", download)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", snapshots, downloads
+
+
+async def test_batch_split_and_routing():
+    """3 Montana hospitals (120 records) split once; Idaho runs alone; every record lands at its hospital"""
+    runner, base_url, snapshots, downloads = await start_stand_in(synthetic_dataset())
+    rate_governor._limiters["brightdata"] = VendorLimiter("brightdata", rate_per_second=1000, burst=1000, max_concurrency=10)
+
+    original_cache = discovery_module.brightdata_snapshot_cache
+    original_normalize = ai_company_normalization_service.normalize_company_name
+
+    async def own_name(company_name, **kwargs):
+        return [company_name]
+
+    disabled_cache = BrightDataSnapshotCache()
+    disabled_cache.enabled = False
+    discovery_module.brightdata_snapshot_cache = disabled_cache
+    ai_company_normalization_service.normalize_company_name = own_name
+
+    service = BrightDataProspectDiscoveryService(api_token="test")
+    service.client.base_url = base_url
+    service.client.poll_initial = 0.05
+
+    try:
+        batch = await service.step1_brightdata_filter_batch(
+            HOSPITALS, target_titles=["Director"], apply_step2_filters=True
+        )
+        assert batch["success"], batch
+        summary = batch["summary"]
+        assert summary["states"] == 2 and summary["splits"] == 1, summary
+        assert summary["snapshots_created"] == 4 and summary["unrouted_records"] == 0, summary
+        # The 120-record combined snapshot was rejected without a download
+        assert len(downloads) == 3 and len(snapshots) == 4
+
+        for hospital, result in zip(HOSPITALS, batch["results"]):
+            name = hospital["company_name"]
+            assert result["success"] and result["company_name"] == name, result
+            urls = [p["linkedin_url"] for p in result["enriched_prospects"]]
+            assert len(urls) == SIZES[name], (name, len(urls))
+            assert all(name.split()[0].lower() in url for url in urls)
+            assert all(p["advanced_filter"]["passed"] for p in result["enriched_prospects"])
+
+        # Same prospects as a separate Step 1 run for one of the hospitals
+        single = await service.step1_brightdata_filter(
+            company_name="Benefis Health", company_state="Montana", target_titles=["Director"]
+        )
+        assert sorted(p["linkedin_url"] for p in single["enriched_prospects"]) == \
+            sorted(p["linkedin_url"] for p in batch["results"][1]["enriched_prospects"])
+    finally:
+        discovery_module.brightdata_snapshot_cache = original_cache
+        ai_company_normalization_service.normalize_company_name = original_normalize
+        await service.client.close()
+        await runner.cleanup()
+    print(f"✅ Batch split / routing test passed ({summary['snapshots_created']} snapshots, {len(downloads)} downloads)")
+
+
+async def main():
+    await test_batch_split_and_routing()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
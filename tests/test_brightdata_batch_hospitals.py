@@ -111,6 +111,7 @@ async def process_hospital(service, hospital_data, csv_writer, csv_file, parent_
         step2_start = time.time()
         step2_result = await service.step2_filter_prospects(
             enriched_prospects=enriched,
+            run_context=step1_result.get('run_context'),
             company_name=company_name,
             company_city=company_city,
             company_state=company_state
@@ -0,0 +1,152 @@
+"""
+Test Concurrent Bright Data Hospital Runs
+Runs Step 1 → Step 2 for several hospitals at the same time on one service
+instance. Company-name normalization finishes in reverse start order, so with
+variations stored on the service every hospital but one would be validated
+against another hospital's names. Each Step 2 must see only its own run_context.
+
+Runs offline - the Bright Data stand-in evaluates each filter against a
+synthetic dataset, company variations are fixed and the snapshot cache is off.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import brightdata_prospect_discovery as discovery_module
+from app.services.brightdata_prospect_discovery import BrightDataProspectDiscoveryService, BrightDataRunContext
+from app.services.brightdata_snapshot_cache import BrightDataSnapshotCache, canonicalize_filter, record_matches
+from app.services.brightdata_preflight import BrightDataSizeEstimator
+from app.services.ai_company_normalization import ai_company_normalization_service
+from app.services.rate_governor import rate_governor, VendorLimiter
+
+# Hospital name → (variation used in the filter, company name on the profiles)
+HOSPITALS = {
+    "Alpine Regional Hospital": "Alpine Health",
+    "Bitterroot Medical Center": "Bitterroot Health",
+    "Cascade Valley Hospital": "Cascade Health",
+    "Deerlodge County Hospital": "Deerlodge Health",
+    "Evergreen Community Hospital": "Evergreen Health",
+}
+RECORDS_PER_HOSPITAL = 6
+
+
+def synthetic_dataset():
+    return [
+        {
+            "url": f"https://www.linkedin.com/in/{company.split()[0].lower()}-{i}",
+            "name": f"Person {i}",
+            "position": "Director of Facilities",
+            "current_company_name": company,
+            "city": "Helena, Montana",
+            "connections": 200
+        }
+        for company in HOSPITALS.values()
+        for i in range(RECORDS_PER_HOSPITAL)
+    ]
+
+
+async def start_stand_in(dataset):
+    snapshots = {}
+
+    async def create(request: web.Request) -> web.Response:
+        node = canonicalize_filter((await request.json())["filter"])
+        snapshot_id = f"s_{len(snapshots)}"
+        snapshots[snapshot_id] = [record for record in dataset if record_matches(record, node)]
+        return web.json_response({"snapshot_id": snapshot_id})
+
+    async def status(request: web.Request) -> web.Response:
+        return web.json_response({"status": "ready", "dataset_size": len(snapshots[request.match_info["snapshot_id"]])})
+
+    async def download(request: web.Request) -> web.Response:
+        records = snapshots[request.match_info["snapshot_id"]]
+        return web.Response(text="\n".join(json.dumps(record) for record in records))
+
+    app = web.Application()
+    app.router.add_post("/filter", create)
+    app.router.add_get("/snapshots/{snapshot_id}", status)
+    app.router.add_get("/snapshots/{snapshot_id}/download", download)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def test_concurrent_hospitals_are_isolated():
+    runner, base_url = await start_stand_in(synthetic_dataset())
+    rate_governor._limiters["brightdata"] = VendorLimiter("brightdata", rate_per_second=1000, burst=1000, max_concurrency=10)
+
+    original_cache = discovery_module.brightdata_snapshot_cache
+    original_estimator = discovery_module.brightdata_size_estimator
+    original_normalize = ai_company_normalization_service.normalize_company_name
+
+    names = list(HOSPITALS)
+
+    async def slow_variations(company_name, **kwargs):
+        # First hospital to start finishes last
+        await asyncio.sleep(0.05 * (len(names) - names.index(company_name)))
+        return [HOSPITALS[company_name]]
+
+    disabled_cache = BrightDataSnapshotCache()
+    disabled_cache.enabled = False
+    disabled_estimator = BrightDataSizeEstimator()
+    disabled_estimator.enabled = False
+    discovery_module.brightdata_snapshot_cache = disabled_cache
+    discovery_module.brightdata_size_estimator = disabled_estimator
+    ai_company_normalization_service.normalize_company_name = slow_variations
+
+    service = BrightDataProspectDiscoveryService(api_token="test")
+    service.client.base_url = base_url
+    service.client.poll_initial = 0.05
+
+    async def run_hospital(company_name: str):
+        step1 = await service.step1_brightdata_filter(
+            company_name=company_name, company_state="Montana", target_titles=["Director"]
+        )
+        assert step1["success"], step1
+        await asyncio.sleep(0.01 * names.index(company_name))  # interleave Step 2 calls as well
+        # Dict form, as a caller persisting step outputs would pass it back
+        step2 = await service.step2_filter_prospects(
+            enriched_prospects=step1["enriched_prospects"],
+            company_name=company_name,
+            company_state="Montana",
+            run_context=step1["run_context"].to_dict()
+        )
+        return step1, step2
+
+    try:
+        results = await asyncio.gather(*[run_hospital(name) for name in names])
+
+        for name, (step1, step2) in zip(names, results):
+            context = step1["run_context"]
+            assert isinstance(context, BrightDataRunContext)
+            assert context.company_name == name and context.company_variations == [HOSPITALS[name]]
+            assert step2["success"], (name, step2)
+            prefix = HOSPITALS[name].split()[0].lower()
+            urls = [p["linkedin_url"] for p in step2["enriched_prospects"]]
+            assert len(urls) == RECORDS_PER_HOSPITAL and all(prefix in url for url in urls), (name, urls)
+
+        assert not hasattr(service, "_company_variations")
+    finally:
+        discovery_module.brightdata_snapshot_cache = original_cache
+        discovery_module.brightdata_size_estimator = original_estimator
+        ai_company_normalization_service.normalize_company_name = original_normalize
+        await service.client.close()
+        await runner.cleanup()
+    print(f"✅ Concurrent hospital isolation test passed ({len(names)} hospitals)")
+
+
+async def main():
+    await test_concurrent_hospitals_are_isolated()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,198 @@
+"""
+Test Bright Data Snapshot Polling
+Verifies BrightDataClient polls snapshots with growing delays, downloads as soon
+as a snapshot is ready (retrying while the download endpoint is still building),
+rejects oversized snapshots without downloading them, stops at the time budget,
+and polls several snapshots concurrently from one coroutine. Downloads are
+streamed as JSON lines: records reach the handler while the transfer is still
+running, and a dropped download resumes without repeating records.
+
+Runs offline - Bright Data responses come from a local aiohttp stand-in.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.brightdata_client import BrightDataClient
+from app.services.rate_governor import rate_governor, VendorLimiter
+
+
+async def start_stand_in(snapshots: dict):
+    """
+    Snapshot-shaped responses
+
+    snapshots: {snapshot_id: {"ready_after": status polls before ready, "building_downloads": n,
+                              "status": final status, "size": dataset_size,
+                              "drop_after": records sent before the first download is cut off,
+                              "line_delay": seconds between streamed records}}
+    """
+    calls = []
+
+    async def status(request: web.Request) -> web.Response:
+        snapshot_id = request.match_info["snapshot_id"]
+        snapshot = snapshots[snapshot_id]
+        calls.append((snapshot_id, "status", time.monotonic()))
+        snapshot["polls"] = snapshot.get("polls", 0) + 1
+        if snapshot["polls"] <= snapshot.get("ready_after", 0):
+            return web.json_response({"status": "building"})
+        return web.json_response({"status": snapshot.get("status", "ready"), "dataset_size": snapshot.get("size", 3),
+                                  "warning": "filter error"})
+
+    async def download(request: web.Request) -> web.Response:
+        snapshot_id = request.match_info["snapshot_id"]
+        snapshot = snapshots[snapshot_id]
+        calls.append((snapshot_id, "download", time.monotonic()))
+        if snapshot.get("building_downloads", 0) > 0:
+            snapshot["building_downloads"] -= 1
+            return web.Response(text="Snapshot is building, try again in a few seconds")
+
+        assert request.query["format"] == "jsonl"
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for i in range(snapshot.get("size", 3)):
+            if i == snapshot.get("drop_after"):
+                snapshot["drop_after"] = None
+                request.transport.close()
+                return response
+            line = json.dumps({"url": f"https://www.linkedin.com/in/{snapshot_id}-{i}"}) + "\n"
+            await response.write(line.encode())
+            if snapshot.get("line_delay"):
+                await asyncio.sleep(snapshot["line_delay"])
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/snapshots/{snapshot_id}", status)
+    app.router.add_get("/snapshots/{snapshot_id}/download", download)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", calls
+
+
+def make_client(base_url: str) -> BrightDataClient:
+    rate_governor._limiters["brightdata"] = VendorLimiter("brightdata", rate_per_second=1000, burst=1000, max_concurrency=10)
+    client = BrightDataClient(api_token="test")
+    client.base_url = base_url
+    client.poll_initial = 0.05
+    client.poll_max = 0.2
+    return client
+
+
+async def test_backoff_and_download():
+    """Delays grow between status polls and the download starts right after ready"""
+    runner, base_url, calls = await start_stand_in({"s1": {"ready_after": 4, "building_downloads": 1}})
+    client = make_client(base_url)
+
+    result = await client.wait_for_snapshot("s1", max_wait_time=10)
+
+    assert result["success"] and result["record_count"] == 3
+    kinds = [kind for _, kind, _ in calls]
+    assert kinds == ["status"] * 5 + ["download"] * 2, kinds
+    times = [at for _, _, at in calls]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert gaps[3] > gaps[0], f"polls should back off: {gaps}"
+    assert all(gap <= client.poll_max + 0.1 for gap in gaps)
+    # Ready → download has no fixed delay
+    assert gaps[4] < 0.05, gaps
+
+    await client.close()
+    await runner.cleanup()
+    print(f"✅ Backoff test passed (gaps: {[round(g, 2) for g in gaps]})")
+
+
+async def test_failed_too_large_and_timeout():
+    """Failed and oversized snapshots end without a download; stuck ones stop at the budget"""
+    runner, base_url, calls = await start_stand_in({
+        "failed": {"status": "failed"},
+        "large": {"size": 250},
+        "stuck": {"ready_after": 1000},
+    })
+    client = make_client(base_url)
+
+    started = time.monotonic()
+    results = await client.wait_for_snapshots(["failed", "large", "stuck"], max_wait_time=0.5, max_records=100)
+    elapsed = time.monotonic() - started
+
+    assert not results["failed"]["success"] and results["failed"]["status"] == "failed"
+    assert not results["large"]["success"] and results["large"]["status"] == "too_large"
+    assert not results["stuck"]["success"] and "Timeout" in results["stuck"]["error"]
+    assert not [kind for _, kind, _ in calls if kind == "download"]
+    assert elapsed < 0.7, f"sleep overshot the budget ({elapsed:.2f}s)"
+
+    await client.close()
+    await runner.cleanup()
+    print(f"✅ Failure / budget test passed ({elapsed:.2f}s)")
+
+
+async def test_concurrent_snapshots():
+    """Several snapshots are polled together - total time tracks the slowest, not the sum"""
+    snapshots = {f"s{i}": {"ready_after": 3} for i in range(5)}
+    runner, base_url, calls = await start_stand_in(snapshots)
+    client = make_client(base_url)
+
+    started = time.monotonic()
+    single = await client.wait_for_snapshot("s0", max_wait_time=10)
+    single_seconds = time.monotonic() - started
+
+    started = time.monotonic()
+    results = await client.wait_for_snapshots(["s1", "s2", "s3", "s4"], max_wait_time=10)
+    batch_seconds = time.monotonic() - started
+
+    assert single["success"]
+    assert all(result["success"] and result["polls"] == 5 for result in results.values())
+    assert batch_seconds < single_seconds * 2, (single_seconds, batch_seconds)
+
+    await client.close()
+    await runner.cleanup()
+    print(f"✅ Concurrent polling test passed (1 snapshot {single_seconds:.2f}s, 4 snapshots {batch_seconds:.2f}s)")
+
+
+async def test_streamed_download():
+    """Records reach the handler during the transfer; a dropped download resumes without duplicates"""
+    runner, base_url, calls = await start_stand_in({
+        "slow": {"size": 10, "line_delay": 0.02},
+        "dropped": {"size": 10, "drop_after": 4},
+    })
+    client = make_client(base_url)
+
+    received = []
+    results = await client.wait_for_snapshots(
+        ["slow", "dropped"], max_wait_time=10,
+        handle_record=lambda snapshot_id, record: received.append((snapshot_id, record["url"], time.monotonic()))
+    )
+
+    assert results["slow"]["success"] and results["slow"]["record_count"] == 10
+    assert "profiles" not in results["slow"]
+    slow_times = [at for snapshot_id, _, at in received if snapshot_id == "slow"]
+    assert slow_times[-1] - slow_times[0] > 0.1, "records should arrive while the download is still running"
+
+    dropped_urls = [url for snapshot_id, url, _ in received if snapshot_id == "dropped"]
+    assert results["dropped"]["success"] and results["dropped"]["record_count"] == 10
+    assert dropped_urls == [f"https://www.linkedin.com/in/dropped-{i}" for i in range(10)], dropped_urls
+    assert [kind for snapshot_id, kind, _ in calls if snapshot_id == "dropped"].count("download") == 2
+
+    await client.close()
+    await runner.cleanup()
+    print("✅ Streamed download test passed")
+
+
+async def main():
+    await test_backoff_and_download()
+    await test_failed_too_large_and_timeout()
+    await test_concurrent_snapshots()
+    await test_streamed_download()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
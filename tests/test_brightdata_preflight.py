@@ -0,0 +1,186 @@
+"""
+Test Bright Data Pre-flight Sizing
+Verifies size estimates (observed size, lower bound from a narrower filter,
+count service), that Step 1 tightens an oversized filter before creating a
+snapshot when the size is known, and that a snapshot rejected as too large is
+retried with the next tighter filter instead of returning nothing.
+
+Runs offline - the Bright Data stand-in (and count service) evaluate each filter
+against a synthetic dataset; estimator and snapshot cache use the memory tier only.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import brightdata_prospect_discovery as discovery_module
+from app.services.brightdata_prospect_discovery import BrightDataProspectDiscoveryService
+from app.services.brightdata_preflight import BrightDataSizeEstimator
+from app.services.brightdata_snapshot_cache import BrightDataSnapshotCache, canonicalize_filter, record_matches
+from app.services.ai_company_normalization import ai_company_normalization_service
+from app.services.response_cache import ResponseCache
+from app.services.rate_governor import rate_governor, VendorLimiter
+
+
+def synthetic_dataset():
+    """150 Billings Clinic directors: 90 with 20 connections, 60 with 200"""
+    return [
+        {
+            "url": f"https://www.linkedin.com/in/billings-{i}",
+            "name": f"Person {i}",
+            "position": "Director of Facilities",
+            "current_company_name": "Billings Clinic",
+            "city": "Billings, Montana",
+            "connections": 20 if i < 90 else 200
+        }
+        for i in range(150)
+    ]
+
+
+async def start_stand_in(dataset):
+    """Bright Data stand-in plus a /count service, both running filters against the dataset"""
+    snapshots = {}
+    downloads = []
+
+    def matching(payload):
+        node = canonicalize_filter(payload["filter"])
+        return [record for record in dataset if record_matches(record, node)]
+
+    async def create(request: web.Request) -> web.Response:
+        snapshot_id = f"s_{len(snapshots)}"
+        snapshots[snapshot_id] = matching(await request.json())
+        return web.json_response({"snapshot_id": snapshot_id})
+
+    async def count(request: web.Request) -> web.Response:
+        return web.json_response({"count": len(matching(await request.json()))})
+
+    async def status(request: web.Request) -> web.Response:
+        return web.json_response({"status": "ready", "dataset_size": len(snapshots[request.match_info["snapshot_id"]])})
+
+    async def download(request: web.Request) -> web.Response:
+        snapshot_id = request.match_info["snapshot_id"]
+        downloads.append(snapshot_id)
+        return web.Response(text="\n".join(json.dumps(record) for record in snapshots[snapshot_id]))
+
+    app = web.Application()
+    app.router.add_post("/filter", create)
+    app.router.add_post("/count", count)
+    app.router.add_get("/snapshots/{snapshot_id}", status)
+    app.router.add_get("/snapshots/{snapshot_id}/download", download)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", snapshots, downloads
+
+
+def make_estimator(count_url: str = None) -> BrightDataSizeEstimator:
+    estimator = BrightDataSizeEstimator()
+    estimator.enabled = True
+    estimator.count_url = count_url
+    estimator.cache = ResponseCache(namespace="brightdata_size", max_entries=100, default_ttl_seconds=3600, persistent=False)
+    return estimator
+
+
+def payload(variations, min_connections):
+    service = BrightDataProspectDiscoveryService(api_token="test")
+    return service._build_filter_payload(variations, ["Director"], "Montana", min_connections)
+
+
+async def test_estimates():
+    """Observed sizes, lower bounds for broader filters, unknown otherwise"""
+    estimator = make_estimator()
+    narrow = payload(["Billings Clinic"], 50)
+    await estimator.record(narrow, 140, scope="Montana")
+
+    assert await estimator.estimate(narrow, scope="Montana") == {"records": 140, "source": "observed"}
+    broader = payload(["Billings Clinic", "Billings Clinic Health"], 10)
+    assert await estimator.estimate(broader, scope="Montana") == {"records": 140, "source": "lower_bound"}
+    # A narrower filter than anything observed has no estimate
+    assert await estimator.estimate(payload(["Billings Clinic"], 300), scope="Montana") is None
+    assert await estimator.estimate(broader, scope="Idaho") is None
+    print("✅ Estimate test passed")
+
+
+async def run_step1(base_url: str, estimator: BrightDataSizeEstimator, **kwargs):
+    original_cache = discovery_module.brightdata_snapshot_cache
+    original_estimator = discovery_module.brightdata_size_estimator
+    original_normalize = ai_company_normalization_service.normalize_company_name
+
+    async def own_name(company_name, **kwargs):
+        return [company_name]
+
+    disabled_cache = BrightDataSnapshotCache()
+    disabled_cache.enabled = False
+    discovery_module.brightdata_snapshot_cache = disabled_cache
+    discovery_module.brightdata_size_estimator = estimator
+    ai_company_normalization_service.normalize_company_name = own_name
+
+    service = BrightDataProspectDiscoveryService(api_token="test")
+    service.client.base_url = base_url
+    service.client.poll_initial = 0.05
+    try:
+        return await service.step1_brightdata_filter(
+            company_name="Billings Clinic", company_state="Montana", target_titles=["Director"], **kwargs
+        )
+    finally:
+        discovery_module.brightdata_snapshot_cache = original_cache
+        discovery_module.brightdata_size_estimator = original_estimator
+        ai_company_normalization_service.normalize_company_name = original_normalize
+        await service.client.close()
+
+
+async def test_step1_tightening():
+    """Unknown size: one rejected snapshot, then a tighter one; known size: tightened up front"""
+    runner, base_url, snapshots, downloads = await start_stand_in(synthetic_dataset())
+    rate_governor._limiters["brightdata"] = VendorLimiter("brightdata", rate_per_second=1000, burst=1000, max_concurrency=10)
+    estimator = make_estimator()
+
+    first = await run_step1(base_url, estimator)
+    assert first["success"], first
+    preflight = first["summary"]["preflight"]
+    assert preflight["snapshot_retries"] == 1 and preflight["tightening"] == ["min_connections>=50"], preflight
+    assert first["summary"]["filters_applied"]["min_connections"] == 50
+    assert len(first["enriched_prospects"]) == 60
+    assert len(snapshots) == 2 and downloads == ["s_1"]  # the 150-record snapshot was never downloaded
+
+    second = await run_step1(base_url, estimator)
+    preflight = second["summary"]["preflight"]
+    assert second["success"] and preflight["snapshot_retries"] == 0, preflight
+    assert preflight["tightening"] == ["min_connections>=50"] and preflight["estimate_source"] == "observed"
+    assert len(snapshots) == 3, "known-oversized filter should be tightened before any snapshot"
+
+    await runner.cleanup()
+    print("✅ Step 1 tightening test passed")
+
+
+async def test_count_service():
+    """With a count service, the first run is tightened without a rejected snapshot"""
+    runner, base_url, snapshots, downloads = await start_stand_in(synthetic_dataset())
+    rate_governor._limiters["brightdata"] = VendorLimiter("brightdata", rate_per_second=1000, burst=1000, max_concurrency=10)
+
+    result = await run_step1(base_url, make_estimator(count_url=f"{base_url}/count"))
+    preflight = result["summary"]["preflight"]
+    assert result["success"] and preflight["snapshot_retries"] == 0, preflight
+    assert preflight["estimate_source"] == "count" and preflight["estimated_records"] == 60
+    assert len(snapshots) == 1
+
+    await runner.cleanup()
+    print("✅ Count service test passed")
+
+
+async def main():
+    await test_estimates()
+    await test_step1_tightening()
+    await test_count_service()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,199 @@
+"""
+Test Bright Data Snapshot Cache
+Verifies the canonical filter hash ignores ordering and case, identical filters
+reuse the stored snapshot, a broader untruncated snapshot is refiltered locally
+for a narrower filter, and truncated or narrower snapshots are never reused.
+Also runs Step 1 end-to-end: the second identical search creates no snapshot and
+force_refresh creates a new one.
+
+Runs offline - Bright Data is a local aiohttp stand-in, company variations are
+fixed and the cache uses the memory tier only.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.brightdata_snapshot_cache import BrightDataSnapshotCache, filter_hash
+from app.services import brightdata_prospect_discovery as discovery_module
+from app.services.brightdata_prospect_discovery import BrightDataProspectDiscoveryService
+from app.services.ai_company_normalization import ai_company_normalization_service
+from app.services.response_cache import ResponseCache
+from app.services.rate_governor import rate_governor, VendorLimiter
+
+
+def make_payload(variations, titles, min_connections=10, exclusions=("intern", "nurse"), records_limit=100):
+    return {
+        "dataset_id": "gd_test",
+        "records_limit": records_limit,
+        "filter": {
+            "operator": "and",
+            "filters": [
+                {"operator": "or", "filters": [
+                    {"name": "current_company_name", "value": v, "operator": "includes"} for v in variations
+                ]},
+                {"operator": "or", "filters": [
+                    {"name": "position", "value": t, "operator": "includes"} for t in titles
+                ]},
+                *[{"name": "position", "value": k, "operator": "not_includes"} for k in exclusions],
+                {"name": "city", "value": "Minnesota", "operator": "includes"},
+                {"name": "connections", "value": min_connections, "operator": ">="}
+            ]
+        }
+    }
+
+
+def make_cache() -> BrightDataSnapshotCache:
+    cache = BrightDataSnapshotCache()
+    cache.enabled = True
+    cache.cache = ResponseCache(namespace="brightdata_snapshot", max_entries=100, default_ttl_seconds=3600, persistent=False)
+    return cache
+
+
+def profile(i, company, position, connections=100, city="Rochester, Minnesota"):
+    return {"url": f"https://www.linkedin.com/in/p{i}", "current_company_name": company,
+            "position": position, "connections": connections, "city": city}
+
+
+RECORDS = [
+    profile(1, "Mayo Clinic", "Director of Facilities"),
+    profile(2, "Mayo Clinic Health System", "Energy Manager", connections=8),
+    profile(3, "Olmsted Medical Center", "Director of Finance"),
+    profile(4, "Mayo Clinic", "Chief Financial Officer", connections=40),
+]
+
+
+def test_canonical_hash():
+    """Reordered / re-cased filters hash the same; a different value does not"""
+    a = make_payload(["Mayo Clinic", "Mayo Clinic Health System"], ["Director", "Energy"])
+    b = make_payload(["mayo clinic health system", " Mayo Clinic"], ["Energy", "Director"], exclusions=("nurse", "intern"))
+    c = make_payload(["Mayo Clinic"], ["Director", "Energy"])
+    assert filter_hash(a) == filter_hash(b)
+    assert filter_hash(a) != filter_hash(c)
+    assert filter_hash(a) != filter_hash({**a, "records_limit": 50})
+    print("✅ Canonical hash test passed")
+
+
+async def test_exact_and_superset():
+    """Exact reuse, then a narrower filter served from the broader snapshot"""
+    cache = make_cache()
+    broad = make_payload(["Mayo Clinic", "Mayo Clinic Health System", "Olmsted Medical"],
+                         ["Director", "Energy", "Chief"], min_connections=5, exclusions=("intern",))
+    await cache.store(broad, "s_broad", RECORDS, scope="Minnesota")
+
+    exact = await cache.lookup(make_payload(["Olmsted Medical", "Mayo Clinic", "Mayo Clinic Health System"],
+                                            ["Chief", "Director", "Energy"], min_connections=5,
+                                            exclusions=("intern",)), scope="minnesota")
+    assert exact["match"] == "exact" and exact["snapshot_id"] == "s_broad" and len(exact["records"]) == 4
+
+    narrow = make_payload(["Mayo Clinic"], ["Director", "Chief"], min_connections=10)
+    superset = await cache.lookup(narrow, scope="Minnesota")
+    assert superset["match"] == "superset" and superset["snapshot_id"] == "s_broad"
+    # p2 has 8 connections, p3 is another company; p1 and p4 match
+    assert [r["url"] for r in superset["records"]] == ["https://www.linkedin.com/in/p1", "https://www.linkedin.com/in/p4"]
+
+    # Another state's index is never searched
+    assert await cache.lookup(narrow, scope="Arizona") is None
+
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1 and stats["superset_hits"] == 1 and stats["misses"] == 1
+    print("✅ Exact / superset reuse test passed")
+
+
+async def test_no_unsafe_reuse():
+    """Truncated broader snapshots and narrower stored filters are not reused"""
+    cache = make_cache()
+    truncated = make_payload(["Mayo Clinic", "Olmsted Medical"], ["Director", "Chief"], records_limit=4)
+    await cache.store(truncated, "s_truncated", RECORDS, scope="Minnesota")
+    assert await cache.lookup(make_payload(["Mayo Clinic"], ["Director"], records_limit=4), scope="Minnesota") is None
+
+    narrow = make_payload(["Mayo Clinic"], ["Director"])
+    await cache.store(narrow, "s_narrow", RECORDS[:1], scope="Minnesota")
+    broader = make_payload(["Mayo Clinic", "Olmsted Medical"], ["Director"])
+    assert await cache.lookup(broader, scope="Minnesota") is None
+    assert await cache.lookup(make_payload(["Mayo Clinic"], ["Director"], min_connections=5), scope="Minnesota") is None
+
+    cache.enabled = False
+    assert await cache.lookup(narrow, scope="Minnesota") is None
+    print("✅ Unsafe reuse test passed")
+
+
+async def start_stand_in():
+    """Bright Data stand-in: every filter creates a new ready snapshot of RECORDS"""
+    created = []
+
+    async def create(request: web.Request) -> web.Response:
+        created.append(await request.json())
+        return web.json_response({"snapshot_id": f"s_{len(created)}"})
+
+    async def status(request: web.Request) -> web.Response:
+        return web.json_response({"status": "ready", "dataset_size": len(RECORDS)})
+
+    async def download(request: web.Request) -> web.Response:
+        return web.Response(text="\n".join(json.dumps(record) for record in RECORDS))
+
+    app = web.Application()
+    app.router.add_post("/filter", create)
+    app.router.add_get("/snapshots/{snapshot_id}", status)
+    app.router.add_get("/snapshots/{snapshot_id}/download", download)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", created
+
+
+async def test_step1_reuses_snapshot():
+    """A repeated Step 1 search skips the snapshot; force_refresh creates one"""
+    runner, base_url, created = await start_stand_in()
+    rate_governor._limiters["brightdata"] = VendorLimiter("brightdata", rate_per_second=1000, burst=1000, max_concurrency=10)
+
+    original_cache = discovery_module.brightdata_snapshot_cache
+    original_normalize = ai_company_normalization_service.normalize_company_name
+
+    async def fixed_variations(**kwargs):
+        return ["Mayo Clinic", "Mayo Clinic Health System"]
+
+    discovery_module.brightdata_snapshot_cache = make_cache()
+    ai_company_normalization_service.normalize_company_name = fixed_variations
+
+    service = BrightDataProspectDiscoveryService(api_token="test")
+    service.client.base_url = base_url
+    service.client.poll_initial = 0.05
+
+    try:
+        kwargs = {"company_name": "Mayo Clinic", "company_state": "Minnesota", "target_titles": ["Director", "Chief"]}
+        first = await service.step1_brightdata_filter(**kwargs)
+        second = await service.step1_brightdata_filter(**kwargs)
+        refreshed = await service.step1_brightdata_filter(**kwargs, force_refresh=True)
+
+        assert first["success"] and first["summary"]["snapshot_cache"] == "miss"
+        assert second["success"] and second["summary"]["snapshot_cache"] == "exact"
+        assert second["summary"]["snapshot_id"] == first["summary"]["snapshot_id"]
+        assert len(second["enriched_prospects"]) == len(first["enriched_prospects"]) == 4
+        assert refreshed["summary"]["snapshot_cache"] == "bypassed" and refreshed["summary"]["snapshot_id"] == "s_2"
+        assert len(created) == 2
+    finally:
+        discovery_module.brightdata_snapshot_cache = original_cache
+        ai_company_normalization_service.normalize_company_name = original_normalize
+        await service.client.close()
+        await runner.cleanup()
+    print("✅ Step 1 snapshot reuse test passed")
+
+
+async def main():
+    test_canonical_hash()
+    await test_exact_and_superset()
+    await test_no_unsafe_reuse()
+    await test_step1_reuses_snapshot()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
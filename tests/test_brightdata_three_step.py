@@ -110,6 +110,7 @@ async def test_brightdata_three_step():
 
     step2_result = await service.step2_filter_prospects(
         enriched_prospects=enriched,
+        run_context=step1_result.get('run_context'),
         company_name=TEST_COMPANY["company_name"],
         company_city=TEST_COMPANY["company_city"],
         company_state=TEST_COMPANY["company_state"],
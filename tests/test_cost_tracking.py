@@ -0,0 +1,108 @@
+"""
+Test Cost Tracking
+Verifies OpenAI usage pricing, stage metering across asyncio.gather, Apify run costs,
+cost per qualified lead, and the per-request cost header from CostTrackingMiddleware.
+
+Runs offline - events are not written to Postgres.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.cost_tracking import cost_tracker, openai_cost, CostTrackingMiddleware
+
+
+async def _no_flush(scope):
+    return None
+
+
+def test_openai_pricing():
+    """Responses and Chat Completions usage are priced the same way; cached input is discounted"""
+    responses_usage = SimpleNamespace(
+        input_tokens=1_000_000, output_tokens=100_000,
+        input_tokens_details=SimpleNamespace(cached_tokens=400_000),
+        output_tokens_details=SimpleNamespace(reasoning_tokens=50_000)
+    )
+    chat_usage = SimpleNamespace(prompt_tokens=1_000_000, completion_tokens=100_000, prompt_tokens_details=None)
+
+    # gpt-5-mini: 600k × $0.25 + 400k × $0.025 + 100k × $2.00 per 1M
+    assert abs(openai_cost("gpt-5-mini-2025-08-07", responses_usage) - 0.36) < 1e-9
+    assert abs(openai_cost("gpt-4o-mini", chat_usage) - 0.21) < 1e-9
+    print("✅ OpenAI pricing test passed")
+
+
+async def test_scope_and_stages():
+    """Events from gathered tasks land in the request scope and the enclosing stage meter"""
+    cost_tracker.flush = _no_flush
+    usage = SimpleNamespace(input_tokens=1000, output_tokens=200)
+
+    async def fake_llm_call():
+        await asyncio.sleep(0)
+        cost_tracker.record_openai("gpt-5-mini", usage, call_site="ai_ranking")
+
+    async with cost_tracker.scope("/discover-prospects-step3", "Mayo Clinic") as scope:
+        with cost_tracker.stage("ai_ranking") as meter:
+            await asyncio.gather(*[fake_llm_call() for _ in range(5)])
+        cost_tracker.record_serper_query("Mayo Clinic Director of Facilities site:linkedin.com/in")
+        cost_tracker.record_apify_run(
+            {"id": "run1", "usageTotalUsd": 0.05, "stats": {"computeUnits": 0.1},
+             "pricingInfo": {"pricingModel": "PRICE_PER_DATASET_ITEM", "pricePerUnitUsd": 0.01}},
+            "dev_fusion/linkedin-profile-scraper", items=4
+        )
+        cost_tracker.record_qualified_leads(2)
+
+    assert len(meter.events) == 5
+    summary = scope.summary()
+    assert summary["by_vendor"]["openai"]["calls"] == 5
+    assert summary["by_vendor"]["openai"]["input_tokens"] == 5000
+    assert abs(summary["by_vendor"]["apify"]["cost_usd"] - 0.09) < 1e-9
+    assert set(summary["by_stage"]) == {"ai_ranking", "serper_search", "linkedin_scrape"}
+    assert summary["qualified_leads"] == 2
+    assert summary["cost_per_qualified_lead"] == round(summary["total_cost_usd"] / 2, 4)
+
+    # Outside a scope nothing is collected
+    assert cost_tracker.current_scope() is None
+    print(f"✅ Scope/stage test passed: {summary}")
+
+
+async def test_middleware_header():
+    """Each request gets its own scope and reports its spend in X-Request-Cost-USD"""
+    import httpx
+    from fastapi import FastAPI
+
+    cost_tracker.flush = _no_flush
+    app = FastAPI()
+    app.add_middleware(CostTrackingMiddleware)
+
+    @app.post("/spend")
+    async def spend(request: dict):
+        cost_tracker.set_company(request.get("company_name"))
+        cost_tracker.record_brightdata_records(100)
+        return {"company": cost_tracker.current_scope().company_name}
+
+    @app.get("/free")
+    async def free():
+        return {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/spend", json={"company_name": "Mayo Clinic"})
+        assert response.json()["company"] == "Mayo Clinic"
+        assert float(response.headers["X-Request-Cost-USD"]) == 0.25
+        assert "X-Request-Cost-USD" not in (await client.get("/free")).headers
+    print("✅ Middleware header test passed")
+
+
+async def main():
+    test_openai_pricing()
+    await test_scope_and_stages()
+    await test_middleware_header()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
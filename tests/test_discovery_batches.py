@@ -0,0 +1,223 @@
+"""
+Test Discovery Batch Scheduler
+Verifies a batch of hospitals given as account ids and CSV-style records runs one
+job each, account ids are resolved from Salesforce, hospitals in different steps
+overlap (one searching while another ranks) while no vendor ever has more
+hospitals inside its steps than its budget, and batch status reports
+throughput. Invalid hospitals reject the whole batch before anything is queued.
+"Retry failed" re-drives only the failed hospitals, from the step that failed.
+
+Runs offline - pipeline steps and Salesforce are stand-ins that sleep briefly,
+and jobs are not written to Postgres.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import discovery_batches as batches_module
+from app.services.discovery_batches import DiscoveryBatchScheduler
+from app.services.discovery_jobs import DiscoveryJobEngine
+from app.services.cost_tracking import cost_tracker
+from app.services.salesforce import salesforce_service
+from app.services.three_step_prospect_discovery import three_step_prospect_discovery_service
+
+BUDGETS = {"serper": 2, "brightdata": 2, "apify": 1, "openai": 2, "salesforce": 1}
+
+
+async def _no_flush(scope):
+    return None
+
+
+async def test_batch_interleaves_within_budgets():
+    """6 hospitals: vendor occupancy stays within budget, steps overlap, throughput reported"""
+    engine = DiscoveryJobEngine()
+    engine.persistent = False
+    engine.max_workers = 6
+    engine.vendor_budgets = dict(BUDGETS)
+    scheduler = DiscoveryBatchScheduler()
+
+    occupancy = {vendor: 0 for vendor in BUDGETS}
+    peak = {vendor: 0 for vendor in BUDGETS}
+    overlaps = []
+
+    def enter(*vendors):
+        for vendor in vendors:
+            occupancy[vendor] += 1
+            peak[vendor] = max(peak[vendor], occupancy[vendor])
+        # Searching and ranking at the same time = hospitals interleaved across vendors
+        overlaps.append(occupancy["serper"] > 0 and occupancy["apify"] + occupancy["openai"] > 0)
+
+    def leave(*vendors):
+        for vendor in vendors:
+            occupancy[vendor] -= 1
+
+    async def get_account(account_id):
+        enter("salesforce")
+        await asyncio.sleep(0.01)
+        leave("salesforce")
+        return {"success": True, "account_id": account_id, "account_name": f"Hospital {account_id[-1]}",
+                "city": "Missoula", "state": "MT", "parent_name": "Providence"}
+
+    async def step1(**kwargs):
+        enter("serper", "openai")
+        await asyncio.sleep(0.05)
+        leave("serper", "openai")
+        return {"success": True, "qualified_prospects": [{"linkedin_url": f"https://www.linkedin.com/in/{kwargs['company_name']}"}]}
+
+    async def step2(**kwargs):
+        enter("apify")
+        await asyncio.sleep(0.02)
+        leave("apify")
+        return {"success": True, "enriched_prospects": [{"name": kwargs["company_name"]}]}
+
+    async def step3(**kwargs):
+        enter("openai")
+        await asyncio.sleep(0.05)
+        leave("openai")
+        return {"success": True, "qualified_prospects": kwargs["enriched_prospects"] * kwargs["max_prospects"]}
+
+    originals = (salesforce_service.get_account_details_for_prospect_search,
+                 three_step_prospect_discovery_service.step1_search_and_filter,
+                 three_step_prospect_discovery_service.step2_scrape_profiles,
+                 three_step_prospect_discovery_service.step3_rank_prospects,
+                 batches_module.discovery_job_engine)
+    salesforce_service.get_account_details_for_prospect_search = get_account
+    three_step_prospect_discovery_service.step1_search_and_filter = step1
+    three_step_prospect_discovery_service.step2_scrape_profiles = step2
+    three_step_prospect_discovery_service.step3_rank_prospects = step3
+    batches_module.discovery_job_engine = engine
+
+    try:
+        hospitals = ["001A", "001B", "001C",
+                     {"name": "St. Patrick Hospital", "city": "Missoula", "state": "MT", "account_id": "001D"},
+                     {"company_name": "Benefis Hospitals Inc", "company_state": "MT"},
+                     {"name": "Bozeman Health", "state": "MT"}]
+        result = await scheduler.submit("three_step", hospitals, shared={"max_prospects": 2, "pipeline": "ignored"})
+        assert result["success"], result
+        batch_id = result["batch"]["batch_id"]
+        assert result["batch"]["hospitals"] == 6
+
+        while True:
+            status = scheduler.status_view(await scheduler.get(batch_id))
+            if status["status"] == "finished":
+                break
+            await asyncio.sleep(0.01)
+
+        assert status["counts"]["succeeded"] == 6, status["jobs"]
+        assert all(peak[vendor] <= BUDGETS[vendor] for vendor in BUDGETS), peak
+        assert peak["serper"] == 2 and peak["openai"] == 2  # Budgets were actually used
+        assert any(overlaps)
+
+        names = [job["company_name"] for job in status["jobs"]]
+        assert names[:3] == ["Hospital A", "Hospital B", "Hospital C"]  # Resolved from Salesforce
+        assert names[3] == "St. Patrick Hospital"  # Named records skip the lookup
+        assert all(job["qualified_prospects"] == 2 for job in status["jobs"])
+        assert status["throughput"]["hospitals_per_hour"] > 0 and status["throughput"]["eta_seconds"] is None
+        assert all(budget["in_use"] == 0 for budget in status["vendor_budgets"].values())
+
+        job = await engine.get(status["jobs"][0]["job_id"])
+        assert job["params"]["company_state"] == "MT" and job["params"]["company_account_id"] == "001A"
+        assert job["params"]["max_prospects"] == 2 and "pipeline" not in job["params"]
+    finally:
+        (salesforce_service.get_account_details_for_prospect_search,
+         three_step_prospect_discovery_service.step1_search_and_filter,
+         three_step_prospect_discovery_service.step2_scrape_profiles,
+         three_step_prospect_discovery_service.step3_rank_prospects,
+         batches_module.discovery_job_engine) = originals
+        await engine.close()
+    print(f"✅ Batch interleaving test passed (peak per vendor: {peak})")
+
+
+async def test_retry_failed():
+    """Only the hospital that failed at step 2 reruns, starting at step 2"""
+    engine = DiscoveryJobEngine()
+    engine.persistent = False
+    scheduler = DiscoveryBatchScheduler()
+    calls = []
+    attempts = {"Hospital B": 0}
+
+    async def step1(**kwargs):
+        calls.append(("step1", kwargs["company_name"]))
+        return {"success": True, "qualified_prospects": [{"linkedin_url": "https://www.linkedin.com/in/x"}]}
+
+    async def step2(**kwargs):
+        calls.append(("step2", kwargs["company_name"]))
+        if kwargs["company_name"] == "Hospital B":
+            attempts["Hospital B"] += 1
+        if attempts.get(kwargs["company_name"]) == 1:
+            return {"success": False, "error": "Apify run failed"}
+        return {"success": True, "enriched_prospects": [{"name": "P"}]}
+
+    async def step3(**kwargs):
+        calls.append(("step3", kwargs["company_name"]))
+        return {"success": True, "qualified_prospects": kwargs["enriched_prospects"]}
+
+    originals = (three_step_prospect_discovery_service.step1_search_and_filter,
+                 three_step_prospect_discovery_service.step2_scrape_profiles,
+                 three_step_prospect_discovery_service.step3_rank_prospects,
+                 batches_module.discovery_job_engine)
+    three_step_prospect_discovery_service.step1_search_and_filter = step1
+    three_step_prospect_discovery_service.step2_scrape_profiles = step2
+    three_step_prospect_discovery_service.step3_rank_prospects = step3
+    batches_module.discovery_job_engine = engine
+
+    async def finished(batch_id):
+        while True:
+            status = scheduler.status_view(await scheduler.get(batch_id))
+            if status["status"] == "finished":
+                return status
+            await asyncio.sleep(0.01)
+
+    try:
+        hospitals = [{"name": name, "state": "MT"} for name in ("Hospital A", "Hospital B", "Hospital C")]
+        batch_id = (await scheduler.submit("three_step", hospitals))["batch"]["batch_id"]
+        status = await finished(batch_id)
+        assert status["counts"]["failed"] == 1
+        assert [job["failed_step"] for job in status["jobs"]] == [None, "step2", None]
+
+        calls.clear()
+        result = await scheduler.retry_failed(batch_id)
+        assert result["retried"] == 1
+        status = await finished(batch_id)
+        assert status["counts"]["succeeded"] == 3
+        assert calls == [("step2", "Hospital B"), ("step3", "Hospital B")]
+
+        assert (await scheduler.retry_failed(batch_id))["retried"] == 0
+        assert await scheduler.retry_failed("unknown") is None
+    finally:
+        (three_step_prospect_discovery_service.step1_search_and_filter,
+         three_step_prospect_discovery_service.step2_scrape_profiles,
+         three_step_prospect_discovery_service.step3_rank_prospects,
+         batches_module.discovery_job_engine) = originals
+        await engine.close()
+    print("✅ Batch retry failed test passed")
+
+
+async def test_invalid_batch_rejected():
+    """A hospital without a name or account id (or hybrid without a state) rejects the batch"""
+    scheduler = DiscoveryBatchScheduler()
+    result = await scheduler.submit("hybrid", [{"name": "Mayo Clinic", "state": "MN"}, {"city": "Rochester"},
+                                               {"name": "Olmsted Medical Center"}])
+    assert not result["success"]
+    assert [entry["index"] for entry in result["invalid"]] == [1, 2]
+    assert (await scheduler.submit("nope", ["001A"]))["success"] is False
+    print("✅ Invalid batch test passed")
+
+
+async def main():
+    original_flush = cost_tracker.flush
+    cost_tracker.flush = _no_flush
+    try:
+        await test_batch_interleaves_within_budgets()
+        await test_retry_failed()
+        await test_invalid_batch_rejected()
+    finally:
+        cost_tracker.flush = original_flush
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
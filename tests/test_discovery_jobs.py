@@ -0,0 +1,271 @@
+"""
+Test Discovery Job Engine
+Verifies a submitted job returns its id before any step runs, each step receives
+the previous steps' outputs, per-step progress / cost are reported without the
+outputs, a failing step stops the job with its error recorded, and retrying a
+failed job resumes at the failed step. A new job with the same inputs (up to
+case, whitespace and title order) starts from the failed job's checkpoints;
+force_refresh and changed inputs start over. A job another worker is still running
+can't be retried until its heartbeat goes stale.
+
+Runs offline - pipeline steps are fast stand-ins and jobs are not written to Postgres.
+"""
+
+import asyncio
+import copy
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.discovery_jobs import DiscoveryJobEngine, input_hash
+from app.services.cost_tracking import cost_tracker
+from app.services.hybrid_prospect_discovery import hybrid_prospect_discovery_service
+from app.services.three_step_prospect_discovery import three_step_prospect_discovery_service
+
+
+async def _no_flush(scope):
+    return None
+
+
+def make_engine() -> DiscoveryJobEngine:
+    engine = DiscoveryJobEngine()
+    engine.persistent = False
+    return engine
+
+
+async def wait_for(engine: DiscoveryJobEngine, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await engine.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        assert asyncio.get_running_loop().time() < deadline, f"job still {job['status']}"
+        await asyncio.sleep(0.01)
+
+
+async def test_hybrid_job():
+    """Job id comes back immediately; steps chain their outputs; status omits outputs (stages not overlapped)"""
+    engine = make_engine()
+    calls = []
+    release = asyncio.Event()
+
+    async def step1(**kwargs):
+        calls.append(("step1", kwargs))
+        await release.wait()
+        cost_tracker.record("serper", "search", 0.01)
+        return {"success": True, "serper_prospects": [{"name": "A"}], "brightdata_prospects": [{"name": "B"}],
+                "summary": {"serper_found": 1, "brightdata_found": 1}}
+
+    async def step2(**kwargs):
+        calls.append(("step2", kwargs))
+        return {"success": True, "enriched_prospects": kwargs["serper_prospects"] + kwargs["brightdata_prospects"],
+                "summary": {"total_unique": 2}}
+
+    async def step3(**kwargs):
+        calls.append(("step3", kwargs))
+        cost_tracker.record("openai", "gpt-5-mini", 0.02)
+        return {"success": True, "qualified_prospects": kwargs["enriched_prospects"][:1],
+                "summary": {"qualified_count": 1}}
+
+    originals = (hybrid_prospect_discovery_service.step1_parallel_search,
+                 hybrid_prospect_discovery_service.step2_deduplicate_and_enrich,
+                 hybrid_prospect_discovery_service.step3_rank_and_qualify)
+    hybrid_prospect_discovery_service.step1_parallel_search = step1
+    hybrid_prospect_discovery_service.step2_deduplicate_and_enrich = step2
+    hybrid_prospect_discovery_service.step3_rank_and_qualify = step3
+
+    try:
+        submitted = await engine.submit("hybrid", {"company_name": "Mayo Clinic", "company_state": "Minnesota",
+                                                   "max_prospects": 5, "overlap_stages": False})
+        assert submitted["status"] == "queued" and "outputs" not in submitted
+        assert [s["status"] for s in submitted["steps"]] == ["skipped", "pending", "pending", "pending", "skipped"]
+
+        await asyncio.sleep(0.05)
+        running = engine.status_view(await engine.get(submitted["job_id"]))
+        assert running["status"] == "running" and running["current_step"] == "step1"
+        assert running["progress"] == {"completed_steps": 0, "total_steps": 3}  # account and step4 are skipped
+
+        release.set()
+        job = await wait_for(engine, submitted["job_id"])
+        assert job["status"] == "succeeded", job["error"]
+        assert [name for name, _ in calls] == ["step1", "step2", "step3"]
+        assert calls[0][1]["company_state"] == "Minnesota"
+        assert calls[2][1]["max_prospects"] == 5
+        assert [p["name"] for p in job["outputs"]["step3"]["qualified_prospects"]] == ["A"]
+
+        view = engine.status_view(job)
+        assert view["results_available"] == ["step1", "step2", "step3"]
+        assert view["steps"][1]["summary"] == {"serper_found": 1, "brightdata_found": 1}
+        assert view["steps"][1]["cost_usd"] == 0.01 and view["steps"][3]["cost_usd"] == 0.02
+        assert abs(view["cost_usd"] - 0.03) < 1e-9
+    finally:
+        (hybrid_prospect_discovery_service.step1_parallel_search,
+         hybrid_prospect_discovery_service.step2_deduplicate_and_enrich,
+         hybrid_prospect_discovery_service.step3_rank_and_qualify) = originals
+        await engine.close()
+    print("✅ Hybrid job test passed")
+
+
+async def test_failed_step_and_resume():
+    """A failing step stops the job; rerunning it skips the steps that already have outputs"""
+    engine = make_engine()
+    scrape_attempts = []
+
+    async def step1(**kwargs):
+        return {"success": True, "qualified_prospects": [{"linkedin_url": "https://www.linkedin.com/in/a"}],
+                "summary": {"qualified": 1}}
+
+    async def step2(**kwargs):
+        scrape_attempts.append(kwargs["linkedin_urls"])
+        if len(scrape_attempts) == 1:
+            return {"success": False, "error": "Apify run timed out"}
+        return {"success": True, "enriched_prospects": [{"name": "A"}]}
+
+    async def step3(**kwargs):
+        return {"success": True, "qualified_prospects": kwargs["enriched_prospects"]}
+
+    originals = (three_step_prospect_discovery_service.step1_search_and_filter,
+                 three_step_prospect_discovery_service.step2_scrape_profiles,
+                 three_step_prospect_discovery_service.step3_rank_prospects)
+    three_step_prospect_discovery_service.step1_search_and_filter = step1
+    three_step_prospect_discovery_service.step2_scrape_profiles = step2
+    three_step_prospect_discovery_service.step3_rank_prospects = step3
+
+    try:
+        submitted = await engine.submit("three_step", {"company_name": "Mayo Clinic"})
+        job = await wait_for(engine, submitted["job_id"])
+        assert job["status"] == "failed" and job["error"] == "step2 failed: Apify run timed out"
+        assert [s["status"] for s in job["steps"]] == ["skipped", "succeeded", "failed", "pending"]
+        assert list(job["outputs"]) == ["step1"]
+
+        retried = await engine.retry(job)
+        assert retried["status"] == "queued" and retried["results_available"] == ["step1"]
+        job = await wait_for(engine, submitted["job_id"])
+        assert job["status"] == "succeeded" and job["error"] is None
+        assert scrape_attempts == [["https://www.linkedin.com/in/a"]] * 2
+        assert job["outputs"]["step3"]["qualified_prospects"] == [{"name": "A"}]
+    finally:
+        (three_step_prospect_discovery_service.step1_search_and_filter,
+         three_step_prospect_discovery_service.step2_scrape_profiles,
+         three_step_prospect_discovery_service.step3_rank_prospects) = originals
+        await engine.close()
+    print("✅ Failed step / resume test passed")
+
+
+async def test_resume_by_input_hash():
+    """Same inputs resume after the last checkpoint; force_refresh / other inputs rerun everything"""
+    engine = make_engine()
+    calls = {"step1": 0, "step2": 0, "step3": 0}
+
+    async def step1(**kwargs):
+        calls["step1"] += 1
+        return {"success": True, "qualified_prospects": [{"linkedin_url": "https://www.linkedin.com/in/a"}]}
+
+    async def step2(**kwargs):
+        calls["step2"] += 1
+        return {"success": True, "enriched_prospects": [{"name": "A"}]}
+
+    async def step3(**kwargs):
+        calls["step3"] += 1
+        if calls["step3"] == 1:
+            return {"success": False, "error": "OpenAI timeout"}
+        return {"success": True, "qualified_prospects": kwargs["enriched_prospects"]}
+
+    originals = (three_step_prospect_discovery_service.step1_search_and_filter,
+                 three_step_prospect_discovery_service.step2_scrape_profiles,
+                 three_step_prospect_discovery_service.step3_rank_prospects)
+    three_step_prospect_discovery_service.step1_search_and_filter = step1
+    three_step_prospect_discovery_service.step2_scrape_profiles = step2
+    three_step_prospect_discovery_service.step3_rank_prospects = step3
+
+    params = {"company_name": "Mayo Clinic", "company_state": "Minnesota", "target_titles": ["CFO", "Director"]}
+    same = {"company_name": " mayo  clinic", "company_state": "MINNESOTA", "target_titles": ["director", "CFO"],
+            "queue_leads": True}
+    assert input_hash("three_step", params) == input_hash("three_step", same)
+    assert input_hash("three_step", params) != input_hash("hybrid", params)
+    assert input_hash("three_step", params) != input_hash("three_step", {**params, "max_prospects": 3})
+
+    try:
+        failed = await wait_for(engine, (await engine.submit("three_step", dict(params)))["job_id"])
+        assert failed["status"] == "failed" and calls == {"step1": 1, "step2": 1, "step3": 1}
+
+        resumed = await engine.submit("three_step", dict(same))
+        assert resumed["resumed_from"] == failed["job_id"]
+        assert [s["status"] for s in resumed["steps"]] == ["skipped", "succeeded", "succeeded", "pending"]
+        job = await wait_for(engine, resumed["job_id"])
+        assert job["status"] == "succeeded" and calls == {"step1": 1, "step2": 1, "step3": 2}
+        assert job["steps"][1]["cost_usd"] == 0.0 and job["outputs"]["step3"]["qualified_prospects"] == [{"name": "A"}]
+
+        # Only failed runs are resumed; a failed run with other inputs doesn't match
+        calls["step3"] = 0
+        await wait_for(engine, (await engine.submit("three_step", {**params, "max_prospects": 3}))["job_id"])
+        refreshed = await engine.submit("three_step", {**params, "force_refresh": True})
+        other = await engine.submit("three_step", {**params, "max_prospects": 4})
+        assert refreshed["resumed_from"] is None and other["resumed_from"] is None
+        await wait_for(engine, refreshed["job_id"])
+        await wait_for(engine, other["job_id"])
+        assert calls["step1"] == 4
+    finally:
+        (three_step_prospect_discovery_service.step1_search_and_filter,
+         three_step_prospect_discovery_service.step2_scrape_profiles,
+         three_step_prospect_discovery_service.step3_rank_prospects) = originals
+        await engine.close()
+    print("✅ Input hash resume test passed")
+
+
+async def test_retry_orphaned_only_when_stale():
+    """A running job loaded by another worker is retried only once it stopped heartbeating"""
+    engine, other_worker = make_engine(), make_engine()
+    other_worker.heartbeat_seconds = 0.02
+    release = asyncio.Event()
+    calls = []
+
+    async def step1(**kwargs):
+        calls.append("step1")
+        await release.wait()
+        return {"success": False, "error": "Serper timeout"}
+
+    original = three_step_prospect_discovery_service.step1_search_and_filter
+    three_step_prospect_discovery_service.step1_search_and_filter = step1
+    try:
+        submitted = await other_worker.submit("three_step", {"company_name": "Mayo Clinic"})
+        await asyncio.sleep(0.1)
+        # What this worker reads back from Postgres: running, recently heartbeated
+        loaded = copy.deepcopy(await other_worker.get(submitted["job_id"]))
+        assert loaded["status"] == "running"
+        try:
+            await engine.retry(loaded)
+            raise AssertionError("retried a job another worker is heartbeating")
+        except ValueError as e:
+            assert "on another worker" in str(e)
+
+        loaded["updated_at"] = (datetime.now(timezone.utc) - timedelta(seconds=engine.stale_seconds + 1)).isoformat()
+        retried = await engine.retry(loaded)
+        assert retried["status"] == "queued"
+        release.set()
+        job = await wait_for(engine, submitted["job_id"])
+        assert job["status"] == "failed" and calls == ["step1", "step1"]
+    finally:
+        three_step_prospect_discovery_service.step1_search_and_filter = original
+        await engine.close()
+        await other_worker.close()
+    print("✅ Orphaned job retry test passed")
+
+
+async def main():
+    original_flush = cost_tracker.flush
+    cost_tracker.flush = _no_flush
+    try:
+        await test_hybrid_job()
+        await test_failed_step_and_resume()
+        await test_resume_by_input_hash()
+        await test_retry_orphaned_only_when_stale()
+    finally:
+        cost_tracker.flush = original_flush
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
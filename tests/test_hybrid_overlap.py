@@ -0,0 +1,200 @@
+"""
+Test Hybrid Overlapped Stages
+Verifies search_and_enrich_overlapped starts scraping Serper URLs before Bright
+Data finishes, so wall time is about max(Bright Data, Serper + Apify) rather than
+the sum. When Bright Data lands, URLs that became duplicates are skipped if their
+chunk hasn't started and discarded if they were already scraped (by requested URL, so
+renamed slugs are kept unless their requested URL is a duplicate); a scrape left
+with nothing needed is cancelled. Discovery jobs use the overlapped path by
+default and skip step 2.
+
+Runs offline - Serper, Bright Data and the Apify scrape are stand-ins that sleep.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.hybrid_prospect_discovery import hybrid_prospect_discovery_service as service
+from app.services.discovery_jobs import DiscoveryJobEngine
+from app.services.cost_tracking import cost_tracker
+from app.services.linkedin_urls import url_key
+
+
+def serper(name: str) -> dict:
+    slug = name.lower().replace(" ", "-")
+    return {"linkedin_url": f"https://www.linkedin.com/in/{slug}", "search_title": f"{name} - Director at Mayo Clinic"}
+
+
+def brightdata(name: str, url: str) -> dict:
+    return {"linkedin_url": url, "linkedin_data": {"name": name}, "data_source": "brightdata"}
+
+
+class FakeSources:
+    """Serper / Bright Data / chunked scrape (one URL per chunk) with configurable delays
+
+    renamed maps a requested URL to the URL the scrape returns it under (redirected slug).
+    """
+
+    def __init__(self, serper_prospects, brightdata_prospects, serper_delay, brightdata_delay, chunk_delay,
+                 renamed=None):
+        self.serper_prospects = serper_prospects
+        self.brightdata_prospects = brightdata_prospects
+        self.serper_delay = serper_delay
+        self.brightdata_delay = brightdata_delay
+        self.chunk_delay = chunk_delay
+        self.renamed = dict(renamed or {})
+        self.scraped = []
+        self.skipped = []
+        self.cancelled = False
+
+    async def serper(self, *args):
+        await asyncio.sleep(self.serper_delay)
+        return {"success": True, "prospects": self.serper_prospects}
+
+    async def brightdata(self, *args):
+        await asyncio.sleep(self.brightdata_delay)
+        return {"success": True, "prospects": self.brightdata_prospects}
+
+    async def scrape(self, linkedin_urls, company_name, company_city=None, company_state=None,
+                     location_filter_enabled=True, skip_url=None):
+        try:
+            for url in linkedin_urls:
+                if skip_url and skip_url(url):
+                    self.skipped.append(url)
+                    continue
+                await asyncio.sleep(self.chunk_delay)
+                self.scraped.append(url)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {"success": True, "summary": {"profiles_skipped": len(self.skipped)},
+                "enriched_prospects": [{"linkedin_url": self.renamed.get(url, url), "requested_url": url,
+                                        "data_source": "linkedin_scrape"} for url in self.scraped]}
+
+    def install(self):
+        originals = (service._run_serper_search, service._run_brightdata_search,
+                     service.three_step_service.step2_scrape_profiles)
+        service._run_serper_search = self.serper
+        service._run_brightdata_search = self.brightdata
+        service.three_step_service.step2_scrape_profiles = self.scrape
+        return originals
+
+
+def restore(originals):
+    (service._run_serper_search, service._run_brightdata_search,
+     service.three_step_service.step2_scrape_profiles) = originals
+
+
+async def test_overlap_and_late_duplicates():
+    """Scrape runs during Bright Data; late duplicates are skipped or discarded"""
+    sources = FakeSources(
+        serper_prospects=[serper(name) for name in ("Alice Adams", "Bob Brown", "Carol Chen", "Dave Diaz")],
+        brightdata_prospects=[brightdata("Carol Chen", "https://www.linkedin.com/in/carol-chen-md"),
+                              brightdata("David Diaz", "https://uk.linkedin.com/in/Dave-Diaz/")],
+        serper_delay=0.05, brightdata_delay=0.4, chunk_delay=0.15,
+        # Bob's profile now lives under a new slug; so does Carol's (a late duplicate either way)
+        renamed={serper("Bob Brown")["linkedin_url"]: "https://www.linkedin.com/in/bob-brown-md",
+                 serper("Carol Chen")["linkedin_url"]: "https://www.linkedin.com/in/carol-chen-rn"}
+    )
+    originals = sources.install()
+    try:
+        started = time.monotonic()
+        result = await service.search_and_enrich_overlapped("Mayo Clinic", company_state="Minnesota")
+        wall = time.monotonic() - started
+    finally:
+        restore(originals)
+
+    assert result["success"], result
+    overlap = result["summary"]["overlap"]
+
+    # Carol (name match) was already being scraped when Bright Data landed; Dave (URL match) hadn't started
+    assert [url_key(p["linkedin_url"]) for p in result["enriched_prospects"][2:]] == \
+        [serper("Alice Adams")["linkedin_url"], "https://www.linkedin.com/in/bob-brown-md"]
+    assert sources.skipped == [serper("Dave Diaz")["linkedin_url"]]
+    assert overlap["late_duplicates"] == 2 and overlap["scrape_urls_skipped"] == 1
+    assert overlap["scraped_then_discarded"] == 1 and not overlap["scrape_cancelled"]
+    assert result["summary"]["duplicates_skipped"] == 2 and result["summary"]["total_enriched"] == 4
+
+    # ≈ max(Bright Data 0.4s, Serper 0.05s + 3 chunks) instead of Bright Data + scrape
+    assert wall < 0.65, wall
+    assert overlap["sequential_estimate_seconds"] > overlap["wall_seconds"] + 0.3, overlap
+    print(f"✅ Overlap test passed ({overlap['wall_seconds']}s vs ~{overlap['sequential_estimate_seconds']}s sequential)")
+
+
+async def test_all_duplicates_cancels_scrape():
+    """Every Serper URL turns out to be in Bright Data → the running scrape is cancelled"""
+    sources = FakeSources(
+        serper_prospects=[serper("Alice Adams"), serper("Bob Brown")],
+        brightdata_prospects=[brightdata("Alice Adams", "https://www.linkedin.com/in/alice-a"),
+                              brightdata("Bob Brown", "https://www.linkedin.com/in/bob-b")],
+        serper_delay=0.01, brightdata_delay=0.1, chunk_delay=5.0
+    )
+    originals = sources.install()
+    try:
+        started = time.monotonic()
+        result = await service.search_and_enrich_overlapped("Mayo Clinic", company_state="Minnesota")
+        wall = time.monotonic() - started
+    finally:
+        restore(originals)
+
+    assert result["success"] and sources.cancelled and wall < 1.0
+    assert result["summary"]["overlap"]["scrape_cancelled"]
+    assert [p["data_source"] for p in result["enriched_prospects"]] == ["brightdata", "brightdata"]
+    print("✅ All-duplicates cancel test passed")
+
+
+async def test_job_uses_overlapped_path():
+    """Hybrid jobs overlap by default: step 2 is skipped and step 3 ranks step 1's enriched prospects"""
+    sources = FakeSources(
+        serper_prospects=[serper("Alice Adams")],
+        brightdata_prospects=[brightdata("Bob Brown", "https://www.linkedin.com/in/bob-b")],
+        serper_delay=0.01, brightdata_delay=0.05, chunk_delay=0.01
+    )
+    ranked = []
+
+    async def step3(**kwargs):
+        ranked.extend(kwargs["enriched_prospects"])
+        return {"success": True, "qualified_prospects": kwargs["enriched_prospects"]}
+
+    engine = DiscoveryJobEngine()
+    engine.persistent = False
+    originals = sources.install()
+    original_step3 = service.step3_rank_and_qualify
+    service.step3_rank_and_qualify = step3
+    try:
+        submitted = await engine.submit("hybrid", {"company_name": "Mayo Clinic", "company_state": "Minnesota"})
+        while (job := await engine.get(submitted["job_id"]))["status"] not in ("succeeded", "failed"):
+            await asyncio.sleep(0.01)
+    finally:
+        restore(originals)
+        service.step3_rank_and_qualify = original_step3
+        await engine.close()
+
+    assert job["status"] == "succeeded", job["error"]
+    assert [s["status"] for s in job["steps"]] == ["skipped", "succeeded", "skipped", "succeeded", "skipped"]
+    assert len(ranked) == 2 and job["steps"][1]["summary"]["overlap"]["late_duplicates"] == 0
+    print("✅ Overlapped job test passed")
+
+
+async def _no_flush(scope):
+    return None
+
+
+async def main():
+    original_flush = cost_tracker.flush
+    cost_tracker.flush = _no_flush
+    try:
+        await test_overlap_and_late_duplicates()
+        await test_all_duplicates_cancels_scrape()
+        await test_job_uses_overlapped_path()
+    finally:
+        cost_tracker.flush = original_flush
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""
+Test LinkedIn URL Canonicalization
+Verifies URL variants from Serper, Bright Data and client payloads collapse to one
+canonical profile URL, and that the per-job dedupe index counts collapsed duplicates.
+
+Runs offline.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.linkedin_urls import canonical_linkedin_url, LinkedInUrlIndex
+from app.services.search import serper_service
+
+
+def test_canonical_variants():
+    """Every shape of the same profile maps to https://www.linkedin.com/in/<slug>"""
+    variants = [
+        "https://www.linkedin.com/in/jane-doe-3c2b1a",
+        "http://linkedin.com/in/jane-doe-3c2b1a/",
+        "https://uk.linkedin.com/in/Jane-Doe-3C2B1A?trk=people-guest",
+        "https://mobile.linkedin.com/in/jane-doe-3c2b1a/details/experience/#main",
+        "www.linkedin.com/in/jane-doe-3c2b1a",
+        "https://www.linkedin.com/pub/jane-doe/1a/2b/3c",
+        "https://www.linkedin.com/in/jane%2Ddoe-3c2b1a",
+    ]
+    assert {canonical_linkedin_url(url) for url in variants} == {"https://www.linkedin.com/in/jane-doe-3c2b1a"}
+
+    # Percent-encoded non-ASCII slugs decode to the same profile as the raw form
+    assert canonical_linkedin_url("https://de.linkedin.com/in/j%C3%BCrgen-m%C3%BCller") == \
+        canonical_linkedin_url("https://www.linkedin.com/in/Jürgen-Müller")
+
+    for not_a_profile in ["https://www.linkedin.com/company/mayo-clinic", "https://example.com/in/jane", "", None]:
+        assert canonical_linkedin_url(not_a_profile) == ""
+    print("✅ Canonical variants test passed")
+
+
+def test_dedupe_index():
+    """First occurrence wins, later variants are counted as collapsed"""
+    index = LinkedInUrlIndex(["https://www.linkedin.com/in/jane-doe"])
+    urls = [
+        "https://uk.linkedin.com/in/jane-doe/",
+        "https://www.linkedin.com/in/john-roe",
+        "https://www.linkedin.com/in/John-Roe?trk=x",
+    ]
+    assert index.dedupe_urls(urls) == ["https://www.linkedin.com/in/john-roe"]
+    assert index.stats() == {"unique_urls": 2, "duplicates_collapsed": 2}
+
+    prospects = [{"linkedin_url": "https://www.linkedin.com/in/a"}, {"linkedin_url": None},
+                 {"linkedin_url": "linkedin.com/in/A/"}]
+    assert len(LinkedInUrlIndex().dedupe(prospects, lambda p: p.get("linkedin_url"))) == 2
+    print("✅ Dedupe index test passed")
+
+
+def test_serper_dedupe():
+    """Serper results for the same profile under different URLs are merged"""
+    results = [
+        {"link": "https://www.linkedin.com/in/jane-doe", "target_title": "Director of Facilities"},
+        {"link": "https://uk.linkedin.com/in/jane-doe/", "target_title": "Facilities Manager"},
+        {"link": "", "target_title": "Plant Manager"},
+    ]
+    unique = serper_service._deduplicate_results(results)
+    assert [r["target_title"] for r in unique] == ["Director of Facilities"]
+    print("✅ Serper dedupe test passed")
+
+
+if __name__ == "__main__":
+    test_canonical_variants()
+    test_dedupe_index()
+    test_serper_dedupe()
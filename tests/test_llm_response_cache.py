@@ -0,0 +1,112 @@
+"""
+Test LLM Response Cache
+Verifies the memory tier (LRU eviction, TTL, counters) and that the gateway
+serves repeated prompts from cache without calling OpenAI again.
+
+Runs offline - the persistent tier is disabled and OpenAI calls are counted locally.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.response_cache import ResponseCache
+from app.services.llm_gateway import LLMGateway
+
+
+class _FakeOutput:
+    def __init__(self, text):
+        self.content = [type("Content", (), {"text": text})()]
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.output = [_FakeOutput(text)]
+
+
+async def test_memory_tier():
+    """LRU eviction, TTL expiry and per-call-site counters"""
+    cache = ResponseCache("test", max_entries=2, persistent=False)
+
+    await cache.set("a", "1", ttl_seconds=60, call_site="site")
+    await cache.set("b", "2", ttl_seconds=60, call_site="site")
+    assert await cache.get("a", "site") == "1"  # a is now most recently used
+
+    await cache.set("c", "3", ttl_seconds=60, call_site="site")  # evicts b
+    assert await cache.get("b", "site") is None
+    assert await cache.get("c", "site") == "3"
+
+    await cache.set("expired", "x", ttl_seconds=0, call_site="site")  # TTL 0 = don't cache
+    assert await cache.get("expired", "site") is None
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["by_call_site"]["site"]["memory_hits"] == 2
+    assert stats["by_call_site"]["site"]["misses"] == 2
+    print("✅ Memory tier test passed")
+
+
+async def test_gateway_cache_hits():
+    """Identical prompts (modulo whitespace) hit the cache; a different effort or output format misses"""
+    gateway = LLMGateway()
+    gateway.cache = ResponseCache("llm", persistent=False)
+    gateway.cache_enabled = True
+
+    calls = []
+
+    async def fake_create_response(**api_params):
+        calls.append(api_params)
+        return _FakeResponse(json.dumps({"score": 80, "reasoning": "Facilities director"}))
+
+    gateway.create_response = fake_create_response
+
+    params = {
+        "model": "gpt-5-mini",
+        "input": "Score this title:\n  Director of Facilities",
+        "reasoning": {"effort": "minimal"}
+    }
+    first = await gateway.create_response_text("title_filter", **params)
+    second = await gateway.create_response_text(
+        "title_filter", **{**params, "input": "Score this title: Director of Facilities"}
+    )
+    assert first == second
+    assert len(calls) == 1, f"Expected 1 OpenAI call, got {len(calls)}"
+
+    await gateway.create_response_text("title_filter", **{**params, "reasoning": {"effort": "high"}})
+    assert len(calls) == 2
+
+    await gateway.create_response_text("title_filter", force_refresh=True, **params)
+    assert len(calls) == 3
+
+    # Output-format params are part of the key: a different schema / token limit misses
+    schema = {"format": {"type": "json_schema", "name": "score", "schema": {"type": "object"}}}
+    await gateway.create_response_text("title_filter", **{**params, "text": schema})
+    await gateway.create_response_text("title_filter", **{**params, "max_output_tokens": 50})
+    assert len(calls) == 5
+    await gateway.create_response_text("title_filter", **{**params, "text": schema})
+    assert len(calls) == 5
+
+    # Message-list input is keyed by its JSON (dict key order doesn't matter)
+    messages = [{"role": "user", "content": "Score this title: Director of Facilities"}]
+    await gateway.create_response_text("title_filter", **{**params, "input": messages})
+    await gateway.create_response_text(
+        "title_filter", **{**params, "input": [{"content": messages[0]["content"], "role": "user"}]}
+    )
+    assert len(calls) == 6
+
+    stats = gateway.cache_stats()["by_call_site"]["title_filter"]
+    assert stats["memory_hits"] == 3
+    print(f"✅ Gateway cache test passed: {stats}")
+
+
+async def main():
+    await test_memory_tier()
+    await test_gateway_cache_hits()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""
+Test Rate Governor
+Verifies the per-vendor token bucket, the AIMD concurrency limit and Retry-After pauses.
+
+Runs offline - calls are simulated with asyncio.sleep.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.rate_governor import RateGovernor, VendorLimiter, parse_retry_after
+
+
+async def test_token_bucket():
+    """Burst goes through immediately, then calls are spaced at the configured rate"""
+    governor = RateGovernor()
+    governor._limiters["test"] = VendorLimiter("test", rate_per_second=20, burst=5, max_concurrency=50)
+
+    async def call():
+        async with governor.slot("test"):
+            return time.monotonic()
+
+    start = time.monotonic()
+    finished = await asyncio.gather(*[call() for _ in range(15)])
+    elapsed = max(finished) - start
+
+    # 5 burst tokens + 10 more at 20/s ≈ 0.5s
+    assert 0.4 <= elapsed < 1.0, f"Expected ~0.5s, took {elapsed:.2f}s"
+    print(f"✅ Token bucket test passed ({elapsed:.2f}s for 15 calls)")
+
+
+async def test_aimd_and_retry_after():
+    """429 halves concurrency and pauses the vendor; successes grow it back"""
+    governor = RateGovernor()
+    limiter = VendorLimiter("test", rate_per_second=1000, burst=1000, max_concurrency=8)
+    governor._limiters["test"] = limiter
+
+    peak = 0
+
+    async def call(status: int, retry_after: str = None):
+        nonlocal peak
+        async with governor.slot("test") as slot:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+            slot.report(status, {"retry-after": retry_after} if retry_after else {})
+
+    await asyncio.gather(*[call(200) for _ in range(40)])
+    assert peak <= 8, f"In-flight exceeded max concurrency: {peak}"
+
+    start = time.monotonic()
+    await call(429, "0.3")
+    assert limiter.concurrency_limit == 4.0
+    await call(200)  # Must wait out the Retry-After pause
+    assert time.monotonic() - start >= 0.3
+
+    for _ in range(20):
+        await call(200)
+    assert limiter.concurrency_limit > 4.0
+
+    stats = governor.stats()["test"]
+    assert stats["throttled"] == 1 and stats["in_flight"] == 0
+    print(f"✅ AIMD / Retry-After test passed: {stats}")
+
+
+async def test_exception_outcomes():
+    """SDK exceptions carrying a 429 status count as throttling"""
+    governor = RateGovernor()
+    limiter = VendorLimiter("test", rate_per_second=1000, burst=1000, max_concurrency=4)
+    governor._limiters["test"] = limiter
+
+    class FakeRateLimitError(Exception):
+        status_code = 429
+
+    try:
+        async with governor.slot("test"):
+            raise FakeRateLimitError()
+    except FakeRateLimitError:
+        pass
+
+    try:
+        async with governor.slot("test"):
+            raise ValueError("not an HTTP error")
+    except ValueError:
+        pass
+
+    assert limiter.stats_counters["throttled"] == 1
+    assert limiter.stats_counters["errors"] == 1
+    assert parse_retry_after("2") == 2.0 and parse_retry_after(None) is None
+    print("✅ Exception outcome test passed")
+
+
+async def main():
+    await test_token_bucket()
+    await test_aimd_and_retry_after()
+    await test_exception_outcomes()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
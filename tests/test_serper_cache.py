@@ -0,0 +1,120 @@
+"""
+Test Serper Query Cache
+Verifies that identical (normalized) queries are served from the cache, failed
+searches are not cached, cached results are safe to tag in place, and
+force_refresh goes back to the API.
+
+Runs offline - Serper responses come from a local aiohttp stand-in and the
+cache uses the memory tier only.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.search import SerperSearchService, normalize_query
+from app.services.response_cache import ResponseCache
+
+TITLES = ["Director of Facilities", "Plant Manager", "Energy Manager"]
+
+
+async def start_stand_in(fail_queries: set):
+    """Serper-shaped responses; queries listed in fail_queries get a 500"""
+    calls = []
+
+    async def search(request: web.Request) -> web.Response:
+        query = (await request.json())["q"]
+        calls.append(query)
+        if query in fail_queries:
+            return web.Response(status=500, text="upstream error")
+        organic = [
+            {"title": f"Person {i} - {query}", "link": f"https://www.linkedin.com/in/p{i}-{len(query)}", "snippet": ""}
+            for i in range(3)
+        ]
+        return web.json_response({"organic": organic})
+
+    app = web.Application()
+    app.router.add_post("/search", search)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/search", calls
+
+
+def make_service(base_url: str) -> SerperSearchService:
+    service = SerperSearchService()
+    service.api_key = "test"
+    service.base_url = base_url
+    service.cache_enabled = True
+    service.cache = ResponseCache(namespace="serper", max_entries=100, default_ttl_seconds=3600, persistent=False)
+    return service
+
+
+async def test_cache_hits_and_force_refresh():
+    """Second run of the same hospital costs no API calls; force_refresh re-buys them"""
+    runner, base_url, calls = await start_stand_in(fail_queries=set())
+    service = make_service(base_url)
+
+    first = await service.search_linkedin_profiles("Mayo Clinic", TITLES, "Rochester", "Minnesota")
+    assert len(calls) == 3 and first["cached_queries"] == 0
+
+    second = await service.search_linkedin_profiles("Mayo Clinic", TITLES, "Rochester", "Minnesota")
+    assert len(calls) == 3 and second["cached_queries"] == 3
+    assert [(r["link"], r["target_title"]) for r in first["results"]] == \
+           [(r["link"], r["target_title"]) for r in second["results"]]
+
+    # Whitespace / case differences share the entry
+    hit = await service._perform_search("  MAYO Clinic   Rochester Minnesota Plant Manager site:linkedin.com/in")
+    assert hit["cached"] and len(calls) == 3
+
+    refreshed = await service.search_linkedin_profiles("Mayo Clinic", TITLES, "Rochester", "Minnesota", force_refresh=True)
+    assert len(calls) == 6 and refreshed["cached_queries"] == 0
+
+    stats = service.cache_stats()["by_call_site"]["serper_search"]
+    assert stats["memory_hits"] == 4 and stats["stores"] == 6
+
+    await service.close()
+    await runner.cleanup()
+    print(f"✅ Cache hit / force_refresh test passed: {stats}")
+
+
+async def test_failures_not_cached():
+    """A failed query is retried on the next run instead of caching the error"""
+    failing = "Mayo Clinic Rochester Minnesota Energy Manager site:linkedin.com/in"
+    fail_queries = {failing}
+    runner, base_url, calls = await start_stand_in(fail_queries)
+    service = make_service(base_url)
+
+    await service.search_linkedin_profiles("Mayo Clinic", TITLES, "Rochester", "Minnesota")
+    fail_queries.clear()
+    rerun = await service.search_linkedin_profiles("Mayo Clinic", TITLES, "Rochester", "Minnesota")
+
+    assert calls.count(failing) == 2
+    assert rerun["cached_queries"] == 2
+    assert any(r["target_title"] == "Energy Manager" for r in rerun["results"])
+
+    await service.close()
+    await runner.cleanup()
+    print("✅ Failed queries not cached test passed")
+
+
+def test_normalize_query():
+    assert normalize_query(" Mayo  Clinic\tCFO ") == "mayo clinic cfo"
+    print("✅ Query normalization test passed")
+
+
+async def main():
+    test_normalize_query()
+    await test_cache_hits_and_force_refresh()
+    await test_failures_not_cached()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Test Serper Query Planner
+Verifies the per-title plan matches the original queries, grouped plans stay within
+Google's 32-word limit while cutting request count, and results are attributed back
+to the title / company variation they match.
+
+Runs offline - no Serper calls.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.serper_query_planner import SerperQueryPlanner, PlannedQuery, MAX_QUERY_WORDS
+
+TITLES = [
+    "Director of Facilities", "Director of Engineering", "Director of Maintenance",
+    "VP Facilities", "VP Operations", "Chief Financial Officer", "Chief Operating Officer",
+    "Facilities Manager", "Energy Manager", "Plant Manager", "Maintenance Manager"
+]
+
+
+def test_per_title_plan():
+    """grouped=False reproduces the existing one-query-per-title strategy"""
+    planner = SerperQueryPlanner()
+    planned = planner.plan(["Mayo Clinic"], "Rochester Minnesota ", TITLES, grouped=False)
+
+    assert [p.query for p in planned] == [
+        f"Mayo Clinic Rochester Minnesota {title} site:linkedin.com/in" for title in TITLES
+    ]
+    assert all(p.num_results == 10 for p in planned)
+    print("✅ Per-title plan test passed")
+
+
+def test_grouped_plan():
+    """Every title is covered once, related titles share a query, and the word limit holds"""
+    planner = SerperQueryPlanner()
+    companies = ["Providence Medford Medical Center", "Providence Medford"]
+    planned = planner.plan(companies, "Medford Oregon ", TITLES)
+
+    covered = [title for p in planned for title in p.titles]
+    assert sorted(covered) == sorted(TITLES)
+    assert all(p.companies == companies for p in planned)
+    assert all(p.word_count <= MAX_QUERY_WORDS for p in planned)
+    assert len(planned) < len(TITLES) * len(companies) / 4
+    assert any({"Director of Facilities", "Facilities Manager"} <= set(p.titles) for p in planned)
+
+    # Long company names force smaller groups instead of overflowing the limit
+    long_names = ["Saint Alphonsus Regional Medical Center Boise Idaho Trinity Health",
+                  "Saint Alphonsus Health System Boise Idaho Regional Medical Center"]
+    for p in planner.plan(long_names, "Boise Idaho ", TITLES):
+        assert p.word_count <= MAX_QUERY_WORDS, p.query
+    print(f"✅ Grouped plan test passed ({len(TITLES) * len(companies)} → {len(planned)} queries)")
+
+
+def test_assign_results():
+    """Results go to the title/company variation their text matches; misses fall back to the first"""
+    planner = SerperQueryPlanner()
+    planned = PlannedQuery(
+        query="",
+        titles=["Director of Facilities", "Facilities Manager", "Chief Financial Officer"],
+        companies=["Mayo Clinic", "Mayo Clinic Health System"]
+    )
+    results = [
+        {"title": "Jane Doe - CFO - Mayo Clinic Health System | LinkedIn", "snippet": ""},
+        {"title": "John Roe - Facilities Manager - Mayo Clinic | LinkedIn", "snippet": ""},
+        {"title": "Ann Poe - Director, Facilities Management - Mayo Clinic | LinkedIn", "snippet": ""},
+        {"title": "Bob Loe - Mayo Clinic | LinkedIn", "snippet": "Rochester, Minnesota"},
+    ]
+    assigned = planner.assign_results(results, planned)
+
+    assert [r["target_title"] for r in assigned] == [
+        "Chief Financial Officer", "Facilities Manager", "Director of Facilities", "Director of Facilities"
+    ]
+    assert [r["search_company_variation"] for r in assigned] == [
+        "Mayo Clinic Health System", "Mayo Clinic", "Mayo Clinic", "Mayo Clinic"
+    ]
+
+    capped = planner.assign_results([dict(r) for r in results[1:]], planned, per_title_limit=1)
+    assert len(capped) == 2
+
+    # Per-title mode: a single-company query tags results with that variation, whatever they mention
+    single = PlannedQuery(query="", titles=["Chief Financial Officer"], companies=["Mayo Clinic Health System"])
+    tagged = planner.assign_results([dict(r) for r in results[:2]], single)
+    assert [r["search_company_variation"] for r in tagged] == ["Mayo Clinic Health System"] * 2
+    print("✅ Result attribution test passed")
+
+
+if __name__ == "__main__":
+    test_per_title_plan()
+    test_grouped_plan()
+    test_assign_results()
@@ -83,6 +83,7 @@ async def main():
 
     step2_result = await service.step2_filter_prospects(
         enriched_prospects=enriched_prospects,
+        run_context=step1_result.get('run_context'),
         company_name=company_name,
         company_city=city,
         company_state=state,
@@ -104,6 +104,7 @@ async def test_stjoseph():
 
     step2_result = await service.step2_filter_prospects(
         enriched_prospects=enriched,
+        run_context=step1_result.get('run_context'),
         company_name=company_name,
         company_city=company_city,
         company_state=company_state
@@ -0,0 +1,171 @@
+"""
+Test Streamed Step 3
+Verifies /discover-prospects-step3/stream and /discover-leads-step3/stream emit each
+ranked prospect as soon as its AI ranking finishes (completion order, failures
+included), then a summary with the top qualified prospects in score order. The
+stream goes through APILoggingMiddleware and CostTrackingMiddleware chunk by chunk:
+the first event arrives before the slowest ranking finishes, and the request is
+logged and its ranking cost stored once the stream ends. NDJSON by default,
+server-sent events with Accept: text/event-stream.
+
+Runs offline - AI ranking calls are stand-ins that sleep, and the API log and
+cost events are captured instead of written to Postgres.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://u:p@127.0.0.1:1/db")
+
+import main as api
+from app.services.cost_tracking import cost_tracker
+from app.services.improved_ai_ranking import ImprovedAIRankingService
+from app.services.llm_gateway import llm_gateway
+from app.services.logging_middleware import APILoggingMiddleware
+
+# Prospect i finishes ranking after DELAYS[i] seconds with SCORES[i] (None = ranking fails)
+DELAYS = [0.6, 0.05, 0.15, 0.1]
+SCORES = [90, 70, 40, None]
+PROSPECTS = [{"linkedin_url": f"https://www.linkedin.com/in/p{i}", "linkedin_data": {"name": f"Person {i}"}}
+             for i in range(len(DELAYS))]
+
+
+async def fake_rank(self, prospect, company_name, index):
+    await asyncio.sleep(DELAYS[index])
+    if SCORES[index] is None:
+        return {"success": False, "index": index, "error": "Missing 'score' field in response"}
+    cost_tracker.record("openai", "ai_ranking", 0.01)
+    return {"success": True, "index": index, "score": SCORES[index], "reasoning": "Director of Facilities"}
+
+
+async def call(path: str, body: dict, accept: str = "application/json"):
+    """Drive the app with raw ASGI messages, timestamping each body chunk as it's sent"""
+    started = time.monotonic()
+    messages = []
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        messages.append((time.monotonic() - started, message))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"accept", accept.encode())],
+        "client": ("127.0.0.1", 50000), "server": ("test", 80),
+    }
+    await api.app(scope, receive, send)
+    start = next(message for _, message in messages if message["type"] == "http.response.start")
+    chunks = [(at, message["body"]) for at, message in messages
+              if message["type"] == "http.response.body" and message.get("body")]
+    return start, chunks, time.monotonic() - started
+
+
+async def test_ndjson_stream():
+    """Ranked prospects arrive in completion order, unbuffered; log + costs land after the stream"""
+    logged, flushed = [], []
+
+    async def capture_log(self, **entry):
+        logged.append((time.monotonic(), entry))
+
+    async def capture_flush(scope):
+        flushed.append((time.monotonic(), scope))
+
+    original_log, original_flush = APILoggingMiddleware._log_to_database, cost_tracker.flush
+    APILoggingMiddleware._log_to_database = capture_log
+    cost_tracker.flush = capture_flush
+    try:
+        started = time.monotonic()
+        start, chunks, total = await call("/discover-prospects-step3/stream", {
+            "enriched_prospects": PROSPECTS, "company_name": "Mayo Clinic", "min_score_threshold": 65, "max_prospects": 5
+        })
+    finally:
+        APILoggingMiddleware._log_to_database = original_log
+        cost_tracker.flush = original_flush
+
+    headers = dict(start["headers"])
+    assert start["status"] == 200 and headers[b"content-type"].startswith(b"application/x-ndjson")
+    events = [json.loads(line) for _, body in chunks for line in body.decode().splitlines()]
+    assert [e["event"] for e in events] == ["ranked", "ranking_failed", "ranked", "ranked", "summary"]
+    assert [e["data"]["index"] for e in events[:4]] == [1, 3, 2, 0]
+    assert [e["data"]["qualified"] for e in events if e["event"] == "ranked"] == [True, False, True]
+
+    # Not buffered: the first prospect reached the client long before the slowest ranking finished
+    assert chunks[0][0] < 0.3 and total >= 0.6, (chunks[0][0], total)
+
+    summary = events[-1]["data"]
+    assert summary["success"] and summary["summary"]["prospects_ranked"] == 3
+    assert [p["linkedin_data"]["name"] for p in summary["qualified_prospects"]] == ["Person 0", "Person 1"]
+    assert [p["ai_ranking"]["rank_position"] for p in summary["qualified_prospects"]] == [1, 2]
+
+    # Logged once with the whole stream; costs stored after the last event, attributed to this request
+    assert len(logged) == 1 and logged[0][0] - started >= total - 0.05
+    assert logged[0][1]["status_code"] == 200 and '"summary"' in logged[0][1]["response_body"]
+    assert len(flushed) == 1 and flushed[0][0] - started >= total - 0.05
+    scope = flushed[0][1]
+    assert scope.endpoint == "/discover-prospects-step3/stream" and scope.company_name == "Mayo Clinic"
+    assert abs(scope.summary()["total_cost_usd"] - 0.03) < 1e-9 and scope.summary()["qualified_leads"] == 2
+    print(f"✅ NDJSON stream test passed (first event at {chunks[0][0]:.2f}s, stream done at {total:.2f}s)")
+
+
+async def test_sse_stream_and_validation():
+    """Accept: text/event-stream gets SSE frames; invalid requests fail before streaming"""
+    async def no_log(self, **entry):
+        return None
+
+    async def no_flush(scope):
+        return None
+
+    original_log, original_flush = APILoggingMiddleware._log_to_database, cost_tracker.flush
+    APILoggingMiddleware._log_to_database = no_log
+    cost_tracker.flush = no_flush
+    try:
+        start, chunks, _ = await call("/discover-leads-step3/stream",
+                                      {"enriched_prospects": PROSPECTS, "company_name": "Mayo Clinic"},
+                                      accept="text/event-stream")
+        invalid, _, _ = await call("/discover-leads-step3/stream", {"enriched_prospects": PROSPECTS})
+    finally:
+        APILoggingMiddleware._log_to_database = original_log
+        cost_tracker.flush = original_flush
+
+    assert dict(start["headers"])[b"content-type"].startswith(b"text/event-stream")
+    frames = b"".join(body for _, body in chunks).decode().split("\n\n")[:-1]
+    assert frames[0].startswith("event: ranked\ndata: ")
+    assert frames[-1].startswith("event: summary\ndata: ")
+    summary = json.loads(frames[-1].split("data: ", 1)[1])
+    assert summary["step"] == "rank_and_qualify_complete" and len(summary["qualified_prospects"]) == 2
+    assert invalid["status"] == 400
+    print("✅ SSE stream / validation test passed")
+
+
+async def main():
+    original_rank, original_client = ImprovedAIRankingService._rank_single_prospect, llm_gateway.client
+    original_key = os.environ.get("OPENAI_API_KEY")
+    ImprovedAIRankingService._rank_single_prospect = fake_rank
+    llm_gateway.client = original_client or object()
+    os.environ["OPENAI_API_KEY"] = original_key or "test-key"
+    try:
+        await test_ndjson_stream()
+        await test_sse_stream_and_validation()
+    finally:
+        ImprovedAIRankingService._rank_single_prospect = original_rank
+        llm_gateway.client = original_client
+        if original_key is None:
+            os.environ.pop("OPENAI_API_KEY", None)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Test Title Pre-Classifier
+Verifies obvious buyer titles are accepted, obvious clinical titles are rejected,
+and ambiguous titles are left for the LLM title filter.
+
+Runs offline - the LLM scorer is replaced with a local counter.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.title_classifier import title_classifier, extract_role, ACCEPT, REJECT, UNCERTAIN
+from app.services.title_filter import TitleFilterService
+
+COMPANY_NAME = "Providence Medford Medical Center"
+
+
+def _serper_title(role: str) -> str:
+    return f"Jane Doe - {role} - {COMPANY_NAME} | LinkedIn"
+
+
+def test_extract_role():
+    """Role is the middle segment, with company and 'at X' removed"""
+    assert extract_role(_serper_title("Director of Facilities"), COMPANY_NAME) == "Director of Facilities"
+    assert extract_role("Jane Doe - Plant Manager at Providence - Providence | LinkedIn") == "Plant Manager"
+    assert extract_role("Jane Doe - Providence | LinkedIn") == ""
+    print("✅ Role extraction test passed")
+
+
+def test_classify():
+    """Accept, reject and uncertain decisions on typical Serper titles"""
+    expected = {
+        "Director of Facilities": ACCEPT,
+        "VP of Operations": ACCEPT,
+        "Chief Financial Officer": ACCEPT,
+        "Energy Manager": ACCEPT,
+        "Registered Nurse": REJECT,
+        "Physical Therapist": REJECT,
+        "Radiology Technologist": REJECT,
+        "Facilities Intern": REJECT,             # Entry-level beats the persona match
+        "Director of Facilities and Patient Services": UNCERTAIN,  # Persona and clinical match
+        "IT Project Manager": UNCERTAIN,
+    }
+    for role, decision in expected.items():
+        result = title_classifier.classify(_serper_title(role), COMPANY_NAME)
+        assert result.decision == decision, f"{role}: expected {decision}, got {result.decision} ({result.reason})"
+
+    # "Medical Center" in the company name must not trigger a clinical rejection
+    result = title_classifier.classify(_serper_title("Facilities Manager"), COMPANY_NAME)
+    assert result.decision == ACCEPT
+    print("✅ Classification test passed")
+
+
+async def test_only_uncertain_titles_reach_llm():
+    """score_prospects sends only uncertain titles to the LLM and keeps input order"""
+    service = TitleFilterService()
+    sent = []
+
+    async def fake_score_with_llm(prospects, company_name, mode=None, batch_size=None):
+        sent.extend(p["title"] for p in prospects)
+        return [
+            {"success": True, "index": i, "score": 60, "reasoning": "LLM", "source": "llm_batch"}
+            for i in range(len(prospects))
+        ]
+
+    service._score_with_llm = fake_score_with_llm
+    service.client = object()
+
+    prospects = [{"title": _serper_title(role), "snippet": ""} for role in (
+        "Director of Facilities", "IT Project Manager", "Registered Nurse", "Controller"
+    )]
+    results = await service.score_prospects(prospects, COMPANY_NAME, preclassify=True)
+
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert [r["source"] for r in results] == ["local", "llm_batch", "local", "llm_batch"]
+    assert len(sent) == 2
+
+    for prospect, result in zip(prospects, results):
+        prospect["ai_title_filter"] = {"score": result["score"], "source": result["source"]}
+    summary = TitleFilterService.summarize_sources(prospects)
+    assert summary["resolved_locally"] == 2 and summary["local_share"] == 0.5
+    print(f"✅ Pre-classifier short-circuit test passed: {summary}")
+
+
+async def test_preclassifier_runs_without_client():
+    """No OpenAI client: obvious titles are still decided locally, only the rest pass through unscored"""
+    service = TitleFilterService()
+    service.client = None
+
+    prospects = [{"title": _serper_title(role), "snippet": ""} for role in (
+        "Director of Facilities", "IT Project Manager", "Registered Nurse", "Controller"
+    )]
+    results = await service.score_prospects(prospects, COMPANY_NAME, preclassify=True)
+
+    assert [r["source"] for r in results] == ["local", "unscored", "local", "unscored"]
+    assert results[2]["success"] and results[2]["score"] < 55
+    assert not results[1]["success"] and results[1]["index"] == 1
+
+    for prospect, result in zip(prospects, results):
+        prospect["ai_title_filter"] = {"score": result.get("score"), "source": result["source"]}
+    summary = TitleFilterService.summarize_sources(prospects)
+    assert summary["resolved_locally"] == 2 and summary["unscored"] == 2 and summary["sent_to_llm"] == 0
+    print(f"✅ No-client pre-classifier test passed: {summary}")
+
+
+async def main():
+    test_extract_role()
+    test_classify()
+    await test_only_uncertain_titles_reach_llm()
+    await test_preclassifier_runs_without_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
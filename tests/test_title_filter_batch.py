@@ -0,0 +1,110 @@
+"""
+Test Batched Title Scoring
+Verifies batch output is mapped back from batch-local indices to prospect indices,
+and that only items with out-of-range, duplicate, non-numeric or missing indices
+(or a failed batch request) fall back to per-item score_single calls.
+
+Runs offline - the LLM gateway and score_single are replaced with local stubs.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.llm_gateway import llm_gateway
+from app.services.title_filter import TitleFilterService
+
+COMPANY_NAME = "Mayo Clinic"
+PROSPECTS = [{"title": f"Title {letter}", "snippet": ""} for letter in "ABCDE"]
+
+
+def _entry(index, score):
+    return {"index": index, "score": score, "reasoning": f"entry {index}"}
+
+
+def make_service():
+    """Service with a client and a recording score_single (batches are answered from RESPONSES)"""
+    service = TitleFilterService()
+    service.client = object()
+    fallback = []
+
+    async def fake_score_single(prospect, company_name, index):
+        fallback.append(index)
+        return {"success": True, "index": index, "score": 50, "reasoning": "single", "source": "llm_single"}
+
+    service.score_single = fake_score_single
+    return service, fallback
+
+
+# Batch output keyed by the first title in the batch (an exception makes the request fail)
+RESPONSES = {}
+
+
+async def fake_create_response_text(call_site, **api_params):
+    assert call_site == "title_filter_batch"
+    for first_title, response in RESPONSES.items():
+        if f"Job Title: {first_title}" in api_params["input"]:
+            if isinstance(response, Exception):
+                raise response
+            return json.dumps({"results": response})
+    raise AssertionError("Unexpected batch")
+
+
+async def test_invalid_indices_fall_back():
+    """Out-of-range, duplicate and non-numeric indices fall back; valid ones map to prospect indices"""
+    RESPONSES.clear()
+    RESPONSES.update({
+        # Batch 1 = prospects 0-2
+        "Title A": [
+            _entry(0, 90),
+            _entry(1, 80), _entry(1, 20),       # duplicate -> prospect 1 falls back
+            _entry("two", 70),                  # non-numeric -> prospect 2 falls back
+        ],
+        # Batch 2 = prospects 3-4 (local indices 0-1)
+        "Title D": [
+            _entry(0, 65),                      # -> prospect 3
+            _entry(5, 40),                      # out of range -> prospect 4 falls back
+        ],
+    })
+    service, fallback = make_service()
+    results = await service.score_prospects(PROSPECTS, COMPANY_NAME, mode="batch", batch_size=3, preclassify=False)
+
+    assert sorted(fallback) == [1, 2, 4], fallback
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+    assert [r["source"] for r in results] == ["llm_batch", "llm_single", "llm_single", "llm_batch", "llm_single"]
+    assert results[0]["score"] == 90 and results[3]["score"] == 65
+    assert results[3]["reasoning"] == "entry 0"
+    print("✅ Invalid index fallback test passed")
+
+
+async def test_failed_batch_falls_back():
+    """A batch request that fails falls back item by item; the other batch is unaffected"""
+    RESPONSES.clear()
+    RESPONSES.update({
+        "Title A": [_entry(0, 90), _entry(1, 10), _entry(2, 70)],
+        "Title D": ValueError("Empty output text"),
+    })
+    service, fallback = make_service()
+    results = await service.score_prospects(PROSPECTS, COMPANY_NAME, mode="batch", batch_size=3, preclassify=False)
+
+    assert sorted(fallback) == [3, 4], fallback
+    assert [r["score"] for r in results] == [90, 10, 70, 50, 50]
+    print("✅ Failed batch fallback test passed")
+
+
+async def main():
+    original = llm_gateway.create_response_text
+    llm_gateway.create_response_text = fake_create_response_text
+    try:
+        await test_invalid_indices_fall_back()
+        await test_failed_batch_falls_back()
+    finally:
+        llm_gateway.create_response_text = original
+
+
+if __name__ == "__main__":
+    asyncio.run(main())